@@ -1,20 +1,38 @@
+import os
 from flask import Flask
-from database import Database 
-import logging
-from routes import api  
-
-logging.basicConfig(level=logging.INFO)
-db = Database()
+from database import Database
+from json_provider import install_json_provider
+from logging_config import configure_logging
+from metrics import install_request_metrics
+from routes import api, metrics_api
+from repositories import BookingRepository, VehicleRepository
+from startup import (configure_availability, load_availability_backend, load_reference_data,
+                     start_outbox_workers)
 
 def create_app():
+    configure_logging()
     app = Flask(__name__)
-    app.config['DATABASE'] = db
+    app.config['DATABASE'] = Database()
+    install_json_provider(app)
+    load_reference_data()
+
+    if configure_availability(app.config) in ('index', 'bitmap'):
+        load_availability_backend(app.config, VehicleRepository().get_fleet,
+                                  BookingRepository().get_active_intervals())
+
+    start_outbox_workers(app.config)
+
+    # Each request starts reading from the replica until it writes through the primary
+    app.before_request(Database.reset_routing)
+    install_request_metrics(app)
 
     for blueprint in api:
         app.register_blueprint(blueprint, url_prefix='/api')
+    app.register_blueprint(metrics_api)
 
     return app
 
 if __name__ == "__main__":
+    # Development server only; production runs wsgi:app under gunicorn (gunicorn.conf.py)
     app = create_app()
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=os.getenv('FLASK_DEBUG', 'false').lower() == 'true')
@@ -0,0 +1,37 @@
+import argparse
+import os
+from datetime import datetime, timedelta
+from repositories import ArchiveRepository
+
+def archive_bookings():
+    parser = argparse.ArgumentParser(
+        description="Move finished bookings and old email logs into the archive tables and "
+                    "maintain the monthly partitions of Bookings and EmailLogs")
+    parser.add_argument('--horizon-days', type=int, default=int(os.getenv('ARCHIVE_HORIZON_DAYS', 90)),
+                        help='archive rows older than this many days')
+    parser.add_argument('--batch-size', type=int, default=int(os.getenv('ARCHIVE_BATCH_SIZE', 1000)))
+    parser.add_argument('--pause', type=float, default=float(os.getenv('ARCHIVE_BATCH_PAUSE', 0)),
+                        help='seconds to sleep between batches')
+    parser.add_argument('--months-ahead', type=int,
+                        default=int(os.getenv('BOOKING_PARTITION_MONTHS_AHEAD', 3)),
+                        help='monthly partitions to keep ready beyond the current month')
+    parser.add_argument('--history-months', type=int,
+                        default=int(os.getenv('BOOKING_PARTITION_HISTORY_MONTHS', 24)),
+                        help='months of history a table without monthly partitions is split into')
+    parser.add_argument('--partitions-only', action='store_true', help='only add and drop partitions')
+    args = parser.parse_args()
+
+    repo = ArchiveRepository()
+    added = repo.ensure_partitions(args.months_ahead, args.history_months)
+    before = datetime.now() - timedelta(days=args.horizon_days)
+    if not args.partitions_only:
+        bookings = repo.archive_bookings(before, args.batch_size, args.pause)
+        email_logs = repo.archive_email_logs(before, args.batch_size, args.pause)
+        print(f"Archived {bookings} bookings and {email_logs} email logs older than {before:%Y-%m-%d}.")
+    dropped = repo.drop_empty_partitions(before)
+    for table in added:
+        print(f"{table}: added {', '.join(added[table]) or 'no'} partitions, "
+              f"dropped {', '.join(dropped[table]) or 'no'} partitions.")
+
+if __name__ == "__main__":
+    archive_bookings()
@@ -0,0 +1,7 @@
+from .repositories import AsyncBookingRepository, AsyncUserRepository, AsyncVehicleRepository
+from .services import AsyncBookingService, AsyncVehicleService
+
+# The app factory and pool live in async_api.app and async_api.database; they need the
+# ASGI dependencies (quart, aiomysql), which the repositories and services do not
+__all__ = ['AsyncBookingRepository', 'AsyncUserRepository', 'AsyncVehicleRepository',
+           'AsyncBookingService', 'AsyncVehicleService']
@@ -0,0 +1,42 @@
+import asyncio
+from quart import Quart
+from json_provider import install_json_provider
+from logging_config import configure_logging
+from startup import (configure_availability, load_availability_backend, load_reference_data,
+                     start_outbox_workers)
+from .database import AsyncDatabase
+from .repositories import AsyncBookingRepository, AsyncVehicleRepository
+from .routes import async_api
+
+'''
+ASGI variant of app.create_app serving the availability, booking and user lookup
+endpoints from one event loop:
+
+    hypercorn asgi:app --bind 0.0.0.0:8000
+'''
+
+def create_async_app():
+    configure_logging()
+    app = Quart(__name__)
+    install_json_provider(app)
+    engine = configure_availability(app.config)
+
+    @app.before_serving
+    async def open_database():
+        db = await AsyncDatabase.connect()
+        app.config['ASYNC_DATABASE'] = db
+        # Read through the sync pool off the event loop; later refreshes run on the
+        # reference data's own thread
+        await asyncio.to_thread(load_reference_data)
+        if engine in ('index', 'bitmap'):
+            fleet = await AsyncVehicleRepository(db).get_fleet() if engine == 'bitmap' else []
+            load_availability_backend(app.config, lambda: fleet,
+                                      await AsyncBookingRepository(db).get_active_intervals())
+
+    @app.after_serving
+    async def close_database():
+        await app.config['ASYNC_DATABASE'].close()
+
+    start_outbox_workers(app.config)
+    app.register_blueprint(async_api, url_prefix='/api')
+    return app
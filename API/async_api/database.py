@@ -0,0 +1,64 @@
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Dict
+import aiomysql
+
+
+class AsyncDatabase:
+    '''
+    aiomysql counterpart of database.Database for the ASGI app. The pool is created inside
+    the running event loop (see async_api.app), so unlike Database it is not a singleton
+    and repositories receive it explicitly.
+    '''
+
+    def __init__(self, pool: aiomysql.Pool):
+        self._pool = pool
+
+    @classmethod
+    async def connect(cls) -> 'AsyncDatabase':
+        try:
+            pool = await aiomysql.create_pool(
+                minsize=int(os.getenv('ASYNC_DB_POOL_MIN_SIZE', 5)),
+                maxsize=int(os.getenv('ASYNC_DB_POOL_MAX_SIZE', 50)),
+                pool_recycle=float(os.getenv('DB_POOL_IDLE_TIMEOUT', 300)),
+                autocommit=False,
+                host=os.getenv('DB_HOST', 'localhost'),
+                user=os.getenv('DB_USER'),
+                password=os.getenv('DB_PASSWORD'),
+                db=os.getenv('DB_NAME')
+            )
+        except aiomysql.Error as e:
+            logging.error("Error creating async connection pool: %s", e)
+            raise
+        logging.info("Async connection pool initialized successfully.")
+        return cls(pool)
+
+    @asynccontextmanager
+    async def get_cursor(self, dictionary=True, commit=True):
+        async with self._pool.acquire() as conn:
+            cursor = await conn.cursor(aiomysql.DictCursor if dictionary else aiomysql.Cursor)
+            try:
+                yield cursor
+                if commit:
+                    await conn.commit()
+            except Exception as e:
+                await conn.rollback()
+                if isinstance(e, aiomysql.Error):
+                    logging.error("Database error: %s", e)
+                raise
+            finally:
+                await cursor.close()
+
+    async def close(self) -> None:
+        self._pool.close()
+        await self._pool.wait_closed()
+
+    def pool_stats(self) -> Dict:
+        return {
+            'size': self._pool.size,
+            'idle': self._pool.freesize,
+            'in_use': self._pool.size - self._pool.freesize,
+            'min_size': self._pool.minsize,
+            'max_size': self._pool.maxsize,
+        }
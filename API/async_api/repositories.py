@@ -0,0 +1,106 @@
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import availability
+from models import Booking, BookingCommitStatus, User
+from repositories.booking_repository import BookingRejected, BookingRepository
+from repositories.vehicle_repository import VehicleRepository
+from row_mapper import object_mapper
+
+'''
+Async versions of the repositories behind the hot endpoints. SQL text and row mapping
+are borrowed from the sync repositories so both stacks return identical results; db is
+an async_api.database.AsyncDatabase (or anything with the same get_cursor).
+'''
+
+class AsyncVehicleRepository:
+    def __init__(self, db):
+        self.db = db
+        self.logger = logging.getLogger(__name__)
+
+    async def get_available_vehicles(self, start_date: datetime, end_date: datetime,
+                                     category_id: Optional[int] = None,
+                                     vehicle_id: Optional[int] = None) -> List[dict]:
+        query, params = VehicleRepository.build_availability_query(
+            start_date, end_date, category_id, vehicle_id)
+        async with self.db.get_cursor(dictionary=False) as cursor:
+            await cursor.execute(query, params)
+            rows = await cursor.fetchall()
+        return list(map(VehicleRepository.availability_mapper(), rows))
+
+    async def get_fleet(self, category_id: Optional[int] = None,
+                        vehicle_id: Optional[int] = None) -> List[dict]:
+        query, params = VehicleRepository.build_fleet_query(category_id, vehicle_id)
+        async with self.db.get_cursor(dictionary=False) as cursor:
+            await cursor.execute(query, params)
+            rows = await cursor.fetchall()
+        return list(map(VehicleRepository.availability_mapper(), rows))
+
+
+class AsyncBookingRepository:
+    def __init__(self, db):
+        self.db = db
+        self.logger = logging.getLogger(__name__)
+
+    async def create(self, booking: Booking) -> int:
+        self.logger.info("Creating new booking: %s", booking)
+        async with self.db.get_cursor() as cursor:
+            await cursor.execute(BookingRepository.VEHICLE_LOCK_SQL, (booking.vehicle_id,))
+            if not await cursor.fetchone():
+                raise BookingRejected(BookingCommitStatus.VEHICLE_NOT_FOUND,
+                                      f"Vehicle with ID {booking.vehicle_id} does not exist")
+
+            await cursor.execute(BookingRepository.USER_CHECK_SQL, (booking.user_id,))
+            if not await cursor.fetchone():
+                raise BookingRejected(BookingCommitStatus.USER_NOT_FOUND,
+                                      f"User with ID {booking.user_id} does not exist")
+
+            await cursor.execute(BookingRepository.OVERLAP_CHECK_SQL,
+                                 BookingRepository.overlap_check_params(booking))
+            if await cursor.fetchone() is not None:
+                self.logger.error("Vehicle not available for selected dates")
+                raise BookingRejected(BookingCommitStatus.VEHICLE_UNAVAILABLE,
+                                      "Vehicle not available for selected dates")
+
+            await cursor.execute("""
+                INSERT INTO Bookings (user_id, vehicle_id, pickup_date,
+                                    return_date, total_cost)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (booking.user_id, booking.vehicle_id, booking.pickup_date,
+                  booking.return_date, booking.total_cost))
+            booking_id = cursor.lastrowid
+
+            await cursor.execute(BookingRepository.OUTBOX_SQL, BookingRepository.outbox_row(
+                booking_id, 'created', booking.total_cost, counted=booking))
+
+        # get_cursor has committed by the time the block exits
+        availability.record_booking(booking_id, booking.vehicle_id,
+                                    booking.pickup_date, booking.return_date)
+        return booking_id
+
+    async def get_active_intervals(self) -> List[Tuple[int, int, datetime, datetime]]:
+        async with self.db.get_cursor(dictionary=False) as cursor:
+            await cursor.execute("""
+                SELECT booking_id, vehicle_id, pickup_date, return_date
+                FROM Bookings
+                WHERE status IN ('pending', 'active')
+                AND is_deleted = FALSE
+            """)
+            return list(await cursor.fetchall())
+
+
+class AsyncUserRepository:
+    def __init__(self, db):
+        self.db = db
+        self.logger = logging.getLogger(__name__)
+
+    USER_FIELDS = ('user_id', 'email', 'first_name', 'last_name', 'password_hash', 'created_at')
+
+    async def get_by_id(self, user_id: int) -> Optional[User]:
+        async with self.db.get_cursor(dictionary=False) as cursor:
+            await cursor.execute(
+                f"SELECT {', '.join(self.USER_FIELDS)} FROM Users WHERE user_id = %s AND is_deleted = FALSE",
+                (user_id,)
+            )
+            data = await cursor.fetchone()
+        return object_mapper(User, self.USER_FIELDS)(data) if data else None
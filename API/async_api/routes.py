@@ -0,0 +1,112 @@
+from datetime import datetime
+from quart import Blueprint, current_app, jsonify, request
+from aiomysql import Error as MySQLError
+from models import BookingCommitStatus
+from repositories.booking_repository import BookingRejected
+from .repositories import AsyncBookingRepository, AsyncUserRepository, AsyncVehicleRepository
+from .services import AsyncBookingService, AsyncVehicleService
+
+async_api = Blueprint('async_api', __name__)
+
+'''
+Async handlers for the hot endpoints; request and response shapes match routes/.
+'''
+
+@async_api.route('/vehicles/availability', methods=['GET'])
+async def check_availability():
+    required_fields = ['start_date', 'end_date']
+    missing_fields = [field for field in required_fields if not request.args.get(field)]
+    if missing_fields:
+        return jsonify({
+            'status': 'error',
+            'message': 'Missing required fields',
+            'details': f"Missing: {', '.join(missing_fields)}"
+        }), 400
+
+    try:
+        start_date = datetime.strptime(request.args.get('start_date'), '%Y-%m-%d')
+        end_date = datetime.strptime(request.args.get('end_date'), '%Y-%m-%d')
+    except ValueError:
+        return jsonify({
+            'status': 'error',
+            'message': 'Invalid date format',
+            'details': 'Dates must be in YYYY-MM-DD format'
+        }), 400
+
+    try:
+        category_id = int(request.args.get('category_id')) if request.args.get('category_id') else None
+        vehicle_id = int(request.args.get('vehicle_id')) if request.args.get('vehicle_id') else None
+
+        vehicle_service = AsyncVehicleService(
+            AsyncVehicleRepository(current_app.config['ASYNC_DATABASE']),
+            current_app.config.get('AVAILABILITY_BACKEND'),
+            current_app.config.get('AVAILABILITY_CACHE')
+        )
+        vehicles = await vehicle_service.check_availability(start_date, end_date, category_id, vehicle_id)
+        return jsonify({
+            'status': 'success',
+            'data': vehicles
+        })
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': 'Internal server error',
+            'details': str(e)
+        }), 500
+
+@async_api.route('/bookings', methods=['POST'])
+async def create_booking():
+    try:
+        booking_service = AsyncBookingService(AsyncBookingRepository(current_app.config['ASYNC_DATABASE']))
+        booking_id = await booking_service.create_booking(await request.get_json())
+        return jsonify({'booking_id': booking_id}), 201
+    except BookingRejected as e:
+        return jsonify({
+            'error': str(e),
+            'code': e.status.name
+        }), 409 if e.status is BookingCommitStatus.VEHICLE_UNAVAILABLE else 400
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except MySQLError as e:
+        current_app.logger.error("Database error: %s", e, exc_info=True)
+        return jsonify({
+            'error': 'Database Error',
+            'details': "An error occurred while processing your request."
+        }), 500
+    except Exception as e:
+        current_app.logger.error("Error occurred while creating booking: %s", e, exc_info=True)
+        return jsonify({
+            'error': 'An unexpected error occurred while processing your booking request.',
+            'details': str(e)
+        }), 500
+
+@async_api.route('/users/<int:user_id>', methods=['GET'])
+async def get_user(user_id):
+    try:
+        user = await AsyncUserRepository(current_app.config['ASYNC_DATABASE']).get_by_id(user_id)
+        if not user:
+            return jsonify({
+                'status': 'error',
+                'message': 'User not found'
+            }), 404
+        return jsonify({
+            'status': 'success',
+            'data': user
+        })
+    except Exception:
+        return jsonify({
+            'status': 'error',
+            'message': 'Internal server error'
+        }), 500
+
+@async_api.route('/admin/pool', methods=['GET'])
+async def get_pool_stats():
+    return jsonify({
+        'status': 'success',
+        'data': current_app.config['ASYNC_DATABASE'].pool_stats()
+    })
@@ -0,0 +1,56 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+from availability import AvailabilityCache, AvailabilityIndex, FleetCalendar
+from models import Booking
+from .repositories import AsyncBookingRepository, AsyncVehicleRepository
+
+class AsyncVehicleService:
+    def __init__(self, vehicle_repo: AsyncVehicleRepository,
+                 availability_backend: Optional[Union[AvailabilityIndex, FleetCalendar]] = None,
+                 cache: Optional[AvailabilityCache] = None):
+        self.vehicle_repo = vehicle_repo
+        self.availability_backend = availability_backend
+        self.cache = cache
+
+    async def check_availability(self, start_date: datetime, end_date: datetime,
+                                 category_id: Optional[int] = None,
+                                 vehicle_id: Optional[int] = None) -> List[Dict]:
+        if self.cache is None or not self.cache.enabled:
+            return await self._lookup_availability(start_date, end_date, category_id, vehicle_id)
+
+        key = self.cache.key(start_date, end_date, category_id, vehicle_id)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        version = self.cache.version
+        available = await self._lookup_availability(start_date, end_date, category_id, vehicle_id)
+        self.cache.put(key, available, version)
+        return available
+
+    async def _lookup_availability(self, start_date: datetime, end_date: datetime,
+                                   category_id: Optional[int] = None,
+                                   vehicle_id: Optional[int] = None) -> List[Dict]:
+        if self.availability_backend is None or not self.availability_backend.loaded:
+            return await self.vehicle_repo.get_available_vehicles(start_date, end_date, category_id, vehicle_id)
+
+        fleet = await self.vehicle_repo.get_fleet(category_id, vehicle_id)
+        free_ids = self.availability_backend.filter_available(
+            [vehicle['vehicle_id'] for vehicle in fleet], start_date, end_date)
+        if free_ids is None:
+            return await self.vehicle_repo.get_available_vehicles(start_date, end_date, category_id, vehicle_id)
+        free_ids = set(free_ids)
+        return [vehicle for vehicle in fleet if vehicle['vehicle_id'] in free_ids]
+
+class AsyncBookingService:
+    def __init__(self, booking_repo: AsyncBookingRepository):
+        self.booking_repo = booking_repo
+
+    async def create_booking(self, booking_data: dict) -> int:
+        booking = Booking(**booking_data)
+
+        errors = booking.validate_dates()
+
+        if errors:
+            raise ValueError(", ".join(errors))
+
+        return await self.booking_repo.create(booking)
@@ -0,0 +1,35 @@
+import os
+from datetime import datetime
+from typing import Optional
+from .interval_index import AvailabilityIndex, VehicleIntervals
+from .calendar_bitmap import FleetCalendar
+from .result_cache import AvailabilityCache
+
+# Shared by every repository in the process; only consulted once loaded
+availability_index = AvailabilityIndex()
+fleet_calendar = FleetCalendar(slot_minutes=int(os.getenv('AVAILABILITY_SLOT_MINUTES', 60)))
+result_cache = AvailabilityCache(max_entries=int(os.getenv('AVAILABILITY_CACHE_SIZE', 1024)),
+                                 ttl_seconds=float(os.getenv('AVAILABILITY_CACHE_TTL', 5)))
+
+def record_booking(booking_id: int, vehicle_id: int, start: datetime, end: datetime) -> None:
+    for backend in (availability_index, fleet_calendar):
+        if backend.loaded:
+            backend.add(booking_id, vehicle_id, start, end)
+    result_cache.invalidate(vehicle_id, start, end)
+
+# The window is only needed to evict cached results precisely; without it every cached
+# result for the vehicle (or for the fleet, when vehicle_id is unknown) is dropped
+def release_booking(booking_id: int, vehicle_id: Optional[int] = None,
+                    start: Optional[datetime] = None, end: Optional[datetime] = None) -> None:
+    for backend in (availability_index, fleet_calendar):
+        if backend.loaded:
+            backend.remove(booking_id)
+    result_cache.invalidate(vehicle_id, start, end)
+
+def invalidate_window(vehicle_id: Optional[int], start: Optional[datetime] = None,
+                      end: Optional[datetime] = None) -> None:
+    result_cache.invalidate(vehicle_id, start, end)
+
+__all__ = ['AvailabilityIndex', 'VehicleIntervals', 'FleetCalendar', 'AvailabilityCache',
+           'availability_index', 'fleet_calendar', 'result_cache', 'record_booking',
+           'release_booking', 'invalidate_window']
@@ -0,0 +1,169 @@
+from datetime import datetime, timedelta
+from threading import RLock
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+import numpy as np
+
+# Booking.validate_dates allows pickups up to 7 days ahead and rentals up to 7 days long
+# (both measured in whole days), so nothing bookable ends more than 16 days from now.
+DEFAULT_HORIZON_DAYS = 16
+
+
+class FleetCalendar:
+    '''
+    Fleet x slot occupancy counts over a rolling horizon. Each booking adds one to every
+    slot it touches, so "free for [start, end]" is a single slice and reduce over the
+    vehicle rows. Queries outside the horizon return None and the caller falls back to SQL.
+
+    The horizon starts at midnight today, because the availability route reads a start
+    date without a time as midnight; it covers horizon_days from now, plus the part of
+    today already gone.
+    '''
+
+    def __init__(self, slot_minutes: int = 60, horizon_days: int = DEFAULT_HORIZON_DAYS):
+        self.logger = logging.getLogger(__name__)
+        self.slot = timedelta(minutes=slot_minutes)
+        self.n_slots = int(timedelta(days=horizon_days + 1) / self.slot)
+        self._lock = RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._origin: Optional[datetime] = None
+        self._counts = np.zeros((0, self.n_slots), dtype=np.uint16)
+        self._vehicle_ids = np.zeros(0, dtype=np.int64)
+        self._categories = np.zeros(0, dtype=np.int64)
+        self._rows: Dict[int, int] = {}
+        self._bookings: Dict[int, Tuple[int, datetime, datetime]] = {}
+        self.loaded = False
+
+    def load(self, vehicles: Iterable[Tuple[int, int]],
+             bookings: Iterable[Tuple[int, int, datetime, datetime]],
+             now: Optional[datetime] = None) -> None:
+        with self._lock:
+            vehicles = list(vehicles)
+            self._origin = self._day_start(now or datetime.now())
+            self._vehicle_ids = np.array([vehicle_id for vehicle_id, _ in vehicles], dtype=np.int64)
+            self._categories = np.array([category_id for _, category_id in vehicles], dtype=np.int64)
+            self._rows = {vehicle_id: row for row, (vehicle_id, _) in enumerate(vehicles)}
+            self._counts = np.zeros((len(vehicles), self.n_slots), dtype=np.uint16)
+            self._bookings = {}
+            for booking_id, vehicle_id, start, end in bookings:
+                self._add_locked(booking_id, vehicle_id, start, end)
+            self.loaded = True
+        self.logger.info("Fleet calendar loaded %d vehicles x %d slots, %d bookings",
+                         len(self._rows), self.n_slots, len(self._bookings))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+
+    def add(self, booking_id: int, vehicle_id: int, start: datetime, end: datetime,
+            now: Optional[datetime] = None) -> None:
+        with self._lock:
+            self._advance_locked(now or datetime.now())
+            self._remove_locked(booking_id)
+            self._add_locked(booking_id, vehicle_id, start, end)
+
+    def remove(self, booking_id: int,
+               now: Optional[datetime] = None) -> Optional[Tuple[int, datetime, datetime]]:
+        with self._lock:
+            self._advance_locked(now or datetime.now())
+            return self._remove_locked(booking_id)
+
+    def advance(self, now: Optional[datetime] = None) -> None:
+        with self._lock:
+            self._advance_locked(now or datetime.now())
+
+    def free_vehicles(self, start: datetime, end: datetime, category_id: Optional[int] = None,
+                      now: Optional[datetime] = None) -> Optional[List[int]]:
+        with self._lock:
+            self._advance_locked(now or datetime.now())
+            window = self._window(start, end)
+            if window is None:
+                return None
+            mask = ~self._counts[:, window[0]:window[1]].any(axis=1)
+            if category_id is not None:
+                mask &= self._categories == category_id
+            return self._vehicle_ids[mask].tolist()
+
+    def filter_available(self, vehicle_ids: Iterable[int], start: datetime, end: datetime,
+                         now: Optional[datetime] = None) -> Optional[List[int]]:
+        with self._lock:
+            self._advance_locked(now or datetime.now())
+            window = self._window(start, end)
+            if window is None:
+                return None
+            vehicle_ids = list(vehicle_ids)
+            rows = np.array([self._rows.get(vehicle_id, -1) for vehicle_id in vehicle_ids], dtype=np.int64)
+            busy = np.zeros(len(vehicle_ids), dtype=bool)
+            known = rows >= 0
+            busy[known] = self._counts[rows[known], window[0]:window[1]].any(axis=1)
+            return [vehicle_id for vehicle_id, taken in zip(vehicle_ids, busy) if not taken]
+
+    def is_available(self, vehicle_id: int, start: datetime, end: datetime) -> Optional[bool]:
+        result = self.filter_available([vehicle_id], start, end)
+        return None if result is None else bool(result)
+
+    @staticmethod
+    def _day_start(moment: datetime) -> datetime:
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def _slot_of(self, moment: datetime) -> int:
+        return (moment - self._origin) // self.slot
+
+    def _window(self, start: datetime, end: datetime) -> Optional[Tuple[int, int]]:
+        first, last = self._slot_of(start), self._slot_of(end)
+        if first < 0 or last >= self.n_slots:
+            return None
+        return first, last + 1
+
+    def _mark(self, row: int, start: datetime, end: datetime, delta: int,
+              low: int = 0, high: Optional[int] = None) -> None:
+        high = self.n_slots if high is None else high
+        first = max(self._slot_of(start), low)
+        last = min(self._slot_of(end) + 1, high)
+        if first < last:
+            if delta > 0:
+                self._counts[row, first:last] += np.uint16(delta)
+            else:
+                self._counts[row, first:last] -= np.uint16(-delta)
+
+    def _row_for(self, vehicle_id: int) -> int:
+        row = self._rows.get(vehicle_id)
+        if row is None:
+            row = len(self._rows)
+            self._rows[vehicle_id] = row
+            self._vehicle_ids = np.append(self._vehicle_ids, vehicle_id)
+            self._categories = np.append(self._categories, -1)
+            self._counts = np.vstack([self._counts, np.zeros((1, self.n_slots), dtype=np.uint16)])
+        return row
+
+    def _add_locked(self, booking_id: int, vehicle_id: int, start: datetime, end: datetime) -> None:
+        self._bookings[booking_id] = (vehicle_id, start, end)
+        self._mark(self._row_for(vehicle_id), start, end, 1)
+
+    def _remove_locked(self, booking_id: int) -> Optional[Tuple[int, datetime, datetime]]:
+        existing = self._bookings.pop(booking_id, None)
+        if existing:
+            vehicle_id, start, end = existing
+            self._mark(self._rows[vehicle_id], start, end, -1)
+        return existing
+
+    def _advance_locked(self, now: datetime) -> None:
+        if self._origin is None:
+            return
+        shift = (self._day_start(now) - self._origin) // self.slot
+        if shift <= 0:
+            return
+        self._origin += shift * self.slot
+        if shift >= self.n_slots:
+            self._counts[:] = 0
+        else:
+            self._counts[:, :-shift] = self._counts[:, shift:]
+            self._counts[:, -shift:] = 0
+        tail = max(self.n_slots - shift, 0)
+        for booking_id, (vehicle_id, start, end) in list(self._bookings.items()):
+            if end < self._origin:
+                del self._bookings[booking_id]
+            else:
+                self._mark(self._rows[vehicle_id], start, end, 1, low=tail)
@@ -0,0 +1,132 @@
+from bisect import bisect_right
+from datetime import datetime
+from threading import RLock
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+
+class VehicleIntervals:
+    '''
+    Booking intervals for one vehicle, kept sorted by pickup date. max_ends[i] is the
+    latest return date among the first i + 1 intervals, so an overlap test is a single
+    bisect on starts followed by one comparison.
+    '''
+    __slots__ = ('starts', 'ends', 'booking_ids', 'max_ends')
+
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+        self.booking_ids: List[int] = []
+        self.max_ends: List[datetime] = []
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def add(self, booking_id: int, start: datetime, end: datetime) -> None:
+        position = bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.booking_ids.insert(position, booking_id)
+        self.max_ends.insert(position, end)
+        self._rebuild_max_ends(position)
+
+    def remove(self, booking_id: int) -> bool:
+        try:
+            position = self.booking_ids.index(booking_id)
+        except ValueError:
+            return False
+        del self.starts[position]
+        del self.ends[position]
+        del self.booking_ids[position]
+        del self.max_ends[position]
+        self._rebuild_max_ends(position)
+        return True
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        # Same closed-interval test as the SQL path: pickup <= end AND return >= start
+        position = bisect_right(self.starts, end)
+        return position > 0 and self.max_ends[position - 1] >= start
+
+    def _rebuild_max_ends(self, position: int) -> None:
+        running = self.max_ends[position - 1] if position > 0 else None
+        for i in range(position, len(self.ends)):
+            end = self.ends[i]
+            running = end if running is None or end > running else running
+            self.max_ends[i] = running
+
+
+class AvailabilityIndex:
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = RLock()
+        self._vehicles: Dict[int, VehicleIntervals] = {}
+        self._bookings: Dict[int, Tuple[int, datetime, datetime]] = {}
+        self.loaded = False
+
+    def load(self, rows: Iterable[Tuple[int, int, datetime, datetime]]) -> None:
+        vehicles: Dict[int, List[Tuple[datetime, datetime, int]]] = {}
+        bookings: Dict[int, Tuple[int, datetime, datetime]] = {}
+        for booking_id, vehicle_id, start, end in rows:
+            vehicles.setdefault(vehicle_id, []).append((start, end, booking_id))
+            bookings[booking_id] = (vehicle_id, start, end)
+
+        built: Dict[int, VehicleIntervals] = {}
+        for vehicle_id, intervals in vehicles.items():
+            intervals.sort()
+            entry = VehicleIntervals()
+            entry.starts = [start for start, _, _ in intervals]
+            entry.ends = [end for _, end, _ in intervals]
+            entry.booking_ids = [booking_id for _, _, booking_id in intervals]
+            entry.max_ends = list(entry.ends)
+            if entry.max_ends:
+                entry._rebuild_max_ends(0)
+            built[vehicle_id] = entry
+
+        with self._lock:
+            self._vehicles = built
+            self._bookings = bookings
+            self.loaded = True
+        self.logger.info("Availability index loaded %d bookings for %d vehicles",
+                         len(bookings), len(built))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vehicles = {}
+            self._bookings = {}
+            self.loaded = False
+
+    def add(self, booking_id: int, vehicle_id: int, start: datetime, end: datetime) -> None:
+        with self._lock:
+            self._remove_locked(booking_id)
+            self._vehicles.setdefault(vehicle_id, VehicleIntervals()).add(booking_id, start, end)
+            self._bookings[booking_id] = (vehicle_id, start, end)
+
+    def remove(self, booking_id: int) -> Optional[Tuple[int, datetime, datetime]]:
+        with self._lock:
+            return self._remove_locked(booking_id)
+
+    def get(self, booking_id: int) -> Optional[Tuple[int, datetime, datetime]]:
+        with self._lock:
+            return self._bookings.get(booking_id)
+
+    def is_available(self, vehicle_id: int, start: datetime, end: datetime) -> bool:
+        with self._lock:
+            intervals = self._vehicles.get(vehicle_id)
+            return intervals is None or not intervals.overlaps(start, end)
+
+    def filter_available(self, vehicle_ids: Iterable[int], start: datetime,
+                         end: datetime) -> List[int]:
+        with self._lock:
+            return [vehicle_id for vehicle_id in vehicle_ids
+                    if vehicle_id not in self._vehicles
+                    or not self._vehicles[vehicle_id].overlaps(start, end)]
+
+    def _remove_locked(self, booking_id: int) -> Optional[Tuple[int, datetime, datetime]]:
+        existing = self._bookings.pop(booking_id, None)
+        if existing:
+            intervals = self._vehicles.get(existing[0])
+            if intervals is not None:
+                intervals.remove(booking_id)
+                if not intervals:
+                    del self._vehicles[existing[0]]
+        return existing
@@ -0,0 +1,111 @@
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+import time
+
+
+class AvailabilityCache:
+    '''
+    Bounded LRU cache of availability results keyed by (start, end, category_id, vehicle_id)
+    plus the page cursor (after_vehicle_id, limit).
+    Entries expire after ttl_seconds and are dropped as soon as a write touches a vehicle
+    in an overlapping window. Every invalidation bumps the version, and put() ignores
+    results computed against an older version so a read racing a write cannot
+    re-insert a stale answer.
+    '''
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._lock = Lock()
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @staticmethod
+    def key(start: datetime, end: datetime, category_id: Optional[int] = None,
+            vehicle_id: Optional[int] = None, after_vehicle_id: Optional[int] = None,
+            limit: Optional[int] = None) -> Tuple:
+        return (start, end, category_id, vehicle_id, after_vehicle_id, limit)
+
+    def get(self, key: Tuple) -> Optional[List[Dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple, value: List[Dict], version: Optional[int] = None) -> bool:
+        if not self.enabled:
+            return False
+        with self._lock:
+            if version is not None and version != self._version:
+                return False
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, vehicle_id: Optional[int] = None, start: Optional[datetime] = None,
+                   end: Optional[datetime] = None) -> int:
+        # Same closed-interval overlap test as the SQL availability query; a missing
+        # bound matches every window and a missing vehicle_id matches every entry
+        with self._lock:
+            self._version += 1
+            stale = [
+                key for key in self._entries
+                if (vehicle_id is None or key[3] is None or key[3] == vehicle_id)
+                and (start is None or key[1] >= start)
+                and (end is None or key[0] <= end)
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
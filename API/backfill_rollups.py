@@ -0,0 +1,18 @@
+import argparse
+from datetime import datetime
+from repositories import ReportRepository
+
+def parse_day(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def backfill_rollups():
+    parser = argparse.ArgumentParser(description="Rebuild DailyCategoryRollups from Bookings")
+    parser.add_argument('--start', type=parse_day, help='first day to rebuild (YYYY-MM-DD)')
+    parser.add_argument('--end', type=parse_day, help='last day to rebuild (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    rebuilt = ReportRepository().rebuild_rollups(args.start, args.end)
+    print(f"Rebuilt {rebuilt} daily rollup rows.")
+
+if __name__ == "__main__":
+    backfill_rollups()
@@ -0,0 +1,103 @@
+'''
+Drives the Flask app and the ASGI app with the same availability and booking traffic at
+increasing concurrency and reports throughput and latency for each. Start both servers
+first, against the same populated database (python db_populate.py), e.g.
+
+    python app.py                                   # http://127.0.0.1:5000
+    hypercorn asgi:app --bind 127.0.0.1:8000
+
+    python -m benchmarks.bench_async_vs_sync --sync-url http://127.0.0.1:5000 \
+        --async-url http://127.0.0.1:8000 --concurrency 50 200 1000
+'''
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from benchmarks.common import HttpTarget, summarize, write_json
+
+
+def make_request(rng: random.Random, args) -> Tuple[str, str, Optional[dict]]:
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=rng.randint(1, 5))
+    end = start + timedelta(days=rng.randint(1, 2))
+    if rng.random() < args.booking_ratio:
+        pickup = start + timedelta(hours=10)
+        return 'POST', '/api/bookings', {
+            'user_id': rng.randint(1, args.users),
+            'vehicle_id': rng.randint(1, args.vehicles),
+            'pickup_date': pickup.isoformat(),
+            'return_date': (pickup + timedelta(days=1)).isoformat(),
+            'total_cost': 50.0,
+        }
+    path = f"/api/vehicles/availability?start_date={start:%Y-%m-%d}&end_date={end:%Y-%m-%d}"
+    if rng.random() < 0.5:
+        path += f"&category_id={rng.randint(1, args.categories)}"
+    return 'GET', path, None
+
+
+async def run_level(target: HttpTarget, concurrency: int, args) -> Dict:
+    rng = random.Random(args.seed)
+    remaining = args.requests
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+
+    async def client():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            method, path, body = make_request(rng, args)
+            started = time.perf_counter()
+            try:
+                status = await target.request(method, path, body)
+            except OSError:
+                status = 0
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    result = summarize(latencies)
+    result.update({'concurrency': concurrency, 'requests_per_second': round(len(latencies) / elapsed, 2),
+                   'statuses': statuses})
+    return result
+
+
+async def run(args) -> Dict:
+    results = {}
+    for name, url in (('sync', args.sync_url), ('async', args.async_url)):
+        if not url:
+            continue
+        target = HttpTarget(url)
+        results[name] = []
+        for concurrency in args.concurrency:
+            level = await run_level(target, concurrency, args)
+            results[name].append(level)
+            print(f"{name:<6} c={concurrency:<6}{level['requests_per_second']:>10.1f} req/s"
+                  f"{level['p50_ms']:>10.2f}ms p50{level['p99_ms']:>10.2f}ms p99  {level['statuses']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sync-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--async-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--requests', type=int, default=5000, help='requests per concurrency level')
+    parser.add_argument('--booking-ratio', type=float, default=0.1, help='share of requests that book')
+    parser.add_argument('--vehicles', type=int, default=50)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--categories', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='optional JSON file for the results')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.output:
+        write_json(args.output, {'benchmark': 'async_vs_sync', 'requests': args.requests,
+                                 'booking_ratio': args.booking_ratio, 'results': results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+'''
+Booking throughput under concurrency with per-vehicle row locking. "distinct" gives every
+thread its own vehicle, taken from each category in turn, and its own dates, so threads
+share no vehicle row and no report day; "same" points every thread at the same dates on
+one vehicle, where exactly one attempt per window may win. Each run reports the InnoDB row
+lock waits it caused (counted server-wide, so keep other writers off the database), which
+shows whatever contention is left between bookings for different vehicles. Both finish by
+checking the database for overlapping active bookings, which must be zero. Needs the .env database populated (python db_populate.py) and DB_POOL_MAX_SIZE plus
+DB_POOL_MAX_OVERFLOW at least as large as the biggest thread count. The bookings created
+are cancelled and soft-deleted after each run.
+
+    python -m benchmarks.bench_booking_concurrency --threads 1,2,4,8,16 --bookings 50
+'''
+import argparse
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+from mysql.connector import Error
+from database import Database
+from models import Booking
+from repositories.booking_repository import BookingRejected, BookingRepository
+from benchmarks.common import summarize, write_json
+
+
+def windows(start: datetime, count: int) -> List[tuple]:
+    # One-day bookings with a free day in between, since the overlap check is inclusive
+    return [(start + timedelta(days=2 * k), start + timedelta(days=2 * k + 1)) for k in range(count)]
+
+
+def spread_vehicles(db: Database, count: int) -> List[int]:
+    # First vehicle of every category, then the second of every category, and so on
+    with db.get_cursor(dictionary=False) as cursor:
+        cursor.execute("""
+            SELECT vehicle_id FROM (
+                SELECT vehicle_id, category_id,
+                       ROW_NUMBER() OVER (PARTITION BY category_id ORDER BY vehicle_id) AS position
+                FROM Vehicles
+            ) ranked
+            ORDER BY position, category_id
+            LIMIT %s
+        """, (count,))
+        return [row[0] for row in cursor.fetchall()]
+
+
+def row_lock_waits(db: Database) -> int:
+    with db.get_cursor(dictionary=False) as cursor:
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Innodb_row_lock_waits'")
+        return int(cursor.fetchone()[1])
+
+
+def run(repo: BookingRepository, user_id: int, plan: List[List[tuple]]) -> Dict:
+    # plan[i] is the list of (vehicle_id, pickup, return) thread i attempts, in order
+    created: List[int] = []
+    latencies: List[float] = []
+    counts = {'rejected': 0, 'errors': 0, 'deadlocks': 0}
+    lock = threading.Lock()
+    barrier = threading.Barrier(len(plan) + 1)
+
+    def worker(attempts):
+        barrier.wait()
+        for vehicle_id, pickup, dropoff in attempts:
+            booking = Booking(user_id=user_id, vehicle_id=vehicle_id, pickup_date=pickup.isoformat(),
+                              return_date=dropoff.isoformat(), total_cost=100.0)
+            started = time.perf_counter()
+            outcome = None
+            try:
+                outcome = repo.create(booking)
+            except BookingRejected:
+                outcome = 'rejected'
+            except Error as e:
+                outcome = 'deadlocks' if e.errno == 1213 else 'errors'
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+                if isinstance(outcome, int):
+                    created.append(outcome)
+                else:
+                    counts[outcome] += 1
+
+    threads = [threading.Thread(target=worker, args=(attempts,)) for attempts in plan]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'created_ids': created,
+        'created': len(created),
+        **counts,
+        'seconds': round(elapsed, 3),
+        'bookings_per_second': round(len(created) / elapsed, 1) if elapsed else 0.0,
+        'latency': summarize(latencies),
+    }
+
+
+def double_bookings(db: Database, vehicle_ids: List[int], start: datetime) -> int:
+    placeholders = ", ".join(["%s"] * len(vehicle_ids))
+    with db.get_cursor(dictionary=False) as cursor:
+        cursor.execute(f"""
+            SELECT COUNT(*) FROM Bookings a
+            JOIN Bookings b ON b.vehicle_id = a.vehicle_id AND b.booking_id > a.booking_id
+            WHERE a.vehicle_id IN ({placeholders})
+            AND a.pickup_date >= %s AND b.pickup_date >= %s
+            AND a.status IN ('pending', 'active') AND b.status IN ('pending', 'active')
+            AND a.is_deleted = FALSE AND b.is_deleted = FALSE
+            AND a.pickup_date <= b.return_date
+            AND a.return_date >= b.pickup_date
+        """, (*vehicle_ids, start, start))
+        return cursor.fetchone()[0]
+
+
+def release(db: Database, booking_ids: List[int]) -> None:
+    for offset in range(0, len(booking_ids), 1000):
+        chunk = booking_ids[offset:offset + 1000]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        with db.get_cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE Bookings SET status = 'cancelled', is_deleted = TRUE
+                WHERE booking_id IN ({placeholders})
+            """, tuple(chunk))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', default='1,2,4,8,16', help='comma separated thread counts')
+    parser.add_argument('--bookings', type=int, default=50, help='booking attempts per thread')
+    parser.add_argument('--mode', choices=('distinct', 'same', 'both'), default='both')
+    parser.add_argument('--commit-path', choices=('statements', 'procedure'), default='statements')
+    parser.add_argument('--user-id', type=int, default=1)
+    parser.add_argument('--start', default='2099-01-01', help='first pickup date; keep it clear of real bookings')
+    parser.add_argument('--output', help='optional JSON file for the results')
+    args = parser.parse_args()
+
+    thread_counts = [int(count) for count in args.threads.split(',')]
+    modes = ('distinct', 'same') if args.mode == 'both' else (args.mode,)
+    db = Database()
+    repo = BookingRepository(commit_path=args.commit_path)
+    vehicle_ids = spread_vehicles(db, max(thread_counts))
+    if len(vehicle_ids) < max(thread_counts):
+        parser.error(f"distinct mode needs {max(thread_counts)} vehicles, found {len(vehicle_ids)}")
+
+    start = datetime.fromisoformat(args.start)
+    slots = windows(start, args.bookings)
+    results = {}
+    created: List[int] = []
+    print(f"{'mode':<10}{'threads':>8}{'created':>9}{'rejected':>10}{'errors':>8}{'per sec':>10}"
+          f"{'p50':>10}{'p99':>10}{'lock waits':>12}{'overlaps':>10}")
+    try:
+        for mode in modes:
+            for count in thread_counts:
+                if mode == 'distinct':
+                    # Thread i books the i-th stretch of days, clear of every other thread's
+                    used = vehicle_ids[:count]
+                    span = timedelta(days=2 * args.bookings)
+                    plan = [[(vehicle_id, *slot) for slot in windows(start + i * span, args.bookings)]
+                            for i, vehicle_id in enumerate(used)]
+                else:
+                    used = vehicle_ids[:1]
+                    plan = [[(used[0], *slot) for slot in slots] for _ in range(count)]
+                waits_before = row_lock_waits(db)
+                result = run(repo, args.user_id, plan)
+                result['row_lock_waits'] = row_lock_waits(db) - waits_before
+                created.extend(result.pop('created_ids'))
+                result['overlaps'] = double_bookings(db, used, start)
+                results[f"{mode}_{count}"] = result
+                print(f"{mode:<10}{count:>8}{result['created']:>9}{result['rejected']:>10}"
+                      f"{result['errors'] + result['deadlocks']:>8}{result['bookings_per_second']:>10}"
+                      f"{result['latency']['p50_ms']:>8.2f}ms{result['latency']['p99_ms']:>8.2f}ms"
+                      f"{result['row_lock_waits']:>12}{result['overlaps']:>10}")
+                # Each run starts from an empty calendar
+                release(db, created)
+                created.clear()
+    finally:
+        if created:
+            release(db, created)
+
+    if args.output:
+        write_json(args.output, {'benchmark': 'booking_concurrency', 'bookings_per_thread': args.bookings,
+                                 'commit_path': args.commit_path, 'results': results})
+    if any(result['overlaps'] for result in results.values()):
+        raise SystemExit("double bookings found")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+'''
+Drives each API endpoint with concurrent clients and reports p50/p95/p99 latency and
+throughput per scenario. Seed a local database first (python bulk_load.py)
+and start the server, then:
+
+    python -m benchmarks.bench_endpoints --url http://127.0.0.1:5000 --output run.json
+    python -m benchmarks.bench_endpoints --baseline run.json --output next.json
+
+With --baseline the run is compared scenario by scenario and the exit status is 1 when
+any p95 or throughput moves the wrong way by more than --tolerance percent.
+'''
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from benchmarks.common import HttpTarget, summarize, write_json
+from benchmarks.fleet_generator import SkewedChoice
+
+Request = Tuple[str, str, Optional[dict]]
+
+
+class Workload:
+    # Request generators for each scenario; vehicle and user ids follow the same Zipf
+    # skew as the seeded history, so hot vehicles are also the contended ones
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.vehicles = SkewedChoice(args.vehicles, args.vehicle_skew, random.Random(f"{args.seed}-v"))
+        self.users = SkewedChoice(args.users, args.user_skew, random.Random(f"{args.seed}-u"))
+        self.today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def window(self) -> Tuple[datetime, datetime]:
+        start = self.today + timedelta(days=self.rng.randint(1, 6))
+        return start, start + timedelta(days=self.rng.randint(1, 3))
+
+    def availability(self) -> Request:
+        start, end = self.window()
+        return 'GET', f"/api/vehicles/availability?start_date={start:%Y-%m-%d}&end_date={end:%Y-%m-%d}", None
+
+    def availability_category(self) -> Request:
+        method, path, body = self.availability()
+        return method, f"{path}&category_id={self.rng.randint(1, self.args.categories)}", body
+
+    def booking_create(self) -> Request:
+        start, _ = self.window()
+        pickup = start + timedelta(hours=self.rng.randint(8, 18))
+        return 'POST', '/api/bookings', {
+            'user_id': self.users.pick() + 1,
+            'vehicle_id': self.vehicles.pick() + 1,
+            'pickup_date': pickup.isoformat(),
+            'return_date': (pickup + timedelta(days=self.rng.randint(1, 3))).isoformat(),
+            'total_cost': 100.0,
+        }
+
+    def daily_report(self) -> Request:
+        day = self.today - timedelta(days=self.rng.randint(0, self.args.report_days))
+        path = f"/api/daily_report?date={day:%Y-%m-%d}"
+        if self.rng.random() < 0.5:
+            path += f"&category_id={self.rng.randint(1, self.args.categories)}"
+        return 'GET', path, None
+
+    def user_get(self) -> Request:
+        return 'GET', f"/api/users/{self.users.pick() + 1}", None
+
+
+SCENARIOS = ('availability', 'availability_category', 'booking_create', 'daily_report', 'user_get')
+
+
+async def run_scenario(target: HttpTarget, make_request: Callable[[], Request],
+                       requests: int, concurrency: int) -> Dict:
+    remaining = requests
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+
+    async def client():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            method, path, body = make_request()
+            started = time.perf_counter()
+            try:
+                status = await target.request(method, path, body)
+            except OSError:
+                status = 0
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    result = summarize(latencies)
+    result.update({
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 3),
+        'requests_per_second': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'statuses': statuses,
+    })
+    return result
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    regressions = []
+    print(f"\n{'scenario':<24}{'p95 before':>12}{'p95 after':>12}{'rps before':>12}{'rps after':>12}")
+    for name, current in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        print(f"{name:<24}{previous['p95_ms']:>10.2f}ms{current['p95_ms']:>10.2f}ms"
+              f"{previous['requests_per_second']:>12.1f}{current['requests_per_second']:>12.1f}")
+        if previous['p95_ms'] and (current['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100 > tolerance:
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        rps_before = previous['requests_per_second']
+        if rps_before and (rps_before - current['requests_per_second']) / rps_before * 100 > tolerance:
+            regressions.append(f"{name}: throughput {rps_before} -> {current['requests_per_second']} req/s")
+    return regressions
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=2000, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--warmup', type=int, default=100, help='unmeasured requests per scenario')
+    parser.add_argument('--vehicles', type=int, default=10_000, help='seeded vehicle count')
+    parser.add_argument('--users', type=int, default=10_000, help='seeded user count')
+    parser.add_argument('--categories', type=int, default=4)
+    parser.add_argument('--vehicle-skew', type=float, default=1.0)
+    parser.add_argument('--user-skew', type=float, default=0.8)
+    parser.add_argument('--report-days', type=int, default=365, help='how far back daily reports look')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='JSON file for the results')
+    parser.add_argument('--baseline', help='earlier --output file to compare against')
+    parser.add_argument('--tolerance', type=float, default=10.0, help='allowed regression in percent')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    workload = Workload(args)
+    target = HttpTarget(args.url)
+    results = {}
+    print(f"{'scenario':<24}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}  statuses")
+    for name in args.scenarios:
+        make_request = getattr(workload, name)
+        if args.warmup:
+            asyncio.run(run_scenario(target, make_request, args.warmup, args.concurrency))
+        result = asyncio.run(run_scenario(target, make_request, args.requests, args.concurrency))
+        results[name] = result
+        print(f"{name:<24}{result['requests_per_second']:>10.1f}{result['p50_ms']:>8.2f}ms"
+              f"{result['p95_ms']:>8.2f}ms{result['p99_ms']:>8.2f}ms  {result['statuses']}")
+
+    if args.output:
+        write_json(args.output, {
+            'benchmark': 'endpoints',
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'target': args.url,
+            'config': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+            'results': results,
+        })
+
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
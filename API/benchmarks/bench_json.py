@@ -0,0 +1,95 @@
+'''
+Serialization cost per 1,000 rows for Flask's default JSON provider and the orjson
+provider, on the payloads the API actually returns: availability rows (datetime and
+Decimal values), daily report rows (Decimal sums) and User models. No database needed.
+
+    python -m benchmarks.bench_json --rows 1000 --repeat 200
+'''
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, List
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from benchmarks.common import summarize, write_json
+from json_provider import FastJSONProvider
+from models import User
+
+
+def availability_rows(count: int, rng: random.Random) -> List[Dict]:
+    now = datetime.now().replace(microsecond=0)
+    return [{
+        'vehicle_id': i + 1,
+        'status': 'available',
+        'category_id': rng.randint(1, 4),
+        'make': 'Toyota',
+        'model': 'Toyota Sedan',
+        'year': 2020 + i % 5,
+        'last_maintenance': now - timedelta(days=rng.randint(1, 365)),
+        'daily_rate': Decimal(rng.randint(30, 250)).quantize(Decimal('0.01')),
+    } for i in range(count)]
+
+
+def report_rows(count: int, rng: random.Random) -> List[Dict]:
+    return [{
+        'category_id': i + 1,
+        'category_name': f"Category {i + 1}",
+        'booking_count': rng.randint(0, 500),
+        'total_revenue': Decimal(rng.randint(0, 10 ** 7)) / 100,
+        'avg_booking_value': Decimal(rng.randint(0, 10 ** 5)) / 100,
+    } for i in range(count)]
+
+
+def users(count: int, rng: random.Random) -> List[User]:
+    return [User(email=f"user{i}@example.com", first_name=f"First{i}", last_name=f"Last{i}",
+                 password_hash='temp_hash', user_id=i + 1,
+                 created_at=datetime(2024, 1, 1) + timedelta(minutes=rng.randint(0, 10 ** 6)))
+            for i in range(count)]
+
+
+PAYLOADS = {'availability': availability_rows, 'daily_report': report_rows, 'users': users}
+
+
+def time_per_thousand(encode: Callable[[Dict], object], payload: Dict, rows: int, repeat: int) -> Dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encode(payload)
+        samples.append((time.perf_counter() - started) * 1000 * 1000 / rows)
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000, help='rows per response')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--payloads', nargs='+', choices=list(PAYLOADS), default=list(PAYLOADS))
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='optional JSON file for the results')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    providers = {'flask': DefaultJSONProvider(app), 'orjson': FastJSONProvider(app)}
+    results = {}
+    print(f"{'payload':<16}{'provider':<10}{'mean/1k':>12}{'p95/1k':>12}{'bytes':>12}")
+    with app.app_context():
+        for name in args.payloads:
+            payload = {'status': 'success', 'data': PAYLOADS[name](args.rows, random.Random(args.seed))}
+            results[name] = {}
+            for provider_name, provider in providers.items():
+                # response() is what jsonify calls, so this includes building the Response
+                result = time_per_thousand(provider.response, payload, args.rows, args.repeat)
+                result['bytes'] = len(provider.response(payload).get_data())
+                results[name][provider_name] = result
+                print(f"{name:<16}{provider_name:<10}{result['mean_ms']:>10.3f}ms"
+                      f"{result['p95_ms']:>10.3f}ms{result['bytes']:>12}")
+
+    if args.output:
+        write_json(args.output, {'benchmark': 'json', 'rows': args.rows, 'repeat': args.repeat,
+                                 'unit': 'ms per 1000 rows', 'results': results})
+
+
+if __name__ == "__main__":
+    main()
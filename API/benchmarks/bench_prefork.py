@@ -0,0 +1,111 @@
+'''
+Throughput of the production server (gunicorn -c gunicorn.conf.py wsgi:app) as the number
+of worker processes grows. For each worker count a server is started on --port, driven
+with the bench_endpoints workload until --requests have completed, then stopped with
+SIGTERM (the graceful drain). Scaling is requests per second relative to one worker; the
+load generator is a single asyncio process, so keep an eye on its CPU at high counts.
+Needs gunicorn installed and the .env database populated (python bulk_load.py).
+
+    python -m benchmarks.bench_prefork --workers 1,2,4,8 --threads 8 --scenarios user_get availability
+'''
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Dict
+from benchmarks.bench_endpoints import SCENARIOS, Workload, run_scenario
+from benchmarks.common import HttpTarget, write_json
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(workers: int, threads: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ, WEB_WORKERS=str(workers), WEB_THREADS=str(threads),
+               WEB_BIND=f"127.0.0.1:{port}")
+    return subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                            cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until_ready(target: HttpTarget, server: subprocess.Popen, timeout: float) -> None:
+    # /metrics answers without touching the database
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"gunicorn exited with status {server.returncode}")
+        try:
+            if asyncio.run(target.request('GET', '/metrics')) == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"server not ready after {timeout}s")
+
+
+def stop_server(server: subprocess.Popen, timeout: float) -> float:
+    # Seconds gunicorn took to drain and exit after SIGTERM
+    started = time.perf_counter()
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+    return round(time.perf_counter() - started, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default='1,2,4', help='comma separated worker process counts')
+    parser.add_argument('--threads', type=int, default=8, help='threads per worker')
+    parser.add_argument('--port', type=int, default=5100)
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=['user_get', 'availability'])
+    parser.add_argument('--requests', type=int, default=4000, help='requests per scenario and worker count')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--warmup', type=int, default=200, help='unmeasured requests per scenario')
+    parser.add_argument('--vehicles', type=int, default=10_000, help='seeded vehicle count')
+    parser.add_argument('--users', type=int, default=10_000, help='seeded user count')
+    parser.add_argument('--categories', type=int, default=4)
+    parser.add_argument('--vehicle-skew', type=float, default=1.0)
+    parser.add_argument('--user-skew', type=float, default=0.8)
+    parser.add_argument('--report-days', type=int, default=365)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--ready-timeout', type=float, default=30.0)
+    parser.add_argument('--output', help='optional JSON file for the results')
+    args = parser.parse_args()
+
+    worker_counts = [int(count) for count in args.workers.split(',')]
+    target = HttpTarget(f"http://127.0.0.1:{args.port}")
+    results: Dict[str, Dict] = {name: {} for name in args.scenarios}
+    print(f"{'scenario':<24}{'workers':>8}{'req/s':>10}{'scaling':>9}{'p50':>10}{'p99':>10}{'drain':>8}")
+    for count in worker_counts:
+        server = start_server(count, args.threads, args.port)
+        try:
+            wait_until_ready(target, server, args.ready_timeout)
+            workload = Workload(args)
+            runs = {}
+            for name in args.scenarios:
+                make_request = getattr(workload, name)
+                if args.warmup:
+                    asyncio.run(run_scenario(target, make_request, args.warmup, args.concurrency))
+                runs[name] = asyncio.run(run_scenario(target, make_request, args.requests, args.concurrency))
+        finally:
+            drain_seconds = stop_server(server, args.ready_timeout)
+        for name, result in runs.items():
+            result['drain_seconds'] = drain_seconds
+            first = results[name].get(str(worker_counts[0]))
+            base = first['requests_per_second'] / worker_counts[0] if first else result['requests_per_second'] / count
+            result['scaling'] = round(result['requests_per_second'] / base, 2) if base else 0.0
+            results[name][str(count)] = result
+            print(f"{name:<24}{count:>8}{result['requests_per_second']:>10.1f}{result['scaling']:>8.2f}x"
+                  f"{result['p50_ms']:>8.2f}ms{result['p99_ms']:>8.2f}ms{drain_seconds:>7.2f}s")
+
+    if args.output:
+        write_json(args.output, {'benchmark': 'prefork', 'threads': args.threads,
+                                 'concurrency': args.concurrency, 'results': results})
+
+
+if __name__ == "__main__":
+    main()
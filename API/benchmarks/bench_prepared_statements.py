@@ -0,0 +1,95 @@
+'''
+Per-query latency of the hot repository statements with and without the prepared
+statement cache. Needs the .env database populated (python db_populate.py).
+
+    python -m benchmarks.bench_prepared_statements --iterations 2000
+'''
+import argparse
+import time
+from datetime import datetime, timedelta
+from database import Database
+from benchmarks.common import summarize, write_json
+
+QUERIES = {
+    'user_get_by_id': (
+        "SELECT user_id, email, first_name, last_name, password_hash, created_at FROM Users WHERE user_id = %s AND is_deleted = FALSE",
+        lambda now: (1,)
+    ),
+    'vehicle_exists': (
+        "SELECT 1 FROM Vehicles WHERE vehicle_id = %s",
+        lambda now: (1,)
+    ),
+    'is_vehicle_available': (
+        """
+            SELECT 1 FROM Bookings
+            WHERE vehicle_id = %s
+            AND status IN ('pending', 'active')
+            AND is_deleted = FALSE
+            AND pickup_date <= %s
+            AND return_date >= %s
+        """,
+        lambda now: (1, now + timedelta(days=2), now)
+    ),
+    'available_vehicles': (
+        """
+            SELECT v.vehicle_id, v.status, v.category_id, v.make, v.model, v.year,
+                   v.last_maintenance, vc.daily_rate
+            FROM Vehicles v
+            INNER JOIN VehicleCategories vc ON v.category_id = vc.category_id
+            WHERE v.status = %s
+            AND NOT EXISTS (
+                SELECT 1 FROM Bookings b
+                WHERE b.vehicle_id = v.vehicle_id
+                AND b.status IN ('pending', 'active')
+                AND b.is_deleted = FALSE
+                AND b.pickup_date <= %s
+                AND b.return_date >= %s
+            )
+            ORDER BY v.vehicle_id
+        """,
+        lambda now: ('AVAILABLE', now + timedelta(days=2), now)
+    ),
+}
+
+
+def run_query(db: Database, sql: str, params, prepared: bool) -> float:
+    started = time.perf_counter()
+    with db.get_cursor(prepared=prepared) as cursor:
+        cursor.execute(sql, params)
+        cursor.fetchall()
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--output', help='optional JSON file for the results')
+    args = parser.parse_args()
+
+    db = Database()
+    now = datetime.now()
+    results = {}
+    print(f"{'query':<22}{'plain p50':>12}{'prepared p50':>14}{'plain mean':>12}{'prepared mean':>15}{'delta':>9}")
+    for name, (sql, make_params) in QUERIES.items():
+        params = make_params(now)
+        timings = {}
+        for prepared in (False, True):
+            for _ in range(args.warmup):
+                run_query(db, sql, params, prepared)
+            samples = [run_query(db, sql, params, prepared) for _ in range(args.iterations)]
+            timings['prepared' if prepared else 'plain'] = summarize(samples)
+        plain, prepared = timings['plain'], timings['prepared']
+        delta = (prepared['mean_ms'] - plain['mean_ms']) / plain['mean_ms'] * 100 if plain['mean_ms'] else 0.0
+        timings['mean_delta_pct'] = round(delta, 2)
+        results[name] = timings
+        print(f"{name:<22}{plain['p50_ms']:>10.3f}ms{prepared['p50_ms']:>12.3f}ms"
+              f"{plain['mean_ms']:>10.3f}ms{prepared['mean_ms']:>13.3f}ms{delta:>8.1f}%")
+
+    if args.output:
+        write_json(args.output, {'benchmark': 'prepared_statements', 'iterations': args.iterations,
+                                 'results': results})
+
+
+if __name__ == "__main__":
+    main()
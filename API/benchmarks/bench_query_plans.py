@@ -0,0 +1,165 @@
+'''
+Query plans and latency of the booking queries before and after the covering indexes and
+the stored pickup_day/return_day columns. "before" runs the previous statement text with
+the new indexes ignored, "after" the statement the repositories now build. For each the
+Bookings accesses from EXPLAIN FORMAT=JSON are listed (access type, index, estimated rows
+per scan, partitions read), so the switch from full scans to range lookups and the
+partition pruning are visible. Needs a populated database; the larger the better
+(python bulk_load.py).
+
+    python -m benchmarks.bench_query_plans --iterations 50 --check
+'''
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+from database import Database
+from models import Booking
+from repositories.booking_repository import BookingRepository
+from repositories.vehicle_repository import VehicleRepository
+from benchmarks.common import write_json
+
+NEW_INDEXES = 'idx_booking_vehicle_window, idx_booking_pickup_day, idx_booking_return_day'
+BOOKINGS_TABLES = {'Bookings', 'b'}
+
+PREVIOUS_OVERLAP_CHECK = f"""
+    SELECT 1 FROM Bookings IGNORE INDEX ({NEW_INDEXES})
+    WHERE vehicle_id = %s
+    AND status IN ('pending', 'active')
+    AND is_deleted = FALSE
+    AND (
+        (pickup_date BETWEEN %s AND %s)
+        OR (return_date BETWEEN %s AND %s)
+        OR (pickup_date <= %s AND return_date >= %s)
+    )
+"""
+
+PREVIOUS_DAILY_REPORT = f"""
+    SELECT
+        v.category_id,
+        vc.name as category_name,
+        COUNT(b.booking_id) as booking_count,
+        SUM(b.total_cost) as total_revenue
+    FROM Vehicles v
+    JOIN VehicleCategories vc ON v.category_id = vc.category_id
+    LEFT JOIN Bookings b IGNORE INDEX ({NEW_INDEXES}) ON v.vehicle_id = b.vehicle_id
+    WHERE DATE(b.pickup_date) = DATE(%s)
+    OR DATE(b.return_date) = DATE(%s)
+    GROUP BY v.category_id, vc.name
+"""
+
+
+def cases(vehicle_id: int, day: datetime) -> Dict[str, Dict]:
+    start, end = day, day + timedelta(days=3)
+    availability, availability_params = VehicleRepository.build_availability_query(start, end)
+    report, report_params = VehicleRepository.build_daily_report_query(day)
+    return {
+        'overlap_check': {
+            'before': (PREVIOUS_OVERLAP_CHECK, (vehicle_id, start, end, start, end, start, end)),
+            'after': (BookingRepository.OVERLAP_CHECK_SQL, BookingRepository.overlap_check_params(
+                Booking(user_id=0, vehicle_id=vehicle_id, pickup_date=start, return_date=end, total_cost=0))),
+        },
+        'available_vehicles': {
+            'before': (availability.replace("FROM Bookings b", f"FROM Bookings b IGNORE INDEX ({NEW_INDEXES})"),
+                       availability_params),
+            'after': (availability, availability_params),
+        },
+        'daily_report': {
+            'before': (PREVIOUS_DAILY_REPORT, (day, day)),
+            'after': (report, report_params),
+        },
+    }
+
+
+def table_accesses(plan) -> List[Dict]:
+    # Every "table" node of an EXPLAIN FORMAT=JSON plan, wherever it is nested
+    # (joins, dependent subqueries, derived tables, union branches)
+    accesses = []
+    if isinstance(plan, dict):
+        for key, value in plan.items():
+            if key == 'table' and isinstance(value, dict) and 'table_name' in value:
+                accesses.append({
+                    'table': value['table_name'],
+                    'access_type': value.get('access_type'),
+                    'key': value.get('key'),
+                    'rows_examined_per_scan': value.get('rows_examined_per_scan'),
+                    'partitions': len(value.get('partitions', [])),
+                    'derived': 'materialized_from_subquery' in value,
+                })
+            accesses.extend(table_accesses(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            accesses.extend(table_accesses(item))
+    return accesses
+
+
+def bookings_scans(accesses: List[Dict]) -> List[Dict]:
+    # Reads of the Bookings table that touch every row or every index entry
+    return [access for access in accesses
+            if access['table'] in BOOKINGS_TABLES and not access['derived']
+            and access['access_type'] in ('ALL', 'index')]
+
+
+def measure(db: Database, sql: str, params: tuple, iterations: int) -> Dict:
+    with db.get_cursor(dictionary=False) as cursor:
+        cursor.execute(f"EXPLAIN FORMAT=JSON {sql}", params)
+        plan = json.loads(cursor.fetchone()[0])
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            cursor.execute(sql, params)
+            cursor.fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+    accesses = [access for access in table_accesses(plan) if access['table'] in BOOKINGS_TABLES
+                and not access['derived']]
+    return {
+        'bookings_accesses': accesses,
+        'full_scans': len(bookings_scans(accesses)),
+        'p50_ms': round(statistics.median(timings), 3) if timings else 0.0,
+    }
+
+
+def describe(accesses: List[Dict]) -> str:
+    return ', '.join(f"{access['access_type']}/{access['key'] or '-'}/{access['rows_examined_per_scan']}"
+                     f"/{access['partitions']}p" for access in accesses) or '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--date', help='report and availability day (default: today)')
+    parser.add_argument('--vehicle-id', type=int, help='vehicle for the overlap check (default: most booked)')
+    parser.add_argument('--check', action='store_true', help='exit 1 if an "after" plan still scans Bookings')
+    parser.add_argument('--output', help='optional JSON file for the results')
+    args = parser.parse_args()
+
+    db = Database()
+    day = datetime.fromisoformat(args.date) if args.date else datetime.now().replace(
+        hour=0, minute=0, second=0, microsecond=0)
+    vehicle_id = args.vehicle_id
+    if vehicle_id is None:
+        with db.get_cursor(dictionary=False) as cursor:
+            cursor.execute("SELECT vehicle_id FROM Bookings GROUP BY vehicle_id ORDER BY COUNT(*) DESC LIMIT 1")
+            row = cursor.fetchone()
+            vehicle_id = row[0] if row else 1
+
+    results = {}
+    print(f"{'query':<20}{'phase':<8}{'p50':>10}  bookings access (type/index/rows/partitions read)")
+    for name, phases in cases(vehicle_id, day).items():
+        results[name] = {}
+        for phase, (sql, params) in phases.items():
+            result = measure(db, sql, params, args.iterations)
+            results[name][phase] = result
+            print(f"{name:<20}{phase:<8}{result['p50_ms']:>8.3f}ms  {describe(result['bookings_accesses'])}")
+
+    if args.output:
+        write_json(args.output, {'benchmark': 'query_plans', 'vehicle_id': vehicle_id, 'date': day,
+                                 'results': results})
+    if args.check and any(result['after']['full_scans'] for result in results.values()):
+        raise SystemExit("an indexed query still scans Bookings")
+
+
+if __name__ == "__main__":
+    main()
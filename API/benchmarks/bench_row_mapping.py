@@ -0,0 +1,139 @@
+'''
+Per-row cost and retained memory of turning cursor rows into API results: dictionary
+cursor rows copied into output dicts / model objects (the previous path) against tuple
+rows through the generated row mappers, with slotted and unslotted models. Rows are
+synthesized in process, so no database is needed.
+
+    python -m benchmarks.bench_row_mapping --rows 100000
+'''
+import argparse
+import gc
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+from benchmarks.common import write_json
+from models import User, VehicleCategory
+from reference_data import reference_data
+from repositories.vehicle_repository import VehicleRepository
+from row_mapper import object_mapper
+
+USER_FIELDS = ('user_id', 'email', 'first_name', 'last_name', 'password_hash', 'created_at')
+
+
+@dataclass
+class UnslottedUser:
+    email: str
+    first_name: str
+    last_name: str
+    password_hash: str
+    user_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+
+class StaticCategories:
+    # Stands in for ReferenceDataRepository so the mapper's rate lookup needs no database
+    def load(self, primary: bool = False):
+        return 0, [VehicleCategory(i, f"Category {i}", 5, Decimal('49.99')) for i in range(1, 5)], []
+
+    def get_version(self, primary: bool = False) -> int:
+        return 0
+
+
+def availability_tuples(count: int, joined: bool = False) -> List[tuple]:
+    # joined rows carry daily_rate as the VehicleCategories join used to return it
+    now = datetime(2024, 1, 1)
+    rate = (Decimal('49.99'),) if joined else ()
+    return [(i, 'available', i % 4 + 1, 'Toyota', 'Toyota Sedan', 2022, now - timedelta(days=i % 365))
+            + rate for i in range(count)]
+
+
+def user_tuples(count: int) -> List[tuple]:
+    created = datetime(2024, 1, 1)
+    return [(i, f"user{i}@example.com", f"First{i}", f"Last{i}", 'temp_hash', created) for i in range(count)]
+
+
+def as_dict_rows(rows: List[tuple], columns) -> List[Dict]:
+    # What cursor(dictionary=True) hands back
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def previous_availability(row: Dict) -> Dict:
+    return {
+        "vehicle_id": row["vehicle_id"],
+        "status": row["status"],
+        "category_id": row["category_id"],
+        "make": row["make"],
+        "model": row["model"],
+        "year": row["year"],
+        "last_maintenance": row["last_maintenance"],
+        "daily_rate": row["daily_rate"]
+    }
+
+
+def measure(make_rows: Callable[[], list], map_row: Callable, repeat: int) -> Dict:
+    # Time covers building the rows (the cursor's share) and mapping them; memory covers
+    # the fetched rows plus the mapped results, i.e. what a request holds at its peak
+    timings = []
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            results = list(map(map_row, make_rows()))
+            timings.append(time.perf_counter() - started)
+            del results
+            gc.collect()
+    finally:
+        gc.enable()
+    tracemalloc.start()
+    rows = make_rows()
+    results = list(map(map_row, rows))
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(results)
+    del rows, results
+    return {
+        'ns_per_row': round(min(timings) / count * 1e9, 1),
+        'bytes_per_row': round(current / count, 1),
+        'peak_mb': round(peak / 2 ** 20, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='optional JSON file for the results')
+    args = parser.parse_args()
+
+    fields = VehicleRepository.AVAILABILITY_FIELDS + ('daily_rate',)
+    reference_data.bind(StaticCategories())
+    reference_data.load()
+    unslotted = object_mapper(UnslottedUser, USER_FIELDS)
+    cases = {
+        'availability_dict_rows': (lambda: as_dict_rows(availability_tuples(args.rows, joined=True), fields),
+                                   previous_availability),
+        'availability_tuple_rows': (lambda: availability_tuples(args.rows),
+                                    VehicleRepository.availability_mapper()),
+        'user_dict_rows_unslotted': (lambda: as_dict_rows(user_tuples(args.rows), USER_FIELDS),
+                                     lambda row: UnslottedUser(**row)),
+        'user_tuple_rows_unslotted': (lambda: user_tuples(args.rows), unslotted),
+        'user_dict_rows_slotted': (lambda: as_dict_rows(user_tuples(args.rows), USER_FIELDS), User.from_db_dict),
+        'user_tuple_rows_slotted': (lambda: user_tuples(args.rows), object_mapper(User, USER_FIELDS)),
+    }
+
+    results = {}
+    print(f"{'case':<28}{'ns/row':>10}{'bytes/row':>12}{'peak MB':>10}")
+    for name, (make_rows, map_row) in cases.items():
+        result = measure(make_rows, map_row, args.repeat)
+        results[name] = result
+        print(f"{name:<28}{result['ns_per_row']:>10}{result['bytes_per_row']:>12}{result['peak_mb']:>10}")
+
+    if args.output:
+        write_json(args.output, {'benchmark': 'row_mapping', 'rows': args.rows, 'results': results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import asyncio
+import json
+import math
+import statistics
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    return {
+        'count': len(samples_ms),
+        'mean_ms': round(statistics.fmean(samples_ms), 4) if samples_ms else 0.0,
+        'p50_ms': round(percentile(samples_ms, 50), 4),
+        'p95_ms': round(percentile(samples_ms, 95), 4),
+        'p99_ms': round(percentile(samples_ms, 99), 4),
+        'max_ms': round(max(samples_ms), 4) if samples_ms else 0.0,
+    }
+
+
+def write_json(path: str, payload: Dict) -> None:
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2, default=str)
+
+
+class HttpTarget:
+    # Minimal HTTP/1.1 client on asyncio streams, so the load generator itself never
+    # blocks a thread and needs nothing beyond the standard library
+    def __init__(self, base_url: str):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+
+    async def request(self, method: str, path: str, body: Optional[dict] = None) -> int:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            payload = json.dumps(body).encode() if body is not None else b''
+            head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                    f"Connection: close\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n\r\n")
+            writer.write(head.encode() + payload)
+            await writer.drain()
+            status_line = await reader.readline()
+            await reader.read()
+            return int(status_line.split()[1]) if status_line else 0
+        finally:
+            writer.close()
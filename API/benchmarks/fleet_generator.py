@@ -0,0 +1,191 @@
+'''
+Deterministic synthetic data for benchmarks: users, vehicles and a booking history
+with Zipf-skewed popularity. Everything is derived from FleetSpec.seed, so two runs
+with the same spec produce identical rows.
+'''
+import argparse
+import random
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+MAKES = ["Toyota", "Honda", "Ford", "Chevrolet", "Nissan", "Hyundai", "Kia", "Volkswagen"]
+MODELS = ["Sedan", "SUV", "Truck", "Compact", "Luxury", "Van"]
+# A booking takes up to 90% of its slot plus a gap of at least an hour, so from 10 hours
+# a slot always holds its booking and a vehicle's bookings stay inside the span
+MIN_SLOT_HOURS = 10
+
+
+@dataclass
+class FleetSpec:
+    users: int = 10_000
+    vehicles: int = 10_000
+    # categories added on top of the defaults from schema.sql
+    categories: int = 0
+    bookings: int = 1_000_000
+    # Zipf exponents; 0 spreads bookings evenly, ~1 gives a realistic long tail
+    vehicle_skew: float = 1.0
+    user_skew: float = 0.8
+    # share of the fleet that is out of service
+    maintenance_ratio: float = 0.02
+    # share of historical bookings that were cancelled and soft-deleted
+    cancelled_ratio: float = 0.05
+    # every vehicle's bookings fit between history_days ago and the end of the 7 day
+    # advance-booking window; busier vehicles get shorter rentals and gaps
+    history_days: int = 730
+    horizon_days: int = 7
+    seed: int = 42
+    now: Optional[datetime] = None
+
+    def __post_init__(self):
+        self.now = (self.now or datetime.now()).replace(minute=0, second=0, microsecond=0)
+
+
+class SkewedChoice:
+    '''Draws 0-based ranks with Zipf(s) weights, shuffled so popularity is not tied to id order.'''
+
+    def __init__(self, n: int, s: float, rng: random.Random):
+        self.rng = rng
+        self._cumulative = list(accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+        self._ranks = list(range(n))
+        rng.shuffle(self._ranks)
+
+    def weights(self) -> List[float]:
+        weights = [0.0] * len(self._ranks)
+        previous = 0.0
+        for rank, cumulative in enumerate(self._cumulative):
+            weights[self._ranks[rank]] = cumulative - previous
+            previous = cumulative
+        return weights
+
+    def pick(self, rng: Optional[random.Random] = None) -> int:
+        rank = bisect_left(self._cumulative, (rng or self.rng).random() * self._cumulative[-1])
+        return self._ranks[min(rank, len(self._ranks) - 1)]
+
+
+def generate_categories(spec: FleetSpec, offset: int = 0) -> Iterator[Tuple]:
+    rng = random.Random(f"{spec.seed}-categories-{offset}")
+    for i in range(offset, offset + spec.categories):
+        capacity = rng.randint(2, 9)
+        yield (f"Category {i + 1}", capacity, Decimal(rng.randint(30, 250)),
+               f"Generated category for up to {capacity} people")
+
+
+def generate_users(spec: FleetSpec, offset: int = 0) -> Iterator[Tuple]:
+    for i in range(offset, offset + spec.users):
+        yield (f"bench{i + 1}@example.com", f"Bench{i + 1}", f"User{i + 1}", 'temp_hash')
+
+
+def generate_vehicles(spec: FleetSpec, category_ids: Sequence[int], offset: int = 0) -> Iterator[Tuple]:
+    rng = random.Random(f"{spec.seed}-vehicles-{offset}")
+    for i in range(offset, offset + spec.vehicles):
+        make = MAKES[i % len(MAKES)]
+        model = MODELS[(i // len(MAKES)) % len(MODELS)]
+        status = 'maintenance' if rng.random() < spec.maintenance_ratio else 'available'
+        yield (
+            category_ids[rng.randrange(len(category_ids))],
+            f"BN-{i + 1:08d}",
+            f"{make} {model}",
+            make,
+            spec.now.year - rng.randint(0, 5),
+            status,
+            spec.now - timedelta(days=rng.randint(1, 365)),
+        )
+
+
+def max_vehicle_bookings(spec: FleetSpec) -> int:
+    return (spec.history_days + spec.horizon_days) * 24 // MIN_SLOT_HOURS
+
+
+def booking_quotas(spec: FleetSpec, vehicle_count: int) -> List[int]:
+    # Bookings per vehicle, proportional to its Zipf weight and summing to spec.bookings.
+    # No vehicle gets more than fits in the span: the busiest are capped and the rest of
+    # the bookings are shared out again by weight among the others.
+    cap = max_vehicle_bookings(spec)
+    if spec.bookings > cap * vehicle_count:
+        raise ValueError(f"{spec.bookings} bookings do not fit on {vehicle_count} vehicles over "
+                         f"{spec.history_days + spec.horizon_days} days (at most {cap} each)")
+    weights = SkewedChoice(vehicle_count, spec.vehicle_skew, random.Random(f"{spec.seed}-quota")).weights()
+    by_weight = sorted(range(vehicle_count), key=weights.__getitem__, reverse=True)
+    quotas = [0] * vehicle_count
+    remaining, remaining_weight = spec.bookings, sum(weights)
+    capped = 0
+    while (capped < vehicle_count and remaining_weight > 0
+           and remaining * weights[by_weight[capped]] / remaining_weight >= cap):
+        quotas[by_weight[capped]] = cap
+        remaining -= cap
+        remaining_weight -= weights[by_weight[capped]]
+        capped += 1
+    uncapped = by_weight[capped:]
+    for position in uncapped:
+        quotas[position] = int(remaining * weights[position] / remaining_weight)
+    shortfall = remaining - sum(quotas[position] for position in uncapped)
+    for position in range(shortfall):
+        quotas[uncapped[position % len(uncapped)]] += 1
+    return quotas
+
+
+def generate_bookings(spec: FleetSpec, vehicles: Sequence[Tuple[int, int]], user_ids: Sequence[int],
+                      daily_rates: Dict[int, Decimal], quotas: Optional[List[int]] = None,
+                      start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple]:
+    '''
+    Yields (user_id, vehicle_id, pickup_date, return_date, total_cost, status, is_deleted)
+    for vehicles[start:stop]. Each vehicle's bookings are laid out backwards from the end of
+    the booking horizon without overlapping, so the history is something the API could
+    have produced: pending in the future, active now, completed or cancelled in the past.
+    vehicles holds (vehicle_id, category_id) pairs.
+    '''
+    quotas = quotas or booking_quotas(spec, len(vehicles))
+    stop = len(vehicles) if stop is None else stop
+    horizon_end = spec.now + timedelta(days=spec.horizon_days)
+    span_hours = (spec.history_days + spec.horizon_days) * 24
+    users = SkewedChoice(len(user_ids), spec.user_skew, random.Random(f"{spec.seed}-users"))
+    for position in range(start, stop):
+        vehicle_id, category_id = vehicles[position]
+        if not quotas[position]:
+            continue
+        rng = random.Random(f"{spec.seed}-bookings-{vehicle_id}")
+        slot_hours = span_hours / quotas[position]
+        cursor = horizon_end
+        rate = daily_rates[category_id]
+        for _ in range(quotas[position]):
+            rental_hours = max(1, min(7 * 24, int(slot_hours * rng.uniform(0.4, 0.9))))
+            gap_hours = max(1, int(slot_hours) - rental_hours)
+            return_date = cursor - timedelta(hours=rng.randint(1, gap_hours))
+            pickup_date = return_date - timedelta(hours=rental_hours)
+            cursor = pickup_date
+            days = max(1, -(-rental_hours // 24))
+            user_id = user_ids[users.pick(rng)]
+            if pickup_date > spec.now:
+                status, deleted = 'pending', False
+            elif return_date >= spec.now:
+                status, deleted = 'active', False
+            elif rng.random() < spec.cancelled_ratio:
+                status, deleted = 'cancelled', True
+            else:
+                status, deleted = 'completed', False
+            yield (user_id, vehicle_id, pickup_date, return_date, rate * days, status, deleted)
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = FleetSpec()
+    parser.add_argument('--users', type=int, default=defaults.users)
+    parser.add_argument('--vehicles', type=int, default=defaults.vehicles)
+    parser.add_argument('--bookings', type=int, default=defaults.bookings)
+    parser.add_argument('--categories', type=int, default=defaults.categories,
+                        help='categories to add on top of the schema defaults')
+    parser.add_argument('--vehicle-skew', type=float, default=defaults.vehicle_skew,
+                        help='Zipf exponent for bookings per vehicle (0 = uniform)')
+    parser.add_argument('--user-skew', type=float, default=defaults.user_skew,
+                        help='Zipf exponent for bookings per user (0 = uniform)')
+    parser.add_argument('--history-days', type=int, default=defaults.history_days)
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+
+
+def spec_from_args(args) -> FleetSpec:
+    return FleetSpec(users=args.users, vehicles=args.vehicles, bookings=args.bookings,
+                     categories=args.categories, vehicle_skew=args.vehicle_skew,
+                     user_skew=args.user_skew, history_days=args.history_days, seed=args.seed)
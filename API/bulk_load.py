@@ -0,0 +1,305 @@
+'''
+Bulk loads categories, users, vehicles and a booking history generated by
+benchmarks.fleet_generator into the .env database.
+
+    python bulk_load.py --users 100000 --vehicles 10000 --bookings 5000000 --truncate
+
+Rows are streamed in chunks through LOAD DATA LOCAL INFILE from generated CSV files
+(--method infile, needs local_infile enabled on the server) or multi-row INSERTs
+(--method insert). Bookings are generated and loaded by --workers processes, each
+owning a slice of the fleet. Non-unique secondary indexes on Bookings are dropped
+for the load and rebuilt in one ALTER TABLE afterwards, and the daily rollups are
+rebuilt once at the end (loaded bookings write no outbox events).
+'''
+import argparse
+import csv
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+import mysql.connector
+from dotenv import load_dotenv
+from benchmarks.fleet_generator import (FleetSpec, add_spec_arguments, booking_quotas,
+                                        generate_bookings, generate_categories,
+                                        generate_users, generate_vehicles, spec_from_args)
+from repositories import ReportRepository
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = {
+    'VehicleCategories': ('name', 'capacity', 'daily_rate', 'description'),
+    'Users': ('email', 'first_name', 'last_name', 'password_hash'),
+    'Vehicles': ('category_id', 'registration_number', 'model', 'make', 'year', 'status',
+                 'last_maintenance'),
+    'Bookings': ('user_id', 'vehicle_id', 'pickup_date', 'return_date', 'total_cost', 'status',
+                 'is_deleted'),
+}
+
+TRUNCATED_TABLES = ('EmailLogs', 'Invoices', 'BookingOutbox', 'DailyCategoryRollups',
+                    'Bookings', 'Vehicles', 'Users')
+
+
+def connect():
+    return mysql.connector.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+        database=os.getenv('DB_NAME'),
+        allow_local_infile=True,
+        autocommit=False
+    )
+
+
+def prepare_session(cursor) -> None:
+    # Generated rows are consistent by construction, so skip the per-row checks
+    cursor.execute("SET unique_checks = 0")
+    cursor.execute("SET foreign_key_checks = 0")
+
+
+def chunked(rows: Iterable[Tuple], size: int) -> Iterator[List[Tuple]]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def csv_value(value):
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+
+def load_chunk_infile(cursor, table: str, chunk: Sequence[Tuple]) -> None:
+    with tempfile.NamedTemporaryFile('w', newline='', suffix='.csv', delete=False) as f:
+        writer = csv.writer(f, lineterminator='\n')
+        for row in chunk:
+            writer.writerow([csv_value(value) for value in row])
+        path = f.name
+    try:
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+            f"LINES TERMINATED BY '\\n' ({', '.join(COLUMNS[table])})",
+            (path,))
+    finally:
+        os.unlink(path)
+
+
+def load_chunk_insert(cursor, table: str, chunk: Sequence[Tuple]) -> None:
+    # executemany rewrites a plain INSERT ... VALUES into one multi-row statement
+    columns = COLUMNS[table]
+    cursor.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})",
+        chunk)
+
+
+def load_rows(conn, table: str, rows: Iterable[Tuple], method: str, chunk_size: int) -> int:
+    load_chunk = load_chunk_infile if method == 'infile' else load_chunk_insert
+    cursor = conn.cursor()
+    loaded = 0
+    try:
+        for chunk in chunked(rows, chunk_size):
+            load_chunk(cursor, table, chunk)
+            conn.commit()
+            loaded += len(chunk)
+    finally:
+        cursor.close()
+    return loaded
+
+
+def local_infile_enabled(cursor) -> bool:
+    cursor.execute("SHOW GLOBAL VARIABLES LIKE 'local_infile'")
+    row = cursor.fetchone()
+    return bool(row) and str(row[1]).upper() in ('ON', '1')
+
+
+def droppable_indexes(cursor, table: str) -> Dict[str, str]:
+    '''
+    Non-unique secondary indexes that can be rebuilt after the load, mapped to their
+    column lists. Unique indexes, functional indexes and indexes backing a foreign key
+    stay in place.
+    '''
+    cursor.execute("""
+        SELECT COLUMN_NAME FROM information_schema.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        AND REFERENCED_TABLE_NAME IS NOT NULL
+    """, (table,))
+    foreign_key_columns = {row[0] for row in cursor.fetchall()}
+    cursor.execute("""
+        SELECT INDEX_NAME, NON_UNIQUE, COLUMN_NAME, SUB_PART, COLLATION
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME <> 'PRIMARY'
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+    """, (table,))
+    parts: Dict[str, List] = {}
+    for name, non_unique, column, sub_part, collation in cursor.fetchall():
+        parts.setdefault(name, []).append((non_unique, column, sub_part, collation))
+
+    indexes = {}
+    for name, columns in parts.items():
+        if not columns[0][0] or any(column is None for _, column, _, _ in columns):
+            continue
+        if columns[0][1] in foreign_key_columns:
+            continue
+        indexes[name] = ', '.join(
+            f"`{column}`" + (f"({sub_part})" if sub_part else '') + (' DESC' if collation == 'D' else '')
+            for _, column, sub_part, collation in columns)
+    return indexes
+
+
+def drop_indexes(cursor, table: str, indexes: Dict[str, str]) -> None:
+    if indexes:
+        cursor.execute(f"ALTER TABLE {table} " + ', '.join(f"DROP INDEX `{name}`" for name in indexes))
+
+
+def rebuild_indexes(cursor, table: str, indexes: Dict[str, str]) -> None:
+    # One ALTER builds every index from a single sorted scan of the loaded table
+    if indexes:
+        cursor.execute(f"ALTER TABLE {table} " + ', '.join(
+            f"ADD INDEX `{name}` ({columns})" for name, columns in indexes.items()))
+
+
+def balanced_slices(quotas: Sequence[int], parts: int) -> List[Tuple[int, int]]:
+    # Contiguous vehicle ranges carrying roughly equal numbers of bookings
+    total = sum(quotas)
+    if not total or parts < 1:
+        return []
+    slices, start, running = [], 0, 0
+    for position, quota in enumerate(quotas):
+        running += quota
+        if running >= total * (len(slices) + 1) / parts:
+            slices.append((start, position + 1))
+            start = position + 1
+    if start < len(quotas):
+        slices.append((start, len(quotas)))
+    return slices
+
+
+_worker_state: Dict = {}
+
+
+def _init_worker(spec, vehicles, user_ids, daily_rates, quotas, method, chunk_size):
+    _worker_state.update(spec=spec, vehicles=vehicles, user_ids=user_ids, daily_rates=daily_rates,
+                         quotas=quotas, method=method, chunk_size=chunk_size)
+
+
+def _load_booking_slice(bounds: Tuple[int, int]) -> int:
+    state = _worker_state
+    conn = connect()
+    try:
+        cursor = conn.cursor()
+        prepare_session(cursor)
+        cursor.close()
+        rows = generate_bookings(state['spec'], state['vehicles'], state['user_ids'],
+                                 state['daily_rates'], state['quotas'], *bounds)
+        return load_rows(conn, 'Bookings', rows, state['method'], state['chunk_size'])
+    finally:
+        conn.close()
+
+
+def report(label: str, rows: int, started: float) -> None:
+    elapsed = time.perf_counter() - started
+    print(f"{label:<12}{rows:>12,} rows in {elapsed:8.1f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s)")
+
+
+def load(spec: FleetSpec, method: str = 'infile', workers: int = 0, chunk_size: int = 50_000,
+         truncate: bool = False, keep_indexes: bool = False) -> Dict[str, int]:
+    workers = workers or os.cpu_count() or 1
+    loaded = {}
+    conn = connect()
+    try:
+        cursor = conn.cursor()
+        prepare_session(cursor)
+        if method == 'infile' and not local_infile_enabled(cursor):
+            logger.warning("local_infile is disabled on the server, falling back to multi-row INSERT")
+            method = 'insert'
+
+        if truncate:
+            for table in TRUNCATED_TABLES:
+                cursor.execute(f"TRUNCATE TABLE {table}")
+            # TRUNCATE fires no delete triggers, so running servers would keep the old fleet
+            cursor.execute("UPDATE ReferenceDataVersion SET version = version + 1 WHERE id = 1")
+            conn.commit()
+
+        for table, generate in (('VehicleCategories', generate_categories), ('Users', generate_users)):
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            offset = cursor.fetchone()[0]
+            started = time.perf_counter()
+            loaded[table] = load_rows(conn, table, generate(spec, offset), method, chunk_size)
+            report(table, loaded[table], started)
+
+        cursor.execute("SELECT category_id, daily_rate FROM VehicleCategories ORDER BY category_id")
+        daily_rates: Dict[int, Decimal] = dict(cursor.fetchall())
+        if not daily_rates:
+            raise RuntimeError("VehicleCategories is empty; run python initialize_schema.py first")
+        cursor.execute("SELECT COUNT(*) FROM Vehicles")
+        offset = cursor.fetchone()[0]
+        started = time.perf_counter()
+        loaded['Vehicles'] = load_rows(conn, 'Vehicles', generate_vehicles(spec, list(daily_rates), offset),
+                                       method, chunk_size)
+        report('Vehicles', loaded['Vehicles'], started)
+
+        if spec.bookings:
+            cursor.execute("SELECT user_id FROM Users ORDER BY user_id")
+            user_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute("SELECT vehicle_id, category_id FROM Vehicles ORDER BY vehicle_id")
+            vehicles = cursor.fetchall()
+            quotas = booking_quotas(spec, len(vehicles))
+
+            indexes = {} if keep_indexes else droppable_indexes(cursor, 'Bookings')
+            drop_indexes(cursor, 'Bookings', indexes)
+            try:
+                started = time.perf_counter()
+                # Several slices per worker so one busy vehicle range does not leave the rest idle
+                slices = balanced_slices(quotas, workers * 4)
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                         initargs=(spec, vehicles, user_ids, daily_rates, quotas,
+                                                   method, chunk_size)) as executor:
+                    loaded['Bookings'] = sum(executor.map(_load_booking_slice, slices))
+                report('Bookings', loaded['Bookings'], started)
+            finally:
+                started = time.perf_counter()
+                rebuild_indexes(cursor, 'Bookings', indexes)
+                if indexes:
+                    print(f"{'indexes':<12}{len(indexes):>12,} rebuilt in {time.perf_counter() - started:8.1f}s")
+
+        for table in ('Users', 'Vehicles', 'Bookings'):
+            cursor.execute(f"ANALYZE TABLE {table}")
+            cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+
+    if loaded.get('Bookings'):
+        started = time.perf_counter()
+        report('rollups', ReportRepository().rebuild_rollups(), started)
+    return loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_spec_arguments(parser)
+    parser.add_argument('--method', choices=('infile', 'insert'), default='infile')
+    parser.add_argument('--workers', type=int, default=0, help='booking loader processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=50_000, help='rows per LOAD DATA file or INSERT')
+    parser.add_argument('--truncate', action='store_true',
+                        help='empty the booking, vehicle and user tables first')
+    parser.add_argument('--keep-indexes', action='store_true',
+                        help='load Bookings with its secondary indexes in place')
+    args = parser.parse_args()
+    load(spec_from_args(args), args.method, args.workers, args.chunk_size, args.truncate, args.keep_indexes)
+
+
+if __name__ == "__main__":
+    main()
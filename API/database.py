@@ -1,32 +1,66 @@
 import mysql.connector
-from mysql.connector.pooling import MySQLConnectionPool
 from mysql.connector import Error
 from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict
 import os
+import threading
+import time
 from dotenv import load_dotenv
 import logging
+import metrics
+from metrics import InstrumentedCursor
+from pool import ConnectionPool
+from replica import ReplicaRouter
+from slow_query_log import slow_query_log
+from statement_cache import PreparedCursor, StatementCache
 
 load_dotenv()
 
+# Set once the current request (or task) has written through the primary, so its own
+# read-only queries stay on the primary instead of a replica that may not have the write yet
+_primary_pinned: ContextVar[bool] = ContextVar('primary_pinned', default=False)
+# Whether the last cursor opened in this context was served by the replica
+_served_by_replica: ContextVar[bool] = ContextVar('served_by_replica', default=False)
+
 class Database:
     _instance = None
     _pool = None
+    _replica = None
+    _read_your_writes = os.getenv('DB_READ_YOUR_WRITES', 'true').lower() == 'true'
+    _statement_cache_size = int(os.getenv('DB_STATEMENT_CACHE_SIZE', 64))
+    _pool_lock = threading.Lock()
+    # Pools inherited from the parent process; see _reset_after_fork
+    _inherited_pools = []
 
     def __new__(cls):
-        logging.info("Database singleton accessed")
+        logging.debug("Database singleton accessed")
         if not cls._instance:
             cls._instance = super().__new__(cls)
-            if not cls._pool:
-                cls._initialize_pool()
         return cls._instance
 
+    @classmethod
+    def _ensure_pool(cls):
+        # The pool is opened by the first query rather than at import, so a prefork server
+        # can import the app in its master and each worker still connects after the fork
+        if cls._pool is None:
+            with cls._pool_lock:
+                if cls._pool is None:
+                    cls._initialize_pool()
+
     @classmethod
     def _initialize_pool(cls):
         try:
-            cls._pool = MySQLConnectionPool(
-                pool_name="mypool",
-                pool_size=5,
-                pool_reset_session=True,
+            cls._pool = ConnectionPool(
+                min_size=int(os.getenv('DB_POOL_MIN_SIZE', 5)),
+                max_size=int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+                max_overflow=int(os.getenv('DB_POOL_MAX_OVERFLOW', 5)),
+                timeout=float(os.getenv('DB_POOL_TIMEOUT', 5)),
+                idle_timeout=float(os.getenv('DB_POOL_IDLE_TIMEOUT', 300)),
+                validate_after=float(os.getenv('DB_POOL_VALIDATE_AFTER', 5)),
+                reset_session=os.getenv('DB_POOL_RESET_SESSION', 'true').lower() == 'true',
+                on_reset=cls._invalidate_statements,
+                consume_results=True,
                 host=os.getenv('DB_HOST', 'localhost'),
                 user=os.getenv('DB_USER'),
                 password=os.getenv('DB_PASSWORD'),
@@ -34,28 +68,151 @@ class Database:
             )
             logging.info("Connection pool initialized successfully.")
         except Error as e:
-            logging.error(f"Error creating connection pool: {e}")
+            logging.error("Error creating connection pool: %s", e)
             raise
+        # EXPLAINs for the slow query log run on their own pooled connection
+        slow_query_log.bind(cls._pool.get_connection, cls._pool.release)
+        if os.getenv('DB_REPLICA_HOST'):
+            cls._initialize_replica()
+
+    @classmethod
+    def _initialize_replica(cls):
+        # A replica that cannot be reached at startup only costs read offload, not the app
+        try:
+            pool = ConnectionPool(
+                min_size=int(os.getenv('DB_REPLICA_POOL_MIN_SIZE', 2)),
+                max_size=int(os.getenv('DB_REPLICA_POOL_MAX_SIZE', os.getenv('DB_POOL_MAX_SIZE', 10))),
+                max_overflow=int(os.getenv('DB_POOL_MAX_OVERFLOW', 5)),
+                timeout=float(os.getenv('DB_REPLICA_POOL_TIMEOUT', 1)),
+                idle_timeout=float(os.getenv('DB_POOL_IDLE_TIMEOUT', 300)),
+                validate_after=float(os.getenv('DB_POOL_VALIDATE_AFTER', 5)),
+                reset_session=os.getenv('DB_POOL_RESET_SESSION', 'true').lower() == 'true',
+                on_reset=cls._invalidate_statements,
+                consume_results=True,
+                host=os.getenv('DB_REPLICA_HOST'),
+                port=int(os.getenv('DB_REPLICA_PORT', 3306)),
+                user=os.getenv('DB_REPLICA_USER', os.getenv('DB_USER')),
+                password=os.getenv('DB_REPLICA_PASSWORD', os.getenv('DB_PASSWORD')),
+                database=os.getenv('DB_REPLICA_NAME', os.getenv('DB_NAME'))
+            )
+            cls._replica = ReplicaRouter(
+                pool,
+                max_lag=float(os.getenv('DB_REPLICA_MAX_LAG', 5)),
+                check_interval=float(os.getenv('DB_REPLICA_LAG_CHECK_INTERVAL', 1))
+            )
+            logging.info("Replica connection pool initialized successfully.")
+        except Error as e:
+            logging.error("Error creating replica connection pool, reads stay on primary: %s", e)
+            cls._replica = None
+
+    @classmethod
+    def _reset_after_fork(cls):
+        # A forked child must not use the parent's sockets. They are kept referenced rather
+        # than closed, since closing (or collecting) them would shut down the parent's
+        # connections too; the child opens its own pool on its first query.
+        cls._inherited_pools.extend(pool for pool in (
+            cls._pool, cls._replica.pool if cls._replica else None) if pool is not None)
+        cls._pool = None
+        cls._replica = None
+        cls._pool_lock = threading.Lock()
+
+    @classmethod
+    def close_pool(cls):
+        # Closes idle connections when a worker exits; connections still checked out are
+        # closed as they are released
+        with cls._pool_lock:
+            pools = [pool for pool in (cls._pool, cls._replica.pool if cls._replica else None) if pool]
+            cls._pool = None
+            cls._replica = None
+        for pool in pools:
+            pool.close()
+
+    @staticmethod
+    def pin_primary() -> None:
+        _primary_pinned.set(True)
+
+    @staticmethod
+    def served_by_replica() -> bool:
+        return _served_by_replica.get()
+
+    @staticmethod
+    def reset_routing() -> None:
+        # Called at the start of every request; worker threads are reused across requests
+        _primary_pinned.set(False)
+
+    @staticmethod
+    def _invalidate_statements(conn) -> None:
+        cache = getattr(conn, 'statement_cache', None)
+        if cache is not None:
+            cache.invalidate(close=False)
+
+    def _statement_cache_for(self, conn) -> StatementCache:
+        cache = getattr(conn, 'statement_cache', None)
+        if cache is None:
+            cache = StatementCache(conn, self._statement_cache_size)
+            conn.statement_cache = cache
+        return cache
 
     @contextmanager
-    def get_cursor(self, dictionary=True):
+    def get_cursor(self, dictionary=True, prepared=False, commit=True, readonly=False, buffered=None):
         conn = None
         cursor = None
+        replica = None
+        pool = None
         try:
-            conn = self._pool.get_connection()
-            cursor = conn.cursor(dictionary=dictionary)
+            if self._pool is None:
+                self._ensure_pool()
+            if readonly and self._replica is not None:
+                started = time.perf_counter()
+                conn = self._replica.acquire(pinned=_primary_pinned.get())
+                if conn is not None:
+                    replica = self._replica
+                    metrics.registry.observe_pool_wait('replica', time.perf_counter() - started)
+            if conn is None:
+                started = time.perf_counter()
+                pool = self._pool
+                conn = pool.get_connection()
+                metrics.registry.observe_pool_wait('primary', time.perf_counter() - started)
+                if not readonly and self._read_your_writes:
+                    _primary_pinned.set(True)
+            if prepared and self._statement_cache_size > 0:
+                cursor = PreparedCursor(conn, self._statement_cache_for(conn), dictionary)
+            elif buffered is not None:
+                # buffered=False streams rows from the server as they are fetched
+                cursor = conn.cursor(dictionary=dictionary, buffered=buffered)
+            else:
+                cursor = conn.cursor(dictionary=dictionary)
+            if metrics.registry.enabled or slow_query_log.enabled:
+                cursor = InstrumentedCursor(cursor, metrics.registry,
+                                            slow_query_log if slow_query_log.enabled else None)
+            _served_by_replica.set(replica is not None)
             yield cursor
-            conn.commit()
+            if commit:
+                conn.commit()
         except Error as e:
             if conn:
                 conn.rollback()
-            logging.error(f"Database error: {e}")
+            logging.error("Database error: %s", e)
             raise e
+        except BaseException:
+            # Sessions are no longer reset on release, so never hand back an open transaction.
+            # BaseException also covers GeneratorExit from an abandoned streaming response.
+            if conn:
+                conn.rollback()
+            raise
         finally:
             if cursor:
                 cursor.close()
-            if conn:
-                conn.close()
+            if replica:
+                replica.release(conn)
+            elif conn:
+                pool.release(conn)
+
+    def pool_stats(self) -> Dict:
+        return self._pool.stats() if self._pool else {}
+
+    def replica_stats(self) -> Dict:
+        return self._replica.stats() if self._replica else {}
 
     def test_connection(self):
         try:
@@ -63,5 +220,8 @@ class Database:
                 cursor.execute("SELECT 1")
                 return True
         except Error as e:
-            logging.error(f"Connection pool test failed: {e}")
-            return False
\ No newline at end of file
+            logging.error("Connection pool test failed: %s", e)
+            return False
+
+
+os.register_at_fork(after_in_child=Database._reset_after_fork)
\ No newline at end of file
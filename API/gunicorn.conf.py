@@ -0,0 +1,146 @@
+import glob
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from dotenv import load_dotenv
+
+'''
+Production server settings: gunicorn -c gunicorn.conf.py wsgi:app
+
+WEB_WORKERS processes (default one per core) each serve WEB_THREADS requests at a time
+(gthread workers). Every worker opens its own connection pool after the fork, sized to
+its thread count, and the outbox workers run once in a separate process instead of in
+every web worker. SIGHUP replaces the workers one by one and SIGTERM stops accepting
+connections and lets in-flight requests finish for up to WEB_GRACEFUL_TIMEOUT seconds.
+
+Workers write their metrics to METRICS_MULTIPROC_DIR (a temporary directory unless set) so
+/metrics covers all of them, each process writes its own slow query log file, and with more
+than one worker the availability result cache is off unless AVAILABILITY_CACHE_SIZE is set.
+'''
+
+load_dotenv()
+
+# With USER_CACHE_SHARED=true this maps the shared user cache in the master, before the
+# workers are forked, so they all inherit the same memory
+import user_cache
+
+bind = os.getenv('WEB_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.getenv('WEB_THREADS', 8))
+worker_class = 'gthread'
+timeout = int(os.getenv('WEB_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('WEB_KEEPALIVE', 5))
+# Recycles workers after this many requests (0 never), jittered so they do not restart together
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('WEB_MAX_REQUESTS_JITTER', 0))
+# Importing the app once in the master shares its memory with the workers; the pool is
+# still opened per worker after the fork
+preload_app = os.getenv('WEB_PRELOAD', 'false').lower() == 'true'
+
+OUTBOX_WORKERS = int(os.getenv('OUTBOX_WORKERS', 2))
+
+
+def worker_pool_settings(threads: int, environ) -> dict:
+    # A request holds at most one connection at a time, so a worker needs one per thread;
+    # DB_POOL_MAX_OVERFLOW still covers extras such as the slow query log's EXPLAINs
+    threads = max(1, threads)
+    return {
+        'DB_POOL_MAX_SIZE': str(threads),
+        'DB_POOL_MIN_SIZE': str(min(int(environ.get('DB_POOL_MIN_SIZE', 5)), threads)),
+        'DB_REPLICA_POOL_MAX_SIZE': str(threads),
+        'DB_REPLICA_POOL_MIN_SIZE': str(min(int(environ.get('DB_REPLICA_POOL_MIN_SIZE', 2)), threads)),
+        'OUTBOX_WORKERS': '0',
+    }
+
+
+def outbox_environ(outbox_workers: int, environ) -> dict:
+    env = dict(environ)
+    env.update({
+        'OUTBOX_WORKERS': str(outbox_workers),
+        'DB_POOL_MIN_SIZE': '1',
+        'DB_POOL_MAX_SIZE': str(outbox_workers + 1),
+    })
+    return env
+
+
+def multiprocess_settings(workers: int, environ) -> dict:
+    settings = {}
+    if not environ.get('METRICS_MULTIPROC_DIR'):
+        settings['METRICS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='vehicle-rental-metrics-')
+    # Each worker's cache only sees its own writes, so a booking made on one worker leaves
+    # the others answering from stale results until the TTL runs out
+    if workers > 1 and 'AVAILABILITY_CACHE_SIZE' not in environ:
+        settings['AVAILABILITY_CACHE_SIZE'] = '0'
+    log_file = environ.get('SLOW_QUERY_LOG_FILE', 'slow_queries.log')
+    if '{pid}' not in log_file:
+        root, ext = os.path.splitext(log_file)
+        settings['SLOW_QUERY_LOG_FILE'] = root + '.{pid}' + ext
+    return settings
+
+
+# Read by the workers (and the app when preloaded) when their pool is first opened
+os.environ.update(worker_pool_settings(threads, os.environ))
+_multiprocess = multiprocess_settings(workers, os.environ)
+os.environ.update(_multiprocess)
+
+
+def when_ready(server):
+    from database import Database
+    from reference_data import reference_data
+    # A preloaded app may have queried the database in the master; close that pool before
+    # any worker is forked so no worker inherits its sockets. Each worker runs its own
+    # reference data refresher, so the master's is stopped too.
+    reference_data.stop()
+    Database.close_pool()
+    overflow = int(os.getenv('DB_POOL_MAX_OVERFLOW', 5))
+    server.log.info("%d workers x %d threads, up to %d primary connections", workers, threads,
+                    workers * (threads + overflow) + (OUTBOX_WORKERS + 1 + overflow if OUTBOX_WORKERS > 0 else 0))
+    if workers > 1 and os.getenv('AVAILABILITY_ENGINE', 'sql') in ('index', 'bitmap'):
+        server.log.warning("AVAILABILITY_ENGINE=%s keeps an index per worker that only sees that "
+                           "worker's writes; use the sql engine with more than one worker",
+                           os.getenv('AVAILABILITY_ENGINE'))
+    if workers > 1 and int(os.getenv('AVAILABILITY_CACHE_SIZE', 0)) > 0 and \
+            float(os.getenv('AVAILABILITY_CACHE_TTL', 5)) > 0:
+        server.log.warning("The availability cache is per worker: a booking only evicts results in the "
+                           "worker that took it, the others serve stale results for up to "
+                           "AVAILABILITY_CACHE_TTL seconds")
+    # Files left by an earlier run in a configured directory would be added to this one's
+    for path in glob.glob(os.path.join(os.environ['METRICS_MULTIPROC_DIR'], '*.json')):
+        os.remove(path)
+    if OUTBOX_WORKERS > 0:
+        server.outbox = subprocess.Popen([sys.executable, 'run_outbox_workers.py'],
+                                         cwd=os.path.dirname(os.path.abspath(__file__)),
+                                         env=outbox_environ(OUTBOX_WORKERS, os.environ))
+        server.log.info("Started outbox process %s", server.outbox.pid)
+
+
+def worker_exit(server, worker):
+    import metrics
+    from database import Database
+    # Whatever was observed since the last periodic write
+    if metrics.registry.multiproc_dir:
+        metrics.registry.flush()
+    Database.close_pool()
+
+
+def child_exit(server, worker):
+    import metrics
+    metrics.mark_process_dead(worker.pid, os.environ['METRICS_MULTIPROC_DIR'])
+
+
+def on_exit(server):
+    outbox = getattr(server, 'outbox', None)
+    if outbox is not None and outbox.poll() is None:
+        outbox.terminate()
+        try:
+            outbox.wait(graceful_timeout)
+        except subprocess.TimeoutExpired:
+            logging.getLogger(__name__).warning("Outbox process did not stop, killing it")
+            outbox.kill()
+    if 'METRICS_MULTIPROC_DIR' in _multiprocess:
+        shutil.rmtree(_multiprocess['METRICS_MULTIPROC_DIR'], ignore_errors=True)
@@ -2,9 +2,31 @@ import mysql.connector
 from mysql.connector import Error
 import os
 from dotenv import load_dotenv
+import partitions
 
 load_dotenv()
 
+def split_statements(script):
+    # Honours DELIMITER lines so stored procedure bodies reach the server in one piece
+    statements = []
+    delimiter = ';'
+    current = []
+    for line in script.splitlines():
+        stripped = line.strip()
+        if stripped.upper().startswith('DELIMITER '):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        if not current and (not stripped or stripped.startswith('--')):
+            continue
+        current.append(line)
+        if stripped.endswith(delimiter):
+            statement = '\n'.join(current).strip()
+            statements.append(statement[:-len(delimiter)].strip())
+            current = []
+    if ''.join(current).strip():
+        statements.append('\n'.join(current).strip())
+    return [stmt for stmt in statements if stmt]
+
 def initialize_schema():
     conn = None
     try:
@@ -27,7 +49,7 @@ def initialize_schema():
         with open('schema.sql', 'r') as f:
             schema_script = f.read()
 
-        statements = [stmt.strip() for stmt in schema_script.split(';') if stmt.strip()]
+        statements = split_statements(schema_script)
 
         statements = [stmt for stmt in statements if not stmt.startswith(('CREATE DATABASE', 'USE'))]
 
@@ -39,8 +61,14 @@ def initialize_schema():
                 print(f"Error details: {stmt_error}")
                 raise
 
+        added = partitions.ensure_partitions(
+            cursor,
+            months_ahead=int(os.getenv('BOOKING_PARTITION_MONTHS_AHEAD', 3)),
+            history_months=int(os.getenv('BOOKING_PARTITION_HISTORY_MONTHS', 24)))
+
         conn.commit()
         print(f"Database {database_name} created and schema initialized successfully.")
+        print(f"Created {len(added['Bookings'])} monthly partitions for Bookings and EmailLogs.")
 
     except Error as e:
         print(f"Error initializing schema: {e}")
@@ -0,0 +1,103 @@
+import dataclasses
+import os
+from datetime import date
+from decimal import Decimal
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, Optional
+import orjson
+from flask.json.provider import JSONProvider
+from werkzeug.http import http_date
+from models import Booking, User, Vehicle
+
+'''
+orjson-backed JSON provider, installed on the Flask app and the Quart app (which share
+Flask's provider interface). dict, list, datetime, date and Enum values are encoded
+natively by orjson, datetimes as ISO 8601 unless http_dates is set, which keeps Flask's
+RFC 822 dates for clients that parse them. Decimal is written as a string, as Flask's
+default provider does, so amounts keep their precision. Dataclass models go through a
+serializer compiled once per class instead of dataclasses.asdict on every call.
+'''
+
+_serializers: Dict[type, Callable[[Any], dict]] = {}
+
+
+def compile_serializer(cls: type, exclude: Iterable[str] = ()) -> Callable[[Any], dict]:
+    names = tuple(field.name for field in dataclasses.fields(cls) if field.name not in exclude)
+    if len(names) == 1:
+        name = names[0]
+        return lambda obj: {name: getattr(obj, name)}
+    # attrgetter reads every field in one C call; orjson then encodes the values natively
+    getter = attrgetter(*names)
+    return lambda obj: dict(zip(names, getter(obj)))
+
+
+def register_model(cls: type, exclude: Iterable[str] = ()) -> None:
+    _serializers[cls] = compile_serializer(cls, exclude)
+
+
+register_model(User, exclude=('password_hash',))
+register_model(Vehicle)
+register_model(Booking)
+
+
+def default(obj: Any) -> Any:
+    # Called by orjson only for types it cannot encode itself
+    serializer = _serializers.get(type(obj))
+    if serializer is not None:
+        return serializer(obj)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        register_model(type(obj))
+        return _serializers[type(obj)](obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def http_date_default(obj: Any) -> Any:
+    # Dates as Flask's default provider writes them, e.g. "Fri, 01 Mar 2024 09:30:00 GMT"
+    if isinstance(obj, date):
+        return http_date(obj)
+    return default(obj)
+
+
+class FastJSONProvider(JSONProvider):
+    # Key order is left as built; Flask's provider sorts keys on every response
+    sort_keys = False
+    compact: Optional[bool] = None
+    mimetype = 'application/json'
+    # Dataclasses are passed to default() so the compiled serializers (and their exclusions) apply
+    options = orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+    http_dates = False
+
+    def dumpb(self, obj: Any, indent: bool = False) -> bytes:
+        options = self.options
+        encode = default
+        if self.http_dates:
+            options |= orjson.OPT_PASSTHROUGH_DATETIME
+            encode = http_date_default
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=encode, option=options)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return self.dumpb(obj, bool(kwargs.get('indent'))).decode()
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        # Builds the body from orjson's bytes directly rather than via an intermediate str
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self.dumpb(obj, indent) + b'\n', mimetype=self.mimetype)
+
+
+def install_json_provider(app) -> None:
+    # JSON_PROVIDER=flask keeps the framework's default provider
+    if os.getenv('JSON_PROVIDER', 'orjson') == 'orjson':
+        app.json = FastJSONProvider(app)
+        app.json.http_dates = os.getenv('JSON_DATETIME_FORMAT', 'iso') == 'http'
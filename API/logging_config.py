@@ -0,0 +1,103 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from typing import Dict, Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional['DroppingQueueHandler'] = None
+_lock = threading.Lock()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    '''
+    Hands records to the listener thread without blocking the caller. When the queue
+    is full the record is dropped and counted rather than stalling the request thread.
+    '''
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self._dropped += 1
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+
+def configure_logging(level: Optional[str] = None, log_file: Optional[str] = None,
+                      queue_size: Optional[int] = None) -> None:
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is not None:
+            return
+
+        level = level or os.getenv('LOG_LEVEL', 'INFO')
+        log_file = log_file or os.getenv('LOG_FILE', 'vehicle_rental.log')
+        queue_size = queue_size or int(os.getenv('LOG_QUEUE_SIZE', 10000))
+
+        formatter = logging.Formatter(LOG_FORMAT)
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setFormatter(formatter)
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+
+        _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+        _listener = logging.handlers.QueueListener(
+            _queue_handler.queue, file_handler, console_handler, respect_handler_level=True)
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_queue_handler)
+        root.setLevel(level.upper())
+
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener = None
+        _queue_handler = None
+
+
+def _restart_after_fork() -> None:
+    # The listener thread does not survive a fork; a child gets a fresh queue and
+    # listener writing to the same handlers
+    global _listener, _lock
+    _lock = threading.Lock()
+    if _listener is None:
+        return
+    _queue_handler.queue = queue.Queue(maxsize=_queue_handler.queue.maxsize)
+    _listener = logging.handlers.QueueListener(
+        _queue_handler.queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def logging_stats() -> Dict[str, int]:
+    handler = _queue_handler
+    if handler is None:
+        return {'queued': 0, 'dropped': 0}
+    return {'queued': handler.queue.qsize(), 'dropped': handler.dropped}
@@ -0,0 +1,451 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from flask import request
+
+'''
+In-process request and query metrics, rendered in the Prometheus text format on /metrics.
+Requests are timed by Flask before/after hooks, statements by the InstrumentedCursor that
+Database.get_cursor hands out, and the database and pool time of each statement is also
+charged to the request it ran under, so a slow route can be split into pool wait, SQL and
+everything else (validation, serialization).
+
+Each process keeps its own series. With multiproc_dir set (gunicorn) every worker also
+writes them to <multiproc_dir>/<pid>.json at most once per flush_interval, and /metrics
+adds up the files of all workers, so a scrape shows the whole server whichever worker
+answers it. mark_process_dead, called by the master when a worker exits, folds that
+worker's counters and histograms into dead.json so the totals never go backwards, and
+drops its pool gauges.
+'''
+
+# Upper bounds in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_LIST = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def normalize_sql(sql: str) -> str:
+    # Statements differing only in literals or IN/VALUES list length share one series
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql.replace('%s', '?'))
+    sql = _PLACEHOLDER_LIST.sub('(...)', sql)
+    sql = _REPEATED_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, counts: List[int], total: float, count: int) -> None:
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, counts)]
+        self.sum += total
+        self.count += count
+
+
+class RequestTimings:
+    __slots__ = ('started', 'db_seconds', 'pool_wait_seconds', 'queries')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        self.queries = 0
+
+
+_current_request: ContextVar[Optional[RequestTimings]] = ContextVar('request_timings', default=None)
+
+
+_HISTOGRAMS = ('requests', 'request_db', 'request_pool_wait', 'queries', 'pool_wait')
+_COUNTERS = ('query_rows', 'query_errors')
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = True, max_statements: int = 500,
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS, multiproc_dir: Optional[str] = None,
+                 flush_interval: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.enabled = enabled
+        # Caps label cardinality; statements beyond it are counted under "other"
+        self.max_statements = max_statements
+        self.buckets = buckets
+        self.multiproc_dir = multiproc_dir
+        self.flush_interval = flush_interval
+        self._clock = clock
+        self._flushed_at: Optional[float] = None
+        # Held while writing this process's file, so two threads never write it at once
+        self._flush_lock = threading.Lock()
+        # Returns {pool: stats} for the pool gauges written with each flush
+        self.pool_source: Optional[Callable[[], Dict[str, Dict]]] = None
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, str], Histogram] = {}
+        self._request_db: Dict[Tuple[str, str], Histogram] = {}
+        self._request_pool_wait: Dict[Tuple[str, str], Histogram] = {}
+        self._queries: Dict[str, Histogram] = {}
+        self._query_rows: Dict[str, int] = {}
+        self._query_errors: Dict[str, int] = {}
+        self._pool_wait: Dict[str, Histogram] = {}
+
+    def start_request(self) -> None:
+        _current_request.set(RequestTimings())
+
+    def finish_request(self, method: str, route: str, status: int) -> None:
+        timings = _current_request.get()
+        if timings is None:
+            return
+        _current_request.set(None)
+        elapsed = time.perf_counter() - timings.started
+        with self._lock:
+            self._histogram(self._requests, (method, route, str(status))).observe(elapsed)
+            self._histogram(self._request_db, (method, route)).observe(timings.db_seconds)
+            self._histogram(self._request_pool_wait, (method, route)).observe(timings.pool_wait_seconds)
+        if self.multiproc_dir:
+            self._maybe_flush()
+
+    def observe_query(self, statement: str, seconds: float, failed: bool = False) -> None:
+        if not self.enabled:
+            return
+        timings = _current_request.get()
+        if timings is not None:
+            timings.db_seconds += seconds
+            timings.queries += 1
+        with self._lock:
+            statement = self._statement_key(statement)
+            self._histogram(self._queries, statement).observe(seconds)
+            if failed:
+                self._query_errors[statement] = self._query_errors.get(statement, 0) + 1
+
+    def observe_rows(self, statement: str, rows: int) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            statement = self._statement_key(statement)
+            self._query_rows[statement] = self._query_rows.get(statement, 0) + rows
+
+    def observe_pool_wait(self, pool: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        timings = _current_request.get()
+        if timings is not None:
+            timings.pool_wait_seconds += seconds
+        with self._lock:
+            self._histogram(self._pool_wait, pool).observe(seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            for series in (self._requests, self._request_db, self._request_pool_wait, self._queries,
+                           self._query_rows, self._query_errors, self._pool_wait):
+                series.clear()
+
+    def snapshot(self) -> Dict:
+        # JSON-friendly copy of every series; keys are written as lists of label values
+        with self._lock:
+            data = {name: [[_key_list(key), histogram.counts, histogram.sum, histogram.count]
+                           for key, histogram in getattr(self, '_' + name).items()]
+                    for name in _HISTOGRAMS}
+            data.update({name: [[_key_list(key), value] for key, value in getattr(self, '_' + name).items()]
+                         for name in _COUNTERS})
+        return data
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            self._write()
+
+    def _maybe_flush(self) -> None:
+        # A request that finds another thread writing skips the flush instead of waiting on it
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            if self._flushed_at is None or self._clock() - self._flushed_at >= self.flush_interval:
+                self._write()
+        finally:
+            self._flush_lock.release()
+
+    def _write(self) -> None:
+        # Written to a temporary file and renamed, so a scrape never reads half a file
+        self._flushed_at = self._clock()
+        data = self.snapshot()
+        try:
+            data['pools'] = self.pool_source() if self.pool_source else {}
+            path = os.path.join(self.multiproc_dir, f'{os.getpid()}.json')
+            with open(path + '.tmp', 'w') as f:
+                json.dump(data, f)
+            os.replace(path + '.tmp', path)
+        except Exception as e:
+            logging.getLogger(__name__).warning("Could not write metrics for process %s: %s", os.getpid(), e)
+
+    def _histogram(self, series: Dict, key) -> Histogram:
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(self.buckets)
+        return histogram
+
+    def _statement_key(self, statement: str) -> str:
+        if statement in self._queries or len(self._queries) < self.max_statements:
+            return statement
+        return 'other'
+
+    def render(self, pools: Optional[Dict[str, Dict]] = None) -> str:
+        if self.multiproc_dir:
+            series, pools = self._collect(pools)
+        else:
+            with self._lock:
+                series = {name: dict(getattr(self, '_' + name)) for name in _HISTOGRAMS + _COUNTERS}
+        lines: List[str] = []
+        _histogram_lines(lines, 'http_request_duration_seconds', 'Request latency by route',
+                         ('method', 'route', 'status'), series['requests'])
+        _histogram_lines(lines, 'http_request_db_seconds', 'SQL time spent per request',
+                         ('method', 'route'), series['request_db'])
+        _histogram_lines(lines, 'http_request_pool_wait_seconds', 'Connection checkout wait per request',
+                         ('method', 'route'), series['request_pool_wait'])
+        _histogram_lines(lines, 'db_query_duration_seconds', 'Statement execution time by normalized SQL',
+                         ('statement',), series['queries'])
+        _counter_lines(lines, 'db_query_rows_total', 'Rows fetched by normalized SQL',
+                       ('statement',), series['query_rows'])
+        _counter_lines(lines, 'db_query_errors_total', 'Failed statements by normalized SQL',
+                       ('statement',), series['query_errors'])
+        _histogram_lines(lines, 'db_pool_wait_seconds', 'Connection checkout wait',
+                         ('pool',), series['pool_wait'])
+        lines.append('# HELP db_pool_connections Pool connections by state')
+        lines.append('# TYPE db_pool_connections gauge')
+        for pool, stats in (pools or {}).items():
+            for state in ('in_use', 'idle', 'waiting', 'total'):
+                if state in stats:
+                    lines.append(f'db_pool_connections{_labels(("pool", "state"), (pool, state))} {stats[state]}')
+        return '\n'.join(lines) + '\n'
+
+    def _collect(self, pools: Optional[Dict[str, Dict]]) -> Tuple[Dict, Dict]:
+        # This process's live series plus the last flush of every other worker and the
+        # totals of the dead ones; pool gauges are summed over the live workers
+        series = {name: {} for name in _HISTOGRAMS + _COUNTERS}
+        pool_totals: Dict[str, Dict] = {}
+        _merge_snapshot(series, self.snapshot(), self.buckets)
+        _add_pools(pool_totals, pools or {})
+        own = f'{os.getpid()}.json'
+        for name in _snapshot_files(self.multiproc_dir):
+            if name == own:
+                continue
+            data = _read_snapshot(os.path.join(self.multiproc_dir, name))
+            if data is not None:
+                _merge_snapshot(series, data, self.buckets)
+                _add_pools(pool_totals, data.get('pools', {}))
+        return series, pool_totals
+
+
+def _key_list(key) -> List[str]:
+    return list(key) if isinstance(key, tuple) else [key]
+
+
+def _merge_snapshot(series: Dict, data: Dict, buckets: Tuple[float, ...]) -> None:
+    for name in _HISTOGRAMS:
+        for key, counts, total, count in data.get(name, []):
+            key = tuple(key) if len(key) > 1 else key[0]
+            histogram = series[name].get(key)
+            if histogram is None:
+                histogram = series[name][key] = Histogram(buckets)
+            histogram.merge(counts, total, count)
+    for name in _COUNTERS:
+        for key, value in data.get(name, []):
+            series[name][key[0]] = series[name].get(key[0], 0) + value
+
+
+def _add_pools(totals: Dict[str, Dict], pools: Dict[str, Dict]) -> None:
+    for pool, stats in pools.items():
+        pool_totals = totals.setdefault(pool, {})
+        for state in ('in_use', 'idle', 'waiting', 'total'):
+            if state in stats:
+                pool_totals[state] = pool_totals.get(state, 0) + stats[state]
+
+
+def _snapshot_files(directory: str) -> List[str]:
+    try:
+        return [name for name in os.listdir(directory) if name.endswith('.json')]
+    except FileNotFoundError:
+        return []
+
+
+def _read_snapshot(path: str) -> Optional[Dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # Removed by mark_process_dead between listing and reading
+        return None
+
+
+def mark_process_dead(pid: int, directory: Optional[str] = None) -> None:
+    # Called in the gunicorn master (child_exit), which handles one exit at a time
+    directory = directory or registry.multiproc_dir
+    if not directory:
+        return
+    path = os.path.join(directory, f'{pid}.json')
+    data = _read_snapshot(path)
+    if data is None:
+        return
+    series = {name: {} for name in _HISTOGRAMS + _COUNTERS}
+    dead = _read_snapshot(os.path.join(directory, 'dead.json'))
+    if dead is not None:
+        _merge_snapshot(series, dead, registry.buckets)
+    _merge_snapshot(series, data, registry.buckets)
+    merged = {name: [[_key_list(key), histogram.counts, histogram.sum, histogram.count]
+                     for key, histogram in series[name].items()] for name in _HISTOGRAMS}
+    merged.update({name: [[_key_list(key), value] for key, value in series[name].items()]
+                   for name in _COUNTERS})
+    dead_path = os.path.join(directory, 'dead.json')
+    with open(dead_path + '.tmp', 'w') as f:
+        json.dump(merged, f)
+    os.replace(dead_path + '.tmp', dead_path)
+    os.remove(path)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}'
+
+
+def _histogram_lines(lines: List[str], name: str, help_text: str, label_names: Tuple[str, ...],
+                     series: Dict) -> None:
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for key, histogram in series.items():
+        key = key if isinstance(key, tuple) else (key,)
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            le = f'le="{bound}"'
+            lines.append(f'{name}_bucket{_labels(label_names, key, le)} {cumulative}')
+        le = 'le="+Inf"'
+        lines.append(f'{name}_bucket{_labels(label_names, key, le)} {histogram.count}')
+        lines.append(f'{name}_sum{_labels(label_names, key)} {histogram.sum:.6f}')
+        lines.append(f'{name}_count{_labels(label_names, key)} {histogram.count}')
+
+
+def _counter_lines(lines: List[str], name: str, help_text: str, label_names: Tuple[str, ...],
+                   series: Dict[str, int]) -> None:
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} counter')
+    for key, value in series.items():
+        lines.append(f'{name}{_labels(label_names, (key,))} {value}')
+
+
+class InstrumentedCursor:
+    '''
+    Wraps a cursor (plain or PreparedCursor) to time execute/executemany and count the
+    rows fetched for the last statement; everything else passes through. Statements over
+    the slow query threshold are also handed to slow_queries (a SlowQueryLog).
+    '''
+
+    def __init__(self, cursor, registry: MetricsRegistry, slow_queries=None):
+        self._cursor = cursor
+        self._registry = registry
+        self._slow_queries = slow_queries
+        self._statement = ''
+
+    def execute(self, operation, *args, **kwargs):
+        return self._timed(self._cursor.execute, operation, args, kwargs, True)
+
+    def executemany(self, operation, *args, **kwargs):
+        # Batches are recorded when slow but never explained
+        return self._timed(self._cursor.executemany, operation, args, kwargs, False)
+
+    def _timed(self, method, operation, args, kwargs, explain: bool):
+        self._statement = normalize_sql(operation)
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = method(operation, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            elapsed = time.perf_counter() - started
+            self._registry.observe_query(self._statement, elapsed, failed)
+            slow_queries = self._slow_queries
+            if slow_queries is not None and elapsed * 1000 >= slow_queries.threshold_ms:
+                params = args[0] if args else kwargs.get('params')
+                slow_queries.record(operation, self._statement, None if not explain else params,
+                                    elapsed, explain)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._registry.observe_rows(self._statement, 1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        if rows:
+            self._registry.observe_rows(self._statement, len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        if rows:
+            self._registry.observe_rows(self._statement, len(rows))
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+registry = MetricsRegistry(
+    enabled=os.getenv('METRICS_ENABLED', 'true').lower() == 'true',
+    max_statements=int(os.getenv('METRICS_MAX_STATEMENTS', 500)),
+    multiproc_dir=os.getenv('METRICS_MULTIPROC_DIR') or None,
+    flush_interval=float(os.getenv('METRICS_FLUSH_SECONDS', 1))
+)
+
+
+def pool_gauges(db) -> Dict[str, Dict]:
+    pools = {'primary': db.pool_stats()}
+    replica = db.replica_stats()
+    if replica:
+        pools['replica'] = replica['pool']
+    return pools
+
+
+def install_request_metrics(app) -> None:
+    if not registry.enabled:
+        return
+    db = app.config['DATABASE']
+    registry.pool_source = lambda: pool_gauges(db)
+
+    @app.before_request
+    def start_request_timer():
+        registry.start_request()
+
+    @app.after_request
+    def record_request(response):
+        # Route template rather than path, so /api/users/1 and /api/users/2 share a series
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        registry.finish_request(request.method, route, response.status_code)
+        return response
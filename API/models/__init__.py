@@ -1,6 +1,7 @@
 from .booking import Booking
 from .user import User
 from .vehicle import Vehicle
-from .enums import BookingStatus, VehicleStatus
+from .vehicle_category import VehicleCategory
+from .enums import BookingStatus, VehicleStatus, BookingCommitStatus
 
-__all__ = ['Booking', 'User', 'Vehicle', 'BookingStatus', 'VehicleStatus']
\ No newline at end of file
+__all__ = ['Booking', 'User', 'Vehicle', 'VehicleCategory', 'BookingStatus', 'VehicleStatus', 'BookingCommitStatus']
@@ -1,9 +1,13 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Optional
 from dataclasses import dataclass
 from .enums import BookingStatus
 
-@dataclass
+# Longest rental validate_dates accepts, in whole days. Queries rely on it to bound how far
+# before a window an overlapping booking can have been picked up.
+MAX_RENTAL_DAYS = 7
+
+@dataclass(slots=True)
 class Booking:
     user_id: int
     vehicle_id: int
@@ -18,10 +22,18 @@ class Booking:
     def __post_init__(self):
         # self.pickup_date = datetime.strptime(self.pickup_date, "%Y-%m-%dT%H:%M:%S")
         # self.return_date = datetime.strptime(self.return_date, "%Y-%m-%dT%H:%M:%S")
-        self.pickup_date = datetime.fromisoformat(self.pickup_date)
-        self.return_date = datetime.fromisoformat(self.return_date)
+        # Request bodies carry ISO strings, rows mapped from the database carry datetimes
+        if isinstance(self.pickup_date, str):
+            self.pickup_date = datetime.fromisoformat(self.pickup_date)
+        if isinstance(self.return_date, str):
+            self.return_date = datetime.fromisoformat(self.return_date)
         self.created_at = self.created_at or datetime.now()
 
+    @staticmethod
+    def earliest_overlapping_pickup(start: datetime) -> datetime:
+        # Rentals run at most MAX_RENTAL_DAYS plus a partial day
+        return start - timedelta(days=MAX_RENTAL_DAYS + 1)
+
     def validate_dates(self) -> List[str]:
         errors = []
         current_date = datetime.now()
@@ -29,8 +41,8 @@ class Booking:
         rental_duration = (self.return_date - self.pickup_date).days
         advance_days = (self.pickup_date - current_date).days
         
-        if rental_duration > 7:
-            errors.append("Booking duration cannot exceed 7 days")
+        if rental_duration > MAX_RENTAL_DAYS:
+            errors.append(f"Booking duration cannot exceed {MAX_RENTAL_DAYS} days")
         if advance_days > 7:
             errors.append("Cannot book more than 7 days in advance")
         if self.pickup_date >= self.return_date:
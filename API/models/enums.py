@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntEnum
 
 class BookingStatus(Enum):
     PENDING = 'pending'
@@ -9,4 +9,10 @@ class BookingStatus(Enum):
 class VehicleStatus(Enum):
     AVAILABLE = 'available'
     RENTED = 'rented'
-    MAINTENANCE = 'maintenance'
\ No newline at end of file
+    MAINTENANCE = 'maintenance'
+
+class BookingCommitStatus(IntEnum):
+    CREATED = 0
+    VEHICLE_NOT_FOUND = 1
+    USER_NOT_FOUND = 2
+    VEHICLE_UNAVAILABLE = 3
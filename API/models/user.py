@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Dict, Optional
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(slots=True)
 class User:
     email: str
     first_name: str
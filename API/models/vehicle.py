@@ -3,7 +3,7 @@ from typing import Dict, Optional
 from dataclasses import dataclass
 from .enums import VehicleStatus
 
-@dataclass
+@dataclass(slots=True)
 class Vehicle:
     category_id: int
     registration_number: str
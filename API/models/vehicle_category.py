@@ -0,0 +1,9 @@
+from decimal import Decimal
+from dataclasses import dataclass
+
+@dataclass(slots=True, frozen=True)
+class VehicleCategory:
+    category_id: int
+    name: str
+    capacity: int
+    daily_rate: Decimal
@@ -0,0 +1,102 @@
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+'''
+Monthly RANGE COLUMNS partitions of Bookings (by pickup_date) and EmailLogs (by sent_at).
+schema.sql creates each table with a single p_future partition; ensure_partitions splits
+it into p_history, one pYYYYMM partition per month and a new p_future, and later calls
+only add the months that are missing at the top. Used by initialize_schema.py and by
+archive_bookings.py through ArchiveRepository.
+'''
+
+PARTITIONED_TABLES = ('Bookings', 'EmailLogs')
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"p{month.year:04d}{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    # p202403 -> 2024-03-01; p_history and p_future are not monthly partitions
+    if len(name) == 7 and name[0] == 'p' and name[1:].isdigit():
+        return date(int(name[1:5]), int(name[5:7]), 1)
+    return None
+
+
+def missing_months(existing: List[str], first_month: date, through_month: date) -> List[date]:
+    # Months after the last monthly partition (from first_month on a table without any)
+    # up to and including through_month
+    months = [month for month in map(partition_month, existing) if month]
+    month = add_months(max(months), 1) if months else first_month
+    missing = []
+    while month <= through_month:
+        missing.append(month)
+        month = add_months(month, 1)
+    return missing
+
+
+def monthly_partition_plan(table: str, existing: List[str], months: List[date]) -> str:
+    # Splits p_future into the given months. The first split of a table also creates
+    # p_history for everything older than its first month.
+    partitions = []
+    if 'p_history' not in existing and not any(map(partition_month, existing)):
+        partitions.append(f"PARTITION p_history VALUES LESS THAN ('{months[0].isoformat()}')")
+    for month in months:
+        partitions.append(f"PARTITION {partition_name(month)} "
+                          f"VALUES LESS THAN ('{add_months(month, 1).isoformat()}')")
+    partitions.append("PARTITION p_future VALUES LESS THAN (MAXVALUE)")
+    return f"ALTER TABLE {table} REORGANIZE PARTITION p_future INTO ({', '.join(partitions)})"
+
+
+def get_partitions(cursor, table: str) -> List[str]:
+    cursor.execute("""
+        SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def ensure_partitions(cursor, months_ahead: int, history_months: int,
+                      today: Optional[date] = None) -> Dict[str, List[str]]:
+    # cursor must return tuple rows
+    current = month_start(today or date.today())
+    added = {}
+    for table in PARTITIONED_TABLES:
+        existing = get_partitions(cursor, table)
+        months = missing_months(existing, add_months(current, -history_months),
+                                add_months(current, months_ahead))
+        if months:
+            cursor.execute(monthly_partition_plan(table, existing, months))
+        added[table] = [partition_name(month) for month in months]
+    return added
+
+
+def drop_empty_partitions(cursor, before: datetime) -> Dict[str, List[str]]:
+    # Only months that end before the horizon and hold no rows at all, so a drop never
+    # deletes data; later rows for those dates would land in the next partition up
+    horizon = month_start(before)
+    dropped = {}
+    for table in PARTITIONED_TABLES:
+        empty = []
+        for name in get_partitions(cursor, table):
+            month = partition_month(name)
+            if month is None or add_months(month, 1) > horizon:
+                continue
+            cursor.execute(f"SELECT 1 FROM {table} PARTITION ({name}) LIMIT 1")
+            if cursor.fetchone() is None:
+                empty.append(name)
+        if empty:
+            cursor.execute(f"ALTER TABLE {table} DROP PARTITION {', '.join(empty)}")
+        dropped[table] = empty
+    return dropped
@@ -0,0 +1,228 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+import mysql.connector
+from mysql.connector.errors import PoolError
+
+# Upper bounds, in milliseconds, of the checkout wait-time histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class ConnectionPool:
+    '''
+    Elastic pool: keeps between min_size and max_size idle-capable connections, allows up
+    to max_overflow extra connections under bursts (closed again on release), and makes
+    callers wait up to timeout seconds for a connection instead of failing immediately.
+
+    Idle connections are handed out in turn (FIFO), so under steady light load none of them
+    sits idle for idle_timeout. The pool therefore also tracks the fewest idle connections
+    it had during each idle_timeout window; that many were never needed, and are closed
+    (down to min_size) at the end of the window.
+    '''
+
+    def __init__(self, min_size: int = 5, max_size: int = 10, max_overflow: int = 5,
+                 timeout: float = 5.0, idle_timeout: float = 300.0, validate_after: float = 5.0,
+                 reset_session: bool = True, on_reset: Optional[Callable] = None,
+                 connect: Callable = mysql.connector.connect, **connection_config):
+        if min_size < 0 or max_size < 1 or min_size > max_size or max_overflow < 0:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_overflow >= 0")
+        self.logger = logging.getLogger(__name__)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.validate_after = validate_after
+        self.reset_session = reset_session
+        self._on_reset = on_reset
+        self._connect = connect
+        self._config = connection_config
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle: Deque[Tuple[object, float]] = deque()
+        self._total = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+        self._counters = {'checkouts': 0, 'checkout_failures': 0, 'created': 0, 'closed': 0,
+                          'evicted': 0, 'invalidated': 0, 'overflow_created': 0}
+        self._wait_buckets: List[int] = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._wait_total_ms = 0.0
+        self._idle_low = min_size
+        self._window_started = time.monotonic()
+
+        for _ in range(min_size):
+            conn = self._open()
+            with self._lock:
+                self._total += 1
+                self._idle.append((conn, time.monotonic()))
+
+    @property
+    def capacity(self) -> int:
+        return self.max_size + self.max_overflow
+
+    def get_connection(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            self._evict_idle()
+            conn, create = None, False
+            with self._lock:
+                if self._closed:
+                    raise PoolError("Connection pool is closed")
+                while not self._idle and self._total >= self.capacity:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._counters['checkout_failures'] += 1
+                        raise PoolError(
+                            f"No connection available within {self.timeout}s "
+                            f"({self._in_use} in use, capacity {self.capacity})")
+                    self._waiting += 1
+                    self._available.wait(remaining)
+                    self._waiting -= 1
+                    if self._closed:
+                        raise PoolError("Connection pool is closed")
+                if self._idle:
+                    conn, last_used = self._idle.popleft()
+                    self._idle_low = min(self._idle_low, len(self._idle))
+                else:
+                    # Reserve the slot before connecting so concurrent callers respect capacity
+                    create = True
+                    self._idle_low = 0
+                    self._total += 1
+                    if self._total > self.max_size:
+                        self._counters['overflow_created'] += 1
+                self._in_use += 1
+
+            if create:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self._lock:
+                        self._total -= 1
+                        self._in_use -= 1
+                        self._counters['checkout_failures'] += 1
+                        self._available.notify()
+                    raise
+            elif time.monotonic() - last_used >= self.validate_after and not self._is_valid(conn):
+                self._discard(conn, 'invalidated')
+                continue
+
+            self._record_wait((time.monotonic() - started) * 1000)
+            return conn
+
+    def release(self, conn) -> None:
+        keep = False
+        if self.reset_session:
+            try:
+                conn.reset_session()
+                if self._on_reset:
+                    self._on_reset(conn)
+            except Exception as e:
+                self.logger.warning("Discarding connection that failed to reset: %s", e)
+                self._discard(conn, 'invalidated')
+                return
+        with self._lock:
+            self._in_use -= 1
+            if not self._closed and self._total <= self.max_size:
+                self._idle.append((conn, time.monotonic()))
+                keep = True
+            else:
+                self._total -= 1
+                self._counters['closed'] += 1
+            self._available.notify()
+        if not keep:
+            self._close_quietly(conn)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._total -= len(idle)
+            self._counters['closed'] += len(idle)
+            self._available.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            buckets = {}
+            cumulative = 0
+            for bound, count in zip(list(WAIT_BUCKETS_MS) + ['+Inf'], self._wait_buckets):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'max_overflow': self.max_overflow,
+                'total': self._total,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+                **self._counters,
+                'wait_ms_sum': round(self._wait_total_ms, 3),
+                'wait_ms_buckets': buckets,
+            }
+
+    def _open(self):
+        conn = self._connect(**self._config)
+        with self._lock:
+            self._counters['created'] += 1
+        return conn
+
+    def _is_valid(self, conn) -> bool:
+        try:
+            return conn.is_connected()
+        except Exception:
+            return False
+
+    def _discard(self, conn, reason: str) -> None:
+        with self._lock:
+            self._total -= 1
+            self._in_use -= 1
+            self._counters[reason] += 1
+            self._counters['closed'] += 1
+            self._available.notify()
+        self._close_quietly(conn)
+
+    def _evict_idle(self) -> None:
+        # The left end of the idle deque is always the least recently used connection
+        stale = []
+        with self._lock:
+            now = time.monotonic()
+            while (self._idle and self._total > self.min_size
+                   and now - self._idle[0][1] >= self.idle_timeout):
+                stale.append(self._evict_oldest_locked())
+            if now - self._window_started >= self.idle_timeout:
+                surplus = min(self._idle_low, self._total - self.min_size, len(self._idle))
+                for _ in range(max(surplus, 0)):
+                    stale.append(self._evict_oldest_locked())
+                self._idle_low = len(self._idle)
+                self._window_started = now
+        for conn in stale:
+            self._close_quietly(conn)
+
+    def _evict_oldest_locked(self):
+        conn, _ = self._idle.popleft()
+        self._total -= 1
+        self._counters['evicted'] += 1
+        self._counters['closed'] += 1
+        return conn
+
+    def _record_wait(self, waited_ms: float) -> None:
+        with self._lock:
+            self._counters['checkouts'] += 1
+            self._wait_total_ms += waited_ms
+            self._wait_buckets[bisect_left(WAIT_BUCKETS_MS, waited_ms)] += 1
+
+    @staticmethod
+    def _close_quietly(conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
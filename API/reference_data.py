@@ -0,0 +1,245 @@
+import logging
+import os
+import threading
+import time
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+from models import VehicleCategory
+
+
+class Snapshot(NamedTuple):
+    version: int
+    categories: Dict[int, VehicleCategory]
+    daily_rates: Dict[int, Decimal]
+    category_names: Dict[int, str]
+    vehicles: Dict[int, int]
+
+
+class ReferenceData:
+    '''
+    In-process copy of VehicleCategories and of every vehicle's category, loaded by
+    create_app. The availability and report queries take daily rates and category names
+    from it instead of joining VehicleCategories, and bookings for vehicles that do not
+    exist are turned away before a transaction is opened.
+
+    Triggers bump ReferenceDataVersion whenever a category changes or a vehicle is added,
+    removed or moved to another category. With background=True a thread, started by the
+    first read in each process, compares it with the loaded version every
+    version_check_interval seconds and reloads when it moved, and reloads everything
+    after refresh_interval seconds regardless. Readers only ever read the current
+    snapshot, so they never wait on the database (the async app calls them on its event
+    loop); without the thread refresh() has to be called explicitly.
+    '''
+
+    def __init__(self, refresh_interval: float = 300.0, version_check_interval: float = 1.0,
+                 negative_ttl: float = 5.0, negative_max_entries: int = 10000,
+                 background: bool = False, clock: Callable[[], float] = time.monotonic):
+        self.logger = logging.getLogger(__name__)
+        self.refresh_interval = refresh_interval
+        self.version_check_interval = version_check_interval
+        self.negative_ttl = negative_ttl
+        self.negative_max_entries = negative_max_entries
+        self.background = background
+        self._clock = clock
+        self._source = None
+        self._snapshot: Optional[Snapshot] = None
+        self._loaded_at: Optional[float] = None
+        self._stale = False
+        # vehicle_id -> expiry of ids the primary confirmed missing
+        self._missing: Dict[int, float] = {}
+        self._counters = {'reloads': 0, 'version_checks': 0, 'primary_checks': 0,
+                          'negative_hits': 0, 'errors': 0}
+        self._reset_threading()
+
+    def _reset_threading(self) -> None:
+        self._refresh_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def bind(self, source) -> None:
+        # source has load(primary) -> (version, categories, [(vehicle_id, category_id)])
+        # and get_version(primary); normally a ReferenceDataRepository
+        self._source = source
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot is not None
+
+    def load(self) -> Snapshot:
+        with self._refresh_lock:
+            self._reload(primary=False)
+        return self._snapshot
+
+    def invalidate(self) -> None:
+        # Called after this process changes vehicles or categories; the refresher reloads
+        # straight away instead of at its next check
+        self._stale = True
+        self._wakeup.set()
+
+    def category(self, category_id: int) -> Optional[VehicleCategory]:
+        return self.current().categories.get(category_id)
+
+    def daily_rates(self) -> Dict[int, Decimal]:
+        return self.current().daily_rates
+
+    def category_names(self) -> Dict[int, str]:
+        return self.current().category_names
+
+    def vehicle_category(self, vehicle_id: int) -> Optional[int]:
+        return self.current().vehicles.get(vehicle_id)
+
+    def has_vehicle(self, vehicle_id: int) -> bool:
+        snapshot = self.current()
+        if vehicle_id in snapshot.vehicles:
+            return True
+        expires_at = self._missing.get(vehicle_id)
+        if expires_at is not None and expires_at > self._clock():
+            self._counters['negative_hits'] += 1
+            return False
+        # The vehicle may have been added by another process since the last check, so an
+        # unknown id is only turned away once the primary confirms the version. The check
+        # runs outside the refresh lock; only an actual version change waits for a reload.
+        self._counters['primary_checks'] += 1
+        version = self._get_source().get_version(primary=True)
+        if version != snapshot.version:
+            with self._refresh_lock:
+                if self._snapshot.version != version:
+                    self._reload(primary=True)
+            if vehicle_id in self._snapshot.vehicles:
+                return True
+        self._remember_missing(vehicle_id)
+        return False
+
+    def current(self) -> Snapshot:
+        if self.background and self._thread is None:
+            self._start()
+        snapshot = self._snapshot
+        if snapshot is None:
+            # Only when create_app did not load it (scripts, tests)
+            with self._refresh_lock:
+                if self._snapshot is None:
+                    self._reload(primary=False)
+            snapshot = self._snapshot
+        return snapshot
+
+    def refresh(self) -> None:
+        # One refresher pass: a full reload when stale or past refresh_interval, otherwise
+        # a version check. Errors keep the loaded snapshot and are retried on the next pass.
+        with self._refresh_lock:
+            try:
+                if (self._snapshot is None or self._stale
+                        or self._clock() - self._loaded_at >= self.refresh_interval):
+                    self._reload(primary=False)
+                else:
+                    self._counters['version_checks'] += 1
+                    if self._get_source().get_version() != self._snapshot.version:
+                        self._reload(primary=False)
+            except Exception as e:
+                self._counters['errors'] += 1
+                self.logger.warning("Could not refresh reference data: %s", e)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        thread = self._thread
+        self._stop.set()
+        self._wakeup.set()
+        if thread is not None:
+            thread.join(timeout)
+        self._thread = None
+
+    def reset_after_fork(self) -> None:
+        # The refresher does not survive a fork, and a lock may have been held by it at the
+        # time; the child's first read starts a new one
+        self._reset_threading()
+
+    def stats(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            'loaded': snapshot is not None,
+            'version': snapshot.version if snapshot else None,
+            'categories': len(snapshot.categories) if snapshot else 0,
+            'vehicles': len(snapshot.vehicles) if snapshot else 0,
+            'missing_vehicles_cached': len(self._missing),
+            'age_seconds': round(self._clock() - self._loaded_at, 3) if self._loaded_at is not None else None,
+            'refresh_interval': self.refresh_interval,
+            'version_check_interval': self.version_check_interval,
+            'refresher_running': self._thread is not None and self._thread.is_alive(),
+            **self._counters,
+        }
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='reference-data-refresh', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.wait(self.version_check_interval)
+            self._wakeup.clear()
+            if self._stop.is_set():
+                return
+            self.refresh()
+
+    def _remember_missing(self, vehicle_id: int) -> None:
+        if self.negative_ttl <= 0:
+            return
+        if len(self._missing) >= self.negative_max_entries:
+            now = self._clock()
+            self._missing = {key: expires_at for key, expires_at in self._missing.items() if expires_at > now}
+            if len(self._missing) >= self.negative_max_entries:
+                self._missing = {}
+        self._missing[vehicle_id] = self._clock() + self.negative_ttl
+
+    def _reload(self, primary: bool) -> None:
+        # Cleared before reading, so an invalidation that lands during the load still counts
+        self._stale = False
+        try:
+            version, categories, vehicles = self._get_source().load(primary=primary)
+        except Exception:
+            self._stale = True
+            raise
+        by_id = {category.category_id: category for category in categories}
+        self._snapshot = Snapshot(
+            version=version,
+            categories=by_id,
+            daily_rates={category_id: category.daily_rate for category_id, category in by_id.items()},
+            category_names={category_id: category.name for category_id, category in by_id.items()},
+            vehicles=dict(vehicles),
+        )
+        # A new version may include vehicles that were missing before
+        self._missing = {}
+        self._loaded_at = self._clock()
+        self._counters['reloads'] += 1
+        self.logger.info("Loaded reference data version %s: %d categories, %d vehicles",
+                         version, len(by_id), len(self._snapshot.vehicles))
+
+    def _get_source(self):
+        if self._source is None:
+            # Imported here: the repositories import this module
+            from repositories.reference_data_repository import ReferenceDataRepository
+            self._source = ReferenceDataRepository()
+        return self._source
+
+
+reference_data = ReferenceData(
+    refresh_interval=float(os.getenv('REFERENCE_DATA_REFRESH_SECONDS', 300)),
+    version_check_interval=float(os.getenv('REFERENCE_DATA_VERSION_CHECK_SECONDS', 1)),
+    negative_ttl=float(os.getenv('REFERENCE_DATA_MISSING_VEHICLE_TTL', 5)),
+    background=True
+)
+
+os.register_at_fork(after_in_child=reference_data.reset_after_fork)
+
+
+def with_category_names(rows: Iterable[Dict]) -> List[Dict]:
+    # Report rows keep the shape they had when category_name came from a join
+    rows = list(rows)
+    if not rows:
+        return rows
+    names = reference_data.category_names()
+    return [{'category_id': row['category_id'], 'category_name': names.get(row['category_id']), **row}
+            for row in rows]
@@ -0,0 +1,116 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+from pool import ConnectionPool
+
+
+class ReplicaRouter:
+    '''
+    Decides whether a read-only cursor may use the replica pool. Replication lag is sampled
+    at most every check_interval seconds by whichever reader finds the sample stale; reads
+    go to the primary while the replica is more than max_lag seconds behind, has stopped
+    replicating, or could not be reached.
+    '''
+
+    def __init__(self, pool: ConnectionPool, max_lag: float = 5.0, check_interval: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.logger = logging.getLogger(__name__)
+        self.pool = pool
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._checking = False
+        self._checked_at: Optional[float] = None
+        self._lag: Optional[float] = None
+        self._healthy = False
+        self._counters = {'replica_reads': 0, 'lag_fallbacks': 0, 'error_fallbacks': 0,
+                          'pinned_reads': 0, 'lag_checks': 0}
+
+    def acquire(self, pinned: bool = False):
+        # Returns a replica connection, or None when the caller should read from the primary
+        if pinned:
+            self._count('pinned_reads')
+            return None
+        self._refresh_lag()
+        if not self._healthy:
+            self._count('lag_fallbacks')
+            return None
+        try:
+            conn = self.pool.get_connection()
+        except (Error, PoolError) as e:
+            self.logger.warning("Replica unavailable, reading from primary: %s", e)
+            self.mark_failed()
+            self._count('error_fallbacks')
+            return None
+        self._count('replica_reads')
+        return conn
+
+    def release(self, conn) -> None:
+        self.pool.release(conn)
+
+    def mark_failed(self) -> None:
+        # Keeps reads on the primary until the next lag sample
+        with self._lock:
+            self._healthy = False
+            self._checked_at = self._clock()
+
+    def _refresh_lag(self) -> None:
+        with self._lock:
+            now = self._clock()
+            if self._checking or (self._checked_at is not None
+                                  and now - self._checked_at < self.check_interval):
+                return
+            self._checking = True
+        lag = None
+        try:
+            lag = self._measure_lag()
+        except (Error, PoolError) as e:
+            self.logger.warning("Could not measure replica lag: %s", e)
+        with self._lock:
+            self._checking = False
+            self._checked_at = self._clock()
+            self._lag = lag
+            self._healthy = lag is not None and lag <= self.max_lag
+            self._counters['lag_checks'] += 1
+
+    def _measure_lag(self) -> Optional[float]:
+        conn = self.pool.get_connection()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                try:
+                    cursor.execute("SHOW REPLICA STATUS")
+                except Error:
+                    # Servers older than 8.0.22 only know the old spelling
+                    cursor.execute("SHOW SLAVE STATUS")
+                row = cursor.fetchone()
+                cursor.fetchall()
+            finally:
+                cursor.close()
+        finally:
+            self.pool.release(conn)
+        if row is None:
+            # Not configured as a replica (e.g. a second local schema standing in for one)
+            return 0.0
+        lag = row.get('Seconds_Behind_Source', row.get('Seconds_Behind_Master'))
+        # NULL means the replication threads are stopped
+        return float(lag) if lag is not None else None
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats.update({
+                'healthy': self._healthy,
+                'lag_seconds': self._lag,
+                'max_lag_seconds': self.max_lag,
+            })
+        stats['pool'] = self.pool.stats()
+        return stats
@@ -1,5 +1,9 @@
-from .booking_repository  import BookingRepository
+from .booking_repository  import BookingRepository, BookingRejected
 from .user_repository import UserRepository
 from .vehicle_repository import VehicleRepository
+from .outbox_repository import OutboxRepository
+from .report_repository import ReportRepository
+from .archive_repository import ArchiveRepository
+from .reference_data_repository import ReferenceDataRepository
 
-__all__ = ['BookingRepository', 'UserRepository', 'VehicleRepository']
\ No newline at end of file
+__all__ = ['BookingRepository', 'BookingRejected', 'UserRepository', 'VehicleRepository', 'OutboxRepository', 'ReportRepository', 'ArchiveRepository', 'ReferenceDataRepository']
@@ -0,0 +1,132 @@
+from database import Database
+from datetime import date, datetime
+from typing import Dict, List, Optional
+import logging
+import time
+import partitions
+
+BOOKING_COLUMNS = ('booking_id, user_id, vehicle_id, pickup_date, return_date, total_cost, '
+                   'is_deleted, status, created_at')
+EMAIL_LOG_COLUMNS = 'log_id, booking_id, email_type, sent_at, status'
+
+
+class ArchiveRepository:
+    '''
+    Moves finished bookings and old email logs into BookingsArchive / EmailLogsArchive in
+    short batches, and keeps the monthly partitions of Bookings and EmailLogs in step with
+    the calendar: new months are added ahead of time and months emptied by archival dropped.
+    '''
+
+    def __init__(self):
+        self.db = Database()
+        self.logger = logging.getLogger(__name__)
+
+    def ensure_partitions(self, months_ahead: int, history_months: int,
+                          today: Optional[date] = None) -> Dict[str, List[str]]:
+        with self.db.get_cursor(dictionary=False) as cursor:
+            added = partitions.ensure_partitions(cursor, months_ahead, history_months, today)
+        for table, names in added.items():
+            if names:
+                self.logger.info("Added partitions to %s: %s", table, ', '.join(names))
+        return added
+
+    def drop_empty_partitions(self, before: datetime) -> Dict[str, List[str]]:
+        with self.db.get_cursor(dictionary=False) as cursor:
+            dropped = partitions.drop_empty_partitions(cursor, before)
+        for table, names in dropped.items():
+            if names:
+                self.logger.info("Dropped empty partitions of %s: %s", table, ', '.join(names))
+        return dropped
+
+    def archive_bookings(self, before: datetime, batch_size: int = 1000, pause: float = 0.0,
+                         max_batches: Optional[int] = None) -> int:
+        # Completed, cancelled and soft-deleted bookings returned before the horizon. Moving
+        # them writes no outbox events, so archived bookings still count in past reports.
+        archived = batches = 0
+        while max_batches is None or batches < max_batches:
+            with self.db.get_cursor(dictionary=False) as cursor:
+                moved = self._archive_booking_batch(cursor, before, batch_size)
+            archived += moved
+            batches += 1
+            if moved < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+        self.logger.info("Archived %s bookings returned before %s", archived, before)
+        return archived
+
+    def _archive_booking_batch(self, cursor, before: datetime, batch_size: int) -> int:
+        cursor.execute("START TRANSACTION")
+        try:
+            # pickup_date < before prunes to the partitions old enough to hold candidates
+            cursor.execute("""
+                SELECT booking_id FROM Bookings
+                WHERE pickup_date < %s
+                AND return_date < %s
+                AND (status IN ('completed', 'cancelled') OR is_deleted = TRUE)
+                ORDER BY pickup_date, booking_id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """, (before, before, batch_size))
+            booking_ids = tuple(row[0] for row in cursor.fetchall())
+            if booking_ids:
+                placeholders = ", ".join(["%s"] * len(booking_ids))
+                cursor.execute(f"""
+                    INSERT INTO BookingsArchive ({BOOKING_COLUMNS})
+                    SELECT {BOOKING_COLUMNS} FROM Bookings
+                    WHERE booking_id IN ({placeholders}) AND pickup_date < %s
+                """, (*booking_ids, before))
+                cursor.execute(f"""
+                    DELETE FROM Bookings
+                    WHERE booking_id IN ({placeholders}) AND pickup_date < %s
+                """, (*booking_ids, before))
+            cursor.execute("COMMIT")
+            return len(booking_ids)
+        except Exception as e:
+            cursor.execute("ROLLBACK")
+            self.logger.error("Error while archiving bookings: %s", e)
+            raise
+
+    def archive_email_logs(self, before: datetime, batch_size: int = 1000, pause: float = 0.0,
+                           max_batches: Optional[int] = None) -> int:
+        archived = batches = 0
+        while max_batches is None or batches < max_batches:
+            with self.db.get_cursor(dictionary=False) as cursor:
+                moved = self._archive_email_log_batch(cursor, before, batch_size)
+            archived += moved
+            batches += 1
+            if moved < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+        self.logger.info("Archived %s email logs sent before %s", archived, before)
+        return archived
+
+    def _archive_email_log_batch(self, cursor, before: datetime, batch_size: int) -> int:
+        cursor.execute("START TRANSACTION")
+        try:
+            cursor.execute("""
+                SELECT log_id FROM EmailLogs
+                WHERE sent_at < %s
+                ORDER BY sent_at, log_id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """, (before, batch_size))
+            log_ids = tuple(row[0] for row in cursor.fetchall())
+            if log_ids:
+                placeholders = ", ".join(["%s"] * len(log_ids))
+                cursor.execute(f"""
+                    INSERT INTO EmailLogsArchive ({EMAIL_LOG_COLUMNS})
+                    SELECT {EMAIL_LOG_COLUMNS} FROM EmailLogs
+                    WHERE log_id IN ({placeholders}) AND sent_at < %s
+                """, (*log_ids, before))
+                cursor.execute(f"""
+                    DELETE FROM EmailLogs
+                    WHERE log_id IN ({placeholders}) AND sent_at < %s
+                """, (*log_ids, before))
+            cursor.execute("COMMIT")
+            return len(log_ids)
+        except Exception as e:
+            cursor.execute("ROLLBACK")
+            self.logger.error("Error while archiving email logs: %s", e)
+            raise
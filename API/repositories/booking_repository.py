@@ -1,41 +1,59 @@
 
 from database import Database
-from models import Booking
+from models import Booking, BookingCommitStatus
+from reference_data import reference_data
+from user_cache import MISS, user_cache
+import availability
 from mysql.connector import Error
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
 import logging
+import os
 
 '''
-for logging: for debugging we could use a constant to allow for the debugging testing but 
-wouldn't produce in the production environment. 
+Handlers are configured once by logging_config.configure_logging at app startup;
+log calls pass their arguments lazily so disabled levels skip formatting entirely.
 '''
+class BookingRejected(ValueError):
+    def __init__(self, status: BookingCommitStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
 class BookingRepository:
-    def __init__(self):
+    def __init__(self, commit_path: Optional[str] = None):
         self.db = Database()
         self.logger = logging.getLogger(__name__)
-        self.logger.setLevel(logging.INFO)
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        file_handler = logging.FileHandler('booking_repository.log')
-        file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
+        self.commit_path = commit_path or os.getenv('BOOKING_COMMIT_PATH', 'statements')
 
 
     def create(self, booking: Booking) -> int:
-        self.logger.info(f"Creating new booking: {booking}")
-        with self.db.get_cursor() as cursor:
+        self.logger.info("Creating new booking: %s", booking)
+        # Unknown vehicles are turned away without a connection or transaction; known ones
+        # are still locked (and so re-checked) by the transaction
+        if not reference_data.has_vehicle(booking.vehicle_id):
+            raise BookingRejected(BookingCommitStatus.VEHICLE_NOT_FOUND,
+                                  f"Vehicle with ID {booking.vehicle_id} does not exist")
+        if self.commit_path == 'procedure':
+            return self._create_with_procedure(booking)
+        with self.db.get_cursor(prepared=True) as cursor:
             cursor.execute("START TRANSACTION")
             try:
-                cursor.execute("SELECT 1 FROM Vehicles WHERE vehicle_id = %s", (booking.vehicle_id,))
+                # Must stay the first read: the snapshot for the checks below is taken after
+                # the lock is granted, so they see whatever the previous holder committed
+                cursor.execute(self.VEHICLE_LOCK_SQL, (booking.vehicle_id,))
                 if not cursor.fetchone():
-                    raise ValueError(f"Vehicle with ID {booking.vehicle_id} does not exist")
+                    raise BookingRejected(BookingCommitStatus.VEHICLE_NOT_FOUND,
+                                          f"Vehicle with ID {booking.vehicle_id} does not exist")
 
-                cursor.execute("SELECT 1 FROM Users WHERE user_id = %s", (booking.user_id,))
-                if not cursor.fetchone():
-                    raise ValueError(f"User with ID {booking.user_id} does not exist")
+                if not self._user_exists(cursor, booking.user_id):
+                    raise BookingRejected(BookingCommitStatus.USER_NOT_FOUND,
+                                          f"User with ID {booking.user_id} does not exist")
 
                 if not self._is_vehicle_available(cursor, booking):
                     self.logger.error("Vehicle not available for selected dates")
-                    raise ValueError("Vehicle not available for selected dates")
+                    raise BookingRejected(BookingCommitStatus.VEHICLE_UNAVAILABLE,
+                                          "Vehicle not available for selected dates")
 
                 cursor.execute("""
                     INSERT INTO Bookings (user_id, vehicle_id, pickup_date, 
@@ -46,74 +64,273 @@ class BookingRepository:
                 
                 booking_id = cursor.lastrowid
 
-                self._create_invoice(cursor, booking_id, booking.total_cost)
-                
-                self._log_email(cursor, booking_id, 'confirmation')
+                self._enqueue_outbox(cursor, booking_id, 'created', booking.total_cost, counted=booking)
                 
                 cursor.execute("COMMIT")
+                availability.record_booking(booking_id, booking.vehicle_id,
+                                            booking.pickup_date, booking.return_date)
                 return booking_id
             except Error as e:
                 cursor.execute("ROLLBACK")
-                if e.errno == 1452: 
-                    if 'vehicles' in str(e):
-                        raise ValueError(f"Vehicle with ID {booking.vehicle_id} does not exist")
-                    elif 'users' in str(e):
-                        raise ValueError(f"User with ID {booking.user_id} does not exist")
-                self.logger.error(f"Database error while creating booking: {e}")
+                self.logger.error("Database error while creating booking: %s", e)
                 raise
             except ValueError as e:
                 cursor.execute("ROLLBACK")
-                self.logger.error(f"Validation error while creating booking: {e}")
+                self.logger.error("Validation error while creating booking: %s", e)
                 raise
             except Exception as e:
                 cursor.execute("ROLLBACK")
-                self.logger.error(f"Unexpected error while creating booking: {e}")
+                self.logger.error("Unexpected error while creating booking: %s", e)
                 raise
 
-    def _is_vehicle_available(self, cursor, booking: Booking) -> bool:
-        cursor.execute("""
+    def _create_with_procedure(self, booking: Booking) -> int:
+        # sp_create_booking runs the checks, inserts and COMMIT server side, so the whole
+        # booking costs one round trip instead of one per statement
+        row = None
+        with self.db.get_cursor(commit=False) as cursor:
+            results = cursor.execute(
+                "CALL sp_create_booking(%s, %s, %s, %s, %s, %s)",
+                (booking.user_id, booking.vehicle_id, booking.pickup_date,
+                 booking.return_date, booking.total_cost,
+                 Booking.earliest_overlapping_pickup(booking.pickup_date)),
+                multi=True)
+            for result in results:
+                if result.with_rows:
+                    row = result.fetchone()
+
+        if row is None:
+            raise RuntimeError("sp_create_booking returned no status row")
+        status = BookingCommitStatus(row['status_code'])
+        if status is BookingCommitStatus.VEHICLE_NOT_FOUND:
+            raise BookingRejected(status, f"Vehicle with ID {booking.vehicle_id} does not exist")
+        if status is BookingCommitStatus.USER_NOT_FOUND:
+            raise BookingRejected(status, f"User with ID {booking.user_id} does not exist")
+        if status is BookingCommitStatus.VEHICLE_UNAVAILABLE:
+            self.logger.error("Vehicle not available for selected dates")
+            raise BookingRejected(status, "Vehicle not available for selected dates")
+
+        booking_id = row['booking_id']
+        availability.record_booking(booking_id, booking.vehicle_id,
+                                    booking.pickup_date, booking.return_date)
+        return booking_id
+
+    # Returns, per input position, the new booking id or the reason it was rejected
+    def create_many(self, bookings: List[Booking]) -> List[Union[int, BookingRejected]]:
+        # Each item is its booking id or the BookingRejected that create would have raised
+        self.logger.info("Creating batch of %s bookings", len(bookings))
+        results: List[Union[int, BookingRejected, None]] = [None] * len(bookings)
+        if not bookings:
+            return results
+
+        with self.db.get_cursor() as cursor:
+            cursor.execute("START TRANSACTION")
+            try:
+                vehicle_ids = sorted({booking.vehicle_id for booking in bookings})
+                user_ids = sorted({booking.user_id for booking in bookings})
+                existing_vehicles = self._existing_ids(cursor, "Vehicles", "vehicle_id", vehicle_ids,
+                                                       for_update=True)
+                existing_users = self._existing_ids(cursor, "Users", "user_id", user_ids,
+                                                    only_live=True)
+                booked = self._booked_intervals(
+                    cursor, vehicle_ids,
+                    min(booking.pickup_date for booking in bookings),
+                    max(booking.return_date for booking in bookings))
+
+                accepted = []
+                for position, booking in enumerate(bookings):
+                    if booking.vehicle_id not in existing_vehicles:
+                        results[position] = BookingRejected(BookingCommitStatus.VEHICLE_NOT_FOUND,
+                                                            f"Vehicle with ID {booking.vehicle_id} does not exist")
+                    elif booking.user_id not in existing_users:
+                        results[position] = BookingRejected(BookingCommitStatus.USER_NOT_FOUND,
+                                                            f"User with ID {booking.user_id} does not exist")
+                    elif any(start <= booking.return_date and end >= booking.pickup_date
+                             for start, end in booked.get(booking.vehicle_id, [])):
+                        results[position] = BookingRejected(BookingCommitStatus.VEHICLE_UNAVAILABLE,
+                                                            "Vehicle not available for selected dates")
+                    else:
+                        # Later items in the same batch must not overlap this one either
+                        booked.setdefault(booking.vehicle_id, []).append(
+                            (booking.pickup_date, booking.return_date))
+                        accepted.append(position)
+
+                if accepted:
+                    cursor.executemany("""
+                        INSERT INTO Bookings (user_id, vehicle_id, pickup_date,
+                                            return_date, total_cost)
+                        VALUES (%s, %s, %s, %s, %s)
+                    """, [(bookings[p].user_id, bookings[p].vehicle_id, bookings[p].pickup_date,
+                           bookings[p].return_date, bookings[p].total_cost) for p in accepted])
+
+                    # Whether a multi-row INSERT gets consecutive ids depends on
+                    # innodb_autoinc_lock_mode, so read the ids back instead. The vehicles are
+                    # locked and each accepted booking overlaps no other live booking, so the
+                    # only live booking overlapping it is the row just inserted for it.
+                    inserted = self._booked_rows(
+                        cursor, sorted({bookings[p].vehicle_id for p in accepted}),
+                        min(bookings[p].pickup_date for p in accepted),
+                        max(bookings[p].return_date for p in accepted))
+                    for position in accepted:
+                        booking = bookings[position]
+                        results[position] = next(
+                            row['booking_id'] for row in inserted
+                            if row['vehicle_id'] == booking.vehicle_id
+                            and row['pickup_date'] <= booking.return_date
+                            and row['return_date'] >= booking.pickup_date)
+
+                    cursor.executemany(self.OUTBOX_SQL, [
+                        self.outbox_row(results[p], 'created', bookings[p].total_cost, counted=bookings[p])
+                        for p in accepted])
+
+                cursor.execute("COMMIT")
+            except Exception as e:
+                cursor.execute("ROLLBACK")
+                self.logger.error("Error while creating booking batch: %s", e)
+                raise
+
+        for position in accepted:
+            booking = bookings[position]
+            availability.record_booking(results[position], booking.vehicle_id,
+                                        booking.pickup_date, booking.return_date)
+        return results
+
+    def _existing_ids(self, cursor, table: str, column: str, ids: List[int],
+                      for_update: bool = False, only_live: bool = False) -> set:
+        placeholders = ", ".join(["%s"] * len(ids))
+        live = " AND is_deleted = FALSE" if only_live else ""
+        lock = f" ORDER BY {column} FOR UPDATE" if for_update else ""
+        cursor.execute(f"SELECT {column} FROM {table} WHERE {column} IN ({placeholders}){live}{lock}",
+                       tuple(ids))
+        return {row[column] for row in cursor.fetchall()}
+
+    def _booked_intervals(self, cursor, vehicle_ids: List[int], start: datetime,
+                          end: datetime) -> Dict[int, List[Tuple[datetime, datetime]]]:
+        booked: Dict[int, List[Tuple[datetime, datetime]]] = {}
+        for row in self._booked_rows(cursor, vehicle_ids, start, end):
+            booked.setdefault(row['vehicle_id'], []).append((row['pickup_date'], row['return_date']))
+        return booked
+
+    def _booked_rows(self, cursor, vehicle_ids: List[int], start: datetime, end: datetime) -> List[dict]:
+        placeholders = ", ".join(["%s"] * len(vehicle_ids))
+        cursor.execute(f"""
+            SELECT booking_id, vehicle_id, pickup_date, return_date FROM Bookings
+            WHERE vehicle_id IN ({placeholders})
+            AND status IN ('pending', 'active')
+            AND is_deleted = FALSE
+            AND pickup_date <= %s
+            AND pickup_date >= %s
+            AND return_date >= %s
+        """, (*vehicle_ids, end, Booking.earliest_overlapping_pickup(start), start))
+        return cursor.fetchall()
+
+    # Bookings serialize on their vehicle's row, so concurrent bookings of different vehicles
+    # never wait on each other. The overlap check itself stays a plain read: a locking read
+    # over a date range takes next-key locks on the Bookings index, which also block inserts
+    # for neighbouring vehicles and dates.
+    VEHICLE_LOCK_SQL = "SELECT 1 FROM Vehicles WHERE vehicle_id = %s FOR UPDATE"
+
+    OVERLAP_CHECK_SQL = """
             SELECT 1 FROM Bookings
             WHERE vehicle_id = %s
             AND status IN ('pending', 'active')
-            AND (
-                (pickup_date BETWEEN %s AND %s)
-                OR (return_date BETWEEN %s AND %s)
-                OR (pickup_date <= %s AND return_date >= %s)
-            )
-        """, (booking.vehicle_id, booking.pickup_date, booking.return_date,
-              booking.pickup_date, booking.return_date, booking.pickup_date,
-              booking.return_date))
-        
+            AND is_deleted = FALSE
+            AND pickup_date <= %s
+            AND pickup_date >= %s
+            AND return_date >= %s
+        """
+
+    # The single pair of comparisons matches the same bookings as the previous three
+    # BETWEEN/OR branches (any interval overlap, bounds inclusive) but, unlike the OR,
+    # is a range on idx_booking_vehicle_window. The lower pickup_date bound prunes the
+    # Bookings partitions to the few months a rental can reach back.
+    @staticmethod
+    def overlap_check_params(booking: Booking) -> tuple:
+        return (booking.vehicle_id, booking.return_date,
+                Booking.earliest_overlapping_pickup(booking.pickup_date), booking.pickup_date)
+
+    USER_CHECK_SQL = "SELECT 1 FROM Users WHERE user_id = %s AND is_deleted = FALSE"
+
+    # Answered from the user cache when it holds the id, which user writes invalidate (in
+    # every worker with USER_CACHE_SHARED=true, otherwise within the TTL). A miss is read on
+    # the booking transaction's own primary connection, and a confirmed missing id is cached.
+    def _user_exists(self, cursor, user_id: int) -> bool:
+        user = user_cache.get(user_id)
+        if user is not MISS:
+            return user is not None
+        version = user_cache.version
+        cursor.execute(self.USER_CHECK_SQL, (user_id,))
+        if cursor.fetchone() is not None:
+            return True
+        user_cache.put(user_id, None, version)
+        return False
+
+    def _is_vehicle_available(self, cursor, booking: Booking,
+                              exclude_booking_id: Optional[int] = None) -> bool:
+        if exclude_booking_id is None:
+            cursor.execute(self.OVERLAP_CHECK_SQL, self.overlap_check_params(booking))
+        else:
+            cursor.execute(self.OVERLAP_CHECK_SQL + " AND booking_id <> %s",
+                           self.overlap_check_params(booking) + (exclude_booking_id,))
         return cursor.fetchone() is None
 
-    def _create_invoice(self, cursor, booking_id: int, amount: float):
-        invoice_number = f"INV-{booking_id}-{datetime.now().strftime('%Y%m%d')}"
-        cursor.execute("""
-            INSERT INTO Invoices (booking_id, amount, invoice_number)
-            VALUES (%s, %s, %s)
-        """, (booking_id, amount, invoice_number))
-
-    def _log_email(self, cursor, booking_id: int, email_type: str):
-        email_type_map = {
-            'update': 'confirmation',  
-            'confirmation': 'confirmation',
-            'invoice': 'invoice',
-            'cancelled': 'cancelled'
-        }
-        
-        mapped_type = email_type_map.get(email_type, 'confirmation')
-        
-        cursor.execute("""
-            INSERT INTO EmailLogs (booking_id, email_type)
-            VALUES (%s, %s)
-        """, (booking_id, mapped_type))
+    def get_active_intervals(self) -> List[Tuple[int, int, datetime, datetime]]:
+        with self.db.get_cursor(dictionary=False) as cursor:
+            cursor.execute("""
+                SELECT booking_id, vehicle_id, pickup_date, return_date
+                FROM Bookings
+                WHERE status IN ('pending', 'active')
+                AND is_deleted = FALSE
+            """)
+            return cursor.fetchall()
+
+    # Invoices, EmailLogs and DailyCategoryRollups are materialized from these rows by
+    # workers.outbox_worker. counted is the booking as it now counts in the rollups and
+    # previous the row it replaces; either is None when that side does not count.
+    OUTBOX_SQL = """
+        INSERT INTO BookingOutbox (booking_id, event_type, amount, vehicle_id, pickup_date,
+                                   return_date, previous_vehicle_id, previous_pickup_date,
+                                   previous_return_date, previous_amount)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """
+
+    @staticmethod
+    def outbox_row(booking_id: int, event_type: str, amount: Optional[float] = None,
+                   counted: Optional[Booking] = None, previous: Optional[Dict] = None) -> tuple:
+        current = ((counted.vehicle_id, counted.pickup_date, counted.return_date)
+                   if counted is not None else (None, None, None))
+        replaced = ((previous['vehicle_id'], previous['pickup_date'], previous['return_date'],
+                     previous['total_cost']) if previous is not None else (None, None, None, None))
+        return (booking_id, event_type, amount) + current + replaced
+
+    def _enqueue_outbox(self, cursor, booking_id: int, event_type: str,
+                        amount: Optional[float] = None, counted: Optional[Booking] = None,
+                        previous: Optional[Dict] = None):
+        cursor.execute(self.OUTBOX_SQL, self.outbox_row(booking_id, event_type, amount, counted, previous))
 
     def update(self, booking_id: int, updated_booking: Booking) -> bool:
-        self.logger.info(f"Updating booking: {booking_id}")
-        with self.db.get_cursor() as cursor:
+        self.logger.info("Updating booking: %s", booking_id)
+        with self.db.get_cursor(prepared=True) as cursor:
             cursor.execute("START TRANSACTION")
             try:
-                if self._is_vehicle_available(cursor, updated_booking):
+                # The previous window is needed to evict cached availability results
+                cursor.execute("""
+                    SELECT vehicle_id, pickup_date, return_date, total_cost, is_deleted
+                    FROM Bookings WHERE booking_id = %s FOR UPDATE
+                """, (booking_id,))
+                previous = cursor.fetchone()
+                if not previous:
+                    self.logger.error("Booking %s not found", booking_id)
+                    cursor.execute("ROLLBACK")
+                    return False
+
+                # Moving a booking locks both vehicles, always in id order so two moves in
+                # opposite directions cannot deadlock
+                for vehicle_id in sorted({previous['vehicle_id'], updated_booking.vehicle_id}):
+                    cursor.execute(self.VEHICLE_LOCK_SQL, (vehicle_id,))
+                    cursor.fetchone()
+
+                if (updated_booking.status in ('pending', 'active')
+                        and not self._is_vehicle_available(cursor, updated_booking, booking_id)):
                     self.logger.error("Vehicle not available for updated dates")
                     raise ValueError("Vehicle not available for updated dates")
 
@@ -126,37 +343,42 @@ class BookingRepository:
                       updated_booking.pickup_date, updated_booking.return_date,
                       updated_booking.total_cost, updated_booking.status,
                       booking_id))
-                
-                if cursor.rowcount == 0:
-                    self.logger.error(f"Booking {booking_id} not found")
-                    cursor.execute("ROLLBACK")
-                    return False
 
-                self._update_invoice(cursor, booking_id, updated_booking.total_cost)
-                self._log_email(cursor, booking_id, 'update')
+                # A soft-deleted booking stays out of the rollups when it is edited
+                counts = not previous['is_deleted']
+                self._enqueue_outbox(cursor, booking_id, 'updated', updated_booking.total_cost,
+                                     counted=updated_booking if counts else None,
+                                     previous=previous if counts else None)
                 
                 cursor.execute("COMMIT")
+                availability.invalidate_window(previous['vehicle_id'], previous['pickup_date'],
+                                               previous['return_date'])
+                # Editing a soft-deleted booking must not put it back in the availability index
+                if counts and updated_booking.status in ('pending', 'active'):
+                    availability.record_booking(booking_id, updated_booking.vehicle_id,
+                                                updated_booking.pickup_date,
+                                                updated_booking.return_date)
+                else:
+                    availability.release_booking(booking_id, updated_booking.vehicle_id,
+                                                 updated_booking.pickup_date,
+                                                 updated_booking.return_date)
                 return True
             except Error as e:
                 cursor.execute("ROLLBACK")
                 raise e
-            
-    def _update_invoice(self, cursor, booking_id: int, new_amount: float):
-        cursor.execute("""
-            UPDATE Invoices
-            SET amount = %s
-            WHERE booking_id = %s
-        """, (new_amount, booking_id))
 
     def delete(self, booking_id: int) -> bool:
-        self.logger.info(f"Deleting booking: {booking_id}")
+        self.logger.info("Deleting booking: %s", booking_id)
         with self.db.get_cursor() as cursor:
             cursor.execute("START TRANSACTION")
             try:
-                cursor.execute("SELECT status FROM Bookings WHERE booking_id = %s", (booking_id,))
+                cursor.execute("""
+                    SELECT status, vehicle_id, pickup_date, return_date, total_cost, is_deleted
+                    FROM Bookings WHERE booking_id = %s
+                """, (booking_id,))
                 result = cursor.fetchone()
                 if not result:
-                    self.logger.error(f"Booking {booking_id} not found")
+                    self.logger.error("Booking %s not found", booking_id)
                     return False
                 
                 # status =  result.get('status') or result[0]
@@ -164,15 +386,20 @@ class BookingRepository:
                 status = result['status'] if isinstance(result, dict) else result[0]
                 
                 if status == 'active':
-                    self.logger.error(f"Cannot delete active booking {booking_id}")
+                    self.logger.error("Cannot delete active booking %s", booking_id)
                     raise ValueError("Cannot delete an active booking")
                 
                 cursor.execute("UPDATE Bookings SET is_deleted = TRUE WHERE booking_id = %s", (booking_id,))
-                cursor.execute("DELETE FROM Invoices WHERE booking_id = %s", (booking_id,))
-                self._log_email(cursor, booking_id, 'cancelled')
+                if not isinstance(result, dict):
+                    result = dict(zip(('status', 'vehicle_id', 'pickup_date', 'return_date',
+                                       'total_cost', 'is_deleted'), result))
+                self._enqueue_outbox(cursor, booking_id, 'cancelled',
+                                     previous=None if result['is_deleted'] else result)
 
                 cursor.execute("COMMIT")
-                self.logger.info(f"Booking {booking_id} soft-deleted successfully")
+                availability.release_booking(booking_id, result['vehicle_id'],
+                                             result['pickup_date'], result['return_date'])
+                self.logger.info("Booking %s soft-deleted successfully", booking_id)
                 return True
             except Error as e:
                 cursor.execute("ROLLBACK")
@@ -0,0 +1,167 @@
+
+from database import Database
+from mysql.connector import Error
+from repositories.report_repository import ReportRepository
+from datetime import datetime
+from typing import Dict, List
+import logging
+
+EMAIL_TYPES = {
+    'created': 'confirmation',
+    'updated': 'confirmation',
+    'cancelled': 'cancelled'
+}
+
+class OutboxRepository:
+    def __init__(self):
+        self.db = Database()
+        self.logger = logging.getLogger(__name__)
+
+    def claim_batch(self, cursor, partition: int, partitions: int, limit: int) -> List[Dict]:
+        # Each worker owns the bookings where booking_id % partitions == partition, so the
+        # events of one booking are always applied in order by a single worker
+        cursor.execute("""
+            SELECT outbox_id, booking_id, event_type, amount, vehicle_id, pickup_date, return_date,
+                   previous_vehicle_id, previous_pickup_date, previous_return_date, previous_amount
+            FROM BookingOutbox
+            WHERE processed_at IS NULL
+            AND dead_lettered_at IS NULL
+            AND MOD(booking_id, %s) = %s
+            ORDER BY outbox_id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (partitions, partition, limit))
+        return cursor.fetchall()
+
+    def materialize(self, cursor, events: List[Dict]) -> None:
+        # Consecutive events of the same type are applied as one batch; runs keep their
+        # original order so a cancel never overtakes the create it follows
+        issued = datetime.now().strftime('%Y%m%d')
+        for event_type, run in self._runs(events):
+            if event_type == 'created':
+                cursor.executemany("""
+                    INSERT INTO Invoices (booking_id, amount, invoice_number)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE amount = VALUES(amount)
+                """, [(e['booking_id'], e['amount'], f"INV-{e['booking_id']}-{issued}") for e in run])
+            elif event_type == 'updated':
+                cursor.executemany("""
+                    UPDATE Invoices
+                    SET amount = %s
+                    WHERE booking_id = %s
+                """, [(e['amount'], e['booking_id']) for e in run])
+            elif event_type == 'cancelled':
+                cursor.executemany("DELETE FROM Invoices WHERE booking_id = %s",
+                                   [(e['booking_id'],) for e in run])
+
+            cursor.executemany("""
+                INSERT INTO EmailLogs (booking_id, email_type)
+                VALUES (%s, %s)
+            """, [(e['booking_id'], EMAIL_TYPES[event_type]) for e in run])
+
+        # The whole batch's rollup changes go in as one write per (day, category)
+        ReportRepository.apply_rollup_deltas(cursor, ReportRepository.rollup_deltas(cursor, events))
+
+        placeholders = ", ".join(["%s"] * len(events))
+        cursor.execute(f"UPDATE BookingOutbox SET processed_at = NOW(6) WHERE outbox_id IN ({placeholders})",
+                       tuple(e['outbox_id'] for e in events))
+
+    def process_batch(self, partition: int, partitions: int, limit: int, max_attempts: int = 5) -> int:
+        try:
+            with self.db.get_cursor() as cursor:
+                events = self.claim_batch(cursor, partition, partitions, limit)
+                if events:
+                    self.materialize(cursor, events)
+                return len(events)
+        except Exception as e:
+            self.logger.warning("Outbox batch for partition %s failed, retrying its events one at a time: %s",
+                                partition, e)
+        return self.process_singly(partition, partitions, limit, max_attempts)
+
+    # A deadlock (or a lock wait timeout with innodb_rollback_on_timeout) rolls back the
+    # whole transaction and its savepoints, so ROLLBACK TO SAVEPOINT then fails with this
+    SAVEPOINT_DOES_NOT_EXIST = 1305
+    TRANSACTION_RETRIES = 3
+
+    def process_singly(self, partition: int, partitions: int, limit: int, max_attempts: int) -> int:
+        # The events applied before a lost transaction were rolled back with it, so the
+        # batch is claimed again in a fresh transaction and the event retried there. It is
+        # not counted against its attempts; the next poll picks the batch up if every
+        # retry is lost too.
+        for attempt in range(1, self.TRANSACTION_RETRIES + 1):
+            try:
+                return self._process_singly(partition, partitions, limit, max_attempts)
+            except Error as e:
+                if e.errno != self.SAVEPOINT_DOES_NOT_EXIST:
+                    raise
+                self.logger.warning("Outbox transaction for partition %s was rolled back by the server "
+                                    "(attempt %s of %s): %s", partition, attempt, self.TRANSACTION_RETRIES,
+                                    e.__context__ or e)
+        return 0
+
+    def _process_singly(self, partition: int, partitions: int, limit: int, max_attempts: int) -> int:
+        # Applies the batch event by event, each under a savepoint, so one bad event is
+        # rolled back alone and counted against its attempts instead of failing the batch.
+        # Later events of its booking wait until it succeeds or is dead-lettered.
+        processed = 0
+        with self.db.get_cursor() as cursor:
+            blocked = set()
+            for event in self.claim_batch(cursor, partition, partitions, limit):
+                if event['booking_id'] in blocked:
+                    continue
+                cursor.execute("SAVEPOINT outbox_event")
+                try:
+                    self.materialize(cursor, [event])
+                    processed += 1
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO SAVEPOINT outbox_event")
+                    blocked.add(event['booking_id'])
+                    self._record_failure(cursor, event, e, max_attempts)
+        return processed
+
+    def _record_failure(self, cursor, event: Dict, error: Exception, max_attempts: int) -> None:
+        # MySQL assigns left to right, so the IF sees the incremented attempts
+        cursor.execute("""
+            UPDATE BookingOutbox
+            SET attempts = attempts + 1,
+                last_error = %s,
+                dead_lettered_at = IF(attempts >= %s, NOW(6), NULL)
+            WHERE outbox_id = %s
+        """, (str(error)[:1000], max_attempts, event['outbox_id']))
+        self.logger.error("Outbox event %s (booking %s, %s) failed: %s", event['outbox_id'],
+                          event['booking_id'], event['event_type'], error)
+
+    def get_lag(self) -> Dict:
+        with self.db.get_cursor() as cursor:
+            # Dead-lettered events are counted apart and do not age the backlog
+            cursor.execute("""
+                SELECT SUM(dead_lettered_at IS NULL) AS pending,
+                       SUM(dead_lettered_at IS NOT NULL) AS dead_lettered,
+                       TIMESTAMPDIFF(MICROSECOND, MIN(IF(dead_lettered_at IS NULL, created_at, NULL)),
+                                     NOW(6)) / 1000000 AS oldest_seconds
+                FROM BookingOutbox
+                WHERE processed_at IS NULL
+            """)
+            row = cursor.fetchone()
+            return {'pending': int(row['pending'] or 0), 'dead_lettered': int(row['dead_lettered'] or 0),
+                    'oldest_seconds': float(row['oldest_seconds'] or 0)}
+
+    def purge_processed(self, older_than_hours: int, limit: int = 1000) -> int:
+        with self.db.get_cursor() as cursor:
+            cursor.execute("""
+                DELETE FROM BookingOutbox
+                WHERE processed_at < NOW(6) - INTERVAL %s HOUR
+                LIMIT %s
+            """, (older_than_hours, limit))
+            return cursor.rowcount
+
+    @staticmethod
+    def _runs(events: List[Dict]):
+        run: List[Dict] = []
+        for event in events:
+            if run and run[-1]['event_type'] != event['event_type']:
+                yield run[-1]['event_type'], run
+                run = []
+            run.append(event)
+        if run:
+            yield run[-1]['event_type'], run
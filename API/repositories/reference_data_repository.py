@@ -0,0 +1,32 @@
+from database import Database
+from models import VehicleCategory
+from row_mapper import object_mapper
+from typing import List, Tuple
+import logging
+
+class ReferenceDataRepository:
+    CATEGORY_FIELDS = ('category_id', 'name', 'capacity', 'daily_rate')
+
+    def __init__(self):
+        self.db = Database()
+        self.logger = logging.getLogger(__name__)
+
+    # primary=True reads past replica lag, for when a stale answer would reject a request
+    def get_version(self, primary: bool = False) -> int:
+        with self.db.get_cursor(dictionary=False, readonly=not primary, commit=False) as cursor:
+            cursor.execute("SELECT version FROM ReferenceDataVersion WHERE id = 1")
+            row = cursor.fetchone()
+            return row[0] if row else 0
+
+    def load(self, primary: bool = False) -> Tuple[int, List[VehicleCategory], List[Tuple[int, int]]]:
+        # The version is read first: a change committed in between only makes the data
+        # newer than the version, which triggers one more reload later
+        with self.db.get_cursor(dictionary=False, readonly=not primary, commit=False) as cursor:
+            cursor.execute("SELECT version FROM ReferenceDataVersion WHERE id = 1")
+            row = cursor.fetchone()
+            version = row[0] if row else 0
+            cursor.execute(f"SELECT {', '.join(self.CATEGORY_FIELDS)} FROM VehicleCategories")
+            categories = list(map(object_mapper(VehicleCategory, self.CATEGORY_FIELDS), cursor.fetchall()))
+            cursor.execute("SELECT vehicle_id, category_id FROM Vehicles")
+            vehicles = cursor.fetchall()
+        return version, categories, vehicles
@@ -0,0 +1,209 @@
+
+from database import Database
+from models import Booking
+from reference_data import with_category_names
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+class ReportRepository:
+    # Archived bookings keep counting in past days' totals
+    BOOKING_TABLES = ('Bookings', 'BookingsArchive')
+
+    def __init__(self):
+        self.db = Database()
+        self.logger = logging.getLogger(__name__)
+
+    def get_daily_report(self, report_date: datetime, category_id: Optional[int] = None) -> List[Dict]:
+        with self.db.get_cursor(prepared=True, readonly=True) as cursor:
+            query = """
+                SELECT
+                    r.category_id,
+                    r.booking_count,
+                    r.total_revenue,
+                    r.pickup_count,
+                    r.pickup_revenue,
+                    r.return_count,
+                    r.return_revenue
+                FROM DailyCategoryRollups r
+                WHERE r.report_date = %s
+                AND r.booking_count > 0
+            """
+            params = [report_date.date() if isinstance(report_date, datetime) else report_date]
+
+            if category_id:
+                query += " AND r.category_id = %s"
+                params.append(category_id)
+
+            query += " ORDER BY r.category_id"
+
+            cursor.execute(query, tuple(params))
+            rows = cursor.fetchall()
+        return with_category_names(rows)
+
+    # Rollup changes of a batch of outbox events, summed per (report_date, category_id) as
+    # [booking_count, total_revenue, pickup_count, pickup_revenue, return_count, return_revenue]
+    @staticmethod
+    def rollup_deltas(cursor, events: Iterable[Dict]) -> Dict[Tuple[date, int], List]:
+        contributions = []
+        for event in events:
+            if event['previous_vehicle_id'] is not None:
+                contributions.append((-1, event['previous_vehicle_id'], event['previous_pickup_date'],
+                                      event['previous_return_date'], event['previous_amount']))
+            if event['vehicle_id'] is not None:
+                contributions.append((1, event['vehicle_id'], event['pickup_date'],
+                                      event['return_date'], event['amount']))
+        if not contributions:
+            return {}
+
+        vehicle_ids = sorted({contribution[1] for contribution in contributions})
+        placeholders = ", ".join(["%s"] * len(vehicle_ids))
+        cursor.execute(f"SELECT vehicle_id, category_id FROM Vehicles WHERE vehicle_id IN ({placeholders})",
+                       tuple(vehicle_ids))
+        categories = {row['vehicle_id']: row['category_id'] for row in cursor.fetchall()}
+
+        deltas: Dict[Tuple[date, int], List] = {}
+        for sign, vehicle_id, pickup_date, return_date, cost in contributions:
+            category_id = categories.get(vehicle_id)
+            if category_id is None:
+                continue
+            pickup_day, return_day = pickup_date.date(), return_date.date()
+            same_day = pickup_day == return_day
+            row = deltas.setdefault((pickup_day, category_id), [0] * 6)
+            row[0] += sign
+            row[1] += sign * cost
+            row[2] += sign
+            row[3] += sign * cost
+            if same_day:
+                row[4] += sign
+                row[5] += sign * cost
+            else:
+                row = deltas.setdefault((return_day, category_id), [0] * 6)
+                row[0] += sign
+                row[1] += sign * cost
+                row[4] += sign
+                row[5] += sign * cost
+        return deltas
+
+    @staticmethod
+    def apply_rollup_deltas(cursor, deltas: Dict[Tuple[date, int], List], sign: int = 1) -> None:
+        # Rows are written in key order, so two transactions applying overlapping days take
+        # the row locks in the same order
+        rows = [(report_date, category_id, *(sign * value for value in values))
+                for (report_date, category_id), values in sorted(deltas.items()) if any(values)]
+        if rows:
+            cursor.executemany("""
+                INSERT INTO DailyCategoryRollups (report_date, category_id, booking_count, total_revenue,
+                                                  pickup_count, pickup_revenue, return_count, return_revenue)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    booking_count = booking_count + VALUES(booking_count),
+                    total_revenue = total_revenue + VALUES(total_revenue),
+                    pickup_count = pickup_count + VALUES(pickup_count),
+                    pickup_revenue = pickup_revenue + VALUES(pickup_revenue),
+                    return_count = return_count + VALUES(return_count),
+                    return_revenue = return_revenue + VALUES(return_revenue)
+            """, rows)
+
+    PENDING_ROLLUP_EVENTS_SQL = """
+        SELECT amount, vehicle_id, pickup_date, return_date, previous_vehicle_id,
+               previous_pickup_date, previous_return_date, previous_amount
+        FROM BookingOutbox
+        WHERE processed_at IS NULL
+        FOR UPDATE
+    """
+
+    # Days rebuilt per transaction. Each one holds the pending outbox rows, and so the
+    # bookings enqueueing behind them, only while its own days are recomputed.
+    REBUILD_CHUNK_DAYS = 7
+
+    def rebuild_rollups(self, start: Optional[date] = None, end: Optional[date] = None,
+                        chunk_days: Optional[int] = None) -> int:
+        # Recomputes the rollup rows for [start, end] (every day with bookings or rollups when
+        # omitted) from Bookings and BookingsArchive, chunk_days per transaction. Each chunk
+        # locks the pending outbox events first and leaves their changes out of its rows,
+        # since the outbox workers apply them afterwards.
+        chunk_days = chunk_days or self.REBUILD_CHUNK_DAYS
+        if start is None or end is None:
+            first_day, last_day = self._rollup_day_bounds()
+            start, end = start or first_day, end or last_day
+            if start is None or end is None:
+                return 0
+
+        self.logger.info("Rebuilding daily rollups from %s to %s", start, end)
+        rebuilt = 0
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+            rebuilt += self._rebuild_rollup_days(chunk_start, chunk_end)
+            chunk_start = chunk_end + timedelta(days=1)
+        return rebuilt
+
+    def _rollup_day_bounds(self) -> Tuple[Optional[date], Optional[date]]:
+        # Days that can have rollup rows: any booking's pickup or return day, and any day
+        # already in the table (its bookings may since have been deleted)
+        with self.db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT MIN(first_day) AS first_day, MAX(last_day) AS last_day FROM (
+                    SELECT MIN(pickup_day) AS first_day, MAX(return_day) AS last_day FROM Bookings
+                    UNION ALL
+                    SELECT MIN(pickup_day), MAX(return_day) FROM BookingsArchive
+                    UNION ALL
+                    SELECT MIN(report_date), MAX(report_date) FROM DailyCategoryRollups
+                ) AS bounds
+            """)
+            row = cursor.fetchone()
+        return (row['first_day'], row['last_day']) if row else (None, None)
+
+    def _rebuild_rollup_days(self, start: date, end: date) -> int:
+        # Each branch is bounded by pickup_day, which both tables index; a return day in
+        # range belongs to a booking picked up at most a rental length earlier
+        earliest_pickup = Booking.earliest_overlapping_pickup(start)
+        contributions, params = [], []
+        for table in self.BOOKING_TABLES:
+            contributions.append(f"""
+                        SELECT b.pickup_day AS report_date, v.category_id, b.total_cost,
+                            1 AS is_pickup,
+                            b.return_day = b.pickup_day AS is_return
+                        FROM {table} b
+                        JOIN Vehicles v ON v.vehicle_id = b.vehicle_id
+                        WHERE b.is_deleted = FALSE
+                        AND b.pickup_day BETWEEN %s AND %s
+                        UNION ALL
+                        SELECT b.return_day, v.category_id, b.total_cost, 0, 1
+                        FROM {table} b
+                        JOIN Vehicles v ON v.vehicle_id = b.vehicle_id
+                        WHERE b.is_deleted = FALSE
+                        AND b.return_day <> b.pickup_day
+                        AND b.pickup_day BETWEEN %s AND %s
+                        AND b.return_day BETWEEN %s AND %s""")
+            params += [start, end, earliest_pickup, end, start, end]
+
+        with self.db.get_cursor() as cursor:
+            cursor.execute("START TRANSACTION")
+            try:
+                cursor.execute(self.PENDING_ROLLUP_EVENTS_SQL)
+                pending = cursor.fetchall()
+                cursor.execute("DELETE FROM DailyCategoryRollups WHERE report_date BETWEEN %s AND %s",
+                               (start, end))
+                cursor.execute(f"""
+                    INSERT INTO DailyCategoryRollups (report_date, category_id, booking_count,
+                        total_revenue, pickup_count, pickup_revenue, return_count, return_revenue)
+                    SELECT report_date, category_id,
+                        COUNT(*), SUM(total_cost),
+                        SUM(is_pickup), SUM(is_pickup * total_cost),
+                        SUM(is_return), SUM(is_return * total_cost)
+                    FROM ({"                        UNION ALL".join(contributions)}
+                    ) AS contributions
+                    GROUP BY report_date, category_id
+                """, tuple(params))
+                rebuilt = cursor.rowcount
+                deltas = {key: values for key, values in self.rollup_deltas(cursor, pending).items()
+                          if start <= key[0] <= end}
+                self.apply_rollup_deltas(cursor, deltas, sign=-1)
+                cursor.execute("COMMIT")
+                return rebuilt
+            except Exception as e:
+                cursor.execute("ROLLBACK")
+                self.logger.error("Error while rebuilding daily rollups: %s", e)
+                raise
@@ -3,27 +3,15 @@ from database import Database
 from models import User
 from typing import Optional
 from mysql.connector import Error
+from user_cache import MISS, user_cache
 import logging
 
 class UserRepository:
+    GET_BY_ID_SQL = "SELECT user_id, email, first_name, last_name, password_hash, created_at FROM Users WHERE user_id = %s AND is_deleted = FALSE"
+
     def __init__(self):
         self.db = Database()
-        
         self.logger = logging.getLogger(__name__)
-        self.logger.setLevel(logging.INFO)
-        
-        file_handler = logging.FileHandler('user_repository.log')
-        file_handler.setLevel(logging.INFO)
-        
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
-
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
 
     def create(self, user: User) -> int:
         with self.db.get_cursor() as cursor:
@@ -32,16 +20,25 @@ class UserRepository:
                 "VALUES (%s, %s, %s, %s)",
                 (user.email, user.first_name, user.last_name, 'temp_hash')
             )
-            return cursor.lastrowid
+            user_id = cursor.lastrowid
+        # Drops a cached "missing" answer for the new id
+        user_cache.invalidate(user_id)
+        return user_id
 
     def get_by_id(self, user_id: int) -> Optional[User]:
-        with self.db.get_cursor() as cursor:
-            cursor.execute(
-                "SELECT user_id, email, first_name, last_name, password_hash, created_at FROM Users WHERE user_id = %s AND is_deleted = FALSE", 
-                (user_id,)
-            )
+        user = user_cache.get(user_id)
+        if user is not MISS:
+            return user
+        version = user_cache.version
+        with self.db.get_cursor(prepared=True, readonly=True) as cursor:
+            cursor.execute(self.GET_BY_ID_SQL, (user_id,))
             data = cursor.fetchone()
-            return User.from_db_dict(data) if data else None
+            user = User.from_db_dict(data) if data else None
+        # A lagging replica can still return a row that was just updated or deleted, and
+        # caching it would serve the old row for the whole TTL
+        if not self.db.served_by_replica():
+            user_cache.put(user_id, user, version)
+        return user
 
     def update(self, user: User) -> bool:
         with self.db.get_cursor() as cursor:
@@ -51,9 +48,14 @@ class UserRepository:
                 "WHERE user_id = %s",
                 (user.email, user.first_name, user.last_name, user.user_id)
             )
-            return cursor.rowcount > 0
+            updated = cursor.rowcount > 0
+        # After the commit, so a concurrent read cannot cache the old row again
+        user_cache.invalidate(user.user_id)
+        return updated
         
     def delete(self, user_id: int) -> bool:
         with self.db.get_cursor() as cursor:
             cursor.execute("UPDATE Users SET is_deleted = TRUE WHERE user_id = %s", (user_id,))
-            return cursor.rowcount > 0
\ No newline at end of file
+            deleted = cursor.rowcount > 0
+        user_cache.invalidate(user_id)
+        return deleted
\ No newline at end of file
@@ -1,34 +1,18 @@
 
-from typing import List, Dict, Optional
-from datetime import datetime
+from typing import Callable, Iterator, List, Dict, Optional, Sequence, Tuple
+from datetime import datetime, timedelta
 from mysql.connector import Error
 from database import Database
-from models import Vehicle, VehicleStatus
+from models import Booking, Vehicle, VehicleStatus
+from reference_data import reference_data, with_category_names
+from row_mapper import dict_mapper, object_mapper
+import availability
 import logging
 
-'''
-
-for logging: for debugging we could use a constant to allow for the debugging testing but 
-wouldn't produce in the production environment. 
-'''
 class VehicleRepository:
     def __init__(self):
         self.db = Database()
         self.logger = logging.getLogger(__name__)
-        self.logger.setLevel(logging.INFO)
-        
-        file_handler = logging.FileHandler('vehicle_repository.log')
-        file_handler.setLevel(logging.INFO)
-        
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
-
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
 
     def create(self, vehicle: Vehicle) -> int:
         with self.db.get_cursor() as cursor:
@@ -46,72 +30,165 @@ class VehicleRepository:
                 vehicle.status.value,
                 vehicle.last_maintenance
             ))
-            return cursor.lastrowid
+            vehicle_id = cursor.lastrowid
+        reference_data.invalidate()
+        # Cached listings that could include the new vehicle are missing it
+        availability.invalidate_window(vehicle_id)
+        return vehicle_id
+
+    VEHICLE_FIELDS = ('vehicle_id', 'category_id', 'registration_number', 'model', 'make',
+                      'year', 'status', 'last_maintenance')
 
     def get_by_id(self, vehicle_id: int) -> Optional[Vehicle]:
-        with self.db.get_cursor() as cursor:
-            cursor.execute("""
-                SELECT * FROM Vehicles 
+        with self.db.get_cursor(dictionary=False) as cursor:
+            cursor.execute(f"""
+                SELECT {', '.join(self.VEHICLE_FIELDS)} FROM Vehicles 
                 WHERE vehicle_id = %s
             """, (vehicle_id,))
             result = cursor.fetchone()
-            return Vehicle.from_db_dict(result) if result else None
+            return object_mapper(Vehicle, self.VEHICLE_FIELDS)(result) if result else None
+
+    # Availability rows are read from tuple cursors and mapped by position, so
+    # AVAILABILITY_COLUMNS and AVAILABILITY_FIELDS must stay in the same order. daily_rate
+    # comes from the reference data cache rather than a join with VehicleCategories.
+    AVAILABILITY_COLUMNS = """
+        v.vehicle_id,
+        v.status,
+        v.category_id,
+        v.make,
+        v.model,
+        v.year,
+        v.last_maintenance
+    """
+    AVAILABILITY_FIELDS = ('vehicle_id', 'status', 'category_id', 'make', 'model', 'year',
+                           'last_maintenance')
+
+    @classmethod
+    def availability_mapper(cls) -> Callable[[Sequence], dict]:
+        # One rate table per result, so a refresh never mixes two versions in one response
+        to_dict = dict_mapper(cls.AVAILABILITY_FIELDS)
+        rates = reference_data.daily_rates()
+
+        def map_row(row):
+            vehicle = to_dict(row)
+            vehicle['daily_rate'] = rates.get(row[2])
+            return vehicle
+        return map_row
 
     def get_available_vehicles(self, start_date: datetime, end_date: datetime,
                             category_id: Optional[int] = None,
-                            vehicle_id: Optional[int] = None) -> List[dict]:
-        with self.db.get_cursor() as cursor:
-            query = """
-                SELECT DISTINCT 
-                    v.vehicle_id,
-                    v.status,
-                    v.category_id,
-                    v.make,
-                    v.model,
-                    v.year,
-                    v.last_maintenance,
-                    vc.daily_rate
-                FROM Vehicles v
-                INNER JOIN VehicleCategories vc ON v.category_id = vc.category_id
-                LEFT JOIN Bookings b ON v.vehicle_id = b.vehicle_id
-                WHERE v.status = %s
-                AND (b.booking_id IS NULL
-                    OR NOT (
-                        (b.pickup_date BETWEEN %s AND %s)
-                        OR (b.return_date BETWEEN %s AND %s)
-                        OR (b.pickup_date <= %s AND b.return_date >= %s)
-                    ))
-            """
-            params = [VehicleStatus.AVAILABLE.name, start_date, end_date, 
-                    start_date, end_date, start_date, end_date]
-            
-            if category_id:
-                query += " AND v.category_id = %s"
-                params.append(category_id)
-            
-            if vehicle_id:
-                query += " AND v.vehicle_id = %s"
-                params.append(vehicle_id)
-                    
-            cursor.execute(query, tuple(params))
-            results = cursor.fetchall()
-            return [
-                {
-                    "vehicle_id": row["vehicle_id"],
-                    "status": row["status"],
-                    "category_id": row["category_id"],
-                    "make": row["make"],
-                    "model": row["model"],
-                    "year": row["year"],
-                    "last_maintenance": row["last_maintenance"],
-                    "daily_rate": row["daily_rate"]
-                }
-                for row in results
-            ]
-
-
-
-
+                            vehicle_id: Optional[int] = None,
+                            after_vehicle_id: Optional[int] = None,
+                            limit: Optional[int] = None) -> List[dict]:
+        with self.db.get_cursor(dictionary=False, prepared=True, readonly=True) as cursor:
+            cursor.execute(*self.build_availability_query(start_date, end_date, category_id, vehicle_id,
+                                                          after_vehicle_id, limit))
+            return list(map(self.availability_mapper(), cursor.fetchall()))
+
+    def iter_available_vehicles(self, start_date: datetime, end_date: datetime,
+                                category_id: Optional[int] = None,
+                                vehicle_id: Optional[int] = None,
+                                after_vehicle_id: Optional[int] = None,
+                                chunk_size: int = 500) -> Iterator[dict]:
+        query, params = self.build_availability_query(start_date, end_date, category_id, vehicle_id,
+                                                      after_vehicle_id)
+        return self._stream(query, params, chunk_size)
+
+    def iter_fleet(self, category_id: Optional[int] = None, chunk_size: int = 500) -> Iterator[dict]:
+        query, params = self.build_fleet_query(category_id)
+        return self._stream(query, params, chunk_size)
+
+    def _stream(self, query: str, params: tuple, chunk_size: int) -> Iterator[dict]:
+        # Unbuffered cursor: rows stay on the server until fetched, so memory is bounded by
+        # chunk_size whatever the result size. The connection is held until the generator
+        # is exhausted or closed.
+        with self.db.get_cursor(dictionary=False, readonly=True, buffered=False) as cursor:
+            cursor.execute(query, params)
+            map_row = self.availability_mapper()
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield from map(map_row, rows)
+
+    # Shared with the async repositories so both stacks answer availability identically.
+    # after_vehicle_id/limit page by keyset on the vehicle_id ordering.
+    @classmethod
+    def build_availability_query(cls, start_date: datetime, end_date: datetime,
+                                 category_id: Optional[int] = None,
+                                 vehicle_id: Optional[int] = None,
+                                 after_vehicle_id: Optional[int] = None,
+                                 limit: Optional[int] = None) -> Tuple[str, tuple]:
+        query = f"""
+            SELECT {cls.AVAILABILITY_COLUMNS}
+            FROM Vehicles v
+            WHERE v.status = %s
+            AND NOT EXISTS (
+                SELECT 1 FROM Bookings b
+                WHERE b.vehicle_id = v.vehicle_id
+                AND b.status IN ('pending', 'active')
+                AND b.is_deleted = FALSE
+                AND b.pickup_date <= %s
+                AND b.pickup_date >= %s
+                AND b.return_date >= %s
+            )
+        """
+        params = [VehicleStatus.AVAILABLE.name, end_date, Booking.earliest_overlapping_pickup(start_date),
+                  start_date]
+
+        if category_id:
+            query += " AND v.category_id = %s"
+            params.append(category_id)
+
+        if vehicle_id:
+            query += " AND v.vehicle_id = %s"
+            params.append(vehicle_id)
+
+        return cls._page(query, params, after_vehicle_id, limit)
+
+    @classmethod
+    def build_fleet_query(cls, category_id: Optional[int] = None,
+                          vehicle_id: Optional[int] = None,
+                          after_vehicle_id: Optional[int] = None,
+                          limit: Optional[int] = None) -> Tuple[str, tuple]:
+        query = f"""
+            SELECT {cls.AVAILABILITY_COLUMNS}
+            FROM Vehicles v
+            WHERE v.status = %s
+        """
+        params = [VehicleStatus.AVAILABLE.name]
+
+        if category_id:
+            query += " AND v.category_id = %s"
+            params.append(category_id)
+
+        if vehicle_id:
+            query += " AND v.vehicle_id = %s"
+            params.append(vehicle_id)
+
+        return cls._page(query, params, after_vehicle_id, limit)
+
+    @staticmethod
+    def _page(query: str, params: list, after_vehicle_id: Optional[int],
+              limit: Optional[int]) -> Tuple[str, tuple]:
+        if after_vehicle_id:
+            query += " AND v.vehicle_id > %s"
+            params.append(after_vehicle_id)
+
+        query += " ORDER BY v.vehicle_id"
+
+        if limit:
+            query += " LIMIT %s"
+            params.append(limit)
+        return query, tuple(params)
+
+    def get_fleet(self, category_id: Optional[int] = None,
+                  vehicle_id: Optional[int] = None,
+                  after_vehicle_id: Optional[int] = None,
+                  limit: Optional[int] = None) -> List[dict]:
+        with self.db.get_cursor(dictionary=False, prepared=True) as cursor:
+            cursor.execute(*self.build_fleet_query(category_id, vehicle_id, after_vehicle_id, limit))
+            return list(map(self.availability_mapper(), cursor.fetchall()))
 
     def update_status(self, vehicle_id: int, status: VehicleStatus) -> None:
         with self.db.get_cursor() as cursor:
@@ -120,6 +197,8 @@ class VehicleRepository:
                 SET status = %s 
                 WHERE vehicle_id = %s
             """, (status.value, vehicle_id))
+        # Status decides whether the vehicle is offered at all, so every window is affected
+        availability.invalidate_window(vehicle_id)
 
     def update_maintenance(self, vehicle_id: int, maintenance_date: datetime) -> None:
         with self.db.get_cursor() as cursor:
@@ -130,26 +209,41 @@ class VehicleRepository:
             """, (maintenance_date, vehicle_id))
 
     def get_daily_report(self, date: datetime, category_id: Optional[int] = None) -> List[Dict]:
-        with self.db.get_cursor() as cursor:
-            query = """
-                SELECT 
-                    v.category_id,
-                    vc.name as category_name,
-                    COUNT(b.booking_id) as booking_count,
-                    SUM(b.total_cost) as total_revenue
-                FROM Vehicles v
-                JOIN VehicleCategories vc ON v.category_id = vc.category_id
-                LEFT JOIN Bookings b ON v.vehicle_id = b.vehicle_id
-                WHERE DATE(b.pickup_date) = DATE(%s)
-                OR DATE(b.return_date) = DATE(%s)
-            """
-            params = [date, date]
-
-            if category_id:
-                query += " AND v.category_id = %s"
-                params.append(category_id)
-
-            query += " GROUP BY v.category_id, vc.name"
-            
-            cursor.execute(query, tuple(params))
-            return cursor.fetchall()
+        query, params = self.build_daily_report_query(date, category_id)
+        with self.db.get_cursor(readonly=True) as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        return with_category_names(rows)
+
+    # Bookings picked up or returned on the day, each counted once. The two branches are
+    # range lookups on the stored pickup_day/return_day columns; the previous
+    # DATE(b.pickup_date) = DATE(%s) OR ... scanned every booking. The pickup_date bounds
+    # only restrict the branches to the partitions that can hold matching rows.
+    @staticmethod
+    def build_daily_report_query(date: datetime, category_id: Optional[int] = None) -> Tuple[str, tuple]:
+        day = date.date() if isinstance(date, datetime) else date
+        day_start = datetime.combine(day, datetime.min.time())
+        next_day = day_start + timedelta(days=1)
+        query = """
+            SELECT
+                v.category_id,
+                COUNT(b.booking_id) as booking_count,
+                SUM(b.total_cost) as total_revenue
+            FROM (
+                SELECT booking_id, vehicle_id, total_cost FROM Bookings
+                WHERE pickup_day = %s AND pickup_date >= %s AND pickup_date < %s
+                UNION
+                SELECT booking_id, vehicle_id, total_cost FROM Bookings
+                WHERE return_day = %s AND pickup_date >= %s AND pickup_date < %s
+            ) b
+            JOIN Vehicles v ON v.vehicle_id = b.vehicle_id
+        """
+        params = [day, day_start, next_day,
+                  day, Booking.earliest_overlapping_pickup(day_start), next_day]
+
+        if category_id:
+            query += " WHERE v.category_id = %s"
+            params.append(category_id)
+
+        query += " GROUP BY v.category_id"
+        return query, tuple(params)
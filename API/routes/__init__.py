@@ -1,5 +1,7 @@
 from .booking_route import bookings_api
 from .vehicle_route import vehicles_api
 from .user_route import users_api
+from .admin_route import admin_api
+from .metrics_route import metrics_api
 
-api = [bookings_api, vehicles_api, users_api]
\ No newline at end of file
+api = [bookings_api, vehicles_api, users_api, admin_api]
@@ -0,0 +1,83 @@
+from flask import Blueprint, jsonify, current_app, request
+from reference_data import reference_data
+from slow_query_log import slow_query_log
+from user_cache import user_cache
+
+admin_api = Blueprint('admin_api', __name__)
+
+@admin_api.route('/admin/pool', methods=['GET'])
+def get_pool_stats():
+    return jsonify({
+        'status': 'success',
+        'data': current_app.config['DATABASE'].pool_stats()
+    })
+
+@admin_api.route('/admin/replica', methods=['GET'])
+def get_replica_stats():
+    stats = current_app.config['DATABASE'].replica_stats()
+    if not stats:
+        return jsonify({
+            'status': 'error',
+            'message': 'No read replica is configured'
+        }), 404
+    return jsonify({
+        'status': 'success',
+        'data': stats
+    })
+
+@admin_api.route('/admin/outbox', methods=['GET'])
+def get_outbox_stats():
+    outbox = current_app.config.get('OUTBOX')
+    if outbox is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Outbox workers are not running in this process'
+        }), 404
+    return jsonify({
+        'status': 'success',
+        'data': outbox.stats()
+    })
+
+
+@admin_api.route('/admin/availability_cache', methods=['GET'])
+def get_availability_cache_stats():
+    cache = current_app.config.get('AVAILABILITY_CACHE')
+    if cache is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Availability cache is disabled'
+        }), 404
+    return jsonify({
+        'status': 'success',
+        'data': cache.stats()
+    })
+
+@admin_api.route('/admin/user_cache', methods=['GET'])
+def get_user_cache_stats():
+    return jsonify({
+        'status': 'success',
+        'data': user_cache.stats()
+    })
+
+@admin_api.route('/admin/reference_data', methods=['GET'])
+def get_reference_data_stats():
+    return jsonify({
+        'status': 'success',
+        'data': reference_data.stats()
+    })
+
+@admin_api.route('/admin/slow_queries', methods=['GET'])
+def get_slow_queries():
+    if not slow_query_log.enabled:
+        return jsonify({
+            'status': 'error',
+            'message': 'Slow query capture is disabled'
+        }), 404
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify({
+        'status': 'success',
+        'data': {
+            'stats': slow_query_log.stats(),
+            'top': slow_query_log.top(limit)
+        }
+    })
@@ -1,8 +1,9 @@
 from flask import Blueprint, request, jsonify, current_app
 from services.booking_service import BookingService
 from datetime import datetime
-from repositories import BookingRepository
-from repositories.vehicle_repository import VehicleRepository
+from repositories import BookingRepository, BookingRejected
+from models import BookingCommitStatus
+from repositories.report_repository import ReportRepository
 from mysql.connector import Error as MySQLError
 
 bookings_api = Blueprint('bookings_api', __name__)
@@ -16,40 +17,77 @@ def create_booking():
         return jsonify({'booking_id': booking_id}), 201
     except MySQLError as e:
         error_code = e.errno
-        if error_code == 1452: 
-            if 'vehicles' in str(e):
-                return jsonify({
-                    'error': 'Invalid Vehicle',
-                    'details': 'The specified vehicle does not exist in the database.'
-                }), 400
-            elif 'users' in str(e):
-                return jsonify({
-                    'error': 'Invalid User',
-                    'details': 'The specified user does not exist in the database.'
-                }), 400
-            else:
-                return jsonify({
-                    'error': 'Foreign Key Constraint Violation',
-                    'details': 'A referenced record does not exist.'
-                }), 400
-        elif error_code == 1062:  
+        if error_code == 1062:  
             return jsonify({
                 'error': 'Duplicate Entry',
                 'details': 'A booking with these details already exists.'
             }), 400
         else:
-            current_app.logger.error(f"Database error: {e}", exc_info=True)
+            current_app.logger.error("Database error: %s", e, exc_info=True)
             return jsonify({
                 'error': 'Database Error',
                 'details': f"An error occurred while processing your request. Error code: {error_code}"
             }), 500
+    except BookingRejected as e:
+        return jsonify({
+            'error': str(e),
+            'code': e.status.name
+        }), 409 if e.status is BookingCommitStatus.VEHICLE_UNAVAILABLE else 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        current_app.logger.error(f"Error occurred while creating booking: {e}", exc_info=True)
+        current_app.logger.error("Error occurred while creating booking: %s", e, exc_info=True)
         return jsonify({
             'error': 'An unexpected error occurred while processing your booking request.',
             'details': str(e)
         }), 500
 
+MAX_BATCH_SIZE = 500
+
+def batch_status(results, created: int) -> int:
+    # 207 only when some bookings were created and some were not. When none were, the
+    # status a single booking gets for the shared reason, or 400 if the reasons differ.
+    if created == len(results):
+        return 201
+    if created:
+        return 207
+    statuses = {409 if result['code'] == BookingCommitStatus.VEHICLE_UNAVAILABLE.name else 400
+                for result in results}
+    return statuses.pop() if len(statuses) == 1 else 400
+
+@bookings_api.route('/bookings/batch', methods=['POST'])
+def create_bookings_batch():
+    items = request.json.get('bookings') if isinstance(request.json, dict) else request.json
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Request body must be a non-empty list of bookings'}), 400
+    if len(items) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'A batch cannot contain more than {MAX_BATCH_SIZE} bookings'}), 400
+    if not all(isinstance(item, dict) for item in items):
+        return jsonify({'error': 'Every booking in the batch must be an object'}), 400
+
+    try:
+        booking_repo = BookingRepository()
+        booking_service = BookingService(booking_repo)
+        results = booking_service.create_bookings(items)
+        created = sum(1 for result in results if result['status'] == 'created')
+        return jsonify({
+            'created': created,
+            'failed': len(results) - created,
+            'results': results
+        }), batch_status(results, created)
+    except MySQLError as e:
+        current_app.logger.error("Database error while creating booking batch: %s", e, exc_info=True)
+        return jsonify({
+            'error': 'Database Error',
+            'details': f"No bookings in the batch were created. Error code: {e.errno}"
+        }), 500
+    except Exception as e:
+        current_app.logger.error("Error occurred while creating booking batch: %s", e, exc_info=True)
+        return jsonify({
+            'error': 'An unexpected error occurred while processing your batch request.',
+            'details': str(e)
+        }), 500
+
 @bookings_api.route('/bookings/<int:booking_id>', methods=['PUT'])
 def update_booking(booking_id):
     try:
@@ -62,7 +100,7 @@ def update_booking(booking_id):
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        current_app.logger.error(f"Error occurred while updating booking: {e}", exc_info=True)
+        current_app.logger.error("Error occurred while updating booking: %s", e, exc_info=True)
         return jsonify({
             'error': 'An unexpected error occurred while processing your update request. Please try again later.',
             'details': str(e)
@@ -80,7 +118,7 @@ def delete_booking(booking_id):
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        current_app.logger.error(f"Error occurred while deleting booking: {e}", exc_info=True)
+        current_app.logger.error("Error occurred while deleting booking: %s", e, exc_info=True)
         return jsonify({
             'error': 'An unexpected error occurred while processing your delete request. Please try again later.',
             'details': str(e)
@@ -104,8 +142,8 @@ def get_daily_report():
     except ValueError:
         return jsonify({'error': 'Invalid date format. Please use YYYY-MM-DD.'}), 400
 
-    vehicle_repo = VehicleRepository()
-    report = vehicle_repo.get_daily_report(date, category_id)
+    report_repo = ReportRepository()
+    report = report_repo.get_daily_report(date, category_id)
 
     return jsonify(report), 200
     
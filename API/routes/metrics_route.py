@@ -0,0 +1,10 @@
+from flask import Blueprint, Response, current_app
+import metrics
+
+metrics_api = Blueprint('metrics_api', __name__)
+
+# Served at /metrics (outside /api) where Prometheus scrapes by default
+@metrics_api.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.registry.render(metrics.pool_gauges(current_app.config['DATABASE'])),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
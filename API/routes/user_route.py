@@ -41,7 +41,7 @@ def handle_user(user_id):
                }), 404
            return jsonify({
                'status': 'success',
-               'data': user.__dict__
+               'data': user
            })
 
        elif request.method == 'PUT':
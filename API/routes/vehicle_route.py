@@ -1,10 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from services import VehicleService
 from datetime import datetime
 from repositories import VehicleRepository
 
 vehicles_api = Blueprint('vehicles_api', __name__)
 
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 500
+STREAM_FORMATS = {'ndjson': 'application/x-ndjson', 'json': 'application/json'}
+
 '''
 """
 http://127.0.0.1:5000/api/vehicles/availability
@@ -43,17 +47,55 @@ def check_availability():
         # Optional fields
         category_id = int(request.args.get('category_id')) if request.args.get('category_id') else None
         vehicle_id = int(request.args.get('vehicle_id')) if request.args.get('vehicle_id') else None
+        after_vehicle_id = int(request.args.get('after_vehicle_id')) if request.args.get('after_vehicle_id') else None
+        limit = int(request.args.get('limit')) if request.args.get('limit') else None
+        stream = request.args.get('stream')
+
+        if limit is not None and not 0 < limit <= MAX_PAGE_SIZE:
+            return jsonify({
+                'status': 'error',
+                'message': 'Invalid limit',
+                'details': f"limit must be between 1 and {MAX_PAGE_SIZE}"
+            }), 400
+        if stream and stream not in STREAM_FORMATS:
+            return jsonify({
+                'status': 'error',
+                'message': 'Invalid stream format',
+                'details': f"stream must be one of: {', '.join(STREAM_FORMATS)}"
+            }), 400
+        if stream and (after_vehicle_id is not None or limit is not None):
+            return jsonify({
+                'status': 'error',
+                'message': 'Streaming cannot be paginated',
+                'details': 'Use either stream or after_vehicle_id/limit'
+            }), 400
 
         vehicle_repo = VehicleRepository()
-        vehicle_service = VehicleService(vehicle_repo)
+        vehicle_service = VehicleService(
+            vehicle_repo,
+            current_app.config.get('AVAILABILITY_BACKEND'),
+            current_app.config.get('AVAILABILITY_CONSISTENCY_CHECK', False),
+            current_app.config.get('AVAILABILITY_CACHE')
+        )
+        if stream:
+            vehicles = vehicle_service.stream_availability(
+                start_date, end_date, category_id, vehicle_id, STREAM_CHUNK_SIZE
+            )
+            body = _ndjson_body(vehicles) if stream == 'ndjson' else _json_body(vehicles)
+            return Response(stream_with_context(body), mimetype=STREAM_FORMATS[stream])
+
         vehicles = vehicle_service.check_availability(  # Changed method name
-            start_date, end_date, category_id, vehicle_id
+            start_date, end_date, category_id, vehicle_id, after_vehicle_id, limit
         )
-        
-        return jsonify({
+
+        response = {
             'status': 'success',
             'data': vehicles
-        })
+        }
+        if limit is not None:
+            # A full page means there may be more; clients pass this back as after_vehicle_id
+            response['next_after_vehicle_id'] = vehicles[-1]['vehicle_id'] if len(vehicles) == limit else None
+        return jsonify(response)
 
     except ValueError as e:
         return jsonify({
@@ -65,4 +107,29 @@ def check_availability():
             'status': 'error',
             'message': 'Internal server error',
             'details': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
+
+
+# Streaming bodies: headers are already sent by the time rows are read, so a failure
+# mid-stream can only be reported inside the body itself
+def _ndjson_body(vehicles):
+    dumps = current_app.json.dumps
+    try:
+        for vehicle in vehicles:
+            yield dumps(vehicle) + '\n'
+    except Exception as e:
+        current_app.logger.error("Availability stream failed: %s", e)
+        yield dumps({'status': 'error', 'message': 'Internal server error', 'details': str(e)}) + '\n'
+
+
+def _json_body(vehicles):
+    dumps = current_app.json.dumps
+    yield '{"status": "success", "data": ['
+    try:
+        for position, vehicle in enumerate(vehicles):
+            yield (',' if position else '') + dumps(vehicle)
+    except Exception as e:
+        current_app.logger.error("Availability stream failed: %s", e)
+        yield '], "complete": false, "error": ' + dumps(str(e)) + '}'
+        return
+    yield '], "complete": true}'
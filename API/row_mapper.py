@@ -0,0 +1,42 @@
+from functools import lru_cache
+from typing import Any, Callable, Optional, Sequence, Tuple
+import dataclasses
+import keyword
+
+'''
+Mappers from positional (tuple) cursor rows to model objects or output dicts. Each
+mapper is generated once per query shape, as a function whose body indexes the row
+directly, e.g. for the availability columns:
+
+    def map_row(row):
+        return {'vehicle_id': row[0], 'status': row[1], ...}
+
+so mapping a row costs one call, with no per-row dict from the cursor and no **kwargs
+unpacking on the way to the model.
+'''
+
+
+def _compile(expression: str, namespace: dict) -> Callable[[Sequence], Any]:
+    source = f"def map_row(row):\n    return {expression}\n"
+    exec(source, namespace)
+    return namespace['map_row']
+
+
+@lru_cache(maxsize=None)
+def dict_mapper(columns: Tuple[str, ...], keys: Optional[Tuple[str, ...]] = None) -> Callable[[Sequence], dict]:
+    # keys renames the columns in the output; by default the column names are used
+    keys = keys or columns
+    if len(keys) != len(columns):
+        raise ValueError("keys and columns must have the same length")
+    items = ', '.join(f"{key!r}: row[{position}]" for position, key in enumerate(keys))
+    return _compile('{' + items + '}', {})
+
+
+@lru_cache(maxsize=None)
+def object_mapper(cls: type, columns: Tuple[str, ...]) -> Callable[[Sequence], Any]:
+    # Columns are matched to the dataclass's init fields by name; columns the model does
+    # not have are skipped and fields the query does not select keep their defaults
+    fields = {field.name for field in dataclasses.fields(cls) if field.init}
+    arguments = [f"{column}=row[{position}]" for position, column in enumerate(columns)
+                 if column in fields and not keyword.iskeyword(column)]
+    return _compile(f"cls({', '.join(arguments)})", {'cls': cls})
@@ -0,0 +1,30 @@
+import argparse
+import os
+import signal
+import threading
+from logging_config import configure_logging
+from workers import OutboxWorkerPool
+
+def run_outbox_workers():
+    # Runs the outbox workers in a process of their own, so a multi-process web server
+    # does not start a set of them in every worker; stops on SIGTERM or SIGINT
+    parser = argparse.ArgumentParser(description="Drain BookingOutbox into Invoices and EmailLogs")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('OUTBOX_WORKERS', 2)))
+    parser.add_argument('--batch-size', type=int, default=int(os.getenv('OUTBOX_BATCH_SIZE', 200)))
+    parser.add_argument('--poll-interval', type=float, default=float(os.getenv('OUTBOX_POLL_INTERVAL', 0.5)))
+    parser.add_argument('--max-attempts', type=int, default=int(os.getenv('OUTBOX_MAX_ATTEMPTS', 5)))
+    args = parser.parse_args()
+
+    configure_logging()
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+
+    outbox = OutboxWorkerPool(workers=max(1, args.workers), batch_size=args.batch_size,
+                              poll_interval=args.poll_interval, max_attempts=args.max_attempts)
+    outbox.start()
+    stop.wait()
+    outbox.stop()
+
+if __name__ == "__main__":
+    run_outbox_workers()
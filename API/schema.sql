@@ -10,6 +10,7 @@ CREATE TABLE Users (
     last_name VARCHAR(100) NOT NULL,
     password_hash VARCHAR(255) NOT NULL,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    is_deleted BOOLEAN DEFAULT FALSE,
     
     -- this constraint may cause problems down the line
     CONSTRAINT chk_email CHECK (email REGEXP '^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$')
@@ -40,8 +41,13 @@ CREATE TABLE Vehicles (
 );
 
 -- Bookings Table
+-- Range partitioned by pickup month so date-bounded queries only open the partitions they
+-- can match. MySQL does not allow foreign keys on partitioned tables (in either direction),
+-- so vehicle and user existence is checked by the booking transaction, which locks the
+-- Vehicles row. The primary key has to include the partitioning column. Monthly partitions
+-- are added ahead of time by archive_bookings.py (initialize_schema.py creates the first set).
 CREATE TABLE Bookings (
-    booking_id INT AUTO_INCREMENT PRIMARY KEY,
+    booking_id INT AUTO_INCREMENT,
     user_id INT NOT NULL,
     vehicle_id INT NOT NULL,
     pickup_date DATETIME NOT NULL,
@@ -50,8 +56,34 @@ CREATE TABLE Bookings (
     is_deleted BOOLEAN DEFAULT FALSE,
     status ENUM('pending', 'active', 'completed', 'cancelled') DEFAULT 'pending',
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (user_id) REFERENCES Users(user_id),
-    FOREIGN KEY (vehicle_id) REFERENCES Vehicles(vehicle_id)
+    -- Calendar days of the pickup and return, so per-day filters are index range lookups
+    -- instead of DATE() over every row
+    pickup_day DATE AS (DATE(pickup_date)) STORED,
+    return_day DATE AS (DATE(return_date)) STORED,
+    PRIMARY KEY (booking_id, pickup_date)
+)
+PARTITION BY RANGE COLUMNS (pickup_date) (
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+-- Finished bookings (completed, cancelled or soft-deleted) moved out of Bookings by
+-- archive_bookings.py once they are older than the archive horizon
+CREATE TABLE BookingsArchive (
+    booking_id INT PRIMARY KEY,
+    user_id INT NOT NULL,
+    vehicle_id INT NOT NULL,
+    pickup_date DATETIME NOT NULL,
+    return_date DATETIME NOT NULL,
+    total_cost DECIMAL(10,2) NOT NULL,
+    is_deleted BOOLEAN DEFAULT FALSE,
+    status ENUM('pending', 'active', 'completed', 'cancelled') DEFAULT 'pending',
+    created_at DATETIME,
+    pickup_day DATE AS (DATE(pickup_date)) STORED,
+    return_day DATE AS (DATE(return_date)) STORED,
+    archived_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_archive_vehicle (vehicle_id, pickup_date),
+    INDEX idx_archive_user (user_id),
+    INDEX idx_archive_pickup_day (pickup_day)
 );
 
 -- Invoices Table
@@ -61,28 +93,202 @@ CREATE TABLE Invoices (
     amount DECIMAL(10,2) NOT NULL,
     payment_date DATETIME DEFAULT CURRENT_TIMESTAMP,
     payment_status ENUM('paid', 'pending', 'failed') DEFAULT 'pending',
-    invoice_number VARCHAR(50) NOT NULL UNIQUE,
-    FOREIGN KEY (booking_id) REFERENCES Bookings(booking_id)
+    invoice_number VARCHAR(50) NOT NULL UNIQUE
 );
 
 -- Email Logs Table
+-- Partitioned by the month the email was sent, like Bookings; rows older than the archive
+-- horizon move to EmailLogsArchive
 CREATE TABLE EmailLogs (
-    log_id INT AUTO_INCREMENT PRIMARY KEY,
+    log_id INT AUTO_INCREMENT,
     booking_id INT NOT NULL,
     email_type ENUM('confirmation', 'invoice', 'cancelled') NOT NULL,
-    sent_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    sent_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     status ENUM('sent', 'failed') NOT NULL DEFAULT 'sent',
-    FOREIGN KEY (booking_id) REFERENCES Bookings(booking_id)
+    PRIMARY KEY (log_id, sent_at),
+    INDEX idx_email_booking (booking_id)
+)
+PARTITION BY RANGE COLUMNS (sent_at) (
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+CREATE TABLE EmailLogsArchive (
+    log_id INT PRIMARY KEY,
+    booking_id INT NOT NULL,
+    email_type ENUM('confirmation', 'invoice', 'cancelled') NOT NULL,
+    sent_at DATETIME NOT NULL,
+    status ENUM('sent', 'failed') NOT NULL DEFAULT 'sent',
+    archived_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_email_archive_booking (booking_id)
+);
+
+-- Booking side effects (invoices, email logs, daily rollups) written in the booking
+-- transaction and materialized asynchronously by the outbox workers. vehicle_id, pickup_date,
+-- return_date (with amount) are the booking as it counts in the rollups after the event and
+-- the previous_* columns the contribution it replaces; each side is NULL when it does not count.
+CREATE TABLE BookingOutbox (
+    outbox_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    booking_id INT NOT NULL,
+    event_type ENUM('created', 'updated', 'cancelled') NOT NULL,
+    amount DECIMAL(10,2),
+    vehicle_id INT NULL,
+    pickup_date DATETIME NULL,
+    return_date DATETIME NULL,
+    previous_vehicle_id INT NULL,
+    previous_pickup_date DATETIME NULL,
+    previous_return_date DATETIME NULL,
+    previous_amount DECIMAL(10,2) NULL,
+    created_at DATETIME(6) DEFAULT CURRENT_TIMESTAMP(6),
+    processed_at DATETIME(6) NULL,
+    -- Failed applications of this event; at the outbox workers' max attempts it is
+    -- dead-lettered and no longer claimed
+    attempts INT NOT NULL DEFAULT 0,
+    last_error VARCHAR(1000) NULL,
+    dead_lettered_at DATETIME(6) NULL
+);
+
+-- Per-day, per-category booking totals applied from BookingOutbox by the outbox workers,
+-- so booking transactions never lock these rows. booking_count/total_revenue count each
+-- booking once per day it is picked up or returned.
+CREATE TABLE DailyCategoryRollups (
+    report_date DATE NOT NULL,
+    category_id INT NOT NULL,
+    booking_count INT NOT NULL DEFAULT 0,
+    total_revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+    pickup_count INT NOT NULL DEFAULT 0,
+    pickup_revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+    return_count INT NOT NULL DEFAULT 0,
+    return_revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (report_date, category_id)
+);
+
+-- Single row bumped by the reference data triggers below; the API reloads its copy of
+-- VehicleCategories and the vehicle -> category map when the version moves
+CREATE TABLE ReferenceDataVersion (
+    id TINYINT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
 );
 
 -- Indices for Optimization
 CREATE INDEX idx_vehicle_status ON Vehicles(status);
 CREATE INDEX idx_booking_dates ON Bookings(pickup_date, return_date);
 CREATE INDEX idx_booking_status ON Bookings(status);
+CREATE INDEX idx_booking_user ON Bookings(user_id);
+-- Covers the per-vehicle overlap checks and the availability NOT EXISTS probe:
+-- equality on vehicle, status and is_deleted, then a range on pickup_date
+CREATE INDEX idx_booking_vehicle_window ON Bookings(vehicle_id, status, is_deleted, pickup_date, return_date);
+-- Cover the daily report's pickup-day and return-day lookups
+CREATE INDEX idx_booking_pickup_day ON Bookings(pickup_day, vehicle_id, total_cost);
+CREATE INDEX idx_booking_return_day ON Bookings(return_day, vehicle_id, total_cost);
 CREATE INDEX idx_email_type ON EmailLogs(email_type);
+CREATE INDEX idx_outbox_pending ON BookingOutbox(processed_at, dead_lettered_at, outbox_id);
 
 -- Default Vehicle Categories
 INSERT INTO VehicleCategories (name, capacity, daily_rate, description) VALUES
 ('Small Car', 4, 50.00, 'Compact car suitable for up to 4 people'),
 ('SUV', 7, 80.00, 'Large SUV suitable for up to 7 people'),
 ('Van', 2, 100.00, 'Cargo van for moving goods');
+
+INSERT INTO ReferenceDataVersion (id, version) VALUES (1, 0);
+
+-- Single round trip booking commit used when BOOKING_COMMIT_PATH=procedure.
+-- status_code: 0 created, 1 vehicle not found, 2 user not found, 3 vehicle unavailable
+DELIMITER //
+CREATE PROCEDURE sp_create_booking(
+    IN p_user_id INT,
+    IN p_vehicle_id INT,
+    IN p_pickup_date DATETIME,
+    IN p_return_date DATETIME,
+    IN p_total_cost DECIMAL(10,2),
+    -- Booking.earliest_overlapping_pickup(p_pickup_date), passed in so the rental length
+    -- bound has one source (models/booking.py); prunes the Bookings partitions
+    IN p_earliest_pickup DATETIME
+)
+BEGIN
+    DECLARE v_status TINYINT DEFAULT 0;
+    DECLARE v_booking_id INT DEFAULT NULL;
+    DECLARE v_vehicle_found INT DEFAULT 0;
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+    -- Serializes bookings of this vehicle only; taken before any plain read so the
+    -- overlap check's snapshot includes what the previous lock holder committed
+    SELECT COUNT(*) INTO v_vehicle_found FROM Vehicles WHERE vehicle_id = p_vehicle_id FOR UPDATE;
+    IF v_vehicle_found = 0 THEN
+        SET v_status = 1;
+    ELSEIF NOT EXISTS (SELECT 1 FROM Users WHERE user_id = p_user_id AND is_deleted = FALSE) THEN
+        SET v_status = 2;
+    ELSEIF EXISTS (
+        SELECT 1 FROM Bookings
+        WHERE vehicle_id = p_vehicle_id
+        AND status IN ('pending', 'active')
+        AND is_deleted = FALSE
+        AND pickup_date <= p_return_date
+        AND pickup_date >= p_earliest_pickup
+        AND return_date >= p_pickup_date
+    ) THEN
+        SET v_status = 3;
+    ELSE
+        INSERT INTO Bookings (user_id, vehicle_id, pickup_date, return_date, total_cost)
+        VALUES (p_user_id, p_vehicle_id, p_pickup_date, p_return_date, p_total_cost);
+        SET v_booking_id = LAST_INSERT_ID();
+
+        INSERT INTO BookingOutbox (booking_id, event_type, amount, vehicle_id, pickup_date, return_date)
+        VALUES (v_booking_id, 'created', p_total_cost, p_vehicle_id, p_pickup_date, p_return_date);
+    END IF;
+
+    IF v_status = 0 THEN
+        COMMIT;
+    ELSE
+        ROLLBACK;
+    END IF;
+
+    SELECT v_status AS status_code, v_booking_id AS booking_id;
+END //
+DELIMITER ;
+
+-- Any change to a category, and any vehicle added, removed or moved to another category
+DELIMITER //
+CREATE TRIGGER trg_categories_version_insert AFTER INSERT ON VehicleCategories
+FOR EACH ROW
+BEGIN
+    UPDATE ReferenceDataVersion SET version = version + 1 WHERE id = 1;
+END //
+
+CREATE TRIGGER trg_categories_version_update AFTER UPDATE ON VehicleCategories
+FOR EACH ROW
+BEGIN
+    UPDATE ReferenceDataVersion SET version = version + 1 WHERE id = 1;
+END //
+
+CREATE TRIGGER trg_categories_version_delete AFTER DELETE ON VehicleCategories
+FOR EACH ROW
+BEGIN
+    UPDATE ReferenceDataVersion SET version = version + 1 WHERE id = 1;
+END //
+
+CREATE TRIGGER trg_vehicles_version_insert AFTER INSERT ON Vehicles
+FOR EACH ROW
+BEGIN
+    UPDATE ReferenceDataVersion SET version = version + 1 WHERE id = 1;
+END //
+
+CREATE TRIGGER trg_vehicles_version_update AFTER UPDATE ON Vehicles
+FOR EACH ROW
+BEGIN
+    -- Status and maintenance updates leave the cached map as it is
+    IF NOT (OLD.category_id <=> NEW.category_id) THEN
+        UPDATE ReferenceDataVersion SET version = version + 1 WHERE id = 1;
+    END IF;
+END //
+
+CREATE TRIGGER trg_vehicles_version_delete AFTER DELETE ON Vehicles
+FOR EACH ROW
+BEGIN
+    UPDATE ReferenceDataVersion SET version = version + 1 WHERE id = 1;
+END //
+DELIMITER ;
@@ -18,6 +18,33 @@ class BookingService:
             
         return self.booking_repo.create(booking)
     
+    def create_bookings(self, items: List[dict]) -> List[dict]:
+        results: List[Optional[dict]] = [None] * len(items)
+        valid_positions = []
+        valid_bookings = []
+
+        for position, booking_data in enumerate(items):
+            try:
+                booking = Booking(**booking_data)
+                errors = booking.validate_dates()
+            except (TypeError, ValueError) as e:
+                errors = [str(e)]
+            if errors:
+                results[position] = {'index': position, 'status': 'error', 'error': ", ".join(errors),
+                                     'code': 'INVALID_BOOKING'}
+            else:
+                valid_positions.append(position)
+                valid_bookings.append(booking)
+
+        outcomes = self.booking_repo.create_many(valid_bookings) if valid_bookings else []
+        for position, outcome in zip(valid_positions, outcomes):
+            if isinstance(outcome, int):
+                results[position] = {'index': position, 'status': 'created', 'booking_id': outcome}
+            else:
+                results[position] = {'index': position, 'status': 'error', 'error': str(outcome),
+                                     'code': outcome.status.name}
+        return results
+
     def update_booking(self, booking_id: int, booking_data: dict) -> bool:
         updated_booking = Booking(**booking_data)
         errors = updated_booking.validate_dates()
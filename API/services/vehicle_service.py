@@ -1,13 +1,155 @@
 
-from typing import List, Dict, Optional
+from itertools import islice
+from typing import Iterator, List, Dict, Optional, Union
 from datetime import datetime
+import logging
 from repositories.vehicle_repository import VehicleRepository
+from availability import AvailabilityCache, AvailabilityIndex, FleetCalendar
 
 class VehicleService:
-    def __init__(self, vehicle_repo: VehicleRepository):
+    def __init__(self, vehicle_repo: VehicleRepository,
+                 availability_backend: Optional[Union[AvailabilityIndex, FleetCalendar]] = None,
+                 consistency_check: bool = False,
+                 cache: Optional[AvailabilityCache] = None):
         self.vehicle_repo = vehicle_repo
+        self.availability_backend = availability_backend
+        self.consistency_check = consistency_check
+        self.cache = cache
+        self.logger = logging.getLogger(__name__)
 
     def check_availability(self, start_date: datetime, end_date: datetime,
                            category_id: Optional[int] = None,
-                           vehicle_id: Optional[int] = None) -> List[Dict]:
-        return self.vehicle_repo.get_available_vehicles(start_date, end_date, category_id, vehicle_id)
\ No newline at end of file
+                           vehicle_id: Optional[int] = None,
+                           after_vehicle_id: Optional[int] = None,
+                           limit: Optional[int] = None) -> List[Dict]:
+        if self.cache is None or not self.cache.enabled:
+            return self._lookup_availability(start_date, end_date, category_id, vehicle_id,
+                                             after_vehicle_id, limit)
+
+        key = self.cache.key(start_date, end_date, category_id, vehicle_id, after_vehicle_id, limit)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        # Captured before the lookup so a write landing in between keeps the result out
+        version = self.cache.version
+        available = self._lookup_availability(start_date, end_date, category_id, vehicle_id,
+                                              after_vehicle_id, limit)
+        self.cache.put(key, available, version)
+        return available
+
+    def stream_availability(self, start_date: datetime, end_date: datetime,
+                            category_id: Optional[int] = None,
+                            vehicle_id: Optional[int] = None,
+                            chunk_size: int = 500) -> Iterator[Dict]:
+        # Yields available vehicles in vehicle_id order without materialising the result;
+        # results are not cached since the point is to never hold them all at once
+        if vehicle_id or self.availability_backend is None or not self.availability_backend.loaded:
+            yield from self.vehicle_repo.iter_available_vehicles(
+                start_date, end_date, category_id, vehicle_id, chunk_size=chunk_size)
+            return
+
+        last_vehicle_id = None
+        fleet = self.vehicle_repo.iter_fleet(category_id, chunk_size=chunk_size)
+        try:
+            for chunk in iter(lambda: list(islice(fleet, chunk_size)), []):
+                free_ids = self.availability_backend.filter_available(
+                    [vehicle['vehicle_id'] for vehicle in chunk], start_date, end_date)
+                if free_ids is None:
+                    break
+                free_ids = set(free_ids)
+                for vehicle in chunk:
+                    if vehicle['vehicle_id'] in free_ids:
+                        yield vehicle
+                last_vehicle_id = chunk[-1]['vehicle_id']
+            else:
+                return
+        finally:
+            fleet.close()
+        # The window left the backend's coverage; SQL picks up where the backend stopped
+        yield from self.vehicle_repo.iter_available_vehicles(
+            start_date, end_date, category_id, None, last_vehicle_id, chunk_size)
+
+    def _lookup_availability(self, start_date: datetime, end_date: datetime,
+                             category_id: Optional[int] = None,
+                             vehicle_id: Optional[int] = None,
+                             after_vehicle_id: Optional[int] = None,
+                             limit: Optional[int] = None) -> List[Dict]:
+        page = self._page_args(after_vehicle_id, limit)
+        if self.availability_backend is None or not self.availability_backend.loaded:
+            return self.vehicle_repo.get_available_vehicles(start_date, end_date, category_id, vehicle_id, **page)
+
+        if limit:
+            available = self._backend_page(start_date, end_date, category_id, vehicle_id,
+                                           after_vehicle_id, limit)
+        else:
+            fleet = self.vehicle_repo.get_fleet(category_id, vehicle_id,
+                                                **self._page_args(after_vehicle_id, None))
+            free_ids = self.availability_backend.filter_available(
+                [vehicle['vehicle_id'] for vehicle in fleet], start_date, end_date)
+            if free_ids is None:
+                # Window falls outside what the backend covers (e.g. past the calendar horizon)
+                return self.vehicle_repo.get_available_vehicles(
+                    start_date, end_date, category_id, vehicle_id, **self._page_args(after_vehicle_id, None))
+            free_ids = set(free_ids)
+            available = [vehicle for vehicle in fleet if vehicle['vehicle_id'] in free_ids]
+
+        if self.consistency_check:
+            self._compare_with_sql(available, start_date, end_date, category_id, vehicle_id,
+                                   after_vehicle_id, limit)
+        return available
+
+    # Largest fleet chunk a paged backend lookup reads at once
+    MAX_FLEET_CHUNK = 1000
+
+    def _backend_page(self, start_date: datetime, end_date: datetime, category_id: Optional[int],
+                      vehicle_id: Optional[int], after_vehicle_id: Optional[int], limit: int) -> List[Dict]:
+        # Reads the fleet after the cursor in chunks (limit rows first, doubling while the
+        # backend filters most of them out) until the page is full, so a page costs about
+        # limit rows rather than the rest of the fleet
+        available: List[Dict] = []
+        cursor, chunk_size = after_vehicle_id, limit
+        while len(available) < limit:
+            chunk = self.vehicle_repo.get_fleet(category_id, vehicle_id, **self._page_args(cursor, chunk_size))
+            if not chunk:
+                break
+            free_ids = self.availability_backend.filter_available(
+                [vehicle['vehicle_id'] for vehicle in chunk], start_date, end_date)
+            if free_ids is None:
+                # The window left the backend's coverage; SQL fills the rest of the page
+                available.extend(self.vehicle_repo.get_available_vehicles(
+                    start_date, end_date, category_id, vehicle_id,
+                    **self._page_args(cursor, limit - len(available))))
+                break
+            free_ids = set(free_ids)
+            available.extend(vehicle for vehicle in chunk if vehicle['vehicle_id'] in free_ids)
+            if len(chunk) < chunk_size:
+                break
+            cursor = chunk[-1]['vehicle_id']
+            chunk_size = min(chunk_size * 2, self.MAX_FLEET_CHUNK)
+        return available[:limit]
+
+    @staticmethod
+    def _page_args(after_vehicle_id: Optional[int], limit: Optional[int]) -> Dict:
+        # Unpaged lookups keep the plain repository call signature
+        page = {}
+        if after_vehicle_id is not None:
+            page['after_vehicle_id'] = after_vehicle_id
+        if limit is not None:
+            page['limit'] = limit
+        return page
+
+    def _compare_with_sql(self, available: List[Dict], start_date: datetime, end_date: datetime,
+                          category_id: Optional[int], vehicle_id: Optional[int],
+                          after_vehicle_id: Optional[int] = None, limit: Optional[int] = None) -> bool:
+        expected = {row['vehicle_id'] for row in
+                    self.vehicle_repo.get_available_vehicles(start_date, end_date, category_id, vehicle_id,
+                                                             **self._page_args(after_vehicle_id, limit))}
+        actual = {row['vehicle_id'] for row in available}
+        if expected == actual:
+            return True
+        self.logger.warning(
+            "Availability backend mismatch for %s - %s (category=%s, vehicle=%s): "
+            "missing from index %s, extra in index %s",
+            start_date, end_date, category_id, vehicle_id,
+            sorted(expected - actual), sorted(actual - expected))
+        return False
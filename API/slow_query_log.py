@@ -0,0 +1,216 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# EXPLAIN accepts these; anything else (CALL, COMMIT, SET ...) is recorded without a plan
+_EXPLAINABLE = re.compile(r'^\s*(SELECT|INSERT|UPDATE|DELETE|REPLACE)\b', re.IGNORECASE)
+
+
+class SlowQueryLog:
+    '''
+    Records statements that ran longer than threshold_ms: per normalized statement totals
+    for the admin endpoint, plus one JSON line per slow execution in a rotating file. The
+    EXPLAIN FORMAT=JSON plan is taken by a background thread on a connection of its own,
+    so the caller's transaction and latency are untouched, and at most once per
+    explain_interval seconds for each statement.
+    '''
+
+    def __init__(self, threshold_ms: float = 200.0, log_file: str = 'slow_queries.log',
+                 max_bytes: int = 10 * 2 ** 20, backup_count: int = 5, explain_interval: float = 60.0,
+                 queue_size: int = 100, log_params: bool = False, max_statements: int = 500,
+                 clock: Callable[[], float] = time.monotonic):
+        self.threshold_ms = threshold_ms
+        self.log_file = log_file
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.explain_interval = explain_interval
+        # Parameters (emails, password hashes) are only kept and served when asked for;
+        # EXPLAIN gets them either way
+        self.log_params = log_params
+        self.max_statements = max_statements
+        self._clock = clock
+        self._acquire: Optional[Callable[[], Any]] = None
+        self._release: Optional[Callable[[Any], None]] = None
+        self._queue: 'queue.Queue' = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._logger: Optional[logging.Logger] = None
+        self._statements: Dict[str, Dict] = {}
+        self._last_explained: Dict[str, float] = {}
+        self.recorded = 0
+        self.explained = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def bind(self, acquire: Callable[[], Any], release: Callable[[Any], None]) -> None:
+        # Where EXPLAIN connections come from, normally the primary pool
+        self._acquire = acquire
+        self._release = release
+
+    def record(self, sql: str, statement: str, params: Any, seconds: float, explain: bool = True) -> None:
+        duration_ms = seconds * 1000
+        now = self._clock()
+        with self._lock:
+            self.recorded += 1
+            entry = self._statements.get(statement)
+            if entry is None:
+                if len(self._statements) >= self.max_statements:
+                    statement = 'other'
+                entry = self._statements.setdefault(statement, {
+                    'statement': statement, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'plan': None})
+            entry['count'] += 1
+            entry['total_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+            entry['last_ms'] = duration_ms
+            entry['last_params'] = params if self.log_params else None
+            entry['last_seen'] = datetime.now()
+            explain = (explain and self._acquire is not None and bool(_EXPLAINABLE.match(sql))
+                       and now - self._last_explained.get(statement, float('-inf')) >= self.explain_interval)
+            if explain:
+                self._last_explained[statement] = now
+        try:
+            self._queue.put_nowait((sql, statement, params, duration_ms, explain))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                if explain:
+                    # Let the next occurrence try again
+                    self._last_explained.pop(statement, None)
+            return
+        self._ensure_started()
+
+    def top(self, limit: int = 20) -> List[Dict]:
+        with self._lock:
+            entries = sorted(self._statements.values(), key=lambda entry: entry['total_ms'], reverse=True)
+            return [dict(entry, total_ms=round(entry['total_ms'], 3), max_ms=round(entry['max_ms'], 3),
+                         avg_ms=round(entry['total_ms'] / entry['count'], 3))
+                    for entry in entries[:limit]]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'threshold_ms': self.threshold_ms,
+                'statements': len(self._statements),
+                'recorded': self.recorded,
+                'explained': self.explained,
+                'dropped': self.dropped,
+                'queued': self._queue.qsize(),
+                'log_file': self.log_file,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements.clear()
+            self._last_explained.clear()
+            self.recorded = self.explained = self.dropped = 0
+
+    def drain(self) -> None:
+        # Processes everything queued on the calling thread (tests, shutdown)
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._process(*item)
+
+    def reset_after_fork(self) -> None:
+        # The background thread does not survive a fork, and its queue or lock may have
+        # been held by it at the time; the child starts over with fresh ones
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+        # A {pid} file name has to be opened again under the child's pid
+        self._logger = None
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='slow-query-log', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                self._process(*item)
+            except Exception as e:
+                logging.getLogger(__name__).error("Slow query capture failed: %s", e)
+
+    def _process(self, sql: str, statement: str, params: Any, duration_ms: float, explain: bool) -> None:
+        plan = self._explain(sql, params) if explain else None
+        if plan is not None:
+            with self._lock:
+                self.explained += 1
+                if statement in self._statements:
+                    self._statements[statement]['plan'] = plan
+        try:
+            self._file_logger().info(json.dumps({
+                'time': datetime.now().isoformat(timespec='milliseconds'),
+                'duration_ms': round(duration_ms, 3),
+                'statement': statement,
+                'sql': sql,
+                'params': params if self.log_params else None,
+                'plan': plan,
+            }, default=str))
+        except Exception as e:
+            logging.getLogger(__name__).error("Could not write slow query log: %s", e)
+
+    def _explain(self, sql: str, params: Any) -> Optional[Dict]:
+        try:
+            conn = self._acquire()
+        except Exception as e:
+            return {'error': f"no connection for EXPLAIN: {e}"}
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"EXPLAIN FORMAT=JSON {sql}", params or ())
+            row = cursor.fetchone()
+            return json.loads(row[0]) if row else None
+        except Exception as e:
+            return {'error': str(e)}
+        finally:
+            if cursor is not None:
+                cursor.close()
+            try:
+                conn.rollback()
+            finally:
+                self._release(conn)
+
+    def _file_logger(self) -> logging.Logger:
+        # A standalone logger, outside the root logger's tree, created on first use so no
+        # file appears unless something was slow
+        if self._logger is None:
+            logger = logging.Logger('slow_queries', logging.INFO)
+            logger.propagate = False
+            # RotatingFileHandler assumes one writer, so under gunicorn the name holds {pid}
+            # and every process rotates a file of its own
+            handler = logging.handlers.RotatingFileHandler(
+                self.log_file.format(pid=os.getpid()), maxBytes=self.max_bytes, backupCount=self.backup_count)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            self._logger = logger
+        return self._logger
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 200)),
+    log_file=os.getenv('SLOW_QUERY_LOG_FILE', 'slow_queries.log'),
+    max_bytes=int(os.getenv('SLOW_QUERY_LOG_MAX_BYTES', 10 * 2 ** 20)),
+    backup_count=int(os.getenv('SLOW_QUERY_LOG_BACKUPS', 5)),
+    explain_interval=float(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', 60)),
+    log_params=os.getenv('SLOW_QUERY_LOG_PARAMS', 'false').lower() == 'true'
+)
+
+os.register_at_fork(after_in_child=slow_query_log.reset_after_fork)
@@ -0,0 +1,50 @@
+import atexit
+import os
+from typing import Callable, Iterable, Tuple
+from availability import availability_index, fleet_calendar, result_cache
+from reference_data import reference_data
+from workers import OutboxWorkerPool
+
+'''
+Startup steps shared by the Flask app (app.create_app) and the ASGI app
+(async_api.app.create_async_app); each takes the app's config mapping.
+'''
+
+def configure_availability(config) -> str:
+    config['AVAILABILITY_ENGINE'] = os.getenv('AVAILABILITY_ENGINE', 'sql')
+    config['AVAILABILITY_CONSISTENCY_CHECK'] = os.getenv('AVAILABILITY_CONSISTENCY_CHECK', 'false').lower() == 'true'
+    if result_cache.enabled:
+        config['AVAILABILITY_CACHE'] = result_cache
+    return config['AVAILABILITY_ENGINE']
+
+def load_availability_backend(config, fleet: Callable[[], Iterable[dict]],
+                              intervals: Iterable[Tuple]) -> None:
+    # fleet is only called for the bitmap engine, the index needs bookings alone
+    if config['AVAILABILITY_ENGINE'] == 'index':
+        availability_index.load(intervals)
+        config['AVAILABILITY_BACKEND'] = availability_index
+    elif config['AVAILABILITY_ENGINE'] == 'bitmap':
+        fleet_calendar.load(
+            [(vehicle['vehicle_id'], vehicle['category_id']) for vehicle in fleet()],
+            intervals
+        )
+        config['AVAILABILITY_BACKEND'] = fleet_calendar
+
+def load_reference_data(source=None) -> None:
+    # source defaults to a ReferenceDataRepository on the sync Database
+    if source is not None:
+        reference_data.bind(source)
+    reference_data.load()
+
+def start_outbox_workers(config) -> None:
+    outbox_workers = int(os.getenv('OUTBOX_WORKERS', 2))
+    if outbox_workers > 0:
+        outbox = OutboxWorkerPool(
+            workers=outbox_workers,
+            batch_size=int(os.getenv('OUTBOX_BATCH_SIZE', 200)),
+            poll_interval=float(os.getenv('OUTBOX_POLL_INTERVAL', 0.5)),
+            max_attempts=int(os.getenv('OUTBOX_MAX_ATTEMPTS', 5))
+        )
+        outbox.start()
+        atexit.register(outbox.stop)
+        config['OUTBOX'] = outbox
@@ -0,0 +1,114 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+
+class StatementCache:
+    '''
+    LRU of server-side prepared statements for one connection, keyed by SQL text. Each
+    entry is a prepared cursor; mysql.connector only skips the re-prepare when it is
+    handed the identical string object, so the cached key is passed back on every call.
+    '''
+
+    def __init__(self, conn, max_size: int = 64):
+        self.conn = conn
+        self.max_size = max_size
+        self._entries: 'OrderedDict[Tuple[str, bool], Tuple[str, Any]]' = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def acquire(self, sql: str, dictionary: bool) -> Tuple[str, Any]:
+        key = (sql, dictionary)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            entry = (sql, self.conn.cursor(prepared=True, dictionary=dictionary))
+            self._entries[key] = entry
+            evicted = []
+            while len(self._entries) > self.max_size:
+                evicted.append(self._entries.popitem(last=False)[1][1])
+                self.evictions += 1
+        for cursor in evicted:
+            self._close_quietly(cursor)
+        return entry
+
+    def invalidate(self, close: bool = True) -> None:
+        # After COM_RESET_CONNECTION the server has already dropped every statement
+        with self._lock:
+            cursors = [cursor for _, cursor in self._entries.values()]
+            self._entries.clear()
+        if close:
+            for cursor in cursors:
+                self._close_quietly(cursor)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'size': len(self._entries), 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _close_quietly(cursor) -> None:
+        try:
+            cursor.close()
+        except Exception:
+            pass
+
+
+class PreparedCursor:
+    '''
+    Cursor facade used by Database.get_cursor(prepared=True). Parameterised statements run
+    on the connection's cached prepared cursors; statements without parameters (START
+    TRANSACTION, COMMIT, ...) and executemany batches run on an ordinary cursor.
+    '''
+
+    def __init__(self, conn, cache: StatementCache, dictionary: bool = True):
+        self._cache = cache
+        self._dictionary = dictionary
+        self._plain = conn.cursor(dictionary=dictionary)
+        self._active = self._plain
+
+    def execute(self, operation: str, params: Optional[Sequence] = None):
+        if not params:
+            self._active = self._plain
+            return self._plain.execute(operation, params)
+        sql, cursor = self._cache.acquire(operation, self._dictionary)
+        self._active = cursor
+        return cursor.execute(sql, tuple(params))
+
+    def executemany(self, operation: str, seq_params):
+        self._active = self._plain
+        return self._plain.executemany(operation, seq_params)
+
+    def fetchone(self):
+        return self._active.fetchone()
+
+    def fetchmany(self, size: int = 1):
+        return self._active.fetchmany(size)
+
+    def fetchall(self):
+        return self._active.fetchall()
+
+    @property
+    def lastrowid(self):
+        return self._active.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._active.rowcount
+
+    @property
+    def description(self):
+        return self._active.description
+
+    def close(self) -> None:
+        # Prepared cursors stay open in the cache for the next checkout of this connection
+        self._plain.close()
@@ -0,0 +1,126 @@
+import unittest
+from datetime import date, datetime
+from unittest.mock import MagicMock, patch
+import partitions
+from repositories.archive_repository import ArchiveRepository
+from repositories.report_repository import ReportRepository
+
+class TestMonthlyPartitions(unittest.TestCase):
+    def test_first_split_creates_history_and_months(self):
+        """Test a table with only p_future is split into p_history, months and p_future"""
+        months = partitions.missing_months(['p_future'], date(2023, 11, 1), date(2024, 1, 1))
+        plan = partitions.monthly_partition_plan('Bookings', ['p_future'], months)
+        self.assertEqual(plan, (
+            "ALTER TABLE Bookings REORGANIZE PARTITION p_future INTO ("
+            "PARTITION p_history VALUES LESS THAN ('2023-11-01'), "
+            "PARTITION p202311 VALUES LESS THAN ('2023-12-01'), "
+            "PARTITION p202312 VALUES LESS THAN ('2024-01-01'), "
+            "PARTITION p202401 VALUES LESS THAN ('2024-02-01'), "
+            "PARTITION p_future VALUES LESS THAN (MAXVALUE))"))
+
+    def test_only_missing_months_are_added(self):
+        """Test later runs continue after the last monthly partition"""
+        existing = ['p_history', 'p202312', 'p202401', 'p_future']
+        months = partitions.missing_months(existing, date(2022, 1, 1), date(2024, 3, 1))
+        self.assertEqual(months, [date(2024, 2, 1), date(2024, 3, 1)])
+        self.assertNotIn("p_history", partitions.monthly_partition_plan('Bookings', existing, months))
+        self.assertEqual(partitions.missing_months(existing, date(2022, 1, 1), date(2024, 1, 1)), [])
+
+    def test_ensure_partitions_skips_complete_tables(self):
+        """Test no ALTER is issued when every month already exists"""
+        cursor = MagicMock()
+        cursor.fetchall.side_effect = [[('p_history',), ('p202403',), ('p_future',)],
+                                       [('p_future',)]]
+
+        added = partitions.ensure_partitions(cursor, 0, 1, today=date(2024, 3, 15))
+
+        self.assertEqual(added, {'Bookings': [], 'EmailLogs': ['p202402', 'p202403']})
+        alter = cursor.execute.call_args_list[-1][0][0]
+        self.assertTrue(alter.startswith("ALTER TABLE EmailLogs REORGANIZE PARTITION p_future"))
+
+    def test_only_empty_old_months_are_dropped(self):
+        """Test months that still hold rows or end after the horizon are kept"""
+        cursor = MagicMock()
+        cursor.fetchall.side_effect = [[('p_history',), ('p202401',), ('p202402',), ('p202403',), ('p_future',)],
+                                       [('p_future',)]]
+        cursor.fetchone.side_effect = [None, (1,)]
+
+        dropped = partitions.drop_empty_partitions(cursor, datetime(2024, 3, 10))
+
+        self.assertEqual(dropped, {'Bookings': ['p202401'], 'EmailLogs': []})
+        cursor.execute.assert_any_call("ALTER TABLE Bookings DROP PARTITION p202401")
+
+class TestArchiveRepository(unittest.TestCase):
+    def setUp(self):
+        patcher = patch('repositories.archive_repository.Database')
+        mock_db = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cursor = MagicMock()
+        mock_db.return_value.get_cursor.return_value.__enter__.return_value = self.cursor
+        self.repo = ArchiveRepository()
+        self.before = datetime(2024, 1, 1)
+
+    def statements(self):
+        return [call[0][0] for call in self.cursor.execute.call_args_list]
+
+    def test_bookings_move_in_batches(self):
+        """Test full batches continue and a short batch ends the run"""
+        self.cursor.fetchall.side_effect = [[(1,), (2,)], [(3,)]]
+
+        archived = self.repo.archive_bookings(self.before, batch_size=2)
+
+        self.assertEqual(archived, 3)
+        statements = self.statements()
+        self.assertEqual(statements.count("COMMIT"), 2)
+        inserts = [sql for sql in statements if "INSERT INTO BookingsArchive" in sql]
+        deletes = [sql for sql in statements if "DELETE FROM Bookings" in sql]
+        self.assertEqual(len(inserts), 2)
+        self.assertEqual(len(deletes), 2)
+        select = next(sql for sql in statements if "SELECT booking_id FROM Bookings" in sql)
+        self.assertIn("status IN ('completed', 'cancelled') OR is_deleted = TRUE", select)
+
+    def test_rollups_are_left_alone(self):
+        """Test archival writes no outbox events and does not touch the rollups"""
+        self.cursor.fetchall.side_effect = [[(1,)]]
+        self.repo.archive_bookings(self.before, batch_size=10)
+        statements = self.statements()
+        self.assertFalse(any("BookingOutbox" in sql or "DailyCategoryRollups" in sql for sql in statements))
+
+    def test_failed_batch_rolls_back(self):
+        """Test an error rolls the batch back"""
+        self.cursor.fetchall.side_effect = [[(1,)]]
+
+        def execute(sql, *args):
+            if "INSERT INTO BookingsArchive" in sql:
+                raise RuntimeError("lock wait timeout")
+        self.cursor.execute.side_effect = execute
+
+        with self.assertRaises(RuntimeError):
+            self.repo.archive_bookings(self.before)
+
+        self.assertEqual(self.statements()[-1], "ROLLBACK")
+
+    def test_nothing_to_archive(self):
+        """Test an empty batch commits without inserting"""
+        self.cursor.fetchall.side_effect = [[]]
+        self.assertEqual(self.repo.archive_email_logs(self.before), 0)
+        self.assertFalse(any("INSERT INTO EmailLogsArchive" in sql for sql in self.statements()))
+
+    def test_max_batches(self):
+        """Test a run can be capped at a number of batches"""
+        self.cursor.fetchall.side_effect = [[(1,)], [(2,)]]
+        self.assertEqual(self.repo.archive_email_logs(self.before, batch_size=1, max_batches=1), 1)
+
+class TestRollupRebuildIncludesArchive(unittest.TestCase):
+    @patch('repositories.report_repository.Database')
+    def test_rebuild_reads_archive(self, mock_db):
+        """Test archived bookings still count when rollups are rebuilt"""
+        cursor = MagicMock()
+        cursor.fetchall.return_value = []
+        mock_db.return_value.get_cursor.return_value.__enter__.return_value = cursor
+        ReportRepository().rebuild_rollups(date(2024, 3, 1), date(2024, 3, 2))
+        insert = cursor.execute.call_args_list[3][0][0]
+        self.assertIn("FROM BookingsArchive", insert)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+from async_api import AsyncBookingRepository, AsyncVehicleRepository, AsyncVehicleService
+from models import Booking, BookingCommitStatus, VehicleCategory
+from reference_data import ReferenceData
+from repositories import BookingRejected
+from repositories.booking_repository import BookingRepository
+
+class FakeAsyncDatabase:
+    def __init__(self):
+        self.cursor = MagicMock()
+        self.cursor.execute = AsyncMock()
+        self.cursor.fetchone = AsyncMock()
+        self.cursor.fetchall = AsyncMock(return_value=[])
+
+    @asynccontextmanager
+    async def get_cursor(self, dictionary=True, commit=True):
+        yield self.cursor
+
+class TestAsyncRepositories(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.db = FakeAsyncDatabase()
+        pickup = datetime.now() + timedelta(days=1)
+        self.booking = Booking(user_id=1, vehicle_id=2, pickup_date=pickup.isoformat(),
+                               return_date=(pickup + timedelta(days=1)).isoformat(), total_cost=50.0)
+
+    async def test_create_booking(self):
+        """Test an async booking inserts the booking and its outbox row"""
+        self.db.cursor.fetchone.side_effect = [{'1': 1}, {'1': 1}, None]
+        self.db.cursor.lastrowid = 42
+        with patch('async_api.repositories.availability') as mock_availability:
+            booking_id = await AsyncBookingRepository(self.db).create(self.booking)
+
+        self.assertEqual(booking_id, 42)
+        statements = [call[0][0] for call in self.db.cursor.execute.call_args_list]
+        self.assertIn("INSERT INTO Bookings", statements[3])
+        self.assertIn("INSERT INTO BookingOutbox", statements[4])
+        mock_availability.record_booking.assert_called_once_with(
+            42, 2, self.booking.pickup_date, self.booking.return_date)
+
+    async def test_create_booking_unavailable(self):
+        """Test an overlapping booking is rejected like the sync repository does"""
+        self.db.cursor.fetchone.side_effect = [{'1': 1}, {'1': 1}, {'1': 1}]
+        with self.assertRaises(BookingRejected) as context:
+            await AsyncBookingRepository(self.db).create(self.booking)
+        self.assertIs(context.exception.status, BookingCommitStatus.VEHICLE_UNAVAILABLE)
+
+    async def test_create_booking_deleted_user(self):
+        """Test a soft-deleted user is rejected with the sync repository's user check"""
+        self.db.cursor.fetchone.side_effect = [{'1': 1}, None]
+        with self.assertRaises(BookingRejected) as context:
+            await AsyncBookingRepository(self.db).create(self.booking)
+        self.assertIs(context.exception.status, BookingCommitStatus.USER_NOT_FOUND)
+        self.assertEqual(self.db.cursor.execute.call_args_list[1][0][0], BookingRepository.USER_CHECK_SQL)
+
+    async def test_available_vehicles_uses_shared_query(self):
+        """Test the async availability query matches the sync one"""
+        self.db.cursor.fetchall.return_value = [(1, 'AVAILABLE', 1, 'Ford', 'Focus', 2022, None)]
+        categories = MagicMock()
+        categories.load.return_value = (1, [VehicleCategory(1, 'Small Car', 4, Decimal('40'))], [])
+        reference_data = ReferenceData()
+        reference_data.bind(categories)
+        start, end = datetime(2024, 3, 1), datetime(2024, 3, 2)
+        service = AsyncVehicleService(AsyncVehicleRepository(self.db))
+        with patch('repositories.vehicle_repository.reference_data', reference_data):
+            vehicles = await service.check_availability(start, end, 1)
+
+        sql, params = self.db.cursor.execute.call_args[0]
+        self.assertIn("NOT EXISTS", sql)
+        self.assertEqual(params, ('AVAILABLE', end, Booking.earliest_overlapping_pickup(start), start, 1))
+        self.assertEqual(vehicles[0], {'vehicle_id': 1, 'status': 'AVAILABLE', 'category_id': 1, 'make': 'Ford',
+                                       'model': 'Focus', 'year': 2022, 'last_maintenance': None,
+                                       'daily_rate': Decimal('40')})
+
+if __name__ == '__main__':
+    unittest.main()
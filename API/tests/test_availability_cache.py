@@ -0,0 +1,81 @@
+import unittest
+from datetime import datetime
+from unittest.mock import Mock
+from availability import AvailabilityCache
+from services.vehicle_service import VehicleService
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestAvailabilityCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = AvailabilityCache(max_entries=2, ttl_seconds=5, clock=self.clock)
+        self.march = self.cache.key(datetime(2024, 3, 1), datetime(2024, 3, 5))
+        self.april = self.cache.key(datetime(2024, 4, 1), datetime(2024, 4, 5))
+
+    def test_hit_and_expiry(self):
+        """Test entries are served until their TTL runs out"""
+        self.cache.put(self.march, [{'vehicle_id': 1}])
+        self.assertEqual(self.cache.get(self.march), [{'vehicle_id': 1}])
+        self.clock.now = 5
+        self.assertIsNone(self.cache.get(self.march))
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['expirations']), (1, 1, 1))
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted at capacity"""
+        may = self.cache.key(datetime(2024, 5, 1), datetime(2024, 5, 5))
+        self.cache.put(self.march, [])
+        self.cache.put(self.april, [])
+        self.cache.get(self.march)
+        self.cache.put(may, [])
+        self.assertIsNone(self.cache.get(self.april))
+        self.assertEqual(self.cache.get(self.march), [])
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_invalidate_only_overlapping_windows(self):
+        """Test a write evicts only entries whose window overlaps it"""
+        self.cache.put(self.march, [])
+        self.cache.put(self.april, [])
+        removed = self.cache.invalidate(7, datetime(2024, 3, 5), datetime(2024, 3, 9))
+        self.assertEqual(removed, 1)
+        self.assertIsNone(self.cache.get(self.march))
+        self.assertEqual(self.cache.get(self.april), [])
+
+    def test_invalidate_other_vehicle_keeps_entry(self):
+        """Test entries scoped to a different vehicle survive"""
+        scoped = self.cache.key(datetime(2024, 3, 1), datetime(2024, 3, 5), vehicle_id=3)
+        self.cache.put(scoped, [])
+        self.cache.invalidate(7, datetime(2024, 3, 1), datetime(2024, 3, 2))
+        self.assertEqual(self.cache.get(scoped), [])
+        self.cache.invalidate(3)
+        self.assertIsNone(self.cache.get(scoped))
+
+    def test_stale_put_is_ignored(self):
+        """Test a result computed before an invalidation is not cached"""
+        version = self.cache.version
+        self.cache.invalidate(1, datetime(2024, 3, 1), datetime(2024, 3, 2))
+        self.assertFalse(self.cache.put(self.march, [], version))
+        self.assertIsNone(self.cache.get(self.march))
+
+class TestVehicleServiceCache(unittest.TestCase):
+    def test_repeat_lookup_served_from_cache(self):
+        """Test repeated availability queries hit the repository once"""
+        repo = Mock()
+        repo.get_available_vehicles.return_value = [{'vehicle_id': 1}]
+        service = VehicleService(repo, cache=AvailabilityCache(ttl_seconds=60))
+        start, end = datetime(2024, 3, 1), datetime(2024, 3, 5)
+
+        first = service.check_availability(start, end)
+        second = service.check_availability(start, end)
+
+        self.assertEqual(first, second)
+        repo.get_available_vehicles.assert_called_once_with(start, end, None, None)
+
+if __name__ == '__main__':
+    unittest.main()
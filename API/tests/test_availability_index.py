@@ -0,0 +1,100 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+from availability import AvailabilityIndex
+from services.vehicle_service import VehicleService
+from repositories.vehicle_repository import VehicleRepository
+
+class TestAvailabilityIndex(unittest.TestCase):
+    def setUp(self):
+        """Index with two bookings on vehicle 1 and one on vehicle 2"""
+        self.base = datetime(2024, 1, 1, 10, 0, 0)
+        self.index = AvailabilityIndex()
+        self.index.load([
+            (1, 1, self.base, self.base + timedelta(days=2)),
+            (2, 1, self.base + timedelta(days=5), self.base + timedelta(days=6)),
+            (3, 2, self.base + timedelta(days=1), self.base + timedelta(days=3)),
+        ])
+
+    def test_overlapping_window_is_unavailable(self):
+        """Test a window overlapping an existing booking"""
+        self.assertFalse(self.index.is_available(1, self.base + timedelta(days=1),
+                                                 self.base + timedelta(days=4)))
+
+    def test_gap_between_bookings_is_available(self):
+        """Test a window that fits between two bookings"""
+        self.assertTrue(self.index.is_available(1, self.base + timedelta(days=3),
+                                                self.base + timedelta(days=4)))
+
+    def test_touching_boundaries_overlap(self):
+        """Test boundaries are inclusive like the SQL BETWEEN checks"""
+        self.assertFalse(self.index.is_available(1, self.base + timedelta(days=2),
+                                                 self.base + timedelta(days=3)))
+
+    def test_long_booking_covers_later_window(self):
+        """Test a long earlier booking still blocks windows after later pickups"""
+        self.index.add(4, 3, self.base, self.base + timedelta(days=7))
+        self.index.add(5, 3, self.base + timedelta(days=1), self.base + timedelta(days=2))
+        self.assertFalse(self.index.is_available(3, self.base + timedelta(days=4),
+                                                 self.base + timedelta(days=5)))
+
+    def test_unknown_vehicle_is_available(self):
+        """Test vehicles without bookings are free"""
+        self.assertTrue(self.index.is_available(99, self.base, self.base + timedelta(days=1)))
+
+    def test_remove_frees_window(self):
+        """Test removing a booking frees its window"""
+        self.index.remove(1)
+        self.assertTrue(self.index.is_available(1, self.base, self.base + timedelta(days=1)))
+
+    def test_add_replaces_existing_booking(self):
+        """Test re-adding a booking id moves it instead of duplicating it"""
+        self.index.add(3, 2, self.base + timedelta(days=5), self.base + timedelta(days=6))
+        self.assertTrue(self.index.is_available(2, self.base + timedelta(days=1),
+                                                self.base + timedelta(days=3)))
+        self.assertEqual(self.index.get(3)[1], self.base + timedelta(days=5))
+
+    def test_filter_available(self):
+        """Test filtering a list of vehicle ids"""
+        result = self.index.filter_available([1, 2, 3], self.base + timedelta(days=3),
+                                             self.base + timedelta(days=4))
+        self.assertEqual(result, [1, 3])
+
+class TestVehicleServiceIndexEngine(unittest.TestCase):
+    def setUp(self):
+        self.start = datetime(2024, 1, 1)
+        self.end = self.start + timedelta(days=2)
+        self.vehicle_repo = Mock(spec=VehicleRepository)
+        self.vehicle_repo.get_fleet.return_value = [{'vehicle_id': 1}, {'vehicle_id': 2}]
+        self.index = AvailabilityIndex()
+        self.index.load([(1, 1, self.start, self.end)])
+
+    def test_index_engine_filters_fleet(self):
+        """Test the service answers from the index instead of the SQL join"""
+        service = VehicleService(self.vehicle_repo, self.index)
+        result = service.check_availability(self.start, self.end, 1)
+
+        self.assertEqual(result, [{'vehicle_id': 2}])
+        self.vehicle_repo.get_fleet.assert_called_once_with(1, None)
+        self.vehicle_repo.get_available_vehicles.assert_not_called()
+
+    def test_unloaded_index_falls_back_to_sql(self):
+        """Test the SQL path is used until the index is loaded"""
+        self.vehicle_repo.get_available_vehicles.return_value = []
+        service = VehicleService(self.vehicle_repo, AvailabilityIndex())
+        service.check_availability(self.start, self.end)
+
+        self.vehicle_repo.get_available_vehicles.assert_called_once_with(self.start, self.end, None, None)
+
+    def test_consistency_check_logs_mismatch(self):
+        """Test consistency mode compares the index against the SQL path"""
+        self.vehicle_repo.get_available_vehicles.return_value = [{'vehicle_id': 1}, {'vehicle_id': 2}]
+        service = VehicleService(self.vehicle_repo, self.index, consistency_check=True)
+
+        with self.assertLogs('services.vehicle_service', level='WARNING'):
+            result = service.check_availability(self.start, self.end)
+
+        self.assertEqual(result, [{'vehicle_id': 2}])
+
+if __name__ == '__main__':
+    unittest.main()
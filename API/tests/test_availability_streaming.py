@@ -0,0 +1,254 @@
+import json
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, Mock, patch
+from flask import Flask
+from models import VehicleCategory
+from reference_data import ReferenceData
+from repositories.vehicle_repository import VehicleRepository
+from routes.vehicle_route import vehicles_api
+from services.vehicle_service import VehicleService
+
+
+def vehicle_row(vehicle_id):
+    return {'vehicle_id': vehicle_id, 'status': 'available', 'category_id': 1, 'make': 'Toyota',
+            'model': 'Sedan', 'year': 2022, 'last_maintenance': None, 'daily_rate': 50.0}
+
+
+def vehicle_tuple(vehicle_id):
+    return tuple(vehicle_row(vehicle_id)[field] for field in VehicleRepository.AVAILABILITY_FIELDS)
+
+
+class TestKeysetQueries(unittest.TestCase):
+    def setUp(self):
+        self.start = datetime(2024, 3, 1)
+        self.end = datetime(2024, 3, 3)
+
+    def test_unpaged_query(self):
+        """Test the plain availability query has no keyset or limit"""
+        sql, params = VehicleRepository.build_availability_query(self.start, self.end)
+        self.assertNotIn("v.vehicle_id > %s", sql)
+        self.assertNotIn("LIMIT", sql)
+        self.assertTrue(sql.rstrip().endswith("ORDER BY v.vehicle_id"))
+
+    def test_paged_query(self):
+        """Test after_vehicle_id and limit seek past the cursor in vehicle_id order"""
+        sql, params = VehicleRepository.build_availability_query(self.start, self.end, 2, None, 40, 25)
+        self.assertLess(sql.index("v.vehicle_id > %s"), sql.index("ORDER BY v.vehicle_id"))
+        self.assertTrue(sql.rstrip().endswith("LIMIT %s"))
+        self.assertEqual(params[-3:], (2, 40, 25))
+
+    def test_paged_fleet_query(self):
+        """Test the fleet query pages the same way"""
+        sql, params = VehicleRepository.build_fleet_query(None, None, 7, 10)
+        self.assertIn("v.vehicle_id > %s", sql)
+        self.assertEqual(params, ('AVAILABLE', 7, 10))
+
+
+class TestStreamingRepository(unittest.TestCase):
+    def setUp(self):
+        patcher = patch('repositories.vehicle_repository.Database')
+        self.mock_db = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cursor = MagicMock()
+        self.mock_db.return_value.get_cursor.return_value.__enter__.return_value = self.cursor
+        categories = MagicMock()
+        categories.load.return_value = (1, [VehicleCategory(1, 'Small Car', 4, 50.0)], [])
+        reference_data = ReferenceData()
+        reference_data.bind(categories)
+        reference_patcher = patch('repositories.vehicle_repository.reference_data', reference_data)
+        reference_patcher.start()
+        self.addCleanup(reference_patcher.stop)
+        self.repo = VehicleRepository()
+
+    def test_stream_fetches_in_chunks(self):
+        """Test rows are read with fetchmany from an unbuffered tuple cursor"""
+        self.cursor.fetchmany.side_effect = [[vehicle_tuple(1), vehicle_tuple(2)], [vehicle_tuple(3)], []]
+
+        rows = self.repo.iter_available_vehicles(datetime(2024, 3, 1), datetime(2024, 3, 3), chunk_size=2)
+        self.mock_db.return_value.get_cursor.assert_not_called()
+
+        self.assertEqual(list(rows), [vehicle_row(1), vehicle_row(2), vehicle_row(3)])
+        self.mock_db.return_value.get_cursor.assert_called_once_with(dictionary=False, readonly=True, buffered=False)
+        self.cursor.fetchmany.assert_called_with(2)
+        self.cursor.fetchall.assert_not_called()
+
+    def test_closing_stream_releases_cursor(self):
+        """Test abandoning a stream part way exits the cursor context"""
+        self.cursor.fetchmany.side_effect = [[vehicle_tuple(1), vehicle_tuple(2)], []]
+        context = self.mock_db.return_value.get_cursor.return_value
+
+        rows = self.repo.iter_fleet(chunk_size=2)
+        self.assertEqual(next(rows)['vehicle_id'], 1)
+        rows.close()
+
+        context.__exit__.assert_called_once()
+        self.assertIs(context.__exit__.call_args[0][0], GeneratorExit)
+
+
+class TestStreamingService(unittest.TestCase):
+    def setUp(self):
+        self.vehicle_repo = Mock(spec=VehicleRepository)
+        self.start = datetime.now() + timedelta(days=1)
+        self.end = self.start + timedelta(days=2)
+
+    def test_stream_without_backend_uses_sql(self):
+        """Test streaming goes straight to the unbuffered SQL query without a backend"""
+        self.vehicle_repo.iter_available_vehicles.return_value = iter([vehicle_row(1)])
+        service = VehicleService(self.vehicle_repo)
+
+        result = list(service.stream_availability(self.start, self.end, 1, None, 100))
+
+        self.assertEqual(result, [vehicle_row(1)])
+        self.vehicle_repo.iter_available_vehicles.assert_called_once_with(
+            self.start, self.end, 1, None, chunk_size=100)
+
+    def test_stream_filters_fleet_through_backend(self):
+        """Test fleet chunks are filtered by the in-memory backend"""
+        backend = Mock(loaded=True)
+        backend.filter_available.side_effect = lambda ids, start, end: [i for i in ids if i % 2]
+        self.vehicle_repo.iter_fleet.return_value = (vehicle_row(i) for i in range(1, 6))
+        service = VehicleService(self.vehicle_repo, backend)
+
+        result = list(service.stream_availability(self.start, self.end, chunk_size=2))
+
+        self.assertEqual([row['vehicle_id'] for row in result], [1, 3, 5])
+        self.assertEqual(backend.filter_available.call_count, 3)
+        self.vehicle_repo.iter_available_vehicles.assert_not_called()
+
+    def test_stream_falls_back_after_last_vehicle(self):
+        """Test SQL resumes after the last vehicle the backend answered for"""
+        backend = Mock(loaded=True)
+        backend.filter_available.side_effect = [[1, 2], None]
+        self.vehicle_repo.iter_fleet.return_value = (vehicle_row(i) for i in range(1, 5))
+        self.vehicle_repo.iter_available_vehicles.return_value = iter([vehicle_row(4)])
+        service = VehicleService(self.vehicle_repo, backend)
+
+        result = list(service.stream_availability(self.start, self.end, chunk_size=2))
+
+        self.assertEqual([row['vehicle_id'] for row in result], [1, 2, 4])
+        self.vehicle_repo.iter_available_vehicles.assert_called_once_with(
+            self.start, self.end, None, None, 2, 2)
+
+    def test_paged_lookup_with_backend(self):
+        """Test the backend path applies the keyset and trims to the limit"""
+        backend = Mock(loaded=True)
+        backend.filter_available.side_effect = lambda ids, start, end: ids
+        self.vehicle_repo.get_fleet.return_value = [vehicle_row(i) for i in range(6, 10)]
+        service = VehicleService(self.vehicle_repo, backend)
+
+        result = service.check_availability(self.start, self.end, after_vehicle_id=5, limit=2)
+
+        self.assertEqual([row['vehicle_id'] for row in result], [6, 7])
+        self.vehicle_repo.get_fleet.assert_called_once_with(None, None, after_vehicle_id=5, limit=2)
+
+    def test_unpaged_fallback_keeps_cursor(self):
+        """Test the SQL fallback outside the backend's coverage still starts after the cursor"""
+        backend = Mock(loaded=True)
+        backend.filter_available.return_value = None
+        self.vehicle_repo.get_fleet.return_value = [vehicle_row(6)]
+        self.vehicle_repo.get_available_vehicles.return_value = [vehicle_row(6)]
+        service = VehicleService(self.vehicle_repo, backend)
+
+        service.check_availability(self.start, self.end, after_vehicle_id=5)
+
+        self.vehicle_repo.get_available_vehicles.assert_called_once_with(
+            self.start, self.end, None, None, after_vehicle_id=5)
+
+    def test_paged_lookup_reads_bounded_chunks(self):
+        """Test a page keeps reading fleet chunks after the cursor only until it is full"""
+        fleet = [vehicle_row(i) for i in range(1, 101)]
+        self.vehicle_repo.get_fleet.side_effect = lambda category_id, vehicle_id, after_vehicle_id=None, limit=None: \
+            [row for row in fleet if row['vehicle_id'] > (after_vehicle_id or 0)][:limit]
+        backend = Mock(loaded=True)
+        # Only even ids are free
+        backend.filter_available.side_effect = lambda ids, start, end: [i for i in ids if i % 2 == 0]
+        service = VehicleService(self.vehicle_repo, backend)
+
+        result = service.check_availability(self.start, self.end, after_vehicle_id=10, limit=4)
+
+        self.assertEqual([row['vehicle_id'] for row in result], [12, 14, 16, 18])
+        self.assertEqual([call.kwargs for call in self.vehicle_repo.get_fleet.call_args_list],
+                         [{'after_vehicle_id': 10, 'limit': 4}, {'after_vehicle_id': 14, 'limit': 8}])
+
+
+class TestAvailabilityRoute(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.register_blueprint(vehicles_api, url_prefix='/api')
+        self.client = self.app.test_client()
+        self.path = '/api/vehicles/availability?start_date=2024-03-01&end_date=2024-03-03'
+        patcher = patch('routes.vehicle_route.VehicleRepository')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('routes.vehicle_route.VehicleService')
+    def test_page_returns_next_cursor(self, mock_service):
+        """Test a full page hands back the last vehicle_id as the next cursor"""
+        mock_service.return_value.check_availability.return_value = [vehicle_row(3), vehicle_row(4)]
+
+        response = self.client.get(self.path + '&after_vehicle_id=2&limit=2')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['next_after_vehicle_id'], 4)
+        args = mock_service.return_value.check_availability.call_args[0]
+        self.assertEqual(args[-2:], (2, 2))
+
+    @patch('routes.vehicle_route.VehicleService')
+    def test_last_page_has_no_cursor(self, mock_service):
+        """Test a short page ends the pagination"""
+        mock_service.return_value.check_availability.return_value = [vehicle_row(3)]
+        response = self.client.get(self.path + '&limit=2')
+        self.assertIsNone(response.get_json()['next_after_vehicle_id'])
+
+    def test_limit_is_bounded(self):
+        """Test out of range limits are rejected"""
+        self.assertEqual(self.client.get(self.path + '&limit=0').status_code, 400)
+        self.assertEqual(self.client.get(self.path + '&limit=100000').status_code, 400)
+
+    def test_stream_cannot_be_paged(self):
+        """Test stream and pagination parameters are mutually exclusive"""
+        self.assertEqual(self.client.get(self.path + '&stream=ndjson&limit=5').status_code, 400)
+        self.assertEqual(self.client.get(self.path + '&stream=ndjson&after_vehicle_id=0').status_code, 400)
+        self.assertEqual(self.client.get(self.path + '&stream=xml').status_code, 400)
+
+    @patch('routes.vehicle_route.VehicleService')
+    def test_ndjson_stream(self, mock_service):
+        """Test NDJSON streams one vehicle per line"""
+        mock_service.return_value.stream_availability.return_value = iter([vehicle_row(1), vehicle_row(2)])
+
+        response = self.client.get(self.path + '&stream=ndjson')
+
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertTrue(response.is_streamed)
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual([json.loads(line)['vehicle_id'] for line in lines], [1, 2])
+
+    @patch('routes.vehicle_route.VehicleService')
+    def test_json_stream(self, mock_service):
+        """Test the chunked JSON body is one valid document"""
+        mock_service.return_value.stream_availability.return_value = iter([vehicle_row(1), vehicle_row(2)])
+
+        body = json.loads(self.client.get(self.path + '&stream=json').get_data(as_text=True))
+
+        self.assertEqual(body['status'], 'success')
+        self.assertTrue(body['complete'])
+        self.assertEqual([row['vehicle_id'] for row in body['data']], [1, 2])
+
+    @patch('routes.vehicle_route.VehicleService')
+    def test_json_stream_reports_failure(self, mock_service):
+        """Test a failure mid-stream still closes the document and flags it incomplete"""
+        def rows():
+            yield vehicle_row(1)
+            raise RuntimeError("connection lost")
+        mock_service.return_value.stream_availability.return_value = rows()
+
+        body = json.loads(self.client.get(self.path + '&stream=json').get_data(as_text=True))
+
+        self.assertFalse(body['complete'])
+        self.assertEqual(body['error'], 'connection lost')
+        self.assertEqual(len(body['data']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
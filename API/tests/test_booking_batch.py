@@ -0,0 +1,127 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+from flask import Flask
+from models import Booking
+from repositories.booking_repository import BookingRepository
+from routes.booking_route import bookings_api
+
+class TestBookingBatchRepository(unittest.TestCase):
+    def setUp(self):
+        """Repository with a mocked Database and cursor"""
+        patcher = patch('repositories.booking_repository.Database')
+        self.mock_database = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cursor = MagicMock()
+        self.mock_database.return_value.get_cursor.return_value.__enter__.return_value = self.cursor
+        self.repo = BookingRepository()
+        self.pickup = datetime.now() + timedelta(days=1)
+
+    def booking(self, vehicle_id, user_id=1, offset_days=0):
+        pickup = self.pickup + timedelta(days=offset_days)
+        return Booking(user_id=user_id, vehicle_id=vehicle_id,
+                       pickup_date=pickup.isoformat(),
+                       return_date=(pickup + timedelta(days=1)).isoformat(),
+                       total_cost=100.0)
+
+    def row(self, booking_id, vehicle_id, offset_days=0):
+        pickup = self.pickup + timedelta(days=offset_days)
+        return {'booking_id': booking_id, 'vehicle_id': vehicle_id,
+                'pickup_date': pickup, 'return_date': pickup + timedelta(days=1)}
+
+    def test_create_many_reports_per_item_results(self):
+        """Test existence, availability and in-batch conflicts are reported per item"""
+        self.cursor.fetchall.side_effect = [
+            [{'vehicle_id': 1}, {'vehicle_id': 2}, {'vehicle_id': 3}],
+            [{'user_id': 1}],
+            [self.row(7, 2)],
+            # Read back after the insert, ids not consecutive
+            [self.row(52, 3, offset_days=3), self.row(40, 1)],
+        ]
+        bookings = [
+            self.booking(1),
+            self.booking(2),
+            self.booking(9),
+            self.booking(3, user_id=5),
+            self.booking(1),
+            self.booking(3, offset_days=3),
+        ]
+
+        results = self.repo.create_many(bookings)
+
+        self.assertEqual([result if isinstance(result, int) else (result.status.name, str(result))
+                          for result in results], [
+            40,
+            ('VEHICLE_UNAVAILABLE', "Vehicle not available for selected dates"),
+            ('VEHICLE_NOT_FOUND', "Vehicle with ID 9 does not exist"),
+            ('USER_NOT_FOUND', "User with ID 5 does not exist"),
+            ('VEHICLE_UNAVAILABLE', "Vehicle not available for selected dates"),
+            52,
+        ])
+        self.assertIn("is_deleted = FALSE", self.cursor.execute.call_args_list[2][0][0])
+        self.assertEqual(self.cursor.executemany.call_count, 2)
+        inserted_rows = self.cursor.executemany.call_args_list[0][0][1]
+        self.assertEqual([row[1] for row in inserted_rows], [1, 3])
+        outbox_rows = self.cursor.executemany.call_args_list[1][0][1]
+        self.assertEqual([row[:4] for row in outbox_rows], [(40, 'created', 100.0, 1), (52, 'created', 100.0, 3)])
+        self.cursor.execute.assert_called_with("COMMIT")
+
+    def test_create_many_rolls_back_on_error(self):
+        """Test a database error rolls back the whole batch"""
+        self.cursor.fetchall.side_effect = [[{'vehicle_id': 1}], [{'user_id': 1}], []]
+        self.cursor.executemany.side_effect = RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            self.repo.create_many([self.booking(1)])
+
+        self.cursor.execute.assert_called_with("ROLLBACK")
+
+class TestBookingBatchRoute(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.register_blueprint(bookings_api, url_prefix='/api')
+        self.client = self.app.test_client()
+        patcher = patch('routes.booking_route.BookingService')
+        self.service = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        patcher = patch('routes.booking_route.BookingRepository')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, *results):
+        self.service.create_bookings.return_value = list(results)
+        return self.client.post('/api/bookings/batch', json=[{}] * len(results))
+
+    @staticmethod
+    def created(index):
+        return {'index': index, 'status': 'created', 'booking_id': index + 1}
+
+    @staticmethod
+    def failed(index, code):
+        return {'index': index, 'status': 'error', 'error': 'rejected', 'code': code}
+
+    def test_all_created(self):
+        """Test a batch that fully succeeds is 201"""
+        self.assertEqual(self.post(self.created(0), self.created(1)).status_code, 201)
+
+    def test_mixed_outcomes(self):
+        """Test 207 is only used when some bookings were created and some were not"""
+        response = self.post(self.created(0), self.failed(1, 'VEHICLE_UNAVAILABLE'))
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.get_json()['failed'], 1)
+
+    def test_all_failed_for_the_same_reason(self):
+        """Test a batch where every item failed the same way gets that reason's status"""
+        self.assertEqual(self.post(self.failed(0, 'VEHICLE_UNAVAILABLE'),
+                                   self.failed(1, 'VEHICLE_UNAVAILABLE')).status_code, 409)
+        self.assertEqual(self.post(self.failed(0, 'USER_NOT_FOUND'),
+                                   self.failed(1, 'INVALID_BOOKING')).status_code, 400)
+
+    def test_all_failed_for_different_reasons(self):
+        """Test a batch where nothing was created for mixed reasons is 400"""
+        response = self.post(self.failed(0, 'VEHICLE_UNAVAILABLE'), self.failed(1, 'VEHICLE_NOT_FOUND'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()['created'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
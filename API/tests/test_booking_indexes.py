@@ -0,0 +1,70 @@
+import os
+import unittest
+from datetime import date, datetime
+from unittest.mock import MagicMock, patch
+from models import Booking
+from repositories.booking_repository import BookingRepository
+from repositories.vehicle_repository import VehicleRepository
+from benchmarks.bench_query_plans import bookings_scans, table_accesses
+
+SCHEMA = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'schema.sql')
+
+class TestSargableQueries(unittest.TestCase):
+    def test_overlap_check_is_a_single_range(self):
+        """Test the overlap check compares plain columns without OR branches"""
+        booking = Booking(user_id=1, vehicle_id=3, pickup_date='2024-03-01T10:00:00',
+                          return_date='2024-03-04T10:00:00', total_cost=100.0)
+        self.assertNotIn(" OR ", BookingRepository.OVERLAP_CHECK_SQL)
+        self.assertEqual(BookingRepository.overlap_check_params(booking),
+                         (3, booking.return_date, datetime(2024, 2, 22, 10), booking.pickup_date))
+
+    def test_daily_report_uses_day_columns(self):
+        """Test the daily report filters the stored day columns with a DATE parameter"""
+        query, params = VehicleRepository.build_daily_report_query(datetime(2024, 3, 1, 15, 30), 2)
+        self.assertIn("WHERE pickup_day = %s", query)
+        self.assertIn("WHERE return_day = %s", query)
+        self.assertNotIn("DATE(", query)
+        self.assertEqual(params[0], date(2024, 3, 1))
+        self.assertEqual(params[3], date(2024, 3, 1))
+        self.assertEqual(params[-1], 2)
+
+    @patch('repositories.vehicle_repository.Database')
+    def test_daily_report_category_filter(self, mock_db):
+        """Test the category filter applies to both pickups and returns"""
+        cursor = MagicMock()
+        mock_db.return_value.get_cursor.return_value.__enter__.return_value = cursor
+        VehicleRepository().get_daily_report(datetime(2024, 3, 1))
+        query, params = cursor.execute.call_args[0]
+        self.assertNotIn("v.category_id = %s", query)
+        self.assertEqual(len(params), 6)
+
+    def test_schema_declares_columns_and_indexes(self):
+        """Test the schema stores the day columns and indexes them"""
+        with open(SCHEMA) as f:
+            schema = f.read()
+        self.assertIn("pickup_day DATE AS (DATE(pickup_date)) STORED", schema)
+        self.assertIn("return_day DATE AS (DATE(return_date)) STORED", schema)
+        self.assertIn("ON Bookings(vehicle_id, status, is_deleted, pickup_date, return_date)", schema)
+        self.assertIn("ON Bookings(pickup_day", schema)
+        self.assertIn("ON Bookings(return_day", schema)
+
+class TestPlanInspection(unittest.TestCase):
+    def test_nested_table_accesses(self):
+        """Test tables are found in joins, subqueries and derived tables"""
+        plan = {'query_block': {'nested_loop': [
+            {'table': {'table_name': 'v', 'access_type': 'ALL', 'rows_examined_per_scan': 10}},
+            {'table': {'table_name': 'b', 'access_type': 'ALL', 'materialized_from_subquery': {
+                'query_block': {'union_result': {'query_specifications': [
+                    {'query_block': {'table': {'table_name': 'Bookings', 'access_type': 'ref',
+                                               'key': 'idx_booking_pickup_day'}}},
+                    {'query_block': {'table': {'table_name': 'Bookings', 'access_type': 'ALL'}}},
+                ]}}}}},
+        ]}}
+        accesses = table_accesses(plan)
+        self.assertEqual([access['table'] for access in accesses], ['v', 'b', 'Bookings', 'Bookings'])
+        scans = bookings_scans(accesses)
+        self.assertEqual(len(scans), 1)
+        self.assertEqual(scans[0]['table'], 'Bookings')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import os
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+from models import Booking
+from repositories.booking_repository import BookingRepository
+from initialize_schema import split_statements
+
+class TestVehicleRowLocking(unittest.TestCase):
+    def setUp(self):
+        """Repository with a mocked Database and cursor"""
+        patcher = patch('repositories.booking_repository.Database')
+        self.mock_database = patcher.start()
+        self.addCleanup(patcher.stop)
+        availability_patcher = patch('repositories.booking_repository.availability')
+        self.mock_availability = availability_patcher.start()
+        self.addCleanup(availability_patcher.stop)
+        reference_patcher = patch('repositories.booking_repository.reference_data')
+        reference_patcher.start().has_vehicle.return_value = True
+        self.addCleanup(reference_patcher.stop)
+        self.cursor = MagicMock()
+        self.mock_database.return_value.get_cursor.return_value.__enter__.return_value = self.cursor
+        self.repo = BookingRepository()
+        self.pickup = datetime.now() + timedelta(days=1)
+
+    def booking(self, vehicle_id, status='pending'):
+        return Booking(user_id=1, vehicle_id=vehicle_id, pickup_date=self.pickup.isoformat(),
+                       return_date=(self.pickup + timedelta(days=1)).isoformat(),
+                       total_cost=100.0, status=status)
+
+    def previous(self, vehicle_id):
+        return {'vehicle_id': vehicle_id, 'pickup_date': self.pickup,
+                'return_date': self.pickup + timedelta(days=1), 'total_cost': 80.0, 'is_deleted': False}
+
+    def statements(self):
+        return [call[0][0] for call in self.cursor.execute.call_args_list]
+
+    def test_create_locks_vehicle_before_checks(self):
+        """Test the vehicle row lock is the first read of the booking transaction"""
+        self.cursor.fetchone.side_effect = [{'1': 1}, {'1': 1}, None]
+        self.cursor.lastrowid = 7
+
+        self.assertEqual(self.repo.create(self.booking(3)), 7)
+
+        statements = self.statements()
+        self.assertEqual(statements[0], "START TRANSACTION")
+        self.assertEqual(statements[1], BookingRepository.VEHICLE_LOCK_SQL)
+        self.assertEqual(self.cursor.execute.call_args_list[1][0][1], (3,))
+        self.assertNotIn("FOR UPDATE", statements[3])
+        self.assertEqual(statements[-1], "COMMIT")
+
+    def test_update_locks_both_vehicles_in_id_order(self):
+        """Test moving a booking locks the old and new vehicle rows, lowest id first"""
+        self.cursor.fetchone.side_effect = [
+            self.previous(9),
+            {'1': 1}, {'1': 1}, None]
+
+        self.assertTrue(self.repo.update(5, self.booking(4)))
+
+        calls = self.cursor.execute.call_args_list
+        self.assertIn("FOR UPDATE", calls[1][0][0])
+        self.assertEqual([call[0][1] for call in calls if call[0][0] == BookingRepository.VEHICLE_LOCK_SQL],
+                         [(4,), (9,)])
+        overlap_sql, overlap_params = calls[4][0]
+        self.assertIn("booking_id <> %s", overlap_sql)
+        self.assertEqual(overlap_params[-1], 5)
+        self.assertEqual(self.statements()[-1], "COMMIT")
+        # The outbox event moves the rollup contribution from vehicle 9 to vehicle 4
+        outbox_sql, outbox_row = calls[-2][0]
+        self.assertIn("INSERT INTO BookingOutbox", outbox_sql)
+        self.assertEqual(outbox_row[3], 4)
+        self.assertEqual((outbox_row[6], outbox_row[9]), (9, 80.0))
+
+    def test_update_rejects_overlap(self):
+        """Test an update onto booked dates is rejected after the locks are taken"""
+        self.cursor.fetchone.side_effect = [
+            self.previous(4),
+            {'1': 1}, {'1': 1}]
+
+        with self.assertRaises(ValueError):
+            self.repo.update(5, self.booking(4))
+        self.assertNotIn("COMMIT", self.statements())
+
+    def test_update_of_cancelled_booking_skips_overlap_check(self):
+        """Test releasing a booking never fails on its own dates"""
+        self.cursor.fetchone.side_effect = [
+            self.previous(4),
+            {'1': 1}]
+
+        self.assertTrue(self.repo.update(5, self.booking(4, status='cancelled')))
+        self.assertFalse(any(sql.startswith(BookingRepository.OVERLAP_CHECK_SQL)
+                             for sql in self.statements()))
+        self.mock_availability.release_booking.assert_called_once()
+
+    def test_update_of_deleted_booking_stays_out_of_availability(self):
+        """Test editing a soft-deleted booking does not record it as booked again"""
+        previous = dict(self.previous(4), is_deleted=True)
+        self.cursor.fetchone.side_effect = [previous, {'1': 1}, None]
+
+        self.assertTrue(self.repo.update(5, self.booking(4)))
+        self.mock_availability.record_booking.assert_not_called()
+        self.mock_availability.release_booking.assert_called_once()
+
+    def test_update_missing_booking(self):
+        """Test an unknown booking id returns False without locking any vehicle"""
+        self.cursor.fetchone.side_effect = [None]
+
+        self.assertFalse(self.repo.update(5, self.booking(4)))
+        self.assertNotIn(BookingRepository.VEHICLE_LOCK_SQL, self.statements())
+        self.assertEqual(self.statements()[-1], "ROLLBACK")
+
+    def test_batch_locks_vehicles(self):
+        """Test a batch locks all of its vehicles in one ordered locking read"""
+        inserted = [{'booking_id': 10 + vehicle_id, 'vehicle_id': vehicle_id, 'pickup_date': self.pickup,
+                     'return_date': self.pickup + timedelta(days=1)} for vehicle_id in (1, 2)]
+        self.cursor.fetchall.side_effect = [[{'vehicle_id': 1}, {'vehicle_id': 2}], [{'user_id': 1}], [], inserted]
+
+        self.repo.create_many([self.booking(2), self.booking(1)])
+
+        sql, params = self.cursor.execute.call_args_list[1][0]
+        self.assertTrue(sql.endswith("ORDER BY vehicle_id FOR UPDATE"))
+        self.assertEqual(params, (1, 2))
+
+    def test_procedure_locks_vehicle(self):
+        """Test sp_create_booking takes the vehicle row lock before its checks"""
+        with open(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'schema.sql')) as f:
+            statements = split_statements(f.read())
+        procedure = next(s for s in statements if s.startswith("CREATE PROCEDURE sp_create_booking"))
+        self.assertLess(procedure.index("FOR UPDATE"), procedure.index("FROM Users"))
+
+    def test_procedure_rejects_deleted_users(self):
+        """Test sp_create_booking ignores soft-deleted users like the Python paths"""
+        with open(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'schema.sql')) as f:
+            statements = split_statements(f.read())
+        procedure = next(s for s in statements if s.startswith("CREATE PROCEDURE sp_create_booking"))
+        self.assertIn("FROM Users WHERE user_id = p_user_id AND is_deleted = FALSE", procedure)
+        self.assertNotIn("INTERVAL", procedure)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+from models import Booking, BookingCommitStatus
+from repositories.booking_repository import BookingRepository, BookingRejected
+from initialize_schema import split_statements
+
+class TestBookingProcedurePath(unittest.TestCase):
+    def setUp(self):
+        """Repository on the stored procedure path with a mocked cursor"""
+        patcher = patch('repositories.booking_repository.Database')
+        self.mock_database = patcher.start()
+        self.addCleanup(patcher.stop)
+        reference_patcher = patch('repositories.booking_repository.reference_data')
+        reference_patcher.start().has_vehicle.return_value = True
+        self.addCleanup(reference_patcher.stop)
+        self.get_cursor = self.mock_database.return_value.get_cursor
+        self.cursor = MagicMock()
+        self.get_cursor.return_value.__enter__.return_value = self.cursor
+        self.repo = BookingRepository(commit_path='procedure')
+        pickup = datetime.now() + timedelta(days=1)
+        self.booking = Booking(user_id=1, vehicle_id=2, pickup_date=pickup.isoformat(),
+                               return_date=(pickup + timedelta(days=1)).isoformat(), total_cost=100.0)
+
+    def procedure_returns(self, status_code, booking_id=None):
+        result = MagicMock(with_rows=True)
+        result.fetchone.return_value = {'status_code': status_code, 'booking_id': booking_id}
+        status = MagicMock(with_rows=False)
+        self.cursor.execute.return_value = iter([result, status])
+
+    def test_created_in_one_call(self):
+        """Test a successful booking is a single CALL without a client-side COMMIT"""
+        self.procedure_returns(0, 42)
+
+        booking_id = self.repo.create(self.booking)
+
+        self.assertEqual(booking_id, 42)
+        self.cursor.execute.assert_called_once()
+        self.assertTrue(self.cursor.execute.call_args[0][0].startswith("CALL sp_create_booking"))
+        self.assertEqual(self.cursor.execute.call_args[0][1][-1],
+                         Booking.earliest_overlapping_pickup(self.booking.pickup_date))
+        self.get_cursor.assert_called_once_with(commit=False)
+
+    def test_status_codes_map_to_rejections(self):
+        """Test each procedure status code raises a structured rejection"""
+        expected = {
+            1: BookingCommitStatus.VEHICLE_NOT_FOUND,
+            2: BookingCommitStatus.USER_NOT_FOUND,
+            3: BookingCommitStatus.VEHICLE_UNAVAILABLE,
+        }
+        for code, status in expected.items():
+            self.procedure_returns(code)
+            with self.assertRaises(BookingRejected) as context:
+                self.repo.create(self.booking)
+            self.assertIs(context.exception.status, status)
+            self.assertIsInstance(context.exception, ValueError)
+
+class TestSplitStatements(unittest.TestCase):
+    def test_delimiter_blocks_kept_whole(self):
+        """Test procedure bodies survive statement splitting"""
+        script = (
+            "-- a comment\n"
+            "CREATE TABLE A (id INT);\n\n"
+            "DELIMITER //\n"
+            "CREATE PROCEDURE p()\nBEGIN\n    SELECT 1;\n    SELECT 2;\nEND //\n"
+            "DELIMITER ;\n"
+            "INSERT INTO A VALUES (1);\n"
+        )
+        statements = split_statements(script)
+        self.assertEqual(len(statements), 3)
+        self.assertEqual(statements[0], "CREATE TABLE A (id INT)")
+        self.assertTrue(statements[1].startswith("CREATE PROCEDURE p()"))
+        self.assertIn("SELECT 2;", statements[1])
+        self.assertTrue(statements[1].endswith("END"))
+
+if __name__ == '__main__':
+    unittest.main()
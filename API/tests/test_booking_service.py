@@ -1,8 +1,8 @@
 import unittest
 from datetime import datetime, timedelta
 from services.booking_service import BookingService
-from repositories.booking_repository import BookingRepository
-from models import Booking
+from repositories.booking_repository import BookingRejected, BookingRepository
+from models import Booking, BookingCommitStatus
 from unittest.mock import Mock, patch
 
 class TestBookingService(unittest.TestCase):
@@ -38,6 +38,33 @@ class TestBookingService(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.booking_service.create_booking(booking_data)
 
+    def test_create_bookings_batch(self):
+        """Test batch creation validates items up front and merges repository results"""
+        pickup = datetime.now() + timedelta(days=1)
+        valid = {
+            "user_id": 1,
+            "vehicle_id": 1,
+            "pickup_date": pickup.strftime("%Y-%m-%dT%H:%M:%S"),
+            "return_date": (pickup + timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%S"),
+            "total_cost": 100.0
+        }
+        too_far = dict(valid, pickup_date=(pickup + timedelta(days=10)).strftime("%Y-%m-%dT%H:%M:%S"),
+                       return_date=(pickup + timedelta(days=11)).strftime("%Y-%m-%dT%H:%M:%S"))
+        missing_field = {"user_id": 1}
+        self.booking_repo.create_many.return_value = [
+            7, BookingRejected(BookingCommitStatus.VEHICLE_UNAVAILABLE, "Vehicle not available for selected dates")]
+
+        results = self.booking_service.create_bookings([valid, too_far, missing_field, valid])
+
+        self.assertEqual(len(self.booking_repo.create_many.call_args[0][0]), 2)
+        self.assertEqual(results[0], {'index': 0, 'status': 'created', 'booking_id': 7})
+        self.assertEqual(results[1]['status'], 'error')
+        self.assertIn("Cannot book more than 7 days in advance", results[1]['error'])
+        self.assertEqual(results[2]['status'], 'error')
+        self.assertEqual(results[2]['code'], 'INVALID_BOOKING')
+        self.assertEqual(results[3]['error'], "Vehicle not available for selected dates")
+        self.assertEqual(results[3]['code'], 'VEHICLE_UNAVAILABLE')
+
     def test_get_daily_report(self):
         """Test getting a daily report"""
         test_date = datetime.now()
@@ -0,0 +1,50 @@
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+from bulk_load import balanced_slices, csv_value, droppable_indexes, load_rows
+
+class TestBulkLoad(unittest.TestCase):
+    def test_balanced_slices_cover_fleet(self):
+        """Test slices are contiguous, cover every vehicle and split bookings evenly"""
+        quotas = [40, 1, 1, 1, 1, 20, 20, 16]
+        slices = balanced_slices(quotas, 3)
+        self.assertEqual(slices[0][0], 0)
+        self.assertEqual(slices[-1][1], len(quotas))
+        for (_, stop), (start, _) in zip(slices, slices[1:]):
+            self.assertEqual(stop, start)
+        self.assertEqual(balanced_slices([0, 0], 2), [])
+
+    def test_csv_values(self):
+        """Test booleans and datetimes are written the way LOAD DATA expects"""
+        self.assertEqual(csv_value(True), 1)
+        self.assertEqual(csv_value(datetime(2024, 3, 1, 9, 30)), '2024-03-01 09:30:00')
+        self.assertEqual(csv_value('Ford'), 'Ford')
+
+    def test_droppable_indexes_keep_foreign_key_and_unique(self):
+        """Test only plain secondary indexes are dropped for the load"""
+        cursor = MagicMock()
+        cursor.fetchall.side_effect = [
+            [('vehicle_id',), ('user_id',)],
+            [
+                ('idx_booking_dates', 1, 'pickup_date', None, 'A'),
+                ('idx_booking_dates', 1, 'return_date', None, 'A'),
+                ('vehicle_id', 1, 'vehicle_id', None, 'A'),
+                ('uq_reference', 0, 'reference', None, 'A'),
+                ('idx_functional', 1, None, None, 'A'),
+            ],
+        ]
+        indexes = droppable_indexes(cursor, 'Bookings')
+        self.assertEqual(indexes, {'idx_booking_dates': '`pickup_date`, `return_date`'})
+
+    def test_load_rows_commits_per_chunk(self):
+        """Test rows are sent as multi-row INSERTs with one commit per chunk"""
+        conn = MagicMock()
+        rows = [('a@example.com', 'A', 'B', 'x')] * 5
+        loaded = load_rows(conn, 'Users', rows, 'insert', chunk_size=2)
+        cursor = conn.cursor.return_value
+        self.assertEqual(loaded, 5)
+        self.assertEqual(cursor.executemany.call_count, 3)
+        self.assertEqual(conn.commit.call_count, 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import threading
+import time
+import unittest
+from mysql.connector.errors import PoolError
+from pool import ConnectionPool
+
+class FakeConnection:
+    def __init__(self, connection_id):
+        self.connection_id = connection_id
+        self.connected = True
+        self.closed = False
+        self.resets = 0
+
+    def is_connected(self):
+        return self.connected
+
+    def reset_session(self):
+        self.resets += 1
+
+    def close(self):
+        self.closed = True
+
+class FakeConnector:
+    def __init__(self):
+        self.created = []
+
+    def __call__(self, **config):
+        conn = FakeConnection(len(self.created) + 1)
+        self.created.append(conn)
+        return conn
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.connector = FakeConnector()
+
+    def make_pool(self, **kwargs):
+        options = dict(min_size=1, max_size=2, max_overflow=1, timeout=0.2,
+                       idle_timeout=300, validate_after=0, connect=self.connector)
+        options.update(kwargs)
+        return ConnectionPool(**options)
+
+    def test_prefills_min_size(self):
+        """Test the pool opens min_size connections up front"""
+        pool = self.make_pool(min_size=2)
+        self.assertEqual(len(self.connector.created), 2)
+        self.assertEqual(pool.stats()['idle'], 2)
+
+    def test_grows_to_capacity_then_times_out(self):
+        """Test checkouts grow into overflow and then fail after waiting"""
+        pool = self.make_pool()
+        held = [pool.get_connection() for _ in range(3)]
+        self.assertEqual(pool.stats()['in_use'], 3)
+        self.assertEqual(pool.stats()['overflow_created'], 1)
+
+        started = time.monotonic()
+        with self.assertRaises(PoolError):
+            pool.get_connection()
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual(pool.stats()['checkout_failures'], 1)
+        for conn in held:
+            pool.release(conn)
+
+    def test_overflow_connections_closed_on_release(self):
+        """Test connections above max_size are not kept idle"""
+        pool = self.make_pool()
+        held = [pool.get_connection() for _ in range(3)]
+        for conn in held:
+            pool.release(conn)
+        stats = pool.stats()
+        self.assertEqual(stats['total'], 2)
+        self.assertEqual(stats['idle'], 2)
+        self.assertEqual(sum(conn.closed for conn in held), 1)
+
+    def test_waiter_gets_released_connection(self):
+        """Test a blocked checkout is served as soon as a connection is returned"""
+        pool = self.make_pool(max_size=1, max_overflow=0, timeout=2)
+        conn = pool.get_connection()
+        result = {}
+
+        def borrow():
+            result['conn'] = pool.get_connection()
+
+        waiter = threading.Thread(target=borrow)
+        waiter.start()
+        time.sleep(0.05)
+        pool.release(conn)
+        waiter.join(1)
+
+        self.assertIs(result['conn'], conn)
+        self.assertEqual(pool.stats()['checkouts'], 2)
+
+    def test_invalid_connection_replaced_on_borrow(self):
+        """Test a dead idle connection is discarded and replaced"""
+        pool = self.make_pool()
+        self.connector.created[0].connected = False
+        conn = pool.get_connection()
+        self.assertEqual(conn.connection_id, 2)
+        self.assertEqual(pool.stats()['invalidated'], 1)
+        self.assertTrue(self.connector.created[0].closed)
+
+    def test_idle_eviction_keeps_min_size(self):
+        """Test idle connections beyond min_size are evicted"""
+        pool = self.make_pool(idle_timeout=0.01)
+        first, second = pool.get_connection(), pool.get_connection()
+        pool.release(first)
+        pool.release(second)
+        time.sleep(0.02)
+        pool.get_connection()
+        stats = pool.stats()
+        self.assertEqual(stats['evicted'], 1)
+        self.assertEqual(stats['total'], 1)
+
+    def test_burst_connections_evicted_under_low_load(self):
+        """Test connections opened for a burst are closed while one request at a time keeps the pool busy"""
+        pool = self.make_pool(max_size=3, max_overflow=0, idle_timeout=0.1)
+        burst = [pool.get_connection() for _ in range(3)]
+        for conn in burst:
+            pool.release(conn)
+        for _ in range(40):
+            conn = pool.get_connection()
+            time.sleep(0.01)
+            pool.release(conn)
+        stats = pool.stats()
+        self.assertEqual(stats['evicted'], 2)
+        self.assertEqual(stats['total'], 1)
+
+    def test_idle_connections_handed_out_in_turn(self):
+        """Test sequential checkouts rotate through the idle connections"""
+        pool = self.make_pool(min_size=3, max_size=3)
+        used = []
+        for _ in range(3):
+            conn = pool.get_connection()
+            used.append(conn.connection_id)
+            pool.release(conn)
+        self.assertEqual(len(set(used)), 3)
+
+    def test_release_resets_session(self):
+        """Test returned connections have their session reset"""
+        pool = self.make_pool()
+        conn = pool.get_connection()
+        pool.release(conn)
+        self.assertEqual(conn.resets, 1)
+
+    def test_wait_histogram_is_cumulative(self):
+        """Test wait times land in cumulative histogram buckets"""
+        pool = self.make_pool()
+        pool.release(pool.get_connection())
+        buckets = pool.stats()['wait_ms_buckets']
+        self.assertEqual(buckets['+Inf'], 1)
+        self.assertEqual(buckets['1000'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
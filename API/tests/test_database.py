@@ -9,6 +9,8 @@ class TestDatabase(unittest.TestCase):
         """Set up before all tests."""
         logging.basicConfig(level=logging.INFO)
         cls.db = Database()  
+        # The pool opens on the first query; open it up front for these tests
+        cls.db._ensure_pool()
 
     def test_connection_pool(self):
         """Test that connection pool is initialized."""
@@ -0,0 +1,94 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+from availability import FleetCalendar
+from services.vehicle_service import VehicleService
+from repositories.vehicle_repository import VehicleRepository
+
+class TestFleetCalendar(unittest.TestCase):
+    def setUp(self):
+        """Calendar with three vehicles in two categories"""
+        self.now = datetime(2024, 1, 1, 9, 30, 0)
+        self.calendar = FleetCalendar(slot_minutes=60, horizon_days=16)
+        self.calendar.load(
+            [(1, 1), (2, 1), (3, 2)],
+            [(10, 1, datetime(2024, 1, 2, 10), datetime(2024, 1, 4, 10)),
+             (11, 3, datetime(2024, 1, 3, 10), datetime(2024, 1, 3, 18))],
+            now=self.now
+        )
+
+    def free(self, start, end, category_id=None, now=None):
+        return self.calendar.free_vehicles(start, end, category_id, now=now or self.now)
+
+    def test_free_vehicles_in_category(self):
+        """Test category filter and booked vehicle exclusion"""
+        result = self.free(datetime(2024, 1, 3, 8), datetime(2024, 1, 3, 12), category_id=1)
+        self.assertEqual(result, [2])
+
+    def test_free_vehicles_all_categories(self):
+        """Test a window clear of every booking"""
+        result = self.free(datetime(2024, 1, 5, 8), datetime(2024, 1, 6, 8))
+        self.assertEqual(result, [1, 2, 3])
+
+    def test_outside_horizon_returns_none(self):
+        """Test windows the calendar cannot answer"""
+        self.assertIsNone(self.free(datetime(2023, 12, 31, 8), datetime(2024, 1, 2, 8)))
+        self.assertIsNone(self.free(datetime(2024, 1, 10), datetime(2024, 1, 20)))
+
+    def test_query_starting_today(self):
+        """Test a window starting at midnight today is answered, including bookings earlier today"""
+        self.calendar.add(12, 2, datetime(2024, 1, 1, 1), datetime(2024, 1, 1, 3), now=self.now)
+        self.assertEqual(self.free(datetime(2024, 1, 1), datetime(2024, 1, 2), category_id=1), [1])
+
+    def test_horizon_covers_last_bookable_day(self):
+        """Test a rental ending 16 days from now is still inside the horizon"""
+        end = self.now + timedelta(days=16)
+        self.assertEqual(self.free(end - timedelta(days=1), end), [1, 2, 3])
+
+    def test_add_and_remove_booking(self):
+        """Test booking writes update the occupancy counts"""
+        self.calendar.add(12, 2, datetime(2024, 1, 5, 10), datetime(2024, 1, 6, 10), now=self.now)
+        self.assertEqual(self.calendar.filter_available([2], datetime(2024, 1, 5), datetime(2024, 1, 7),
+                                                        now=self.now), [])
+        self.calendar.remove(12, now=self.now)
+        self.assertEqual(self.calendar.filter_available([2], datetime(2024, 1, 5), datetime(2024, 1, 7),
+                                                        now=self.now), [2])
+
+    def test_overlapping_bookings_keep_slot_busy(self):
+        """Test removing one of two overlapping bookings keeps the shared slots busy"""
+        self.calendar.add(12, 1, datetime(2024, 1, 3, 10), datetime(2024, 1, 5, 10), now=self.now)
+        self.calendar.remove(10, now=self.now)
+        self.assertEqual(self.free(datetime(2024, 1, 4, 8), datetime(2024, 1, 4, 9), category_id=1), [2])
+
+    def test_unknown_vehicle_gets_a_row(self):
+        """Test a booking for a vehicle added after load"""
+        self.calendar.add(12, 4, datetime(2024, 1, 5, 10), datetime(2024, 1, 6, 10), now=self.now)
+        self.assertEqual(self.calendar.filter_available([4, 5], datetime(2024, 1, 5), datetime(2024, 1, 7),
+                                                        now=self.now), [5])
+
+    def test_roll_forward_keeps_long_bookings(self):
+        """Test rolling the horizon marks bookings that were beyond the old end"""
+        late_start = datetime(2024, 1, 16, 12)
+        self.calendar.add(12, 2, late_start, late_start + timedelta(days=3), now=self.now)
+        later = self.now + timedelta(days=5)
+        result = self.calendar.free_vehicles(datetime(2024, 1, 18), datetime(2024, 1, 19), 1, now=later)
+        self.assertEqual(result, [1])
+        self.assertIsNone(self.calendar.free_vehicles(self.now, self.now + timedelta(hours=1), now=later))
+
+class TestVehicleServiceBitmapEngine(unittest.TestCase):
+    def test_out_of_horizon_falls_back_to_sql(self):
+        """Test the service uses SQL when the calendar cannot answer"""
+        vehicle_repo = Mock(spec=VehicleRepository)
+        vehicle_repo.get_fleet.return_value = [{'vehicle_id': 1}]
+        vehicle_repo.get_available_vehicles.return_value = [{'vehicle_id': 1}]
+        calendar = FleetCalendar()
+        calendar.load([(1, 1)], [])
+        start = datetime.now() + timedelta(days=30)
+
+        result = VehicleService(vehicle_repo, calendar).check_availability(start, start + timedelta(days=1))
+
+        self.assertEqual(result, [{'vehicle_id': 1}])
+        vehicle_repo.get_available_vehicles.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
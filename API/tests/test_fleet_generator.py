@@ -0,0 +1,76 @@
+import unittest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from benchmarks.fleet_generator import (FleetSpec, booking_quotas, generate_bookings, generate_vehicles,
+                                        max_vehicle_bookings)
+
+class TestFleetGenerator(unittest.TestCase):
+    def setUp(self):
+        self.spec = FleetSpec(users=50, vehicles=40, bookings=2000, now=datetime(2024, 3, 1, 12))
+        self.vehicles = [(vehicle_id, vehicle_id % 3 + 1) for vehicle_id in range(1, 41)]
+        self.rates = {1: Decimal('40.00'), 2: Decimal('60.00'), 3: Decimal('90.00')}
+
+    def bookings(self):
+        return list(generate_bookings(self.spec, self.vehicles, list(range(1, 51)), self.rates))
+
+    def test_quotas_are_skewed_and_complete(self):
+        """Test every booking is assigned and popular vehicles get the most"""
+        quotas = booking_quotas(self.spec, 40)
+        self.assertEqual(sum(quotas), 2000)
+        self.assertGreater(max(quotas), 5 * min(quotas))
+
+    def test_busiest_vehicles_are_capped(self):
+        """Test no vehicle's quota exceeds what fits in the span and the excess goes to the others"""
+        spec = FleetSpec(now=self.spec.now)
+        quotas = booking_quotas(spec, spec.vehicles)
+        self.assertEqual(sum(quotas), spec.bookings)
+        self.assertLessEqual(max(quotas), max_vehicle_bookings(spec))
+
+    def test_pickups_stay_inside_the_span(self):
+        """Test every pickup falls between history_days ago and the end of the booking horizon"""
+        self.spec = FleetSpec(users=50, vehicles=40, bookings=3000, history_days=30,
+                              now=datetime(2024, 3, 1, 12))
+        rows = self.bookings()
+        self.assertEqual(len(rows), 3000)
+        earliest = self.spec.now - timedelta(days=self.spec.history_days)
+        latest = self.spec.now + timedelta(days=self.spec.horizon_days)
+        for _, _, pickup, return_date, _, _, _ in rows:
+            self.assertGreaterEqual(pickup, earliest)
+            self.assertLess(return_date, latest)
+
+    def test_too_many_bookings_rejected(self):
+        """Test a spec whose bookings cannot fit on the fleet is refused"""
+        spec = FleetSpec(vehicles=2, bookings=10_000, history_days=30, now=self.spec.now)
+        with self.assertRaises(ValueError):
+            booking_quotas(spec, spec.vehicles)
+
+    def test_generation_is_deterministic(self):
+        """Test the same spec always yields the same rows"""
+        self.assertEqual(self.bookings(), self.bookings())
+        self.assertEqual(list(generate_vehicles(self.spec, [1, 2, 3])),
+                         list(generate_vehicles(self.spec, [1, 2, 3])))
+
+    def test_bookings_never_overlap_per_vehicle(self):
+        """Test the history is one the availability rules could have produced"""
+        rows = self.bookings()
+        self.assertEqual(len(rows), 2000)
+        by_vehicle = {}
+        for user_id, vehicle_id, pickup, return_date, cost, status, deleted in rows:
+            self.assertLess(pickup, return_date)
+            by_vehicle.setdefault(vehicle_id, []).append((pickup, return_date))
+        for intervals in by_vehicle.values():
+            intervals.sort()
+            for (_, previous_end), (next_start, _) in zip(intervals, intervals[1:]):
+                self.assertLess(previous_end, next_start)
+
+    def test_status_follows_dates(self):
+        """Test future bookings are pending and only past ones are completed"""
+        for _, _, pickup, return_date, _, status, deleted in self.bookings():
+            if pickup > self.spec.now:
+                self.assertEqual(status, 'pending')
+            if status in ('completed', 'cancelled'):
+                self.assertLess(return_date, self.spec.now)
+            self.assertEqual(deleted, status == 'cancelled')
+
+if __name__ == '__main__':
+    unittest.main()
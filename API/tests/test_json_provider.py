@@ -0,0 +1,132 @@
+import json
+import unittest
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import patch
+from flask import Flask, jsonify
+from json_provider import FastJSONProvider, compile_serializer, install_json_provider
+from models import Booking, User, Vehicle, VehicleStatus
+
+
+class TestSerializers(unittest.TestCase):
+    def test_compiled_serializer_reads_fields(self):
+        """Test a compiled serializer maps every dataclass field"""
+        vehicle = Vehicle(category_id=1, registration_number='ABC123', model='Corolla', make='Toyota',
+                          year=2022, vehicle_id=4)
+        data = compile_serializer(Vehicle)(vehicle)
+        self.assertEqual(data['vehicle_id'], 4)
+        self.assertIs(data['status'], VehicleStatus.AVAILABLE)
+        self.assertEqual(list(data), ['category_id', 'registration_number', 'model', 'make', 'year',
+                                      'status', 'vehicle_id', 'last_maintenance'])
+
+    def test_compiled_serializer_exclusions(self):
+        """Test excluded fields are left out"""
+        user = User(email='a@b.com', first_name='A', last_name='B', password_hash='secret', user_id=1)
+        self.assertNotIn('password_hash', compile_serializer(User, exclude=('password_hash',))(user))
+
+
+class TestFastJSONProvider(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.json = FastJSONProvider(self.app)
+
+    def test_native_types(self):
+        """Test datetime, date, Decimal and Enum values"""
+        payload = {
+            'last_maintenance': datetime(2024, 3, 1, 9, 30),
+            'day': date(2024, 3, 1),
+            'daily_rate': Decimal('49.99'),
+            'status': VehicleStatus.MAINTENANCE,
+        }
+        data = json.loads(self.app.json.dumps(payload))
+        self.assertEqual(data, {
+            'last_maintenance': '2024-03-01T09:30:00',
+            'day': '2024-03-01',
+            'daily_rate': '49.99',
+            'status': 'maintenance',
+        })
+
+    def test_http_dates(self):
+        """Test http_dates keeps the RFC 822 dates of Flask's default provider"""
+        self.app.json.http_dates = True
+        payload = {'last_maintenance': datetime(2024, 3, 1, 9, 30), 'day': date(2024, 3, 1),
+                   'daily_rate': Decimal('49.99')}
+        data = json.loads(self.app.json.dumps(payload))
+        self.assertEqual(data, {
+            'last_maintenance': 'Fri, 01 Mar 2024 09:30:00 GMT',
+            'day': 'Fri, 01 Mar 2024 00:00:00 GMT',
+            'daily_rate': '49.99',
+        })
+
+    def test_models_use_registered_serializers(self):
+        """Test model dataclasses serialize without the password hash"""
+        user = User(email='a@b.com', first_name='A', last_name='B', password_hash='secret',
+                    user_id=1, created_at=datetime(2024, 1, 2))
+        booking = Booking(user_id=1, vehicle_id=2, pickup_date='2024-03-01T10:00:00',
+                          return_date='2024-03-02T10:00:00', total_cost=50.0, booking_id=3,
+                          created_at=datetime(2024, 2, 1))
+        data = json.loads(self.app.json.dumps({'user': user, 'booking': booking}))
+        self.assertEqual(data['user'], {'email': 'a@b.com', 'first_name': 'A', 'last_name': 'B',
+                                        'user_id': 1, 'created_at': '2024-01-02T00:00:00'})
+        self.assertEqual(data['booking']['pickup_date'], '2024-03-01T10:00:00')
+        self.assertEqual(data['booking']['booking_id'], 3)
+
+    def test_unregistered_dataclass(self):
+        """Test other dataclasses are compiled on first use"""
+        @dataclass
+        class Point:
+            x: int
+            y: Decimal
+        self.assertEqual(json.loads(self.app.json.dumps([Point(1, Decimal('2.5'))])), [{'x': 1, 'y': '2.5'}])
+
+    def test_unsupported_type(self):
+        """Test unknown objects raise TypeError like the stdlib encoder"""
+        with self.assertRaises(TypeError):
+            self.app.json.dumps({'value': object()})
+
+    def test_jsonify_response(self):
+        """Test jsonify goes through the provider"""
+        with self.app.app_context():
+            response = jsonify({'daily_rate': Decimal('10.50'), 3: 'non-string key'})
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(json.loads(response.get_data()), {'daily_rate': '10.50', '3': 'non-string key'})
+
+    def test_debug_responses_are_indented(self):
+        """Test responses are pretty printed in debug mode like Flask's provider"""
+        self.app.debug = True
+        with self.app.app_context():
+            body = jsonify({'a': 1}).get_data(as_text=True)
+        self.assertEqual(body, '{\n  "a": 1\n}\n')
+
+    def test_loads(self):
+        """Test request bodies are parsed by the provider"""
+        self.assertEqual(self.app.json.loads(b'{"a": [1, 2]}'), {'a': [1, 2]})
+
+
+class TestInstall(unittest.TestCase):
+    def test_installed_by_default(self):
+        """Test the orjson provider is installed unless disabled"""
+        app = Flask(__name__)
+        with patch.dict('os.environ', {}, clear=True):
+            install_json_provider(app)
+        self.assertIsInstance(app.json, FastJSONProvider)
+        self.assertFalse(app.json.http_dates)
+
+    def test_http_datetime_format(self):
+        """Test JSON_DATETIME_FORMAT=http switches the orjson provider to RFC 822 dates"""
+        app = Flask(__name__)
+        with patch.dict('os.environ', {'JSON_DATETIME_FORMAT': 'http'}, clear=True):
+            install_json_provider(app)
+        self.assertTrue(app.json.http_dates)
+
+    def test_flask_provider_kept(self):
+        """Test JSON_PROVIDER=flask keeps the default provider"""
+        app = Flask(__name__)
+        with patch.dict('os.environ', {'JSON_PROVIDER': 'flask'}):
+            install_json_provider(app)
+        self.assertNotIsInstance(app.json, FastJSONProvider)
+
+
+if __name__ == '__main__':
+    unittest.main()
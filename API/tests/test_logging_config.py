@@ -0,0 +1,65 @@
+import logging
+import os
+import queue
+import tempfile
+import unittest
+import logging_config
+from logging_config import DroppingQueueHandler, configure_logging, shutdown_logging, logging_stats
+
+class TestLoggingConfig(unittest.TestCase):
+    def setUp(self):
+        """Start from an unconfigured root logger"""
+        shutdown_logging()
+        self.root = logging.getLogger()
+        self.saved_handlers = list(self.root.handlers)
+        self.saved_level = self.root.level
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.log_dir.name, 'test.log')
+
+    def tearDown(self):
+        shutdown_logging()
+        for handler in list(self.root.handlers):
+            self.root.removeHandler(handler)
+        for handler in self.saved_handlers:
+            self.root.addHandler(handler)
+        self.root.setLevel(self.saved_level)
+        self.log_dir.cleanup()
+
+    def test_configure_is_idempotent(self):
+        """Test repeated configuration installs a single queue handler"""
+        configure_logging(log_file=self.log_file)
+        configure_logging(log_file=self.log_file)
+        queue_handlers = [h for h in self.root.handlers if isinstance(h, DroppingQueueHandler)]
+        self.assertEqual(len(queue_handlers), 1)
+        self.assertEqual(len(self.root.handlers), 1)
+
+    def test_records_reach_file_once(self):
+        """Test records are written once by the listener thread"""
+        configure_logging(level='INFO', log_file=self.log_file)
+        logging.getLogger('repositories.booking_repository').info("Creating new booking: %s", 42)
+        shutdown_logging()
+        with open(self.log_file) as f:
+            lines = [line for line in f if 'Creating new booking: 42' in line]
+        self.assertEqual(len(lines), 1)
+
+    def test_disabled_level_skips_formatting(self):
+        """Test arguments are not formatted when the level is disabled"""
+        configure_logging(level='WARNING', log_file=self.log_file)
+
+        class Exploding:
+            def __str__(self):
+                raise AssertionError("formatted a disabled record")
+
+        logging.getLogger('repositories.booking_repository').info("Creating new booking: %s", Exploding())
+        self.assertEqual(logging_stats()['queued'], 0)
+
+    def test_full_queue_drops_and_counts(self):
+        """Test a full queue drops records instead of blocking"""
+        handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+        record = logging.LogRecord('test', logging.INFO, __file__, 1, "message", None, None)
+        handler.handle(record)
+        handler.handle(record)
+        self.assertEqual(handler.dropped, 1)
+
+if __name__ == '__main__':
+    unittest.main()
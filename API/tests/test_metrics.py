@@ -0,0 +1,225 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, Mock, patch
+from flask import Flask, jsonify
+from database import Database
+from metrics import (Histogram, InstrumentedCursor, MetricsRegistry, install_request_metrics,
+                     mark_process_dead, normalize_sql)
+from routes.metrics_route import metrics_api
+
+
+class TestNormalizeSql(unittest.TestCase):
+    def test_placeholders_and_whitespace(self):
+        """Test placeholders become ? and whitespace collapses"""
+        sql = """
+            SELECT 1 FROM Vehicles
+            WHERE vehicle_id = %s
+        """
+        self.assertEqual(normalize_sql(sql), "SELECT ? FROM Vehicles WHERE vehicle_id = ?")
+
+    def test_literals(self):
+        """Test string and number literals are stripped"""
+        self.assertEqual(normalize_sql("SELECT * FROM Users WHERE email = 'a@b.com' AND user_id = 42"),
+                         "SELECT * FROM Users WHERE email = ? AND user_id = ?")
+
+    def test_lists_collapse(self):
+        """Test IN and VALUES lists of any length share one statement"""
+        self.assertEqual(normalize_sql("SELECT user_id FROM Users WHERE user_id IN (%s, %s, %s)"),
+                         normalize_sql("SELECT user_id FROM Users WHERE user_id IN (%s)"))
+        self.assertEqual(normalize_sql("INSERT INTO T (a, b) VALUES (%s, %s), (%s, %s)"),
+                         "INSERT INTO T (a, b) VALUES (...)")
+
+
+class TestHistogram(unittest.TestCase):
+    def test_bucket_bounds_are_inclusive(self):
+        """Test values land in the first bucket whose bound is >= the value"""
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.1, 0.5, 2.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [1, 1, 1])
+        self.assertEqual(histogram.count, 3)
+        self.assertAlmostEqual(histogram.sum, 2.6)
+
+
+class TestInstrumentedCursor(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.inner = MagicMock()
+        self.cursor = InstrumentedCursor(self.inner, self.registry)
+
+    def test_statement_timing_and_rows(self):
+        """Test execute is timed and fetched rows are counted per statement"""
+        self.inner.fetchall.return_value = [(1,), (2,)]
+        self.cursor.execute("SELECT vehicle_id FROM Vehicles WHERE category_id = %s", (1,))
+        self.assertEqual(self.cursor.fetchall(), [(1,), (2,)])
+
+        self.inner.execute.assert_called_once_with("SELECT vehicle_id FROM Vehicles WHERE category_id = %s", (1,))
+        text = self.registry.render()
+        self.assertIn('db_query_duration_seconds_count{statement="SELECT vehicle_id FROM Vehicles '
+                      'WHERE category_id = ?"} 1', text)
+        self.assertIn('db_query_rows_total{statement="SELECT vehicle_id FROM Vehicles WHERE category_id = ?"} 2',
+                      text)
+
+    def test_failed_statement(self):
+        """Test errors are counted and re-raised"""
+        self.inner.execute.side_effect = RuntimeError("deadlock")
+        with self.assertRaises(RuntimeError):
+            self.cursor.execute("UPDATE Vehicles SET status = %s")
+        self.assertIn('db_query_errors_total{statement="UPDATE Vehicles SET status = ?"} 1',
+                      self.registry.render())
+
+    def test_attributes_pass_through(self):
+        """Test lastrowid, rowcount and the like come from the wrapped cursor"""
+        self.inner.lastrowid = 9
+        self.assertEqual(self.cursor.lastrowid, 9)
+
+    def test_statement_cardinality_cap(self):
+        """Test statements beyond the cap are grouped under other"""
+        registry = MetricsRegistry(max_statements=1)
+        registry.observe_query("SELECT ?", 0.001)
+        registry.observe_query("SELECT ? FROM Users", 0.001)
+        self.assertIn('statement="other"', registry.render())
+
+
+class TestRequestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        patcher = patch('metrics.registry', self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.app = Flask(__name__)
+        self.db = Mock()
+        self.db.pool_stats.return_value = {'in_use': 1, 'idle': 4, 'waiting': 0, 'total': 5}
+        self.db.replica_stats.return_value = {}
+        self.app.config['DATABASE'] = self.db
+        install_request_metrics(self.app)
+        self.app.register_blueprint(metrics_api)
+
+        @self.app.route('/api/users/<int:user_id>')
+        def get_user(user_id):
+            self.registry.observe_pool_wait('primary', 0.002)
+            self.registry.observe_query("SELECT ? FROM Users WHERE user_id = ?", 0.003)
+            return jsonify({'user_id': user_id})
+
+        self.client = self.app.test_client()
+
+    def test_route_latency_and_breakdown(self):
+        """Test requests are recorded by route template with their SQL and pool time"""
+        self.client.get('/api/users/1')
+        self.client.get('/api/users/2')
+
+        text = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="/api/users/<int:user_id>",'
+                      'status="200"} 2', text)
+        self.assertIn('http_request_db_seconds_sum{method="GET",route="/api/users/<int:user_id>"} 0.006000', text)
+        self.assertIn('http_request_pool_wait_seconds_bucket{method="GET",route="/api/users/<int:user_id>",'
+                      'le="0.0025"} 2', text)
+        self.assertIn('db_pool_connections{pool="primary",state="idle"} 4', text)
+
+    def test_prometheus_content_type(self):
+        """Test /metrics is served as the Prometheus text format"""
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        self.assertIn('# TYPE http_request_duration_seconds histogram', response.get_data(as_text=True))
+
+    def test_unmatched_routes_share_a_series(self):
+        """Test 404s do not create a series per path"""
+        self.client.get('/nope/1')
+        self.client.get('/nope/2')
+        self.assertIn('route="unmatched",status="404"} 2', self.client.get('/metrics').get_data(as_text=True))
+
+
+class TestDatabaseInstrumentation(unittest.TestCase):
+    def setUp(self):
+        Database.reset_routing()
+        self.db = object.__new__(Database)
+        self.db._pool = Mock()
+        self.db._replica = None
+        self.db._statement_cache_size = 0
+
+    def test_cursor_is_instrumented(self):
+        """Test get_cursor hands out an instrumented cursor and records pool wait"""
+        registry = MetricsRegistry()
+        with patch('metrics.registry', registry):
+            with self.db.get_cursor() as cursor:
+                self.assertIsInstance(cursor, InstrumentedCursor)
+                cursor.execute("SELECT 1")
+        text = registry.render()
+        self.assertIn('db_pool_wait_seconds_count{pool="primary"} 1', text)
+        self.assertIn('db_query_duration_seconds_count{statement="SELECT ?"} 1', text)
+
+    def test_disabled_metrics_use_raw_cursor(self):
+        """Test no wrapper is added when metrics and slow query capture are disabled"""
+        with patch('metrics.registry', MetricsRegistry(enabled=False)), \
+                patch('database.slow_query_log', Mock(enabled=False)):
+            with self.db.get_cursor() as cursor:
+                self.assertNotIsInstance(cursor, InstrumentedCursor)
+
+
+class TestMultiprocess(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.registry = MetricsRegistry(multiproc_dir=self.dir.name)
+        self.registry.observe_query("SELECT ?", 0.001)
+
+    def write_worker(self, pid, queries, pools=None):
+        # Another worker's last flush
+        other = MetricsRegistry()
+        for _ in range(queries):
+            other.observe_query("SELECT ?", 0.001)
+        data = other.snapshot()
+        data['pools'] = pools or {}
+        with open(os.path.join(self.dir.name, f'{pid}.json'), 'w') as f:
+            json.dump(data, f)
+
+    def test_scrape_adds_up_workers(self):
+        """Test any worker's scrape covers the series and pool gauges of all of them"""
+        self.write_worker(90001, 2, {'primary': {'in_use': 1, 'idle': 2}})
+        self.write_worker(90002, 3, {'primary': {'in_use': 0, 'idle': 4}})
+        text = self.registry.render({'primary': {'in_use': 1, 'idle': 1}})
+        self.assertIn('db_query_duration_seconds_count{statement="SELECT ?"} 6', text)
+        self.assertIn('db_pool_connections{pool="primary",state="idle"} 7', text)
+        self.assertIn('db_pool_connections{pool="primary",state="in_use"} 2', text)
+
+    def test_dead_worker_totals_are_kept(self):
+        """Test an exited worker's counts stay in the totals but its pool gauges are dropped"""
+        self.write_worker(90001, 2, {'primary': {'idle': 5}})
+        mark_process_dead(90001, self.dir.name)
+        self.write_worker(90002, 1)
+        mark_process_dead(90002, self.dir.name)
+        self.assertEqual(sorted(os.listdir(self.dir.name)), ['dead.json'])
+        text = self.registry.render({'primary': {'idle': 1}})
+        self.assertIn('db_query_duration_seconds_count{statement="SELECT ?"} 4', text)
+        self.assertIn('db_pool_connections{pool="primary",state="idle"} 1', text)
+
+    def test_requests_flush_at_most_once_per_interval(self):
+        """Test a worker writes its file on a request once the flush interval has passed"""
+        now = [0.0]
+        registry = MetricsRegistry(multiproc_dir=self.dir.name, flush_interval=1, clock=lambda: now[0])
+        registry._write = Mock(wraps=registry._write)
+        for elapsed in (0.0, 0.5, 1.0):
+            now[0] = elapsed
+            registry.start_request()
+            registry.finish_request('GET', '/api/users', 200)
+        self.assertEqual(registry._write.call_count, 2)
+        with open(os.path.join(self.dir.name, f'{os.getpid()}.json')) as f:
+            self.assertEqual(json.load(f)['requests'][0][3], 3)
+
+    def test_request_skips_flush_while_another_thread_writes(self):
+        """Test only one thread writes the worker's file at a time"""
+        registry = MetricsRegistry(multiproc_dir=self.dir.name, flush_interval=0)
+        registry._write = Mock(wraps=registry._write)
+        with registry._flush_lock:
+            registry.start_request()
+            registry.finish_request('GET', '/api/users', 200)
+        registry._write.assert_not_called()
+        registry.start_request()
+        registry.finish_request('GET', '/api/users', 200)
+        registry._write.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
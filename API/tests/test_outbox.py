@@ -0,0 +1,162 @@
+import unittest
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import MagicMock, Mock, patch
+from mysql.connector import Error
+from repositories.outbox_repository import OutboxRepository
+from workers import OutboxWorkerPool
+
+class TestOutboxRepository(unittest.TestCase):
+    def setUp(self):
+        patcher = patch('repositories.outbox_repository.Database')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.repo = OutboxRepository()
+        self.cursor = MagicMock()
+
+    def event(self, outbox_id, booking_id, event_type, amount=None, **rollup):
+        event = {'outbox_id': outbox_id, 'booking_id': booking_id, 'event_type': event_type,
+                 'amount': amount}
+        for column in ('vehicle_id', 'pickup_date', 'return_date', 'previous_vehicle_id',
+                       'previous_pickup_date', 'previous_return_date', 'previous_amount'):
+            event[column] = rollup.get(column)
+        return event
+
+    def test_materialize_keeps_event_order(self):
+        """Test runs of events are applied in order and marked processed"""
+        events = [
+            self.event(1, 10, 'created', 100),
+            self.event(2, 11, 'created', 50),
+            self.event(3, 10, 'cancelled'),
+            self.event(4, 11, 'updated', 70),
+        ]
+
+        self.repo.materialize(self.cursor, events)
+
+        statements = [call[0][0] for call in self.cursor.executemany.call_args_list]
+        self.assertIn("INSERT INTO Invoices", statements[0])
+        self.assertEqual(len(self.cursor.executemany.call_args_list[0][0][1]), 2)
+        self.assertIn("INSERT INTO EmailLogs", statements[1])
+        self.assertIn("DELETE FROM Invoices", statements[2])
+        self.assertEqual(self.cursor.executemany.call_args_list[3][0][1], [(10, 'cancelled')])
+        self.assertIn("UPDATE Invoices", statements[4])
+        self.assertEqual(self.cursor.executemany.call_args_list[5][0][1], [(11, 'confirmation')])
+        processed_sql, processed_ids = self.cursor.execute.call_args[0]
+        self.assertIn("UPDATE BookingOutbox SET processed_at", processed_sql)
+        self.assertEqual(processed_ids, (1, 2, 3, 4))
+
+    def test_materialize_applies_rollups(self):
+        """Test the batch's rollup changes are written by the worker, not the booking transaction"""
+        self.cursor.fetchall.return_value = [{'vehicle_id': 7, 'category_id': 2}]
+        events = [self.event(1, 10, 'created', Decimal('60.00'), vehicle_id=7,
+                             pickup_date=datetime(2024, 3, 1, 9), return_date=datetime(2024, 3, 1, 17))]
+
+        self.repo.materialize(self.cursor, events)
+
+        sql, rows = self.cursor.executemany.call_args_list[-1][0]
+        self.assertIn("INSERT INTO DailyCategoryRollups", sql)
+        self.assertEqual(rows, [(date(2024, 3, 1), 2, 1, Decimal('60.00'), 1, Decimal('60.00'),
+                                 1, Decimal('60.00'))])
+
+    def test_claim_batch_uses_partition(self):
+        """Test workers claim only their partition with SKIP LOCKED"""
+        self.cursor.fetchall.return_value = []
+        self.repo.claim_batch(self.cursor, 1, 4, 200)
+        sql, params = self.cursor.execute.call_args[0]
+        self.assertIn("FOR UPDATE SKIP LOCKED", sql)
+        self.assertEqual(params, (4, 1, 200))
+
+    def test_failed_batch_isolates_bad_event(self):
+        """Test a failed batch is retried event by event and only the bad event is held back"""
+        events = [self.event(1, 10, 'created', 100), self.event(2, 11, 'created', 50),
+                  self.event(3, 11, 'cancelled'), self.event(4, 12, 'created', 70)]
+        cursor = MagicMock()
+        self.repo.db.get_cursor.return_value.__enter__.side_effect = [Exception("batch failed"), cursor]
+        self.repo.claim_batch = Mock(return_value=events)
+
+        def materialize(cursor, batch):
+            if batch[0]['outbox_id'] == 2:
+                raise ValueError("bad amount")
+        self.repo.materialize = Mock(side_effect=materialize)
+
+        self.assertEqual(self.repo.process_batch(0, 1, 10, max_attempts=3), 2)
+
+        applied = [call[0][1][0]['outbox_id'] for call in self.repo.materialize.call_args_list]
+        # Event 3 follows the failed event of the same booking
+        self.assertEqual(applied, [1, 2, 4])
+        statements = [call[0][0] for call in cursor.execute.call_args_list]
+        self.assertIn("ROLLBACK TO SAVEPOINT outbox_event", statements)
+        failure_sql, failure_params = [call[0] for call in cursor.execute.call_args_list
+                                       if "attempts = attempts + 1" in call[0][0]][0]
+        self.assertIn("dead_lettered_at = IF(attempts >= %s", failure_sql)
+        self.assertEqual(failure_params, ("bad amount", 3, 2))
+
+    def test_lost_transaction_retries_the_batch(self):
+        """Test a deadlock that discarded the savepoint reruns the batch in a fresh transaction"""
+        events = [self.event(1, 10, 'created', 100), self.event(2, 11, 'created', 50)]
+        lost, fresh = MagicMock(), MagicMock()
+
+        def execute(sql, *args):
+            if sql == "ROLLBACK TO SAVEPOINT outbox_event":
+                raise Error(msg="SAVEPOINT outbox_event does not exist", errno=1305)
+        lost.execute.side_effect = execute
+        self.repo.db.get_cursor.return_value.__enter__.side_effect = [lost, fresh]
+        self.repo.claim_batch = Mock(return_value=events)
+        outcomes = [None, Error(msg="Deadlock found", errno=1213), None, None]
+
+        def materialize(cursor, batch):
+            outcome = outcomes.pop(0)
+            if outcome is not None:
+                raise outcome
+        self.repo.materialize = Mock(side_effect=materialize)
+
+        self.assertEqual(self.repo.process_singly(0, 1, 10, max_attempts=3), 2)
+
+        applied = [call[0][1][0]['outbox_id'] for call in self.repo.materialize.call_args_list]
+        self.assertEqual(applied, [1, 2, 1, 2])
+        self.assertFalse(any("attempts = attempts + 1" in call[0][0] for call in fresh.execute.call_args_list))
+
+    def test_claim_skips_dead_letters(self):
+        """Test dead-lettered events are never claimed again"""
+        self.cursor.fetchall.return_value = []
+        self.repo.claim_batch(self.cursor, 0, 1, 200)
+        self.assertIn("dead_lettered_at IS NULL", self.cursor.execute.call_args[0][0])
+
+    def test_lag_reports_dead_letters(self):
+        """Test the lag counts dead-lettered events apart from the pending backlog"""
+        cursor = self.repo.db.get_cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = {'pending': Decimal('4'), 'dead_lettered': Decimal('1'),
+                                        'oldest_seconds': Decimal('2.5')}
+        self.assertEqual(self.repo.get_lag(), {'pending': 4, 'dead_lettered': 1, 'oldest_seconds': 2.5})
+
+class TestOutboxWorkerPool(unittest.TestCase):
+    def test_drain_records_throughput(self):
+        """Test drained batches feed the processed and rate metrics"""
+        repository = Mock(spec=OutboxRepository)
+        repository.process_batch.side_effect = [5, 0]
+        repository.get_lag.return_value = {'pending': 0, 'oldest_seconds': 0.0}
+        pool = OutboxWorkerPool(workers=2, batch_size=10, repository=repository)
+
+        self.assertEqual(pool.drain_once(1), 5)
+        self.assertEqual(pool.drain_once(1), 0)
+        repository.process_batch.assert_called_with(1, 2, 10, 5)
+
+        stats = pool.stats(window_seconds=60)
+        self.assertEqual(stats['processed_total'], 5)
+        self.assertEqual(stats['batches_total'], 1)
+        self.assertEqual(stats['lag_pending'], 0)
+
+    def test_worker_threads_start_and_stop(self):
+        """Test the background threads drain until stopped"""
+        repository = Mock(spec=OutboxRepository)
+        repository.process_batch.return_value = 0
+        pool = OutboxWorkerPool(workers=2, poll_interval=0.01, repository=repository)
+
+        pool.start()
+        pool.stop()
+
+        self.assertTrue(repository.process_batch.called)
+        self.assertEqual(pool.stats()['workers'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import runpy
+import unittest
+from unittest.mock import MagicMock, patch
+from database import Database
+from slow_query_log import SlowQueryLog
+
+CONFIG = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'gunicorn.conf.py')
+
+class TestLazyPool(unittest.TestCase):
+    def setUp(self):
+        saved = (Database._instance, Database._pool, Database._replica, list(Database._inherited_pools))
+
+        def restore():
+            Database._instance, Database._pool, Database._replica = saved[:3]
+            Database._inherited_pools[:] = saved[3]
+        self.addCleanup(restore)
+        Database._instance = Database._pool = Database._replica = None
+        patcher = patch('database.ConnectionPool')
+        self.pool_class = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pool_opens_on_first_query(self):
+        """Test creating the singleton does not connect and the first query opens the pool once"""
+        db = Database()
+        self.pool_class.assert_not_called()
+        with db.get_cursor():
+            pass
+        with db.get_cursor():
+            pass
+        self.pool_class.assert_called_once()
+        self.assertEqual(self.pool_class.return_value.release.call_count, 2)
+
+    def test_fork_drops_inherited_pool_without_closing_it(self):
+        """Test a forked child forgets the parent's pool but keeps its sockets referenced"""
+        inherited = MagicMock()
+        Database._pool = inherited
+        Database._reset_after_fork()
+        self.assertIsNone(Database._pool)
+        self.assertIn(inherited, Database._inherited_pools)
+        inherited.close.assert_not_called()
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "needs fork")
+    def test_child_process_opens_its_own_pool(self):
+        """Test the at-fork hook runs in a real child process"""
+        Database._pool = MagicMock()
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if Database._pool is None else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertIsNotNone(Database._pool)
+
+    def test_close_pool_on_worker_exit(self):
+        """Test close_pool closes the pool and the next query opens a new one"""
+        db = Database()
+        with db.get_cursor():
+            pass
+        Database.close_pool()
+        self.pool_class.return_value.close.assert_called_once()
+        self.assertIsNone(Database._pool)
+
+class TestSlowQueryLogAfterFork(unittest.TestCase):
+    def test_background_thread_restarts(self):
+        """Test the child forgets the parent's thread and queue"""
+        log = SlowQueryLog(threshold_ms=1)
+        log._thread = MagicMock()
+        queue = log._queue
+        log.reset_after_fork()
+        self.assertIsNone(log._thread)
+        self.assertIsNot(log._queue, queue)
+        self.assertEqual(log._queue.maxsize, queue.maxsize)
+
+class TestServerConfig(unittest.TestCase):
+    def load(self, **environ):
+        environ.setdefault('METRICS_MULTIPROC_DIR', '/tmp/metrics')
+        with patch.dict(os.environ, environ):
+            config = runpy.run_path(CONFIG)
+            return config, dict(os.environ)
+
+    def test_pool_sized_per_worker(self):
+        """Test each worker's pool is sized to its thread count and outbox threads stay out of workers"""
+        config, environ = self.load(WEB_WORKERS='4', WEB_THREADS='3', DB_POOL_MIN_SIZE='5', OUTBOX_WORKERS='2')
+        self.assertEqual(config['workers'], 4)
+        self.assertEqual(config['worker_class'], 'gthread')
+        self.assertEqual(environ['DB_POOL_MAX_SIZE'], '3')
+        self.assertEqual(environ['DB_POOL_MIN_SIZE'], '3')
+        self.assertEqual(environ['OUTBOX_WORKERS'], '0')
+        self.assertEqual(config['OUTBOX_WORKERS'], 2)
+
+    def test_outbox_process_environment(self):
+        """Test the separate outbox process runs the configured workers with a small pool"""
+        config, _ = self.load(WEB_THREADS='8')
+        env = config['outbox_environ'](3, {'DB_POOL_MAX_SIZE': '8', 'OUTBOX_WORKERS': '0'})
+        self.assertEqual(env['OUTBOX_WORKERS'], '3')
+        self.assertEqual(env['DB_POOL_MAX_SIZE'], '4')
+
+    def test_outbox_process_stopped_on_exit(self):
+        """Test the master terminates the outbox process when it exits"""
+        config, _ = self.load()
+        server = MagicMock()
+        server.outbox.poll.return_value = None
+        config['on_exit'](server)
+        server.outbox.terminate.assert_called_once()
+
+    def test_multiprocess_settings(self):
+        """Test workers share a metrics directory, get their own slow log and lose the result cache"""
+        config, _ = self.load()
+        settings = config['multiprocess_settings'](4, {'METRICS_MULTIPROC_DIR': '/tmp/metrics',
+                                                       'SLOW_QUERY_LOG_FILE': 'logs/slow.log'})
+        self.assertEqual(settings, {'AVAILABILITY_CACHE_SIZE': '0', 'SLOW_QUERY_LOG_FILE': 'logs/slow.{pid}.log'})
+
+    def test_result_cache_kept_when_configured(self):
+        """Test an explicit cache size, or a single worker, keeps the result cache"""
+        config, _ = self.load()
+        settings = config['multiprocess_settings'](4, {'METRICS_MULTIPROC_DIR': '/tmp/metrics',
+                                                       'AVAILABILITY_CACHE_SIZE': '1024'})
+        self.assertNotIn('AVAILABILITY_CACHE_SIZE', settings)
+        settings = config['multiprocess_settings'](1, {'METRICS_MULTIPROC_DIR': '/tmp/metrics'})
+        self.assertNotIn('AVAILABILITY_CACHE_SIZE', settings)
+
+    def test_exited_worker_marked_dead(self):
+        """Test the master folds an exited worker's metrics into the totals"""
+        config, _ = self.load()
+        worker = MagicMock(pid=4321)
+        with patch('metrics.mark_process_dead') as mark, patch.dict(os.environ, {'METRICS_MULTIPROC_DIR': '/tmp/metrics'}):
+            config['child_exit'](MagicMock(), worker)
+        mark.assert_called_once_with(4321, '/tmp/metrics')
+
+if __name__ == '__main__':
+    unittest.main()
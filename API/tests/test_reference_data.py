@@ -0,0 +1,245 @@
+import time
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+from models import Booking, BookingCommitStatus, Vehicle, VehicleCategory
+from reference_data import ReferenceData, with_category_names
+from repositories.booking_repository import BookingRejected, BookingRepository
+from repositories.reference_data_repository import ReferenceDataRepository
+from repositories.vehicle_repository import VehicleRepository
+
+CATEGORIES = [VehicleCategory(1, 'Small Car', 4, Decimal('50.00')),
+              VehicleCategory(2, 'SUV', 7, Decimal('80.00'))]
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class FakeSource:
+    def __init__(self):
+        self.version = 1
+        self.categories = list(CATEGORIES)
+        self.vehicles = [(10, 1), (11, 2)]
+        self.loads = []
+        self.version_reads = []
+
+    def load(self, primary=False):
+        self.loads.append(primary)
+        return self.version, list(self.categories), list(self.vehicles)
+
+    def get_version(self, primary=False):
+        self.version_reads.append(primary)
+        return self.version
+
+class TestReferenceData(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.source = FakeSource()
+        self.data = ReferenceData(refresh_interval=300, version_check_interval=1, negative_ttl=5,
+                                  clock=self.clock)
+        self.data.bind(self.source)
+
+    def test_first_read_loads(self):
+        """Test the snapshot is loaded on first use and then served from memory"""
+        self.assertFalse(self.data.loaded)
+        self.assertEqual(self.data.daily_rates(), {1: Decimal('50.00'), 2: Decimal('80.00')})
+        self.assertEqual(self.data.category(2).capacity, 7)
+        self.assertEqual(self.data.vehicle_category(11), 2)
+        self.assertEqual(self.data.category_names()[1], 'Small Car')
+        self.assertEqual(self.source.loads, [False])
+        self.assertEqual(self.source.version_reads, [])
+
+    def test_readers_never_query(self):
+        """Test reads after the load are served from the snapshot however much time passes"""
+        self.data.load()
+        self.source.version = 2
+        self.clock.now += 1000
+        self.data.daily_rates()
+        self.data.vehicle_category(10)
+        self.assertEqual(self.source.loads, [False])
+        self.assertEqual(self.source.version_reads, [])
+
+    def test_version_change_reloads(self):
+        """Test a refresher pass picks up a bumped version"""
+        self.data.load()
+        self.source.version = 2
+        self.source.categories[0] = VehicleCategory(1, 'Small Car', 4, Decimal('55.00'))
+        self.data.refresh()
+        self.assertEqual(self.data.daily_rates()[1], Decimal('55.00'))
+        self.assertEqual(len(self.source.loads), 2)
+
+    def test_unchanged_version_keeps_snapshot(self):
+        """Test a version check that finds no change does not reload"""
+        self.data.load()
+        self.clock.now += 5
+        self.data.refresh()
+        self.assertEqual(self.source.version_reads, [False])
+        self.assertEqual(len(self.source.loads), 1)
+
+    def test_refresh_interval_reloads(self):
+        """Test everything is reloaded after the refresh interval even without a version bump"""
+        self.data.load()
+        self.clock.now += 300
+        self.data.refresh()
+        self.assertEqual(len(self.source.loads), 2)
+        self.assertEqual(self.source.version_reads, [])
+
+    def test_invalidate_reloads_on_next_pass(self):
+        """Test a local write is reloaded without comparing versions"""
+        self.data.load()
+        self.source.vehicles.append((12, 1))
+        self.data.invalidate()
+        self.data.refresh()
+        self.assertEqual(self.data.vehicle_category(12), 1)
+        self.assertEqual(self.source.version_reads, [])
+
+    def test_unknown_vehicle_confirmed_on_primary(self):
+        """Test an unknown vehicle id checks the primary's version before it is rejected"""
+        self.data.load()
+        self.assertFalse(self.data.has_vehicle(99))
+        self.assertEqual(self.source.version_reads, [True])
+        self.source.version = 2
+        self.source.vehicles.append((99, 1))
+        self.clock.now += 5
+        self.assertTrue(self.data.has_vehicle(99))
+        self.assertEqual(self.source.loads, [False, True])
+        self.assertTrue(self.data.has_vehicle(10))
+        self.assertEqual(len(self.source.version_reads), 2)
+
+    def test_missing_vehicle_is_cached(self):
+        """Test repeated bogus ids are rejected without a round trip until the entry expires"""
+        self.data.load()
+        for _ in range(3):
+            self.assertFalse(self.data.has_vehicle(99))
+        self.assertEqual(self.source.version_reads, [True])
+        self.assertEqual(self.data.stats()['negative_hits'], 2)
+        self.clock.now += 5
+        self.assertFalse(self.data.has_vehicle(99))
+        self.assertEqual(len(self.source.version_reads), 2)
+
+    def test_reload_forgets_missing_vehicles(self):
+        """Test a new version clears the missing-vehicle cache"""
+        self.data.load()
+        self.assertFalse(self.data.has_vehicle(99))
+        self.source.version = 2
+        self.source.vehicles.append((99, 1))
+        self.data.refresh()
+        self.assertTrue(self.data.has_vehicle(99))
+
+    def test_primary_check_does_not_wait_for_refresh(self):
+        """Test a bogus id is checked while a refresher pass holds the lock"""
+        self.data.load()
+        with self.data._refresh_lock:
+            self.assertFalse(self.data.has_vehicle(99))
+
+    def test_failed_refresh_keeps_snapshot(self):
+        """Test a refresh error keeps serving the loaded snapshot"""
+        self.data.load()
+        self.source.load = MagicMock(side_effect=Exception("down"))
+        self.data.invalidate()
+        self.data.refresh()
+        self.assertEqual(self.data.vehicle_category(10), 1)
+        self.assertEqual(self.data.stats()['errors'], 1)
+        self.assertTrue(self.data._stale)
+
+    def test_background_refresher(self):
+        """Test the refresher thread is started by the first read and applies invalidations"""
+        data = ReferenceData(version_check_interval=60, background=True)
+        data.bind(self.source)
+        self.addCleanup(data.stop)
+        data.load()
+        self.assertTrue(data.has_vehicle(10))
+        self.assertTrue(data.stats()['refresher_running'])
+        self.source.vehicles.append((12, 1))
+        data.invalidate()
+        deadline = time.monotonic() + 2
+        while data.vehicle_category(12) is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(data.vehicle_category(12), 1)
+
+    def test_fork_resets_refresher(self):
+        """Test a forked child starts its own refresher"""
+        data = ReferenceData(version_check_interval=60, background=True)
+        data.bind(self.source)
+        self.addCleanup(data.stop)
+        data.current()
+        parent_stop, parent_wakeup = data._stop, data._wakeup
+        data.reset_after_fork()
+        self.assertIsNone(data._thread)
+        data.current()
+        self.assertTrue(data.stats()['refresher_running'])
+        # The parent's thread, which a real child would not have
+        parent_stop.set()
+        parent_wakeup.set()
+
+    def test_with_category_names(self):
+        """Test report rows get their category name from the snapshot"""
+        with patch('reference_data.reference_data', self.data):
+            rows = with_category_names([{'category_id': 2, 'booking_count': 3}])
+        self.assertEqual(rows, [{'category_id': 2, 'category_name': 'SUV', 'booking_count': 3}])
+
+class TestReferenceDataQueries(unittest.TestCase):
+    def setUp(self):
+        data = ReferenceData()
+        data.bind(FakeSource())
+        patcher = patch('repositories.vehicle_repository.reference_data', data)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_hot_queries_do_not_join_categories(self):
+        """Test availability, fleet and daily report queries no longer join VehicleCategories"""
+        queries = [VehicleRepository.build_availability_query(datetime(2024, 3, 1), datetime(2024, 3, 2))[0],
+                   VehicleRepository.build_fleet_query()[0],
+                   VehicleRepository.build_daily_report_query(datetime(2024, 3, 1))[0]]
+        for query in queries:
+            self.assertNotIn("VehicleCategories", query)
+
+    def test_new_vehicle_invalidates_availability_results(self):
+        """Test creating a vehicle drops cached availability results it should appear in"""
+        with patch('repositories.vehicle_repository.Database') as mock_db, \
+                patch('repositories.vehicle_repository.availability') as mock_availability:
+            mock_db.return_value.get_cursor.return_value.__enter__.return_value.lastrowid = 12
+            VehicleRepository().create(Vehicle(1, 'ABC123', 'Focus', 'Ford', 2022))
+        mock_availability.invalidate_window.assert_called_once_with(12)
+
+    def test_availability_rows_get_daily_rate(self):
+        """Test the mapper fills daily_rate from the category of each row"""
+        map_row = VehicleRepository.availability_mapper()
+        vehicle = map_row((10, 'AVAILABLE', 2, 'Ford', 'Explorer', 2022, None))
+        self.assertEqual(vehicle['daily_rate'], Decimal('80.00'))
+        self.assertEqual(vehicle['make'], 'Ford')
+
+class TestBookingVehicleCheck(unittest.TestCase):
+    def test_unknown_vehicle_rejected_without_transaction(self):
+        """Test a booking for a vehicle missing from the reference data opens no cursor"""
+        data = ReferenceData()
+        data.bind(FakeSource())
+        with patch('repositories.booking_repository.Database') as mock_db, \
+                patch('repositories.booking_repository.reference_data', data):
+            booking = Booking(user_id=1, vehicle_id=99, pickup_date='2030-01-01T10:00:00',
+                              return_date='2030-01-02T10:00:00', total_cost=50.0)
+            with self.assertRaises(BookingRejected) as raised:
+                BookingRepository(commit_path='statements').create(booking)
+        self.assertIs(raised.exception.status, BookingCommitStatus.VEHICLE_NOT_FOUND)
+        mock_db.return_value.get_cursor.assert_not_called()
+
+class TestReferenceDataRepository(unittest.TestCase):
+    def test_load(self):
+        """Test the version, categories and vehicle map are read on one cursor"""
+        with patch('repositories.reference_data_repository.Database') as mock_db:
+            cursor = MagicMock()
+            mock_db.return_value.get_cursor.return_value.__enter__.return_value = cursor
+            cursor.fetchone.return_value = (4,)
+            cursor.fetchall.side_effect = [[(1, 'Small Car', 4, Decimal('50.00'))], [(10, 1)]]
+            version, categories, vehicles = ReferenceDataRepository().load(primary=True)
+        self.assertEqual(version, 4)
+        self.assertEqual(categories, [CATEGORIES[0]])
+        self.assertEqual(vehicles, [(10, 1)])
+        mock_db.return_value.get_cursor.assert_called_once_with(dictionary=False, readonly=False, commit=False)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from unittest.mock import MagicMock, Mock
+from mysql.connector.errors import PoolError
+from database import Database
+from replica import ReplicaRouter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestReplicaRouter(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.pool = Mock()
+        self.status_cursor = MagicMock()
+        self.status_cursor.fetchone.return_value = {'Seconds_Behind_Source': 1}
+        self.pool.get_connection.return_value.cursor.return_value = self.status_cursor
+        self.router = ReplicaRouter(self.pool, max_lag=5, check_interval=1, clock=self.clock)
+
+    def test_reads_go_to_replica_when_caught_up(self):
+        """Test a healthy replica serves read-only connections"""
+        self.assertIsNotNone(self.router.acquire())
+        self.assertEqual(self.router.stats()['replica_reads'], 1)
+
+    def test_lagging_replica_falls_back(self):
+        """Test reads fall back to the primary beyond the lag limit"""
+        self.status_cursor.fetchone.return_value = {'Seconds_Behind_Source': 30}
+        self.assertIsNone(self.router.acquire())
+        self.assertEqual(self.router.stats()['lag_fallbacks'], 1)
+
+    def test_stopped_replication_falls_back(self):
+        """Test a NULL lag (replication stopped) is treated as unhealthy"""
+        self.status_cursor.fetchone.return_value = {'Seconds_Behind_Source': None}
+        self.assertIsNone(self.router.acquire())
+
+    def test_lag_sampled_once_per_interval(self):
+        """Test lag is measured at most once per check interval"""
+        self.router.acquire()
+        self.router.acquire()
+        self.assertEqual(self.status_cursor.execute.call_count, 1)
+        self.clock.now = 2
+        self.router.acquire()
+        self.assertEqual(self.status_cursor.execute.call_count, 2)
+
+    def test_pinned_reads_skip_replica(self):
+        """Test read-your-writes keeps the request on the primary"""
+        self.assertIsNone(self.router.acquire(pinned=True))
+        self.pool.get_connection.assert_not_called()
+
+    def test_unreachable_replica_falls_back(self):
+        """Test a checkout failure sends reads to the primary until the next sample"""
+        self.router.acquire()
+        self.pool.get_connection.side_effect = PoolError("exhausted")
+        self.assertIsNone(self.router.acquire())
+        self.assertEqual(self.router.stats()['error_fallbacks'], 1)
+
+class TestDatabaseRouting(unittest.TestCase):
+    def setUp(self):
+        Database.reset_routing()
+        self.addCleanup(Database.reset_routing)
+        self.db = object.__new__(Database)
+        self.db._pool = Mock()
+        self.db._replica = Mock()
+        self.db._statement_cache_size = 0
+        self.replica_conn = Mock()
+        self.db._replica.acquire.return_value = self.replica_conn
+
+    def test_readonly_cursor_uses_replica(self):
+        """Test readonly cursors are served from the replica pool"""
+        with self.db.get_cursor(readonly=True):
+            pass
+        self.db._pool.get_connection.assert_not_called()
+        self.db._replica.release.assert_called_once_with(self.replica_conn)
+        self.assertTrue(Database.served_by_replica())
+
+    def test_write_pins_later_reads_to_primary(self):
+        """Test reads after a write in the same request ask for the primary"""
+        with self.db.get_cursor():
+            pass
+        self.db._replica.acquire.return_value = None
+        with self.db.get_cursor(readonly=True):
+            pass
+        self.db._replica.acquire.assert_called_once_with(pinned=True)
+        self.assertEqual(self.db._pool.release.call_count, 2)
+
+    def test_reset_routing_unpins(self):
+        """Test a new request starts reading from the replica again"""
+        with self.db.get_cursor():
+            pass
+        Database.reset_routing()
+        with self.db.get_cursor(readonly=True):
+            pass
+        self.db._replica.acquire.assert_called_once_with(pinned=False)
+
+if __name__ == '__main__':
+    unittest.main()
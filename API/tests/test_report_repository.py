@@ -0,0 +1,163 @@
+import unittest
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+from models import VehicleCategory
+from reference_data import ReferenceData
+from repositories.report_repository import ReportRepository
+
+def event(amount=None, vehicle_id=None, pickup_date=None, return_date=None, previous_vehicle_id=None,
+          previous_pickup_date=None, previous_return_date=None, previous_amount=None):
+    return {'amount': amount, 'vehicle_id': vehicle_id, 'pickup_date': pickup_date,
+            'return_date': return_date, 'previous_vehicle_id': previous_vehicle_id,
+            'previous_pickup_date': previous_pickup_date, 'previous_return_date': previous_return_date,
+            'previous_amount': previous_amount}
+
+class TestRollupDeltas(unittest.TestCase):
+    def setUp(self):
+        self.cursor = MagicMock()
+        self.cursor.fetchall.return_value = [{'vehicle_id': 3, 'category_id': 1},
+                                             {'vehicle_id': 4, 'category_id': 2}]
+
+    def test_moved_booking(self):
+        """Test an update removes the old contribution and adds the new one"""
+        moved = event(amount=Decimal('100'), vehicle_id=4, pickup_date=datetime(2024, 3, 2, 9),
+                      return_date=datetime(2024, 3, 2, 18), previous_vehicle_id=3,
+                      previous_pickup_date=datetime(2024, 3, 1, 9), previous_return_date=datetime(2024, 3, 3, 9),
+                      previous_amount=Decimal('80'))
+        deltas = ReportRepository.rollup_deltas(self.cursor, [moved])
+        self.assertEqual(deltas, {
+            (date(2024, 3, 1), 1): [-1, Decimal('-80'), -1, Decimal('-80'), 0, 0],
+            (date(2024, 3, 3), 1): [-1, Decimal('-80'), 0, 0, -1, Decimal('-80')],
+            (date(2024, 3, 2), 2): [1, Decimal('100'), 1, Decimal('100'), 1, Decimal('100')],
+        })
+        self.assertEqual(self.cursor.execute.call_args[0][1], (3, 4))
+
+    def test_created_then_cancelled_cancels_out(self):
+        """Test a batch whose events net to zero writes nothing"""
+        window = dict(pickup_date=datetime(2024, 3, 1, 9), return_date=datetime(2024, 3, 1, 18))
+        created = event(amount=Decimal('50'), vehicle_id=3, **window)
+        cancelled = event(previous_vehicle_id=3, previous_amount=Decimal('50'),
+                          previous_pickup_date=window['pickup_date'], previous_return_date=window['return_date'])
+        ReportRepository.apply_rollup_deltas(self.cursor, ReportRepository.rollup_deltas(self.cursor, [created, cancelled]))
+        self.cursor.executemany.assert_not_called()
+
+    def test_rows_written_in_key_order(self):
+        """Test rollup rows are upserted sorted by (day, category)"""
+        deltas = {(date(2024, 3, 2), 1): [1, 10, 1, 10, 0, 0], (date(2024, 3, 1), 2): [1, 5, 0, 0, 1, 5]}
+        ReportRepository.apply_rollup_deltas(self.cursor, deltas)
+        sql, rows = self.cursor.executemany.call_args[0]
+        self.assertIn("ON DUPLICATE KEY UPDATE", sql)
+        self.assertEqual([row[:2] for row in rows], [(date(2024, 3, 1), 2), (date(2024, 3, 2), 1)])
+
+    def test_no_outbox_events_no_query(self):
+        """Test events that change no rollup skip the category lookup"""
+        self.assertEqual(ReportRepository.rollup_deltas(self.cursor, [event(amount=Decimal('10'))]), {})
+        self.cursor.execute.assert_not_called()
+
+class TestReportRepository(unittest.TestCase):
+    def setUp(self):
+        patcher = patch('repositories.report_repository.Database')
+        mock_db = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cursor = MagicMock()
+        mock_db.return_value.get_cursor.return_value.__enter__.return_value = self.cursor
+        categories = MagicMock()
+        categories.load.return_value = (1, [VehicleCategory(1, 'Small Car', 4, Decimal('50.00'))], [])
+        reference_data = ReferenceData()
+        reference_data.bind(categories)
+        reference_patcher = patch('reference_data.reference_data', reference_data)
+        reference_patcher.start()
+        self.addCleanup(reference_patcher.stop)
+        self.repo = ReportRepository()
+
+    def test_daily_report_reads_rollups(self):
+        """Test the daily report is a keyed lookup on the rollup table"""
+        self.cursor.fetchall.return_value = [{'category_id': 1, 'booking_count': 2}]
+
+        report = self.repo.get_daily_report(datetime(2024, 3, 1), 1)
+
+        sql, params = self.cursor.execute.call_args[0]
+        self.assertIn("FROM DailyCategoryRollups", sql)
+        self.assertNotIn("FROM Bookings", sql)
+        self.assertIn("AND r.category_id = %s", sql)
+        self.assertEqual(params, (date(2024, 3, 1), 1))
+        self.assertNotIn("VehicleCategories", sql)
+        self.assertEqual(report, [{'category_id': 1, 'category_name': 'Small Car', 'booking_count': 2}])
+
+    def test_daily_report_without_category(self):
+        """Test the category filter is only added when requested"""
+        self.cursor.fetchall.return_value = []
+        self.repo.get_daily_report(datetime(2024, 3, 1))
+        sql, params = self.cursor.execute.call_args[0]
+        self.assertNotIn("r.category_id = %s", sql)
+        self.assertEqual(params, (date(2024, 3, 1),))
+
+    def test_rebuild_range(self):
+        """Test a rebuild replaces only the requested days"""
+        self.cursor.rowcount = 6
+        self.cursor.fetchall.return_value = []
+        rebuilt = self.repo.rebuild_rollups(date(2024, 3, 1), date(2024, 3, 31), chunk_days=31)
+
+        statements = [call[0][0] for call in self.cursor.execute.call_args_list]
+        self.assertEqual(statements[0], "START TRANSACTION")
+        self.assertIn("FROM BookingOutbox", statements[1])
+        self.assertIn("FOR UPDATE", statements[1])
+        self.assertIn("DELETE FROM DailyCategoryRollups", statements[2])
+        self.assertIn("INSERT INTO DailyCategoryRollups", statements[3])
+        self.assertIn("b.is_deleted = FALSE", statements[3])
+        self.assertEqual(statements[4], "COMMIT")
+        self.assertEqual(self.cursor.execute.call_args_list[2][0][1], (date(2024, 3, 1), date(2024, 3, 31)))
+        # Return days in range come from pickups up to a rental length earlier
+        self.assertEqual(self.cursor.execute.call_args_list[3][0][1][:6],
+                         (date(2024, 3, 1), date(2024, 3, 31), date(2024, 2, 22), date(2024, 3, 31),
+                          date(2024, 3, 1), date(2024, 3, 31)))
+        self.assertEqual(rebuilt, 6)
+
+    def test_rebuild_commits_per_chunk(self):
+        """Test a long range is rebuilt in short transactions of chunk_days each"""
+        self.cursor.rowcount = 2
+        self.cursor.fetchall.return_value = []
+        rebuilt = self.repo.rebuild_rollups(date(2024, 3, 1), date(2024, 3, 20), chunk_days=7)
+
+        deletes = [call[0][1] for call in self.cursor.execute.call_args_list
+                   if call[0][0].startswith("DELETE FROM DailyCategoryRollups")]
+        self.assertEqual(deletes, [(date(2024, 3, 1), date(2024, 3, 7)), (date(2024, 3, 8), date(2024, 3, 14)),
+                                   (date(2024, 3, 15), date(2024, 3, 20))])
+        statements = [call[0][0] for call in self.cursor.execute.call_args_list]
+        self.assertEqual(statements.count("COMMIT"), 3)
+        self.assertEqual(sum("FOR UPDATE" in sql for sql in statements), 3)
+        self.assertEqual(rebuilt, 6)
+
+    def test_rebuild_everything_uses_stored_days(self):
+        """Test an unbounded rebuild covers the days bookings and rollups span"""
+        self.cursor.fetchone.return_value = {'first_day': date(2024, 3, 1), 'last_day': date(2024, 3, 2)}
+        self.cursor.fetchall.return_value = []
+        self.repo.rebuild_rollups()
+        self.assertEqual(self.cursor.execute.call_args_list[3][0][1], (date(2024, 3, 1), date(2024, 3, 2)))
+
+    def test_rebuild_empty_database(self):
+        """Test an unbounded rebuild with no bookings or rollups does nothing"""
+        self.cursor.fetchone.return_value = {'first_day': None, 'last_day': None}
+        self.assertEqual(self.repo.rebuild_rollups(), 0)
+        self.assertEqual(self.cursor.execute.call_count, 1)
+
+    def test_rebuild_leaves_out_pending_events(self):
+        """Test changes still waiting in the outbox are subtracted from the rebuilt days only"""
+        pending = event(vehicle_id=3, pickup_date=datetime(2024, 3, 31, 10), return_date=datetime(2024, 4, 2, 10),
+                        amount=Decimal('90.00'))
+        self.cursor.fetchall.side_effect = [[pending], [{'vehicle_id': 3, 'category_id': 2}]]
+        self.repo.rebuild_rollups(date(2024, 3, 1), date(2024, 3, 31), chunk_days=31)
+
+        rows = self.cursor.executemany.call_args[0][1]
+        self.assertEqual(rows, [(date(2024, 3, 31), 2, -1, Decimal('-90.00'), -1, Decimal('-90.00'), 0, 0)])
+
+    def test_rebuild_rolls_back_on_error(self):
+        """Test a failed rebuild leaves the existing rollups in place"""
+        self.cursor.execute.side_effect = [None, None, Exception("boom"), None]
+        with self.assertRaises(Exception):
+            self.repo.rebuild_rollups(date(2024, 3, 1), date(2024, 3, 2))
+        self.assertEqual(self.cursor.execute.call_args_list[-1][0][0], "ROLLBACK")
+
+if __name__ == '__main__':
+    unittest.main()
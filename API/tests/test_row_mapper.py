@@ -0,0 +1,64 @@
+import unittest
+from datetime import datetime
+from models import Booking, User, Vehicle, VehicleStatus
+from row_mapper import dict_mapper, object_mapper
+
+
+class TestRowMapper(unittest.TestCase):
+    def test_dict_mapper(self):
+        """Test tuple rows map to dicts keyed by column"""
+        mapper = dict_mapper(('vehicle_id', 'make'))
+        self.assertEqual(mapper((3, 'Ford')), {'vehicle_id': 3, 'make': 'Ford'})
+
+    def test_dict_mapper_renames(self):
+        """Test output keys can differ from the selected columns"""
+        mapper = dict_mapper(('vehicle_id', 'daily_rate'), ('id', 'rate'))
+        self.assertEqual(mapper((3, 40)), {'id': 3, 'rate': 40})
+        with self.assertRaises(ValueError):
+            dict_mapper(('vehicle_id',), ('id', 'rate'))
+
+    def test_mappers_are_cached_per_shape(self):
+        """Test a query shape compiles its mapper once"""
+        columns = ('user_id', 'email', 'first_name', 'last_name', 'password_hash', 'created_at')
+        self.assertIs(object_mapper(User, columns), object_mapper(User, columns))
+        self.assertIs(dict_mapper(columns), dict_mapper(columns))
+        self.assertIsNot(dict_mapper(columns), dict_mapper(columns[:2]))
+
+    def test_object_mapper(self):
+        """Test tuple rows map straight to models, running __post_init__"""
+        columns = ('vehicle_id', 'category_id', 'registration_number', 'model', 'make',
+                   'year', 'status', 'last_maintenance')
+        vehicle = object_mapper(Vehicle, columns)((7, 2, 'AB-123', 'Focus', 'Ford', 2022, 'maintenance', None))
+        self.assertEqual(vehicle.vehicle_id, 7)
+        self.assertIs(vehicle.status, VehicleStatus.MAINTENANCE)
+
+    def test_object_mapper_skips_unknown_columns(self):
+        """Test columns the model lacks are ignored and missing fields keep defaults"""
+        created = datetime(2024, 1, 1)
+        user = object_mapper(User, ('user_id', 'email', 'first_name', 'last_name', 'password_hash',
+                                    'is_deleted'))((1, 'a@b.com', 'A', 'B', 'hash', False))
+        self.assertEqual(user.email, 'a@b.com')
+        self.assertIsNotNone(user.created_at)
+        booking = object_mapper(Booking, ('booking_id', 'user_id', 'vehicle_id', 'pickup_date',
+                                          'return_date', 'total_cost', 'status', 'created_at'))(
+            (5, 1, 2, created, created, 50, 'active', created))
+        self.assertEqual(booking.pickup_date, created)
+
+
+class TestSlottedModels(unittest.TestCase):
+    def test_models_have_no_instance_dict(self):
+        """Test the models are slotted"""
+        user = User(email='a@b.com', first_name='A', last_name='B', password_hash='hash')
+        self.assertFalse(hasattr(user, '__dict__'))
+        with self.assertRaises(AttributeError):
+            user.nickname = 'ab'
+
+    def test_booking_parses_iso_strings(self):
+        """Test request bodies still parse into datetimes"""
+        booking = Booking(user_id=1, vehicle_id=2, pickup_date='2024-03-01T10:00:00',
+                          return_date='2024-03-02T10:00:00', total_cost=50.0)
+        self.assertEqual(booking.pickup_date, datetime(2024, 3, 1, 10))
+
+
+if __name__ == '__main__':
+    unittest.main()
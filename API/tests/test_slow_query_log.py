@@ -0,0 +1,172 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, Mock, patch
+from flask import Flask
+from metrics import InstrumentedCursor, MetricsRegistry
+from routes.admin_route import admin_api
+from slow_query_log import SlowQueryLog
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSlowQueryLog(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.log_file = os.path.join(self.dir.name, 'slow.log')
+        self.clock = FakeClock()
+        self.log = SlowQueryLog(threshold_ms=100, log_file=self.log_file, explain_interval=60,
+                                log_params=True, clock=self.clock)
+        self.log._ensure_started = Mock()
+        self.explain_conn = MagicMock()
+        self.explain_conn.cursor.return_value.fetchone.return_value = ('{"query_block": {"select_id": 1}}',)
+        self.release = Mock()
+        self.log.bind(lambda: self.explain_conn, self.release)
+        self.addCleanup(self._close_handlers)
+
+    def _close_handlers(self):
+        if self.log._logger is not None:
+            for handler in list(self.log._logger.handlers):
+                handler.close()
+                self.log._logger.removeHandler(handler)
+
+    def test_explain_runs_on_separate_connection(self):
+        """Test the plan comes from EXPLAIN FORMAT=JSON on the bound connection"""
+        sql = "SELECT * FROM Vehicles WHERE category_id = %s"
+        self.log.record(sql, "SELECT * FROM Vehicles WHERE category_id = ?", (2,), 0.25)
+        self.log.drain()
+
+        self.explain_conn.cursor.return_value.execute.assert_called_once_with(f"EXPLAIN FORMAT=JSON {sql}", (2,))
+        self.explain_conn.rollback.assert_called_once()
+        self.release.assert_called_once_with(self.explain_conn)
+        top = self.log.top()
+        self.assertEqual(top[0]['plan'], {'query_block': {'select_id': 1}})
+        self.assertEqual(top[0]['last_params'], (2,))
+
+    def test_rotating_file_entry(self):
+        """Test each slow execution is written as a JSON line"""
+        self.log.record("SELECT 1 FROM Users WHERE user_id = %s", "SELECT ? FROM Users WHERE user_id = ?",
+                        (7,), 0.3)
+        self.log.drain()
+        with open(self.log_file) as f:
+            entry = json.loads(f.readline())
+        self.assertEqual(entry['statement'], "SELECT ? FROM Users WHERE user_id = ?")
+        self.assertEqual(entry['params'], [7])
+        self.assertEqual(entry['duration_ms'], 300.0)
+        self.assertIn('query_block', entry['plan'])
+
+    def test_file_per_process(self):
+        """Test a {pid} log file name is written by this process alone"""
+        self.log.log_file = os.path.join(self.dir.name, 'slow.{pid}.log')
+        self.log.record("SELECT 1", "SELECT ?", (), 0.3, explain=False)
+        self.log.drain()
+        self.assertTrue(os.path.exists(os.path.join(self.dir.name, f'slow.{os.getpid()}.log')))
+
+    def test_explain_is_rate_limited_per_statement(self):
+        """Test a statement is explained at most once per interval"""
+        for _ in range(3):
+            self.log.record("SELECT 1 FROM Users", "SELECT ? FROM Users", None, 0.2)
+        self.log.drain()
+        self.assertEqual(self.explain_conn.cursor.return_value.execute.call_count, 1)
+        self.clock.now = 61
+        self.log.record("SELECT 1 FROM Users", "SELECT ? FROM Users", None, 0.2)
+        self.log.drain()
+        self.assertEqual(self.explain_conn.cursor.return_value.execute.call_count, 2)
+
+    def test_non_explainable_statements(self):
+        """Test CALL and transaction statements are recorded without a plan"""
+        self.log.record("CALL sp_create_booking(%s)", "CALL sp_create_booking(?)", (1,), 0.5)
+        self.log.drain()
+        self.explain_conn.cursor.assert_not_called()
+        self.assertIsNone(self.log.top()[0]['plan'])
+
+    def test_explain_failure_is_recorded(self):
+        """Test a failed EXPLAIN still releases the connection and keeps the error"""
+        self.explain_conn.cursor.return_value.execute.side_effect = RuntimeError("syntax")
+        self.log.record("SELECT 1", "SELECT ?", None, 0.2)
+        self.log.drain()
+        self.release.assert_called_once_with(self.explain_conn)
+        self.assertEqual(self.log.top()[0]['plan'], {'error': 'syntax'})
+
+    def test_top_offenders_by_total_time(self):
+        """Test statements are ranked by total time, not by single executions"""
+        self.log.record("SELECT a", "SELECT a", None, 0.9, explain=False)
+        for _ in range(5):
+            self.log.record("SELECT b", "SELECT b", None, 0.2, explain=False)
+        top = self.log.top()
+        self.assertEqual([entry['statement'] for entry in top], ['SELECT b', 'SELECT a'])
+        self.assertEqual(top[0]['count'], 5)
+        self.assertEqual(top[0]['avg_ms'], 200.0)
+        self.assertEqual(len(self.log.top(1)), 1)
+
+    def test_params_can_be_withheld(self):
+        """Test SLOW_QUERY_LOG_PARAMS=false keeps parameters out of the log but not out of EXPLAIN"""
+        self.log.log_params = False
+        self.log.record("SELECT 1 FROM Users WHERE email = %s", "SELECT ? FROM Users WHERE email = ?",
+                        ('a@b.com',), 0.2)
+        self.log.drain()
+        self.assertIsNone(self.log.top()[0]['last_params'])
+        self.assertEqual(self.explain_conn.cursor.return_value.execute.call_args[0][1], ('a@b.com',))
+        with open(self.log_file) as f:
+            self.assertIsNone(json.loads(f.readline())['params'])
+
+    def test_params_withheld_by_default(self):
+        """Test parameters are only logged when asked for"""
+        self.assertFalse(SlowQueryLog().log_params)
+
+    def test_full_queue_drops(self):
+        """Test the request thread never blocks on a full queue"""
+        log = SlowQueryLog(threshold_ms=100, queue_size=1)
+        log._ensure_started = Mock()
+        log.record("SELECT 1", "SELECT ?", None, 0.2)
+        log.record("SELECT 1", "SELECT ?", None, 0.2)
+        self.assertEqual(log.stats()['dropped'], 1)
+
+
+class TestCursorCapture(unittest.TestCase):
+    def test_only_slow_statements_are_recorded(self):
+        """Test the cursor hands statements over the threshold to the slow query log"""
+        slow_queries = Mock(threshold_ms=100)
+        inner = MagicMock()
+        cursor = InstrumentedCursor(inner, MetricsRegistry(), slow_queries)
+        with patch('metrics.time.perf_counter', side_effect=[0.0, 0.01, 1.0, 1.5]):
+            cursor.execute("SELECT 1 FROM Users WHERE user_id = %s", (1,))
+            cursor.execute("SELECT 2 FROM Users WHERE user_id = %s", (2,))
+        slow_queries.record.assert_called_once_with(
+            "SELECT 2 FROM Users WHERE user_id = %s", "SELECT ? FROM Users WHERE user_id = ?", (2,), 0.5, True)
+
+
+class TestSlowQueryEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.register_blueprint(admin_api, url_prefix='/api')
+        self.client = self.app.test_client()
+
+    @patch('routes.admin_route.slow_query_log')
+    def test_lists_top_offenders(self, mock_log):
+        """Test the endpoint returns stats and the top statements"""
+        mock_log.enabled = True
+        mock_log.stats.return_value = {'recorded': 1}
+        mock_log.top.return_value = [{'statement': 'SELECT ?', 'total_ms': 250.0}]
+        response = self.client.get('/api/admin/slow_queries?limit=5')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['data']['top'][0]['statement'], 'SELECT ?')
+        mock_log.top.assert_called_once_with(5)
+
+    @patch('routes.admin_route.slow_query_log')
+    def test_disabled(self, mock_log):
+        """Test a disabled log answers 404"""
+        mock_log.enabled = False
+        self.assertEqual(self.client.get('/api/admin/slow_queries').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import MagicMock
+from statement_cache import PreparedCursor, StatementCache
+
+class FakeConnection:
+    def __init__(self):
+        self.cursors = []
+
+    def cursor(self, prepared=False, dictionary=False):
+        cursor = MagicMock(name=f"cursor{len(self.cursors)}")
+        cursor.prepared = prepared
+        self.cursors.append(cursor)
+        return cursor
+
+class TestStatementCache(unittest.TestCase):
+    def setUp(self):
+        self.conn = FakeConnection()
+        self.cache = StatementCache(self.conn, max_size=2)
+
+    def test_same_sql_reuses_prepared_cursor(self):
+        """Test equal SQL text maps to the same cursor and canonical string"""
+        first_sql, first = self.cache.acquire("SELECT 1 FROM Users WHERE user_id = %s", True)
+        dynamic = "".join(["SELECT 1 FROM Users ", "WHERE user_id = %s"])
+        second_sql, second = self.cache.acquire(dynamic, True)
+
+        self.assertIs(first, second)
+        self.assertIs(first_sql, second_sql)
+        self.assertEqual(self.cache.stats(), {'size': 1, 'hits': 1, 'misses': 1, 'evictions': 0})
+
+    def test_lru_eviction_closes_cursor(self):
+        """Test the least recently used statement is evicted and closed"""
+        _, a = self.cache.acquire("A %s", True)
+        self.cache.acquire("B %s", True)
+        self.cache.acquire("A %s", True)
+        self.cache.acquire("C %s", True)
+
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+        self.assertFalse(a.close.called)
+        self.assertTrue(self.conn.cursors[1].close.called)
+        _, b_again = self.cache.acquire("B %s", True)
+        self.assertIsNot(b_again, self.conn.cursors[1])
+
+    def test_invalidate_drops_all_entries(self):
+        """Test invalidation after a connection reset"""
+        self.cache.acquire("A %s", True)
+        self.cache.invalidate(close=False)
+        self.assertEqual(len(self.cache), 0)
+
+class TestPreparedCursor(unittest.TestCase):
+    def setUp(self):
+        self.conn = FakeConnection()
+        self.cache = StatementCache(self.conn)
+        self.cursor = PreparedCursor(self.conn, self.cache)
+        self.plain = self.conn.cursors[0]
+
+    def test_statements_without_params_use_plain_cursor(self):
+        """Test transaction control statements bypass the cache"""
+        self.cursor.execute("START TRANSACTION")
+        self.plain.execute.assert_called_once_with("START TRANSACTION", None)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_parameterised_statements_use_cache(self):
+        """Test parameterised statements execute on the cached prepared cursor"""
+        self.cursor.execute("SELECT 1 FROM Vehicles WHERE vehicle_id = %s", (1,))
+        prepared = self.conn.cursors[1]
+        prepared.lastrowid = 9
+        prepared.fetchone.return_value = {'1': 1}
+
+        self.assertTrue(prepared.prepared)
+        self.assertEqual(self.cursor.fetchone(), {'1': 1})
+        self.assertEqual(self.cursor.lastrowid, 9)
+
+    def test_close_keeps_prepared_cursors(self):
+        """Test closing the facade leaves cached statements open"""
+        self.cursor.execute("SELECT 1 FROM Vehicles WHERE vehicle_id = %s", (1,))
+        self.cursor.close()
+        self.assertTrue(self.plain.close.called)
+        self.assertFalse(self.conn.cursors[1].close.called)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,235 @@
+import os
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+from models import Booking, BookingCommitStatus, User
+from repositories.booking_repository import BookingRejected, BookingRepository
+from repositories.user_repository import UserRepository
+from user_cache import MISS, SharedUserCache, UserCache
+
+USER_ROW = {'user_id': 1, 'email': 'jane@example.com', 'first_name': 'Jane', 'last_name': 'Doe',
+            'password_hash': 'hash', 'created_at': None}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def make_user(user_id=1):
+    return User(email=f"user{user_id}@example.com", first_name='Jane', last_name='Doe',
+                password_hash='hash', user_id=user_id)
+
+class CacheBehaviour:
+    # Run against both the in-process and the shared memory cache
+    def make_cache(self, **kwargs):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_hit_after_put(self):
+        """Test a cached user is returned without a lookup"""
+        cache = self.make_cache()
+        self.assertIs(cache.get(1), MISS)
+        cache.put(1, make_user())
+        self.assertEqual(cache.get(1).email, 'user1@example.com')
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_missing_ids_use_negative_ttl(self):
+        """Test a missing id is cached as None for the shorter negative TTL"""
+        cache = self.make_cache(ttl_seconds=60, negative_ttl_seconds=5)
+        cache.put(2, None)
+        cache.put(1, make_user())
+        self.assertIsNone(cache.get(2))
+        self.clock.now += 6
+        self.assertIs(cache.get(2), MISS)
+        self.assertIsNotNone(cache.get(1))
+        self.clock.now += 60
+        self.assertIs(cache.get(1), MISS)
+        self.assertEqual(cache.stats()['expirations'], 2)
+
+    def test_invalidate_rejects_racing_put(self):
+        """Test a result read before an invalidation is not cached afterwards"""
+        cache = self.make_cache()
+        version = cache.version
+        cache.invalidate(1)
+        self.assertFalse(cache.put(1, make_user(), version))
+        self.assertIs(cache.get(1), MISS)
+
+    def test_invalidate_drops_entry(self):
+        """Test invalidate removes the cached user"""
+        cache = self.make_cache()
+        cache.put(1, make_user())
+        self.assertTrue(cache.invalidate(1))
+        self.assertIs(cache.get(1), MISS)
+
+    def test_disabled(self):
+        """Test a zero size or TTL disables caching"""
+        cache = self.make_cache(ttl_seconds=0)
+        self.assertFalse(cache.put(1, make_user()))
+        self.assertIs(cache.get(1), MISS)
+
+class TestUserCache(CacheBehaviour, unittest.TestCase):
+    def make_cache(self, **kwargs):
+        return UserCache(clock=self.clock, **kwargs)
+
+    def test_least_recently_used_is_evicted(self):
+        """Test the cache stays bounded by dropping the least recently used user"""
+        cache = self.make_cache(max_entries=2)
+        cache.put(1, make_user(1))
+        cache.put(2, make_user(2))
+        cache.get(1)
+        cache.put(3, make_user(3))
+        self.assertIs(cache.get(2), MISS)
+        self.assertIsNotNone(cache.get(1))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+class TestSharedUserCache(CacheBehaviour, unittest.TestCase):
+    def make_cache(self, **kwargs):
+        return SharedUserCache(clock=self.clock, **kwargs)
+
+    def test_least_recently_used_slot_is_replaced(self):
+        """Test a full bucket replaces its least recently used slot"""
+        cache = self.make_cache(max_entries=SharedUserCache.WAYS)
+        for user_id in range(SharedUserCache.WAYS):
+            self.clock.now += 1
+            cache.put(user_id, make_user(user_id))
+        self.clock.now += 1
+        cache.get(0)
+        cache.put(100, make_user(100))
+        self.assertIs(cache.get(1), MISS)
+        self.assertIsNotNone(cache.get(0))
+        self.assertIsNotNone(cache.get(100))
+        self.assertEqual(cache.stats()['entries'], SharedUserCache.WAYS)
+
+    def test_oversized_users_are_not_cached(self):
+        """Test a user that does not fit in a slot is skipped"""
+        cache = self.make_cache(slot_bytes=16)
+        self.assertFalse(cache.put(1, make_user()))
+        self.assertEqual(cache.stats()['oversized'], 1)
+
+    def test_lock_held_by_dead_worker(self):
+        """Test a lock that is never released turns the cache off instead of blocking"""
+        cache = self.make_cache(lock_timeout_seconds=0.01)
+        cache.put(1, make_user())
+        cache._lock.acquire()
+        self.assertIs(cache.get(1), MISS)
+        self.assertFalse(cache.put(2, make_user(2)))
+        self.assertFalse(cache.invalidate(1))
+        stats = cache.stats()
+        self.assertEqual(stats['lock_timeouts'], 1)
+        self.assertFalse(stats['enabled'])
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "needs fork")
+    def test_entries_are_shared_with_forked_workers(self):
+        """Test a user cached by a child process is a hit in the parent"""
+        cache = SharedUserCache()
+        pid = os.fork()
+        if pid == 0:
+            cache.put(7, make_user(7))
+            cache.invalidate(8)
+            os._exit(0)
+        os.waitpid(pid, 0)
+        self.assertEqual(cache.get(7).user_id, 7)
+        self.assertEqual(cache.version, 1)
+
+class TestCachedUserLookups(unittest.TestCase):
+    def setUp(self):
+        patcher = patch('repositories.user_repository.Database')
+        self.mock_db = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cursor = MagicMock()
+        self.mock_db.return_value.get_cursor.return_value.__enter__.return_value = self.cursor
+        self.mock_db.return_value.served_by_replica.return_value = False
+        cache_patcher = patch('repositories.user_repository.user_cache', UserCache())
+        self.cache = cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+        self.repo = UserRepository()
+
+    def test_second_lookup_is_cached(self):
+        """Test GET /users/<id> reads MySQL once for repeated lookups"""
+        self.cursor.fetchone.return_value = USER_ROW
+        self.assertEqual(self.repo.get_by_id(1).email, 'jane@example.com')
+        self.assertEqual(self.repo.get_by_id(1).email, 'jane@example.com')
+        self.assertEqual(self.cursor.execute.call_count, 1)
+
+    def test_missing_user_is_cached(self):
+        """Test a missing id is answered from the cache the second time"""
+        self.cursor.fetchone.return_value = None
+        self.assertIsNone(self.repo.get_by_id(9))
+        self.assertIsNone(self.repo.get_by_id(9))
+        self.assertEqual(self.cursor.execute.call_count, 1)
+
+    def test_replica_reads_are_not_cached(self):
+        """Test a row read from a possibly lagging replica is not put back in the cache"""
+        self.mock_db.return_value.served_by_replica.return_value = True
+        self.cursor.fetchone.return_value = USER_ROW
+        self.repo.get_by_id(1)
+        self.assertIs(self.cache.get(1), MISS)
+
+    def test_writes_invalidate(self):
+        """Test update, delete and create evict the cached id"""
+        self.cursor.rowcount = 1
+        for write in (lambda: self.repo.update(make_user(1)), lambda: self.repo.delete(1)):
+            self.cache.put(1, make_user(1))
+            write()
+            self.assertIs(self.cache.get(1), MISS)
+        self.cache.put(5, None)
+        self.cursor.lastrowid = 5
+        self.repo.create(make_user(None))
+        self.assertIs(self.cache.get(5), MISS)
+
+class TestBookingUserCheck(unittest.TestCase):
+    def setUp(self):
+        patcher = patch('repositories.booking_repository.Database')
+        mock_db = patcher.start()
+        self.addCleanup(patcher.stop)
+        availability_patcher = patch('repositories.booking_repository.availability')
+        availability_patcher.start()
+        self.addCleanup(availability_patcher.stop)
+        self.cursor = MagicMock()
+        mock_db.return_value.get_cursor.return_value.__enter__.return_value = self.cursor
+        reference_patcher = patch('repositories.booking_repository.reference_data')
+        reference_patcher.start().has_vehicle.return_value = True
+        self.addCleanup(reference_patcher.stop)
+        cache_patcher = patch('repositories.booking_repository.user_cache', UserCache())
+        self.cache = cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+        self.repo = BookingRepository(commit_path='statements')
+        pickup = datetime.now() + timedelta(days=1)
+        self.booking = Booking(user_id=1, vehicle_id=3, pickup_date=pickup.isoformat(),
+                               return_date=(pickup + timedelta(days=1)).isoformat(), total_cost=100.0)
+
+    def users_queries(self):
+        return [call for call in self.cursor.execute.call_args_list if "FROM Users" in call[0][0]]
+
+    def test_cached_user_skips_the_query(self):
+        """Test a booking for a cached user does not read Users"""
+        self.cache.put(1, make_user(1))
+        self.cursor.fetchone.side_effect = [{'1': 1}, None]
+        self.cursor.lastrowid = 11
+        self.assertEqual(self.repo.create(self.booking), 11)
+        self.assertEqual(self.users_queries(), [])
+
+    def test_uncached_user_read_on_the_primary(self):
+        """Test a cache miss reads Users in the booking transaction and caches a missing id"""
+        self.cursor.fetchone.side_effect = [{'1': 1}, None]
+        with self.assertRaises(BookingRejected) as raised:
+            self.repo.create(self.booking)
+        self.assertIs(raised.exception.status, BookingCommitStatus.USER_NOT_FOUND)
+        self.assertIn("is_deleted = FALSE", self.users_queries()[0][0][0])
+        self.assertIsNone(self.cache.get(1))
+
+    def test_cached_missing_user_is_rejected(self):
+        """Test a cached missing id is rejected without a query"""
+        self.cache.put(1, None)
+        self.cursor.fetchone.side_effect = [{'1': 1}]
+        with self.assertRaises(BookingRejected):
+            self.repo.create(self.booking)
+        self.assertEqual(self.users_queries(), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,325 @@
+import logging
+import mmap
+import multiprocessing
+import os
+import pickle
+import struct
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable, Dict, Hashable, Optional, Tuple
+from models import User
+
+# Returned by get() when the id is not cached; None means "cached as missing"
+MISS = object()
+
+
+class UserCache:
+    '''
+    Bounded LRU cache of users by id behind UserRepository.get_by_id. Ids with no
+    (undeleted) user are cached as None for the shorter negative_ttl_seconds. Writes
+    invalidate the id after they commit, and like the availability cache every
+    invalidation bumps the version so put() drops a result read before a concurrent
+    write. Entries are private to the process, so a write made by another process is only
+    seen once the entry expires; booking validation therefore reads Users itself.
+    '''
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 60.0,
+                 negative_ttl_seconds: float = 5.0, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Optional[User]]]" = OrderedDict()
+        self._lock = Lock()
+        self._version = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @contextmanager
+    def _locked(self):
+        # Yields whether the lock was taken; see SharedUserCache
+        with self._lock:
+            yield True
+
+    def get(self, user_id: int):
+        with self._locked():
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return MISS
+            expires_at, user = entry
+            if expires_at <= self._clock():
+                del self._entries[user_id]
+                self.expirations += 1
+                self.misses += 1
+                return MISS
+            self._entries.move_to_end(user_id)
+            self._count_hit(user)
+            return user
+
+    def put(self, user_id: int, user: Optional[User], version: Optional[int] = None) -> bool:
+        ttl = self._ttl_for(user)
+        if not self.enabled or ttl <= 0:
+            return False
+        with self._locked():
+            if version is not None and version != self._version:
+                return False
+            self._entries[user_id] = (self._clock() + ttl, user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, user_id: int) -> bool:
+        with self._locked():
+            self._version += 1
+            if self._entries.pop(user_id, None) is None:
+                return False
+            self.invalidations += 1
+            return True
+
+    def clear(self) -> None:
+        with self._locked():
+            self._version += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._locked():
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'shared': False,
+                'entries': self._size(),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'negative_ttl_seconds': self.negative_ttl_seconds,
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+                'hit_ratio': round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+    def _ttl_for(self, user: Optional[User]) -> float:
+        return self.ttl_seconds if user is not None else self.negative_ttl_seconds
+
+    def _count_hit(self, user: Optional[User]) -> None:
+        if user is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+
+    def _size(self) -> int:
+        return len(self._entries)
+
+
+class SharedUserCache(UserCache):
+    '''
+    The same cache in an anonymous shared memory mapping, so the prefork workers of one
+    server share a single warm copy and every worker sees another's invalidations. It has
+    to be created before the workers are forked (gunicorn.conf.py imports this module in
+    the master). Entries live in buckets of WAYS fixed-size slots chosen by user_id; the
+    least recently used slot of a full bucket is replaced. Users are pickled into the slot
+    and are not cached when they do not fit in slot_bytes. Hit and miss counters are per
+    process.
+
+    A worker killed while holding the process-shared lock (timeout SIGABRT, OOM kill)
+    never releases it. The lock is only held for a few slot reads and writes, so a wait
+    longer than lock_timeout_seconds is taken to mean that happened: the process stops
+    using the cache and every lookup falls through to MySQL. Entries another process
+    wrote before that still expire within the TTL.
+    '''
+
+    WAYS = 8
+    # user_id, expires_at, last_used, state, payload length
+    SLOT = struct.Struct('<qddBH')
+    VERSION = struct.Struct('<Q')
+    EMPTY, PRESENT, ABSENT = 0, 1, 2
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 60.0,
+                 negative_ttl_seconds: float = 5.0, slot_bytes: int = 512,
+                 lock_timeout_seconds: float = 0.5, clock: Callable[[], float] = time.monotonic):
+        super().__init__(max_entries, ttl_seconds, negative_ttl_seconds, clock)
+        self.slot_bytes = slot_bytes
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self.oversized = 0
+        self.lock_timeouts = 0
+        self._abandoned = False
+        self.logger = logging.getLogger(__name__)
+        self._buckets = max(1, -(-max_entries // self.WAYS))
+        self._slot_size = self.SLOT.size + slot_bytes
+        # CLOCK_MONOTONIC is system wide, so expiry times compare across processes
+        self._memory = mmap.mmap(-1, self.VERSION.size + self._buckets * self.WAYS * self._slot_size)
+        self._lock = multiprocessing.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return super().enabled and not self._abandoned
+
+    @property
+    def version(self) -> int:
+        return self.VERSION.unpack_from(self._memory, 0)[0]
+
+    @contextmanager
+    def _locked(self):
+        if self._abandoned:
+            yield False
+            return
+        if not self._lock.acquire(timeout=self.lock_timeout_seconds):
+            self.lock_timeouts += 1
+            self._abandoned = True
+            self.logger.error(
+                "Shared user cache lock not released within %ss; reading users from MySQL in this process",
+                self.lock_timeout_seconds)
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            self._lock.release()
+
+    def get(self, user_id: int):
+        now = self._clock()
+        with self._locked() as locked:
+            if not locked:
+                self.misses += 1
+                return MISS
+            offset = self._find(user_id)
+            if offset is None:
+                self.misses += 1
+                return MISS
+            _, expires_at, _, state, length = self.SLOT.unpack_from(self._memory, offset)
+            if expires_at <= now:
+                self._write_slot(offset, user_id, 0.0, 0.0, self.EMPTY, 0)
+                self.expirations += 1
+                self.misses += 1
+                return MISS
+            self._write_slot(offset, user_id, expires_at, now, state, length)
+            if state == self.ABSENT:
+                self.negative_hits += 1
+                return None
+            self.hits += 1
+            start = offset + self.SLOT.size
+            payload = self._memory[start:start + length]
+        return pickle.loads(payload)
+
+    def put(self, user_id: int, user: Optional[User], version: Optional[int] = None) -> bool:
+        ttl = self._ttl_for(user)
+        if not self.enabled or ttl <= 0:
+            return False
+        payload = pickle.dumps(user, pickle.HIGHEST_PROTOCOL) if user is not None else b''
+        if len(payload) > self.slot_bytes:
+            self.oversized += 1
+            return False
+        now = self._clock()
+        with self._locked() as locked:
+            if not locked:
+                return False
+            if version is not None and version != self.version:
+                return False
+            offset = self._find(user_id)
+            if offset is None:
+                offset = self._victim(user_id, now)
+            start = offset + self.SLOT.size
+            self._memory[start:start + len(payload)] = payload
+            self._write_slot(offset, user_id, now + ttl, now,
+                             self.PRESENT if user is not None else self.ABSENT, len(payload))
+            return True
+
+    def invalidate(self, user_id: int) -> bool:
+        with self._locked() as locked:
+            if not locked:
+                return False
+            self._bump_version()
+            offset = self._find(user_id)
+            if offset is None:
+                return False
+            self._write_slot(offset, user_id, 0.0, 0.0, self.EMPTY, 0)
+            self.invalidations += 1
+            return True
+
+    def clear(self) -> None:
+        with self._locked() as locked:
+            if not locked:
+                return
+            self._bump_version()
+            for offset in self._slots(range(self._buckets)):
+                self._write_slot(offset, 0, 0.0, 0.0, self.EMPTY, 0)
+
+    def stats(self) -> Dict:
+        stats = super().stats()
+        stats.update({'shared': True, 'slot_bytes': self.slot_bytes, 'oversized': self.oversized,
+                      'lock_timeouts': self.lock_timeouts})
+        return stats
+
+    def _slots(self, buckets):
+        for bucket in buckets:
+            first = self.VERSION.size + bucket * self.WAYS * self._slot_size
+            yield from range(first, first + self.WAYS * self._slot_size, self._slot_size)
+
+    def _find(self, user_id: int) -> Optional[int]:
+        for offset in self._slots((user_id % self._buckets,)):
+            key, _, _, state, _ = self.SLOT.unpack_from(self._memory, offset)
+            if state != self.EMPTY and key == user_id:
+                return offset
+        return None
+
+    def _victim(self, user_id: int, now: float) -> int:
+        # A free or expired slot of the bucket, otherwise its least recently used one
+        victim = None
+        oldest = None
+        for offset in self._slots((user_id % self._buckets,)):
+            _, expires_at, last_used, state, _ = self.SLOT.unpack_from(self._memory, offset)
+            if state == self.EMPTY or expires_at <= now:
+                return offset
+            if oldest is None or last_used < oldest:
+                victim, oldest = offset, last_used
+        self.evictions += 1
+        return victim
+
+    def _write_slot(self, offset: int, user_id: int, expires_at: float, last_used: float,
+                    state: int, length: int) -> None:
+        self.SLOT.pack_into(self._memory, offset, user_id, expires_at, last_used, state, length)
+
+    def _bump_version(self) -> None:
+        self.VERSION.pack_into(self._memory, 0, self.version + 1)
+
+    def _size(self) -> int:
+        now = self._clock()
+        entries = 0
+        for offset in self._slots(range(self._buckets)):
+            _, expires_at, _, state, _ = self.SLOT.unpack_from(self._memory, offset)
+            if state != self.EMPTY and expires_at > now:
+                entries += 1
+        return entries
+
+
+def _from_env() -> UserCache:
+    options = dict(max_entries=int(os.getenv('USER_CACHE_SIZE', 10000)),
+                   ttl_seconds=float(os.getenv('USER_CACHE_TTL', 60)),
+                   negative_ttl_seconds=float(os.getenv('USER_CACHE_NEGATIVE_TTL', 5)))
+    if os.getenv('USER_CACHE_SHARED', 'false').lower() == 'true':
+        return SharedUserCache(slot_bytes=int(os.getenv('USER_CACHE_SLOT_BYTES', 512)),
+                               lock_timeout_seconds=float(os.getenv('USER_CACHE_LOCK_TIMEOUT', 0.5)), **options)
+    return UserCache(**options)
+
+
+# One cache per process, or one per server with USER_CACHE_SHARED=true
+user_cache = _from_env()
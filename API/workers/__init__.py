@@ -0,0 +1,3 @@
+from .outbox_worker import OutboxWorkerPool
+
+__all__ = ['OutboxWorkerPool']
@@ -0,0 +1,94 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from repositories.outbox_repository import OutboxRepository
+
+
+class OutboxWorkerPool:
+    '''
+    Background threads that drain BookingOutbox into Invoices and EmailLogs. Worker i
+    handles bookings with booking_id % workers == i, polling every poll_interval seconds
+    while idle and looping immediately while there is a backlog. An event that keeps
+    failing is dead-lettered after max_attempts and no longer holds up its partition.
+    '''
+
+    def __init__(self, workers: int = 2, batch_size: int = 200, poll_interval: float = 0.5,
+                 retention_hours: int = 72, max_attempts: int = 5,
+                 repository: Optional[OutboxRepository] = None):
+        self.logger = logging.getLogger(__name__)
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retention_hours = retention_hours
+        self.max_attempts = max_attempts
+        self.repository = repository or OutboxRepository()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._processed = 0
+        self._batches = 0
+        self._errors = 0
+        # (monotonic time, events) of recent batches for the throughput rate
+        self._recent: Deque[Tuple[float, int]] = deque(maxlen=1000)
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for partition in range(self.workers):
+            thread = threading.Thread(target=self._run, args=(partition,),
+                                      name=f"outbox-worker-{partition}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.logger.info("Started %d outbox workers", self.workers)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def drain_once(self, partition: int = 0) -> int:
+        processed = self.repository.process_batch(partition, self.workers, self.batch_size, self.max_attempts)
+        if processed:
+            with self._lock:
+                self._processed += processed
+                self._batches += 1
+                self._recent.append((time.monotonic(), processed))
+        return processed
+
+    def stats(self, window_seconds: float = 60.0) -> Dict:
+        now = time.monotonic()
+        with self._lock:
+            recent = sum(count for at, count in self._recent if now - at <= window_seconds)
+            stats = {
+                'workers': len(self._threads),
+                'processed_total': self._processed,
+                'batches_total': self._batches,
+                'errors_total': self._errors,
+                'drain_rate_per_second': round(recent / window_seconds, 3),
+            }
+        try:
+            stats.update({f"lag_{key}": value for key, value in self.repository.get_lag().items()})
+        except Exception as e:
+            self.logger.warning("Could not read outbox lag: %s", e)
+        return stats
+
+    def _run(self, partition: int) -> None:
+        purge_every = max(1, int(3600 / self.poll_interval)) if self.poll_interval else 3600
+        loops = 0
+        while not self._stop.is_set():
+            try:
+                processed = self.drain_once(partition)
+                if partition == 0 and loops % purge_every == 0:
+                    self.repository.purge_processed(self.retention_hours)
+            except Exception as e:
+                processed = 0
+                with self._lock:
+                    self._errors += 1
+                self.logger.error("Outbox worker %s failed: %s", partition, e)
+            loops += 1
+            if processed < self.batch_size:
+                self._stop.wait(self.poll_interval)